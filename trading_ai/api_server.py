@@ -38,6 +38,8 @@ except ImportError:
     print("ERROR: Instalar dependencias: pip install fastapi uvicorn")
     sys.exit(1)
 
+from debug_journal import read_tail as read_debug_tail
+from trade_store import get_trade_store
 from mt5_paths import (
     BASE as MT5_EXCHANGE,
     SIGNAL_FILE,
@@ -58,8 +60,9 @@ API_HOST = os.environ.get("API_HOST", "0.0.0.0")
 BOT_CONFIG_FILE   = BOT_DIR / "bot_config.json"
 MAINTENANCE_FILE  = BOT_DIR / "maintenance.json"
 HISTORY_FILE      = BOT_DIR / "learning_data" / "trade_history.json"
+HISTORY_DB        = BOT_DIR / "learning_data" / "trade_history.db"
 STATS_FILE        = BOT_DIR / "learning_data" / "setup_stats.json"
-DEBUG_FILE        = BOT_DIR / "logs" / "debug.json"
+DEBUG_DIR         = BOT_DIR / "logs"
 ML_STATE_FILE     = BOT_DIR / "learning_data" / "ml_state.json"
 
 # ==============================
@@ -132,6 +135,10 @@ def get_today_str() -> str:
     return datetime.now().strftime("%Y-%m-%d")
 
 
+def history_store():
+    return get_trade_store(HISTORY_DB, HISTORY_FILE)
+
+
 # ==============================
 # MODELOS PYDANTIC
 # ==============================
@@ -188,16 +195,15 @@ def get_status():
     bot_status = read_json(Path(BOT_STATUS_FILE)) or {}
     active_trades = 0
 
-    # Intentar leer trades activos del debug
-    debug = read_json(DEBUG_FILE) or []
-    if debug:
-        last = debug[-1] if isinstance(debug, list) else {}
-        msg  = str(last.get("message", ""))
+    # Intentar leer trades activos del debug (ultimo "Ciclo #N | Activos: X")
+    for entry in reversed(read_debug_tail(50, DEBUG_DIR)):
+        msg = str(entry.get("message", ""))
         if "Activos:" in msg:
             try:
                 active_trades = int(msg.split("Activos:")[1].strip().split()[0])
             except Exception:
                 pass
+            break
 
     return {
         "running":       running,
@@ -317,27 +323,25 @@ def update_config(update: BotConfigUpdate):
 # ==============================
 @app.get("/api/stats", dependencies=[Depends(verify_key)])
 def get_stats():
-    history: List[Dict] = read_json(HISTORY_FILE) or []
+    store       = history_store()
     setup_stats = read_json(STATS_FILE) or {}
     ml_state    = read_json(ML_STATE_FILE) or {}
 
-    total  = len(history)
-    wins   = sum(1 for t in history if t.get("result") == "WIN")
-    losses = sum(1 for t in history if t.get("result") == "LOSS")
-    total_pips = sum(float(t.get("pips", 0)) for t in history)
+    overall    = store.summary()
+    total      = overall["total"]
+    wins       = overall["wins"]
+    losses     = overall["losses"]
+    total_pips = overall["pips"]
     win_rate   = (wins / total * 100) if total > 0 else 0.0
 
-    today = get_today_str()
-    today_trades = [t for t in history if str(t.get("timestamp", "")).startswith(today)]
-    today_wins   = sum(1 for t in today_trades if t.get("result") == "WIN")
-    today_pips   = sum(float(t.get("pips", 0)) for t in today_trades)
+    from datetime import timedelta
+    today    = get_today_str()
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
+    today_summary = store.summary(today, tomorrow)
 
     # Stats por semana (ultimos 7 dias)
-    from datetime import timedelta
     week_start = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-    week_trades = [t for t in history if str(t.get("timestamp", "")) >= week_start]
-    week_wins   = sum(1 for t in week_trades if t.get("result") == "WIN")
-    week_pips   = sum(float(t.get("pips", 0)) for t in week_trades)
+    week_summary = store.summary(week_start)
 
     return {
         "total_trades": total,
@@ -346,14 +350,14 @@ def get_stats():
         "win_rate":     round(win_rate, 1),
         "total_pips":   round(total_pips, 1),
         "today": {
-            "trades": len(today_trades),
-            "wins":   today_wins,
-            "pips":   round(today_pips, 1),
+            "trades": today_summary["total"],
+            "wins":   today_summary["wins"],
+            "pips":   round(today_summary["pips"], 1),
         },
         "week": {
-            "trades": len(week_trades),
-            "wins":   week_wins,
-            "pips":   round(week_pips, 1),
+            "trades": week_summary["total"],
+            "wins":   week_summary["wins"],
+            "pips":   round(week_summary["pips"], 1),
         },
         "setup_stats": setup_stats,
         "ml_state":    ml_state,
@@ -365,19 +369,16 @@ def get_history(
     limit:  int = Query(default=100, ge=1, le=500),
     offset: int = Query(default=0, ge=0),
 ):
-    history: List[Dict] = read_json(HISTORY_FILE) or []
-    history = list(reversed(history))   # mas reciente primero
-    total = len(history)
-    page  = history[offset : offset + limit]
+    store = history_store()
+    total = store.count()
+    page  = store.page(limit, offset)   # mas reciente primero
     return {"trades": page, "total": total, "limit": limit, "offset": offset}
 
 
 @app.get("/api/debug", dependencies=[Depends(verify_key)])
 def get_debug(limit: int = Query(default=100, ge=1, le=500)):
-    logs = read_json(DEBUG_FILE) or []
-    if isinstance(logs, list):
-        logs = list(reversed(logs))
-    return logs[:limit]
+    logs = read_debug_tail(limit, DEBUG_DIR)
+    return list(reversed(logs))
 
 
 # ==============================
@@ -0,0 +1,390 @@
+# backtest_cache.py
+
+"""
+Cache columnar en disco para los datos historicos del backtesting
+
+La primera carga de un CSV/JSON recorre el archivo una vez (en bloques,
+con los mismos indicadores que load_historical_data) y guarda cada campo
+como un archivo binario plano:
+
+    learning_data/backtest_cache/<clave>/     (junto a este modulo)
+        meta.json          origen, tamano, mtime, huella, filas, dtypes
+        timestamp.bin      S32
+        open.bin ... atr   float64 (NaN = campo ausente en la vela)
+        txt_*.bin          S32: analysis trend/volatility, symbol, timeframe
+                           (vacio = campo ausente)
+
+Las cargas siguientes abren esos archivos con np.memmap: sin parsear nada
+y en milisegundos aunque el historial ocupe varios GB. Varios procesos
+(p.ej. los workers de backtest_sweep) comparten las mismas paginas a
+traves de la cache del sistema operativo.
+
+Validez: la entrada se reutiliza si coinciden tamano y mtime del archivo
+original; si solo cambia el mtime se compara la huella de contenido
+(blake2b de bloques del principio, medio y final) antes de reconstruir.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from collections.abc import Sequence
+
+import numpy as np
+
+_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, _DIR)
+
+# Junto al modulo (no relativa al directorio de trabajo del proceso)
+CACHE_DIR = os.path.join(_DIR, "learning_data", "backtest_cache")
+CACHE_VERSION = 2
+
+# Velas por bloque al construir la cache (acota la memoria)
+BUILD_CHUNK = 100000
+
+# Bytes leidos en cada muestra de la huella de contenido
+FINGERPRINT_BLOCK = 1 << 20
+
+# ==============================
+# COLUMNAS
+# ==============================
+BAR_FIELDS = ("open", "high", "low", "close", "bid", "ask", "spread", "volume")
+INDICATOR_FIELDS = (
+    ("rsi",),
+    ("ema", "fast"), ("ema", "slow"), ("ema", "long"),
+    ("macd", "main"), ("macd", "signal"), ("macd", "histogram"),
+    ("bollinger", "upper"), ("bollinger", "middle"), ("bollinger", "lower"),
+    ("atr",),
+)
+# Campos de texto que leen las decisiones (context_analyzer, evaluadores)
+TEXT_FIELDS = (
+    ("analysis", "trend"), ("analysis", "volatility"),
+    ("symbol",), ("timeframe",),
+)
+# Campos que usa la simulacion de trades (el resto solo lo usan las decisiones)
+REPLAY_FIELDS = ("high", "low", "bid", "ask")
+
+TIMESTAMP_DTYPE = "S32"
+TEXT_DTYPE = "S32"
+
+
+def indicator_column(key):
+    return "ind_" + "_".join(key)
+
+
+def text_column(key):
+    return "txt_" + "_".join(key)
+
+
+def column_dtypes():
+    """{columna: dtype} del formato columnar"""
+    dtypes = {"timestamp": np.dtype(TIMESTAMP_DTYPE)}
+    dtypes.update({name: np.dtype("f8") for name in BAR_FIELDS})
+    dtypes.update({indicator_column(key): np.dtype("f8") for key in INDICATOR_FIELDS})
+    dtypes.update({text_column(key): np.dtype(TEXT_DTYPE) for key in TEXT_FIELDS})
+    return dtypes
+
+
+def _number(value):
+    """Valor numerico o NaN (NaN = el campo no venia en la vela)"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _text(value):
+    """Texto -> bytes de la columna (b"" = el campo no venia en la vela)"""
+    if value is None:
+        return b""
+    encoded = str(value).encode()
+    if len(encoded) > np.dtype(TEXT_DTYPE).itemsize:
+        raise ValueError(f"Texto demasiado largo para la cache columnar: {value!r}")
+    return encoded
+
+
+def _set_field(candle, key, value):
+    if len(key) == 1:
+        candle[key[0]] = value
+    else:
+        candle.setdefault(key[0], {})[key[1]] = value
+
+
+def columns_from_candles(candles):
+    """Lista de velas del bot -> {columna: array}"""
+    n = len(candles)
+    columns = {
+        "timestamp": np.array([str(c.get("timestamp") or "").encode() for c in candles],
+                              dtype=TIMESTAMP_DTYPE)
+    }
+    for name in BAR_FIELDS:
+        columns[name] = np.fromiter((_number(c.get(name)) for c in candles), dtype=np.float64, count=n)
+
+    for key in INDICATOR_FIELDS:
+        if len(key) == 1:
+            values = (_number(c.get("indicators", {}).get(key[0])) for c in candles)
+        else:
+            values = (_number(c.get("indicators", {}).get(key[0], {}).get(key[1])) for c in candles)
+        columns[indicator_column(key)] = np.fromiter(values, dtype=np.float64, count=n)
+
+    for key in TEXT_FIELDS:
+        if len(key) == 1:
+            values = [_text(c.get(key[0])) for c in candles]
+        else:
+            values = [_text((c.get(key[0]) or {}).get(key[1])) for c in candles]
+        columns[text_column(key)] = np.array(values, dtype=TEXT_DTYPE)
+
+    return columns
+
+
+def candles_from_columns(columns, start=0, stop=None):
+    """Velas completas (con indicadores) del tramo [start, stop)"""
+    stop = len(columns) if stop is None else stop
+    timestamps = [t.decode() for t in columns["timestamp"][start:stop].tolist()]
+    bars = {name: columns[name][start:stop].tolist() for name in BAR_FIELDS}
+    indicators = [(key, columns[indicator_column(key)][start:stop].tolist()) for key in INDICATOR_FIELDS]
+    texts = [(key, columns[text_column(key)][start:stop].tolist()) for key in TEXT_FIELDS]
+
+    candles = []
+    for i, timestamp in enumerate(timestamps):
+        candle = {"timestamp": timestamp}
+        for name, values in bars.items():
+            if values[i] == values[i]:
+                candle[name] = values[i]
+        ind = {}
+        for key, values in indicators:
+            value = values[i]
+            if value != value:
+                continue
+            if len(key) == 1:
+                ind[key[0]] = value
+            else:
+                ind.setdefault(key[0], {})[key[1]] = value
+        candle["indicators"] = ind
+        for key, values in texts:
+            if values[i]:
+                _set_field(candle, key, values[i].decode())
+        candles.append(candle)
+    return candles
+
+
+class ColumnCandles(Sequence):
+    """
+    Velas sobre columnas (memmap o memoria compartida) como secuencia de
+    solo lectura: cada acceso construye el dict de esa vela. BacktestEngine
+    la trata como una lista en memoria y lee high/low con column().
+
+    full=False: solo timestamp + REPLAY_FIELDS (lo que usa la simulacion)
+    """
+
+    def __init__(self, columns, full=True):
+        self.columns = columns
+        self.full = full
+        self._timestamps = columns["timestamp"]
+        self._fields = [(name, columns[name]) for name in (BAR_FIELDS if full else REPLAY_FIELDS)]
+        self._indicators = [(key, columns[indicator_column(key)]) for key in INDICATOR_FIELDS] if full else []
+        self._texts = [(key, columns[text_column(key)]) for key in TEXT_FIELDS] if full else []
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        candle = {"timestamp": self._timestamps.item(index).decode()}
+        for name, values in self._fields:
+            value = values.item(index)
+            if value == value:
+                candle[name] = value
+        if self.full:
+            ind = {}
+            for key, values in self._indicators:
+                value = values.item(index)
+                if value != value:
+                    continue
+                if len(key) == 1:
+                    ind[key[0]] = value
+                else:
+                    ind.setdefault(key[0], {})[key[1]] = value
+            candle["indicators"] = ind
+            for key, values in self._texts:
+                value = values.item(index)
+                if value:
+                    _set_field(candle, key, value.decode())
+        return candle
+
+    def column(self, name, default=0.0):
+        """Array completo de un campo, con NaN (campo ausente) -> default"""
+        values = self.columns[name]
+        if np.isnan(values).any():
+            return np.where(np.isnan(values), default, values)
+        return values
+
+
+# ==============================
+# CACHE EN DISCO
+# ==============================
+class ColumnStore:
+    """Columnas de una entrada de la cache abiertas con np.memmap (solo lectura)"""
+
+    def __init__(self, path, meta=None):
+        self.path = path
+        if meta is None:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                meta = json.load(f)
+        self.meta = meta
+        rows = meta["rows"]
+        self._arrays = {}
+        for name, dtype in meta["columns"].items():
+            dtype = np.dtype(dtype)
+            if rows == 0:
+                self._arrays[name] = np.empty(0, dtype=dtype)
+            else:
+                # Vista ndarray del memmap (el acceso por elemento es mas rapido)
+                self._arrays[name] = np.asarray(np.memmap(os.path.join(path, name + ".bin"),
+                                                          dtype=dtype, mode="r", shape=(rows,)))
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __len__(self):
+        return self.meta["rows"]
+
+    def candles(self, full=True):
+        """Vista de velas para BacktestEngine (ver ColumnCandles)"""
+        return ColumnCandles(self, full)
+
+    def close(self):
+        self._arrays = {}
+
+
+def _cache_path(filepath, indicator_mode, cache_dir):
+    key = f"{os.path.abspath(filepath)}|{indicator_mode}"
+    return os.path.join(cache_dir, hashlib.sha1(key.encode()).hexdigest()[:16])
+
+
+def content_fingerprint(filepath, size=None):
+    """blake2b del tamano y de bloques al principio, medio y final del archivo"""
+    size = os.path.getsize(filepath) if size is None else size
+    h = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(filepath, "rb") as f:
+        for offset in sorted({0, max(0, size // 2 - FINGERPRINT_BLOCK // 2), max(0, size - FINGERPRINT_BLOCK)}):
+            f.seek(offset)
+            h.update(f.read(FINGERPRINT_BLOCK))
+    return h.hexdigest()
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            return None
+        return meta
+    except Exception:
+        return None
+
+
+def _is_valid(meta, path, stat):
+    """Comprobar la entrada contra el archivo original (actualiza el mtime si solo cambio eso)"""
+    if meta is None or meta["size"] != stat.st_size:
+        return False
+    if meta["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if meta["hash"] != content_fingerprint(meta["source"], stat.st_size):
+        return False
+    meta["mtime_ns"] = stat.st_mtime_ns
+    try:
+        _write_meta(path, meta)
+    except Exception:
+        pass
+    return True
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=4)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+def build_cache(filepath, indicator_mode="legacy", cache_dir=CACHE_DIR):
+    """
+    Recorrer el archivo una vez y escribir la entrada de la cache.
+    Se escribe en un directorio temporal y se renombra al final, asi un
+    proceso lector nunca ve una entrada a medias.
+
+    Returns:
+        ColumnStore de la entrada nueva
+    """
+    from backtesting_engine import iter_historical_chunks
+
+    source = os.path.abspath(filepath)
+    stat = os.stat(source)
+    path = _cache_path(source, indicator_mode, cache_dir)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp, exist_ok=True)
+
+    dtypes = column_dtypes()
+    rows = 0
+    files = {name: open(os.path.join(tmp, name + ".bin"), "wb") for name in dtypes}
+    try:
+        for chunk in iter_historical_chunks(source, BUILD_CHUNK, indicator_mode):
+            columns = columns_from_candles(chunk)
+            for name, f in files.items():
+                f.write(np.ascontiguousarray(columns[name], dtype=dtypes[name]).tobytes())
+            rows += len(chunk)
+    finally:
+        for f in files.values():
+            f.close()
+
+    meta = {
+        "version": CACHE_VERSION,
+        "source": source,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": content_fingerprint(source, stat.st_size),
+        "indicator_mode": indicator_mode,
+        "rows": rows,
+        "columns": {name: dtype.str for name, dtype in dtypes.items()},
+    }
+    _write_meta(tmp, meta)
+
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Otro proceso la escribio a la vez: usar la suya
+        shutil.rmtree(tmp, ignore_errors=True)
+        return ColumnStore(path)
+    return ColumnStore(path, meta)
+
+
+def load_columns(filepath, indicator_mode="legacy", cache_dir=CACHE_DIR, rebuild=False):
+    """
+    Columnas del archivo historico desde la cache (construyendola si falta
+    o si el archivo cambio).
+
+    Returns:
+        ColumnStore (memmap de solo lectura)
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+
+    path = _cache_path(filepath, indicator_mode, cache_dir)
+    if not rebuild:
+        meta = _read_meta(path)
+        if _is_valid(meta, path, os.stat(filepath)):
+            return ColumnStore(path, meta)
+
+    print(f"🗂️ Construyendo cache columnar de {os.path.basename(filepath)}...")
+    store = build_cache(filepath, indicator_mode, cache_dir)
+    print(f"✅ Cache lista: {len(store)} velas en {store.path}")
+    return store
+
+
+def clear_cache(cache_dir=CACHE_DIR):
+    """Eliminar todas las entradas de la cache"""
+    shutil.rmtree(cache_dir, ignore_errors=True)
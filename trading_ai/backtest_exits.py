@@ -0,0 +1,121 @@
+# backtest_exits.py
+
+"""
+Resolucion vectorizada de salidas para el backtesting
+
+Para un lote de entradas calcula de una vez que toca primero el precio,
+TP o SL, dentro de un horizonte de velas, usando mascaras NumPy sobre
+ventanas deslizantes (sliding_window_view) de los arrays high/low.
+
+Misma regla que BacktestEngine.simulate_trade:
+  - Se revisan las velas index+1 .. index+horizon-1
+  - BUY:  TP si high >= tp, SL si low <= sl
+  - SELL: TP si low <= tp,  SL si high >= sl
+  - Si en la misma vela se tocan ambos, gana el TP
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+EXIT_TIMEOUT = 0
+EXIT_TP = 1
+EXIT_SL = 2
+EXIT_REASONS = ("TIMEOUT", "TP", "SL")
+
+# Entradas procesadas por bloque (acota la memoria de las ventanas)
+CHUNK_SIZE = 4096
+
+
+def resolve_exits(high, low, entries, is_buy, tp, sl, horizon=100, chunk_size=CHUNK_SIZE):
+    """
+    Primer toque de TP/SL para todas las entradas.
+
+    Args:
+        high, low: Arrays de la serie completa
+        entries: Indices de entrada
+        is_buy: Mascara bool (True = BUY, False = SELL)
+        tp, sl: Precios de TP y SL por entrada
+        horizon: Velas de look-ahead (100 = comportamiento historico)
+
+    Returns:
+        (exit_index, reason): exit_index es la vela de salida (TP/SL) o la
+        ultima vela revisada (TIMEOUT); reason usa EXIT_TP / EXIT_SL /
+        EXIT_TIMEOUT.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    entries = np.asarray(entries, dtype=np.intp)
+    is_buy = np.asarray(is_buy, dtype=bool)
+    tp = np.asarray(tp, dtype=np.float64)
+    sl = np.asarray(sl, dtype=np.float64)
+
+    n = len(high)
+    m = len(entries)
+    width = int(horizon) - 1
+
+    # Ultima vela revisada si no hay toque: min(index + horizon, n) - 1
+    exit_index = np.minimum(entries + horizon, n) - 1
+    reason = np.full(m, EXIT_TIMEOUT, dtype=np.int8)
+
+    if m == 0 or width <= 0:
+        return exit_index, reason
+
+    # Relleno NaN al final: las comparaciones fuera de la serie dan False
+    pad = np.full(width, np.nan)
+    high_windows = sliding_window_view(np.concatenate([high, pad]), width)
+    low_windows = sliding_window_view(np.concatenate([low, pad]), width)
+
+    for start in range(0, m, chunk_size):
+        sl_ = slice(start, start + chunk_size)
+        rows = entries[sl_] + 1
+        wh = high_windows[rows]
+        wl = low_windows[rows]
+        buy = is_buy[sl_, None]
+        tp_c = tp[sl_, None]
+        sl_c = sl[sl_, None]
+
+        tp_mask = np.where(buy, wh >= tp_c, wl <= tp_c)
+        sl_mask = np.where(buy, wl <= sl_c, wh >= sl_c)
+
+        tp_any = tp_mask.any(axis=1)
+        sl_any = sl_mask.any(axis=1)
+        tp_first = np.where(tp_any, tp_mask.argmax(axis=1), width)
+        sl_first = np.where(sl_any, sl_mask.argmax(axis=1), width)
+
+        hit_tp = tp_any & (tp_first <= sl_first)
+        hit_sl = sl_any & ~hit_tp
+
+        chunk_reason = reason[sl_]
+        chunk_exit = exit_index[sl_]
+        chunk_reason[hit_tp] = EXIT_TP
+        chunk_reason[hit_sl] = EXIT_SL
+        chunk_exit[hit_tp] = rows[hit_tp] + tp_first[hit_tp]
+        chunk_exit[hit_sl] = rows[hit_sl] + sl_first[hit_sl]
+
+    return exit_index, reason
+
+
+def first_touch(high, low, index, is_buy, tp, sl, horizon=100):
+    """
+    Igual que resolve_exits para UNA entrada, recorriendo solo hasta el
+    primer toque (para simuladores que abren trades de uno en uno).
+    high/low pueden ser listas: es mas rapido que crear mascaras NumPy
+    para ventanas cortas.
+
+    Returns:
+        (exit_index, reason)
+    """
+    end = min(index + horizon, len(high))
+    if is_buy:
+        for j in range(index + 1, end):
+            if high[j] >= tp:
+                return j, EXIT_TP
+            if low[j] <= sl:
+                return j, EXIT_SL
+    else:
+        for j in range(index + 1, end):
+            if low[j] <= tp:
+                return j, EXIT_TP
+            if high[j] >= sl:
+                return j, EXIT_SL
+    return end - 1, EXIT_TIMEOUT
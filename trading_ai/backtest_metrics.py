@@ -0,0 +1,487 @@
+# backtest_metrics.py
+
+"""
+Metricas de backtest sobre arrays NumPy
+
+compute_metrics recibe el P&L de cada trade (dinero y pips) y sus tiempos
+de entrada/salida y calcula el reporte completo de una vez:
+
+  - Win rate, avg win/loss, profit factor, expectancy, mejor/peor trade
+  - Sharpe y Sortino sobre retornos por periodo (por defecto diarios,
+    retorno = P&L del periodo / balance al inicio del periodo; los periodos
+    sin trades cuentan como retorno 0). Sin tiempos: retornos por trade.
+    Sin periodos negativos y con retorno medio > 0, Sortino = inf
+    (json_safe lo convierte para exportar a JSON)
+  - Max drawdown (profundidad y duracion en trades y en segundos)
+  - Exposicion: % del tiempo con alguna posicion abierta
+  - Desglose por setup y por hora de entrada
+
+RunningMetrics produce el mismo reporte de forma incremental (O(1) por
+trade) para ir mostrando metricas mientras corre un backtest largo o un
+barrido. Coincide con compute_metrics si los trades llegan en orden de
+entrada y con salidas no decrecientes.
+"""
+
+import math
+from datetime import datetime, timezone
+
+import numpy as np
+
+PERIOD_SECONDS = 86400             # Retornos diarios
+YEAR_SECONDS = 365 * 86400         # Anualizacion de Sharpe/Sortino
+
+_TIME_FORMATS = ("%Y.%m.%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+
+# ==============================
+# CONVERSION
+# ==============================
+def json_safe(value):
+    """
+    Copia apta para JSON estricto: inf/-inf -> "Infinity"/"-Infinity" y
+    NaN -> None (json.dump escribiria literales que otros lectores no aceptan)
+    """
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        return value
+    if isinstance(value, dict):
+        return {k: json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [json_safe(v) for v in value]
+    return value
+
+
+def parse_time(value):
+    """Timestamp (MT5 / ISO / epoch) -> epoch UTC en segundos, o NaN"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "")[:19]
+    for fmt in _TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    return math.nan
+
+
+def parse_times(values):
+    """
+    Timestamps de velas/trades -> array float64 de epoch en segundos (NaN si
+    no se puede leer). Se convierte toda la columna de golpe con datetime64;
+    si algun formato no encaja, elemento a elemento.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind == "f":
+        return values.astype(np.float64)
+    if isinstance(values, np.ndarray) and values.dtype.kind == "S":
+        raw = values.astype("U19")
+    else:
+        raw = np.array([str(v or "")[:19] for v in values], dtype="U19")
+
+    try:
+        parsed = np.char.replace(raw, ".", "-").astype("datetime64[s]")
+    except ValueError:
+        source = values.tolist() if isinstance(values, np.ndarray) else values
+        return np.fromiter((parse_time(v.decode() if isinstance(v, bytes) else v) for v in source),
+                           dtype=np.float64, count=len(raw))
+
+    times = parsed.astype(np.int64).astype(np.float64)
+    times[np.isnat(parsed)] = np.nan
+    return times
+
+
+def trade_arrays(trades):
+    """Lista de trades de BacktestEngine -> arrays para compute_metrics"""
+    n = len(trades)
+    return {
+        "profit": np.fromiter((t.get("profit", 0.0) for t in trades), dtype=np.float64, count=n),
+        "pips": np.fromiter((t.get("pips", 0.0) for t in trades), dtype=np.float64, count=n),
+        "entry_time": parse_times([t.get("entry_time", "") for t in trades]),
+        "exit_time": parse_times([t.get("exit_time", "") for t in trades]),
+        "setup": [t.get("setup", "Unknown") for t in trades],
+    }
+
+
+# ==============================
+# REPORTE VECTORIZADO
+# ==============================
+def _profit_factor(gross_profit, gross_loss):
+    # Sin perdidas el divisor es 1 (como calculaba calculate_final_stats)
+    return gross_profit / (gross_loss if gross_loss > 0 else 1)
+
+
+def _ratios(mean, std, downside, periods, annualize):
+    """(sharpe, sortino) de los retornos por periodo"""
+    if periods < 2:
+        return 0.0, 0.0
+    sharpe = mean / std * annualize if std > 0 else 0.0
+    if downside > 0:
+        sortino = mean / downside * annualize
+    else:
+        # Sin periodos negativos: Sortino infinito si hubo ganancia
+        sortino = math.inf if mean > 0 else 0.0
+    return float(sharpe), float(sortino)
+
+
+def _group_report(trades, wins, pips, profit, gross_profit, gross_loss):
+    return {
+        "trades": int(trades),
+        "wins": int(wins),
+        "win_rate": wins / trades * 100 if trades else 0.0,
+        "total_pips": float(pips),
+        "total_profit": float(profit),
+        "profit_factor": float(_profit_factor(gross_profit, gross_loss)),
+        "expectancy": float(profit / trades) if trades else 0.0,
+    }
+
+
+def _group_split(codes, n_groups, pips, profit):
+    """Agregados por grupo (codigos 0..n_groups-1) con bincount"""
+    count = np.bincount(codes, minlength=n_groups)
+    wins = np.bincount(codes, weights=(pips > 0), minlength=n_groups)
+    total_pips = np.bincount(codes, weights=pips, minlength=n_groups)
+    total_profit = np.bincount(codes, weights=profit, minlength=n_groups)
+    gross_profit = np.bincount(codes, weights=np.where(pips > 0, pips, 0.0), minlength=n_groups)
+    gross_loss = np.bincount(codes, weights=np.where(pips < 0, -pips, 0.0), minlength=n_groups)
+    return [
+        _group_report(*values)
+        for values in zip(count.tolist(), wins.tolist(), total_pips.tolist(), total_profit.tolist(),
+                          gross_profit.tolist(), gross_loss.tolist())
+    ]
+
+
+def compute_metrics(profit, pips=None, entry_time=None, exit_time=None, setup=None,
+                    initial_balance=10000.0, period=PERIOD_SECONDS):
+    """
+    Reporte completo del backtest
+
+    Args:
+        profit: P&L en dinero de cada trade (orden de registro)
+        pips: P&L en pips (win rate, avg win/loss, profit factor); None = profit
+        entry_time, exit_time: Epoch en segundos (NaN = desconocido)
+        setup: Nombre del setup de cada trade
+        initial_balance: Balance inicial (retornos y drawdown %)
+        period: Segundos por periodo de los retornos de Sharpe/Sortino
+
+    Returns:
+        dict: metricas (ver docstring del modulo)
+    """
+    profit = np.asarray(profit, dtype=np.float64)
+    pips = profit if pips is None else np.asarray(pips, dtype=np.float64)
+    n = len(profit)
+    entry_time = np.full(n, np.nan) if entry_time is None else np.asarray(entry_time, dtype=np.float64)
+    exit_time = np.full(n, np.nan) if exit_time is None else np.asarray(exit_time, dtype=np.float64)
+
+    # ---------- Trades ----------
+    win_mask = pips > 0
+    loss_mask = pips < 0
+    wins = int(np.count_nonzero(win_mask))
+    gross_profit = float(pips[win_mask].sum())
+    gross_loss = float(-pips[loss_mask].sum())
+    n_losses = int(np.count_nonzero(loss_mask))
+    total_profit = float(profit.sum())
+
+    report = {
+        "total_trades": n,
+        "wins": wins,
+        "losses": n - wins,
+        "win_rate": wins / n * 100 if n else 0.0,
+        "avg_win": gross_profit / wins if wins else 0.0,
+        "avg_loss": gross_loss / n_losses if n_losses else 0.0,
+        "profit_factor": float(_profit_factor(gross_profit, gross_loss)) if n else 0.0,
+        "expectancy": total_profit / n if n else 0.0,
+        "expectancy_pips": float(pips.sum()) / n if n else 0.0,
+        "total_pips": float(pips.sum()),
+        "total_profit": total_profit,
+        "return_pct": total_profit / initial_balance * 100 if initial_balance else 0.0,
+        "best_trade": float(pips.max()) if n else 0.0,
+        "worst_trade": float(pips.min()) if n else 0.0,
+    }
+
+    # ---------- Drawdown ----------
+    equity = np.concatenate(([0.0], np.cumsum(profit)))
+    peak = np.maximum.accumulate(equity)
+    drawdown = peak - equity
+    # Indice del ultimo maximo para cada punto de la curva
+    at_peak = equity >= peak
+    peak_index = np.maximum.accumulate(np.where(at_peak, np.arange(n + 1), 0))
+    point_time = np.concatenate(([entry_time[0] if n and not np.isnan(entry_time[0]) else
+                                  (exit_time[0] if n else np.nan)], exit_time))
+    duration_time = point_time - point_time[peak_index]
+
+    max_dd = float(drawdown.max())
+    report["max_drawdown"] = max_dd
+    report["max_drawdown_pct"] = max_dd / initial_balance * 100 if initial_balance > 0 else 0.0
+    report["max_drawdown_trades"] = int((np.arange(n + 1) - peak_index).max())
+    report["max_drawdown_seconds"] = float(np.nanmax(duration_time)) if n and not np.isnan(duration_time).all() else 0.0
+
+    # ---------- Sharpe / Sortino ----------
+    if n and not np.isnan(exit_time).any():
+        bucket = np.floor(exit_time / period).astype(np.int64)
+        first = int(bucket.min())
+        pnl = np.bincount(bucket - first, weights=profit)
+        annualize = math.sqrt(YEAR_SECONDS / period)
+    else:
+        pnl = profit
+        annualize = 1.0
+    start_balance = initial_balance + np.concatenate(([0.0], np.cumsum(pnl)[:-1])) if n else pnl
+    returns = np.divide(pnl, start_balance, out=np.zeros_like(pnl), where=start_balance > 0)
+
+    periods = len(returns)
+    mean = float(returns.mean()) if periods else 0.0
+    std = float(returns.std(ddof=1)) if periods > 1 else 0.0
+    downside = float(np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))) if periods else 0.0
+    report["sharpe_ratio"], report["sortino_ratio"] = _ratios(mean, std, downside, periods, annualize)
+    report["periods"] = periods
+
+    # ---------- Exposicion ----------
+    valid = ~(np.isnan(entry_time) | np.isnan(exit_time))
+    if valid.any():
+        order = np.argsort(entry_time[valid], kind="stable")
+        start, end = entry_time[valid][order], exit_time[valid][order]
+        frontier = np.concatenate(([-np.inf], np.maximum.accumulate(end)[:-1]))
+        covered = float(np.clip(end - np.maximum(start, frontier), 0, None).sum())
+        span = float(end.max() - start.min())
+        report["exposure_pct"] = covered / span * 100 if span > 0 else 0.0
+    else:
+        report["exposure_pct"] = 0.0
+
+    # ---------- Por setup / por hora ----------
+    if setup is not None and n:
+        names, codes = np.unique(np.asarray(setup, dtype=str), return_inverse=True)
+        splits = _group_split(codes, len(names), pips, profit)
+        report["by_setup"] = {str(name): split for name, split in zip(names.tolist(), splits)}
+    else:
+        report["by_setup"] = {}
+
+    has_hour = ~np.isnan(entry_time)
+    if has_hour.any():
+        hours = (np.floor(entry_time[has_hour] / 3600).astype(np.int64) % 24)
+        splits = _group_split(hours, 24, pips[has_hour], profit[has_hour])
+        report["by_hour"] = {str(h): split for h, split in enumerate(splits) if split["trades"]}
+    else:
+        report["by_hour"] = {}
+
+    return report
+
+
+def trade_metrics(trades, initial_balance=10000.0, period=PERIOD_SECONDS):
+    """compute_metrics sobre la lista de trades de BacktestEngine"""
+    return compute_metrics(initial_balance=initial_balance, period=period, **trade_arrays(trades))
+
+
+# ==============================
+# MODO INCREMENTAL
+# ==============================
+class RunningMetrics:
+    """Mismo reporte que compute_metrics, actualizado trade a trade en O(1)"""
+
+    def __init__(self, initial_balance=10000.0, period=PERIOD_SECONDS):
+        self.initial_balance = initial_balance
+        self.period = period
+
+        self.n = 0
+        self.wins = 0
+        self.n_losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+        self.total_pips = 0.0
+        self.total_profit = 0.0
+        self.best = -math.inf
+        self.worst = math.inf
+
+        # Drawdown
+        self.equity = 0.0
+        self.peak = 0.0
+        self.peak_n = 0
+        self.peak_time = math.nan
+        self.max_dd = 0.0
+        self.max_dd_trades = 0
+        self.max_dd_seconds = math.nan
+
+        # Retornos por periodo (Welford); sin tiempos, por trade
+        self.timed = True
+        self._bucket = None
+        self._bucket_pnl = 0.0
+        self._bucket_balance = initial_balance
+        self._trade_returns = _Moments()
+        self._period_returns = _Moments()
+
+        # Exposicion
+        self._frontier = -math.inf
+        self._covered = 0.0
+        self._first_entry = math.inf
+        self._last_exit = -math.inf
+
+        self._by_setup = {}
+        self._by_hour = {}
+
+    def update(self, profit, pips=None, entry_time=math.nan, exit_time=math.nan, setup="Unknown"):
+        """Sumar un trade cerrado (tiempos en epoch s, NaN si no se conocen)"""
+        pips = profit if pips is None else pips
+        if self.n == 0:
+            self.peak_time = exit_time if math.isnan(entry_time) else entry_time
+
+        # Retorno por trade (fallback sin tiempos)
+        balance = self.initial_balance + self.total_profit
+        self._trade_returns.add(profit / balance if balance > 0 else 0.0)
+
+        self.n += 1
+        self.total_pips += pips
+        self.total_profit += profit
+        if pips > 0:
+            self.wins += 1
+            self.gross_profit += pips
+        elif pips < 0:
+            self.n_losses += 1
+            self.gross_loss -= pips
+        self.best = max(self.best, pips)
+        self.worst = min(self.worst, pips)
+
+        # Drawdown
+        self.equity += profit
+        if self.equity >= self.peak:
+            self.peak = self.equity
+            self.peak_n = self.n
+            self.peak_time = exit_time
+        else:
+            self.max_dd = max(self.max_dd, self.peak - self.equity)
+            self.max_dd_trades = max(self.max_dd_trades, self.n - self.peak_n)
+            elapsed = exit_time - self.peak_time
+            if not math.isnan(elapsed) and not elapsed <= self.max_dd_seconds:
+                self.max_dd_seconds = elapsed
+
+        # Periodos
+        if math.isnan(exit_time):
+            self.timed = False
+        elif self.timed:
+            bucket = math.floor(exit_time / self.period)
+            if self._bucket is None:
+                self._bucket = bucket
+            elif bucket > self._bucket:
+                self._close_bucket()
+                # Periodos intermedios sin trades: retorno 0
+                self._period_returns.add_zeros(bucket - self._bucket - 1)
+                self._bucket = bucket
+            self._bucket_pnl += profit
+
+        # Exposicion (exacta si los trades llegan en orden de entrada)
+        if not (math.isnan(entry_time) or math.isnan(exit_time)):
+            self._covered += max(0.0, exit_time - max(entry_time, self._frontier))
+            self._frontier = max(self._frontier, exit_time)
+            self._first_entry = min(self._first_entry, entry_time)
+            self._last_exit = max(self._last_exit, exit_time)
+
+        # Grupos
+        win = pips > 0
+        _group_add(self._by_setup, str(setup), win, pips, profit)
+        if not math.isnan(entry_time):
+            _group_add(self._by_hour, str(math.floor(entry_time / 3600) % 24), win, pips, profit)
+
+    def _close_bucket(self):
+        balance = self._bucket_balance
+        self._period_returns.add(self._bucket_pnl / balance if balance > 0 else 0.0)
+        self._bucket_balance += self._bucket_pnl
+        self._bucket_pnl = 0.0
+
+    def report(self):
+        """Reporte con las mismas claves que compute_metrics"""
+        n = self.n
+        report = {
+            "total_trades": n,
+            "wins": self.wins,
+            "losses": n - self.wins,
+            "win_rate": self.wins / n * 100 if n else 0.0,
+            "avg_win": self.gross_profit / self.wins if self.wins else 0.0,
+            "avg_loss": self.gross_loss / self.n_losses if self.n_losses else 0.0,
+            "profit_factor": float(_profit_factor(self.gross_profit, self.gross_loss)) if n else 0.0,
+            "expectancy": self.total_profit / n if n else 0.0,
+            "expectancy_pips": self.total_pips / n if n else 0.0,
+            "total_pips": self.total_pips,
+            "total_profit": self.total_profit,
+            "return_pct": self.total_profit / self.initial_balance * 100 if self.initial_balance else 0.0,
+            "best_trade": self.best if n else 0.0,
+            "worst_trade": self.worst if n else 0.0,
+            "max_drawdown": self.max_dd,
+            "max_drawdown_pct": self.max_dd / self.initial_balance * 100 if self.initial_balance > 0 else 0.0,
+            "max_drawdown_trades": self.max_dd_trades,
+            "max_drawdown_seconds": 0.0 if math.isnan(self.max_dd_seconds) else max(0.0, self.max_dd_seconds),
+        }
+
+        if n and self.timed:
+            # El periodo en curso cuenta como cerrado (sin modificar el estado)
+            moments = self._period_returns.copy()
+            balance = self._bucket_balance
+            moments.add(self._bucket_pnl / balance if balance > 0 else 0.0)
+            annualize = math.sqrt(YEAR_SECONDS / self.period)
+        else:
+            moments = self._trade_returns
+            annualize = 1.0
+        report["sharpe_ratio"], report["sortino_ratio"] = _ratios(
+            moments.mean, moments.std(), moments.downside(), moments.count, annualize)
+        report["periods"] = moments.count
+
+        span = self._last_exit - self._first_entry
+        report["exposure_pct"] = self._covered / span * 100 if span > 0 else 0.0
+
+        report["by_setup"] = {name: _group_report(*values) for name, values in sorted(self._by_setup.items())}
+        report["by_hour"] = {hour: _group_report(*self._by_hour[hour])
+                             for hour in sorted(self._by_hour, key=int)}
+        return report
+
+
+def _group_add(groups, key, win, pips, profit):
+    values = groups.get(key)
+    if values is None:
+        values = groups[key] = [0, 0, 0.0, 0.0, 0.0, 0.0]
+    values[0] += 1
+    values[1] += win
+    values[2] += pips
+    values[3] += profit
+    if pips > 0:
+        values[4] += pips
+    elif pips < 0:
+        values[5] -= pips
+
+
+class _Moments:
+    """Media, varianza (Welford) y semidesviacion de una serie de retornos"""
+
+    __slots__ = ("count", "mean", "m2", "down_sq")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.down_sq = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < 0:
+            self.down_sq += value * value
+
+    def add_zeros(self, k):
+        """Sumar k retornos 0 de golpe (formula de combinacion de Chan)"""
+        if k <= 0:
+            return
+        total = self.count + k
+        delta = -self.mean
+        self.m2 += delta * delta * self.count * k / total
+        self.mean += delta * k / total
+        self.count = total
+
+    def copy(self):
+        other = _Moments()
+        other.count, other.mean, other.m2, other.down_sq = self.count, self.mean, self.m2, self.down_sq
+        return other
+
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def downside(self):
+        return math.sqrt(self.down_sq / self.count) if self.count else 0.0
@@ -0,0 +1,330 @@
+# backtest_montecarlo.py
+
+"""
+Analisis Monte Carlo de robustez de un backtest
+
+Un backtest da una sola curva de equity. Aqui se remuestrea el P&L de sus
+trades miles de veces para ver que drawdowns y retornos son plausibles con
+la misma estrategia:
+
+  - bootstrap: cada simulacion elige n trades con reemplazo
+  - permutation: cada simulacion baraja el orden de los mismos trades
+    (el retorno final no cambia; el drawdown si)
+
+Todo va en NumPy por bloques de simulaciones (matriz simulaciones x trades,
+acotada por CHUNK_ELEMENTS para no disparar la memoria). Salida: las
+distribuciones de max drawdown, retorno final y la probabilidad de ruina
+(perder ruin_level del balance inicial en algun momento).
+
+Uso:
+    python backtest_montecarlo.py resultados.json --simulations 20000 --method permutation
+    (resultados.json = BacktestEngine.export_results, o un CSV/JSON de velas
+    sobre el que se ejecuta el backtest antes)
+
+Desde la GUI se lanza con MonteCarloWorker en un proceso aparte.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+METHODS = ("bootstrap", "permutation")
+DEFAULT_SIMULATIONS = 10000
+DEFAULT_RUIN_LEVEL = 0.5        # Ruina = perder el 50% del balance inicial
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+HISTOGRAM_BINS = 50
+
+# Elementos (simulaciones x trades) por bloque: ~32 MB por matriz float64
+CHUNK_ELEMENTS = 4_000_000
+
+
+def pnl_from_results(results):
+    """P&L por trade de los resultados de BacktestEngine (sin redondear si hay curva de equity)"""
+    equity = results.get("equity_curve")
+    trades = results.get("trades", [])
+    if equity and len(equity) == len(trades) + 1:
+        return np.diff(np.asarray(equity, dtype=np.float64))
+    return np.array([t.get("profit", 0.0) for t in trades], dtype=np.float64)
+
+
+# ==============================
+# SIMULACION
+# ==============================
+def simulate(pnl, simulations=DEFAULT_SIMULATIONS, method="bootstrap", initial_balance=10000.0,
+             ruin_level=DEFAULT_RUIN_LEVEL, seed=None, chunk_elements=CHUNK_ELEMENTS,
+             progress_callback=None):
+    """
+    Remuestrear el P&L y medir cada curva simulada
+
+    Args:
+        pnl: P&L en dinero de cada trade
+        simulations: Numero de curvas simuladas
+        method: "bootstrap" o "permutation"
+        initial_balance: Balance inicial (drawdown %, retorno % y ruina)
+        ruin_level: Fraccion del balance inicial cuya perdida cuenta como ruina
+        seed: Semilla para reproducir el resultado
+        chunk_elements: Tamano maximo de bloque (simulaciones x trades)
+        progress_callback: Funcion (porcentaje) opcional
+
+    Returns:
+        dict de arrays (una entrada por simulacion): max_drawdown,
+        max_drawdown_pct, final_return, min_equity, ruined
+    """
+    if method not in METHODS:
+        raise ValueError(f"Metodo desconocido: {method} (usar {', '.join(METHODS)})")
+
+    pnl = np.asarray(pnl, dtype=np.float64)
+    n = len(pnl)
+    out = {
+        "max_drawdown": np.zeros(simulations),
+        "max_drawdown_pct": np.zeros(simulations),
+        "final_return": np.zeros(simulations),
+        "min_equity": np.zeros(simulations),
+    }
+    if n == 0 or simulations <= 0:
+        out["ruined"] = np.zeros(simulations, dtype=bool)
+        return out
+
+    rng = np.random.default_rng(seed)
+    rows = max(1, min(simulations, chunk_elements // n))
+
+    for start in range(0, simulations, rows):
+        stop = min(simulations, start + rows)
+        k = stop - start
+
+        if method == "bootstrap":
+            equity = pnl[rng.integers(0, n, size=(k, n))]
+        else:
+            equity = rng.permuted(np.broadcast_to(pnl, (k, n)), axis=1)
+
+        # Curva de equity (desde 0) y su maximo previo, en el mismo buffer
+        np.cumsum(equity, axis=1, out=equity)
+        peak = np.maximum.accumulate(equity, axis=1)
+        np.maximum(peak, 0.0, out=peak)
+
+        out["final_return"][start:stop] = equity[:, -1]
+        out["min_equity"][start:stop] = np.minimum(equity.min(axis=1), 0.0)
+
+        drawdown = peak - equity
+        out["max_drawdown"][start:stop] = drawdown.max(axis=1)
+        # Drawdown relativo al balance en el maximo
+        peak += initial_balance
+        np.divide(drawdown, peak, out=drawdown, where=peak > 0)
+        out["max_drawdown_pct"][start:stop] = drawdown.max(axis=1) * 100
+
+        if progress_callback:
+            progress_callback(stop / simulations * 100)
+
+    out["ruined"] = out["min_equity"] <= -initial_balance * ruin_level
+    return out
+
+
+def distribution(values, bins=HISTOGRAM_BINS):
+    """Resumen de una distribucion: media, desviacion, extremos, percentiles e histograma"""
+    lo, hi = float(values.min()), float(values.max())
+    if hi - lo <= 1e-9 * max(1.0, abs(hi)):
+        # Valor constante (p.ej. retorno final en permutation)
+        lo, hi = lo - 0.5, hi + 0.5
+    counts, edges = np.histogram(values, bins=bins, range=(lo, hi))
+    return {
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+        "histogram": {"counts": counts.tolist(), "edges": edges.tolist()},
+    }
+
+
+def run_monte_carlo(pnl, simulations=DEFAULT_SIMULATIONS, method="bootstrap", initial_balance=10000.0,
+                    ruin_level=DEFAULT_RUIN_LEVEL, seed=None, progress_callback=None):
+    """
+    Simulacion completa + resumen
+
+    Returns:
+        dict: parametros, distribuciones (max_drawdown, max_drawdown_pct,
+        final_return, final_return_pct), ruin_probability y los valores
+        de la curva original para compararlos
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if len(pnl) == 0:
+        raise ValueError("No hay trades para simular")
+
+    started = time.perf_counter()
+    sims = simulate(pnl, simulations, method, initial_balance, ruin_level, seed,
+                    progress_callback=progress_callback)
+
+    # Curva original (la del backtest)
+    equity = np.concatenate(([0.0], np.cumsum(pnl)))
+    original_dd = float((np.maximum.accumulate(equity) - equity).max())
+
+    return {
+        "method": method,
+        "simulations": simulations,
+        "trades": len(pnl),
+        "initial_balance": initial_balance,
+        "ruin_level": ruin_level,
+        "seed": seed,
+        "max_drawdown": distribution(sims["max_drawdown"]),
+        "max_drawdown_pct": distribution(sims["max_drawdown_pct"]),
+        "final_return": distribution(sims["final_return"]),
+        "final_return_pct": distribution(sims["final_return"] / initial_balance * 100),
+        "ruin_probability": float(sims["ruined"].mean()),
+        "loss_probability": float((sims["final_return"] < 0).mean()),
+        "original": {
+            "max_drawdown": original_dd,
+            "final_return": float(equity[-1]),
+            # % de simulaciones con drawdown peor que el del backtest
+            "worse_drawdown_pct": float((sims["max_drawdown"] > original_dd).mean() * 100),
+        },
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def format_report(report):
+    """Reporte de texto (CLI y GUI)"""
+    dd = report["max_drawdown"]
+    ddp = report["max_drawdown_pct"]
+    ret = report["final_return"]
+    retp = report["final_return_pct"]
+    original = report["original"]
+    lines = [
+        f"MONTE CARLO ({report['method']}, {report['simulations']} simulaciones, {report['trades']} trades)",
+        "",
+        "MAX DRAWDOWN:",
+        f"  Mediana: ${dd['percentiles']['p50']:.2f} ({ddp['percentiles']['p50']:.2f}%)",
+        f"  P95: ${dd['percentiles']['p95']:.2f} ({ddp['percentiles']['p95']:.2f}%)",
+        f"  P99: ${dd['percentiles']['p99']:.2f} ({ddp['percentiles']['p99']:.2f}%)",
+        f"  Backtest: ${original['max_drawdown']:.2f} "
+        f"(peor en el {original['worse_drawdown_pct']:.1f}% de simulaciones)",
+        "",
+        "RETORNO FINAL:",
+        f"  P5: ${ret['percentiles']['p5']:.2f} ({retp['percentiles']['p5']:.2f}%)",
+        f"  Mediana: ${ret['percentiles']['p50']:.2f} ({retp['percentiles']['p50']:.2f}%)",
+        f"  P95: ${ret['percentiles']['p95']:.2f} ({retp['percentiles']['p95']:.2f}%)",
+        "",
+        "RIESGO:",
+        f"  Prob. de perdida: {report['loss_probability'] * 100:.2f}%",
+        f"  Prob. de ruina (-{report['ruin_level'] * 100:.0f}%): {report['ruin_probability'] * 100:.2f}%",
+        "",
+        f"Tiempo: {report['seconds']:.2f}s",
+    ]
+    return "\n".join(lines)
+
+
+# ==============================
+# PROCESO WORKER (GUI)
+# ==============================
+def _worker_main(result_queue, pnl, options):
+    try:
+        def progress(pct):
+            result_queue.put(("progress", pct))
+        result_queue.put(("done", run_monte_carlo(pnl, progress_callback=progress, **options)))
+    except Exception as e:
+        result_queue.put(("error", str(e)))
+
+
+class MonteCarloWorker:
+    """
+    Monte Carlo en un proceso aparte para no bloquear la GUI.
+    La GUI llama a poll() periodicamente (p.ej. con root.after).
+    """
+
+    def __init__(self, pnl, **options):
+        self._queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=_worker_main, args=(self._queue, np.asarray(pnl, dtype=np.float64), options), daemon=True
+        )
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+
+    def start(self):
+        self._process.start()
+        return self
+
+    def poll(self):
+        """Procesar mensajes pendientes; True cuando termino (ver result/error)"""
+        while True:
+            try:
+                kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.progress = payload
+            elif kind == "done":
+                self.result = payload
+            else:
+                self.error = payload
+
+        if self.result is not None or self.error is not None:
+            self._process.join(timeout=1)
+            return True
+        if not self._process.is_alive():
+            self.error = self.error or f"El proceso termino sin resultado (exit code {self._process.exitcode})"
+            return True
+        return False
+
+    def cancel(self):
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join(timeout=1)
+
+
+# ==============================
+# CLI
+# ==============================
+def _load_pnl(path, initial_balance):
+    """P&L de un JSON de resultados exportado, o backtest sobre un archivo de velas"""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and "trades" in data:
+            balance = data.get("config", {}).get("initial_balance", initial_balance)
+            return pnl_from_results(data), balance
+
+    from backtesting_engine import BacktestEngine, load_historical_data
+    engine = BacktestEngine(load_historical_data(path), {
+        **BacktestEngine([]).get_default_config(), "initial_balance": initial_balance, "record_signals": False
+    })
+    return pnl_from_results(engine.run_backtest()), initial_balance
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analisis Monte Carlo de un backtest")
+    parser.add_argument("source", help="Resultados JSON (export_results) o archivo CSV/JSON de velas")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--initial-balance", type=float, default=10000.0)
+    parser.add_argument("--ruin", type=float, default=DEFAULT_RUIN_LEVEL,
+                        help="Fraccion del balance inicial que cuenta como ruina (0.5 = -50%%)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Guardar el reporte completo en JSON")
+    args = parser.parse_args(argv)
+
+    pnl, balance = _load_pnl(args.source, args.initial_balance)
+    if len(pnl) == 0:
+        print("❌ El backtest no tiene trades")
+        return
+
+    print(f"🎲 Simulando {args.simulations} curvas ({args.method}) sobre {len(pnl)} trades...")
+    report = run_monte_carlo(pnl, args.simulations, args.method, balance, args.ruin, args.seed)
+    print()
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+        print(f"\n✅ Reporte exportado a {args.output}")
+
+
+if __name__ == "__main__":
+    main()
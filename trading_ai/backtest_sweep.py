@@ -0,0 +1,457 @@
+# backtest_sweep.py
+
+"""
+Barrido de parametros del backtest en paralelo
+
+Ejecuta BacktestEngine sobre una rejilla de configuraciones (min_confidence,
+max_trades_per_day, lot_size y SL/TP por setup) repartida en un pool de
+procesos:
+
+  1. Las velas se copian UNA vez a columnas NumPy en memoria compartida; los
+     workers las abren por nombre (nada de pickle de la lista de velas).
+  2. Las decisiones del bot no dependen de la config del barrido, asi que se
+     calculan una sola vez, repartidas por tramos entre los workers, y se
+     guardan tambien en memoria compartida.
+  3. Cada combinacion solo repite el filtrado (confianza, limite diario) y la
+     simulacion de salidas, y devuelve una fila resumen.
+
+Las filas llegan segun terminan (iter_sweep / on_result) y se ordenan por
+profit factor, drawdown y Sharpe (rank_results).
+
+Uso:
+    python backtest_sweep.py datos.csv --min-confidence 0.6,0.7,0.75 \\
+        --max-trades 10,20 --lot-size 0.01,0.02 \\
+        --sltp TREND_FOLLOWING=15/25,20/35 --sltp MEAN_REVERSION=12/18,15/25
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections.abc import Sequence
+from multiprocessing import get_context, shared_memory
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import backtesting_engine
+from backtesting_engine import BacktestEngine
+from backtest_cache import ColumnCandles, ColumnStore, candles_from_columns, columns_from_candles, load_columns
+from backtest_metrics import json_safe
+
+# ==============================
+# COLUMNAS
+# ==============================
+SETUP_DTYPE = "S48"
+ACTIONS = ("NONE", "BUY", "SELL")
+
+# Metrica -> True si mayor es mejor
+RANK_METRICS = {
+    "profit_factor": True,
+    "max_drawdown": False,
+    "sharpe_ratio": True,
+    "sortino_ratio": True,
+    "expectancy": True,
+}
+
+SUMMARY_FIELDS = (
+    "total_trades", "win_rate", "profit_factor", "max_drawdown",
+    "max_drawdown_pct", "max_drawdown_trades", "max_drawdown_seconds", "sharpe_ratio",
+    "sortino_ratio", "expectancy", "exposure_pct", "total_pips", "total_profit", "return_pct",
+)
+
+
+class SharedColumns:
+    """Arrays NumPy con nombre en memoria compartida"""
+
+    def __init__(self, blocks, arrays, owner):
+        self._blocks = blocks
+        self._arrays = arrays
+        self.owner = owner
+
+    @classmethod
+    def create(cls, columns):
+        """columns: {nombre: (dtype, longitud)} -> columnas a cero"""
+        blocks, arrays = {}, {}
+        for name, (dtype, length) in columns.items():
+            dtype = np.dtype(dtype)
+            shm = shared_memory.SharedMemory(create=True, size=max(dtype.itemsize * length, 1))
+            array = np.ndarray((length,), dtype=dtype, buffer=shm.buf)
+            array[:] = np.zeros(1, dtype=dtype)[0]
+            blocks[name], arrays[name] = shm, array
+        return cls(blocks, arrays, owner=True)
+
+    @classmethod
+    def attach(cls, spec):
+        """Abrir desde otro proceso con el resultado de spec()"""
+        blocks, arrays = {}, {}
+        for name, (shm_name, dtype, length) in spec.items():
+            shm = shared_memory.SharedMemory(name=shm_name)
+            blocks[name] = shm
+            arrays[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf)
+        return cls(blocks, arrays, owner=False)
+
+    def spec(self):
+        """Descripcion picklable (nombres de bloque, dtype, longitud)"""
+        return {
+            name: (self._blocks[name].name, array.dtype.str, len(array))
+            for name, array in self._arrays.items()
+        }
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __len__(self):
+        return len(self._arrays["timestamp"]) if "timestamp" in self._arrays else 0
+
+    def close(self):
+        self._arrays = {}
+        for shm in self._blocks.values():
+            try:
+                shm.close()
+                if self.owner:
+                    shm.unlink()
+            except Exception:
+                pass
+        self._blocks = {}
+
+
+def share_candles(candles):
+    """Copiar una lista de velas del bot a columnas compartidas"""
+    columns = columns_from_candles(candles)
+    shared = SharedColumns.create({name: (array.dtype, len(array)) for name, array in columns.items()})
+    for name, array in columns.items():
+        shared[name][:] = array
+    return shared
+
+
+def share_signals(n):
+    """Columnas para las senales precalculadas de n velas"""
+    return SharedColumns.create({
+        "action": ("i1", n),
+        "confidence": ("f8", n),
+        "sl_pips": ("f8", n),
+        "tp_pips": ("f8", n),
+        "setup": (SETUP_DTYPE, n),
+    })
+
+
+class ColumnSignals(Sequence):
+    """Senales precalculadas como secuencia (None donde no hay operacion)"""
+
+    def __init__(self, columns):
+        self._action = columns["action"]
+        self._confidence = columns["confidence"]
+        self._sl = columns["sl_pips"]
+        self._tp = columns["tp_pips"]
+        self._setup = columns["setup"]
+
+    def __len__(self):
+        return len(self._action)
+
+    def __getitem__(self, index):
+        action = int(self._action[index])
+        if action == 0:
+            return None
+        return {
+            "action": ACTIONS[action],
+            "confidence": float(self._confidence[index]),
+            "sl_pips": float(self._sl[index]),
+            "tp_pips": float(self._tp[index]),
+            "setup_name": self._setup[index].decode(),
+        }
+
+
+# ==============================
+# WORKERS
+# ==============================
+_worker = {}
+
+
+def _open_candles(source):
+    """("cache", ruta) -> memmap de backtest_cache; ("shm", spec) -> memoria compartida"""
+    kind, value = source
+    if kind == "cache":
+        return ColumnStore(value)
+    return SharedColumns.attach(value)
+
+
+def _init_worker(candle_source, signal_spec, base_config):
+    _worker["candles"] = _open_candles(candle_source)
+    _worker["signals"] = SharedColumns.attach(signal_spec) if signal_spec else None
+    _worker["base_config"] = base_config
+
+
+def _decide_range(bounds):
+    """Fase 1: decisiones del bot para las velas [start, stop)"""
+    start, stop = bounds
+    out = _worker["signals"]
+    candles = candles_from_columns(_worker["candles"], start, stop)
+    engine = BacktestEngine([], {**_worker["base_config"], "record_signals": False})
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset, candle in enumerate(candles):
+            i = start + offset
+            try:
+                signal = engine.decide_bar(candle)
+            except Exception:
+                signal = None
+            action = ACTIONS.index(signal.get("action")) if signal and signal.get("action") in ACTIONS else 0
+            out["action"][i] = action
+            if action:
+                out["confidence"][i] = signal.get("confidence", 0)
+                out["sl_pips"][i] = signal.get("sl_pips", 15)
+                out["tp_pips"][i] = signal.get("tp_pips", 25)
+                out["setup"][i] = str(signal.get("setup_name", "Unknown")).encode()
+    return stop - start
+
+
+def _run_combo(params):
+    """Fase 2: backtest de una combinacion -> fila resumen"""
+    base_config = _worker["base_config"]
+    config = {**base_config, **params}
+    if "sl_tp_by_setup" in params:
+        config["sl_tp_by_setup"] = {**base_config.get("sl_tp_by_setup", {}), **params["sl_tp_by_setup"]}
+
+    signals = ColumnSignals(_worker["signals"]) if _worker["signals"] is not None else None
+    engine = BacktestEngine(ColumnCandles(_worker["candles"], full=False), config, signals=signals)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = engine.run_backtest()
+    stats = results["stats"]
+
+    row = {"params": params, "seconds": round(time.perf_counter() - started, 3)}
+    for field in SUMMARY_FIELDS:
+        row[field] = stats.get(field, 0)
+    return row
+
+
+# ==============================
+# API
+# ==============================
+def build_grid(min_confidence=None, max_trades_per_day=None, lot_size=None, sl_tp=None):
+    """
+    Producto cartesiano de los valores dados -> lista de overrides de config.
+
+    Args:
+        min_confidence, max_trades_per_day, lot_size: Listas de valores
+        sl_tp: {setup: [(sl_pips, tp_pips), ...]} (cada setup es un eje)
+    """
+    axes = []
+    for key, values in (("min_confidence", min_confidence),
+                        ("max_trades_per_day", max_trades_per_day),
+                        ("lot_size", lot_size)):
+        if values:
+            axes.append([(key, value) for value in values])
+    for setup, options in (sl_tp or {}).items():
+        axes.append([("sl_tp", (setup, sl, tp)) for sl, tp in options])
+
+    grid = []
+    for choice in itertools.product(*axes):
+        params = {}
+        overrides = {}
+        for key, value in choice:
+            if key == "sl_tp":
+                setup, sl, tp = value
+                overrides[setup] = {"sl_pips": sl, "tp_pips": tp}
+            else:
+                params[key] = value
+        if overrides:
+            params["sl_tp_by_setup"] = overrides
+        grid.append(params)
+    return grid
+
+
+def rank_results(rows, sort_by="profit_factor", min_trades=1):
+    """
+    Ordenar filas: primero sort_by y luego el resto de RANK_METRICS como
+    desempate. Las filas con menos de min_trades trades van al final.
+    """
+    order = [sort_by] + [m for m in RANK_METRICS if m != sort_by]
+
+    def key(row):
+        values = []
+        for metric in order:
+            value = row.get(metric, 0) or 0
+            values.append(-value if RANK_METRICS.get(metric, True) else value)
+        return (row.get("total_trades", 0) < min_trades, *values)
+
+    return sorted(rows, key=key)
+
+
+@contextlib.contextmanager
+def sweep_pool(historical_data, base_config, workers=None, precompute_signals=True):
+    """
+    Pool de procesos con las velas (y las decisiones precalculadas) en
+    memoria compartida. Produce imap_unordered(func, tareas); func corre en
+    los workers y lee las columnas de _worker.
+
+    Args: ver iter_sweep (base_config ya completa)
+    """
+    workers = max(1, workers or os.cpu_count() or 1)
+    n = len(historical_data)
+
+    if isinstance(historical_data, ColumnCandles):
+        historical_data = historical_data.columns
+    if isinstance(historical_data, ColumnStore):
+        candles = None
+        candle_source = ("cache", historical_data.path)
+    else:
+        candles = share_candles(historical_data)
+        candle_source = ("shm", candles.spec())
+    signals = None
+    if precompute_signals and backtesting_engine.DECISION_ENGINE_AVAILABLE:
+        signals = share_signals(n)
+
+    init_args = (candle_source, signals.spec() if signals is not None else None, base_config)
+    try:
+        if workers == 1:
+            _init_worker(*init_args)
+            if signals is not None:
+                _decide_range((0, n))
+            yield map
+            return
+
+        ctx = get_context()
+        with ctx.Pool(workers, initializer=_init_worker, initargs=init_args) as pool:
+            if signals is not None:
+                step = max(1, -(-n // (workers * 4)))
+                ranges = [(start, min(start + step, n)) for start in range(0, n, step)]
+                for _ in pool.imap_unordered(_decide_range, ranges):
+                    pass
+            yield pool.imap_unordered
+    finally:
+        for shared in _worker.pop("candles", None), _worker.pop("signals", None):
+            if shared is not None:
+                shared.close()
+        if candles is not None:
+            candles.close()
+        if signals is not None:
+            signals.close()
+
+
+def iter_sweep(historical_data, grid, base_config=None, workers=None, precompute_signals=True):
+    """
+    Generador: ejecuta cada combinacion de grid en el pool y devuelve las
+    filas resumen en el orden en que terminan.
+
+    Args:
+        historical_data: Lista de velas (load_historical_data) o columnas de
+            backtest_cache (ColumnStore / load_historical_data(columnar=True));
+            las columnas en cache se abren por memmap en cada worker sin copiarlas
+        grid: Lista de overrides de config (build_grid)
+        base_config: Config comun (None = la de BacktestEngine)
+        workers: Procesos (None = todos los nucleos, 1 = sin pool)
+        precompute_signals: Calcular las decisiones una sola vez (requiere
+            el decision engine; sin el, cada combinacion usa la logica
+            simplificada del motor)
+    """
+    base_config = {**BacktestEngine([]).get_default_config(), **(base_config or {})}
+    with sweep_pool(historical_data, base_config, workers, precompute_signals) as imap:
+        for row in imap(_run_combo, grid):
+            yield row
+
+
+def run_sweep(historical_data, grid, base_config=None, workers=None,
+              sort_by="profit_factor", min_trades=1, on_result=None):
+    """
+    Barrido completo -> filas ordenadas (rank_results).
+
+    on_result(row, done, total) se llama con cada fila segun llega.
+    """
+    rows = []
+    for row in iter_sweep(historical_data, grid, base_config, workers):
+        rows.append(row)
+        if on_result:
+            on_result(row, len(rows), len(grid))
+    return rank_results(rows, sort_by, min_trades)
+
+
+def format_params(params):
+    parts = [f"{k}={v}" for k, v in params.items() if k != "sl_tp_by_setup"]
+    for setup, levels in params.get("sl_tp_by_setup", {}).items():
+        parts.append(f"{setup}={levels['sl_pips']:g}/{levels['tp_pips']:g}")
+    return " ".join(parts)
+
+
+def format_table(rows, top=None):
+    lines = [f"{'#':>4} {'PF':>6} {'MaxDD':>9} {'Sharpe':>7} {'Sortino':>7} {'Trades':>7} {'WR%':>6} {'Profit':>10}  Params"]
+    for rank, row in enumerate(rows[:top] if top else rows, 1):
+        lines.append(
+            f"{rank:>4} {row['profit_factor']:>6.2f} {row['max_drawdown']:>9.2f} "
+            f"{row['sharpe_ratio']:>7.3f} {row['sortino_ratio']:>7.3f} {row['total_trades']:>7} {row['win_rate']:>6.1f} "
+            f"{row['total_profit']:>10.2f}  {format_params(row['params'])}"
+        )
+    return "\n".join(lines)
+
+
+# ==============================
+# CLI
+# ==============================
+def _parse_list(text, cast):
+    return [cast(v) for v in text.split(",") if v.strip()] if text else None
+
+
+def _parse_sltp(items):
+    """["SETUP=15/25,20/35", ...] -> {"SETUP": [(15, 25), (20, 35)]}"""
+    result = {}
+    for item in items or []:
+        setup, _, options = item.partition("=")
+        pairs = []
+        for option in options.split(","):
+            sl, _, tp = option.partition("/")
+            pairs.append((float(sl), float(tp)))
+        result[setup.strip()] = pairs
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parametros del backtest en paralelo")
+    parser.add_argument("data", help="Archivo CSV/JSON de datos historicos")
+    parser.add_argument("--min-confidence", help="Valores separados por coma (p.ej. 0.6,0.7,0.75)")
+    parser.add_argument("--max-trades", help="Valores de max_trades_per_day")
+    parser.add_argument("--lot-size", help="Valores de lot_size")
+    parser.add_argument("--sltp", action="append", help="SETUP=sl/tp,sl/tp (repetible)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto todos los nucleos)")
+    parser.add_argument("--sort-by", default="profit_factor", choices=sorted(RANK_METRICS))
+    parser.add_argument("--min-trades", type=int, default=1, help="Minimo de trades para rankear arriba")
+    parser.add_argument("--top", type=int, default=20, help="Filas a mostrar")
+    parser.add_argument("--output", help="Guardar todas las filas ordenadas en JSON")
+    args = parser.parse_args(argv)
+
+    grid = build_grid(
+        min_confidence=_parse_list(args.min_confidence, float),
+        max_trades_per_day=_parse_list(args.max_trades, int),
+        lot_size=_parse_list(args.lot_size, float),
+        sl_tp=_parse_sltp(args.sltp),
+    )
+
+    print(f"📂 Cargando {args.data}...")
+    data = load_columns(args.data)
+    print(f"🧪 {len(grid)} combinaciones sobre {len(data)} velas")
+
+    started = time.time()
+
+    def on_result(row, done, total):
+        print(f"[{done}/{total}] PF {row['profit_factor']:.2f} | DD {row['max_drawdown']:.2f} | "
+              f"Sharpe {row['sharpe_ratio']:.3f} | {row['total_trades']} trades | {format_params(row['params'])}")
+
+    rows = run_sweep(data, grid, workers=args.workers, sort_by=args.sort_by,
+                     min_trades=args.min_trades, on_result=on_result)
+
+    print(f"\n✅ Barrido completado en {time.time() - started:.1f}s\n")
+    print(format_table(rows, args.top))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(json_safe(rows), f, indent=4)
+        print(f"\n✅ Resultados exportados a {args.output}")
+
+
+if __name__ == "__main__":
+    main()
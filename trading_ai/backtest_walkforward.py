@@ -0,0 +1,397 @@
+# backtest_walkforward.py
+
+"""
+Optimizacion walk-forward de los umbrales del bot
+
+MLAdaptiveSystem.learn_and_adapt ajusta min_confidence, cooldown y
+max_concurrent_trades en vivo con ventanas pequenas (ultimos 50 trades).
+Aqui se eligen los mismos parametros sobre el historico completo:
+
+  1. El historico se parte en ventanas rodantes: in-sample (IS) seguida
+     de out-of-sample (OOS); con anchored=True el IS crece desde el inicio
+  2. En cada IS se prueba la rejilla de parametros con PortfolioSimulator
+     (las reglas de main.run_cycle) y se elige la mejor (rank_results)
+  3. Los parametros elegidos se evaluan en el OOS siguiente, junto con la
+     config base como referencia
+
+Las ventanas son independientes: todas las tareas (ventana x combinacion)
+van al mismo pool de backtest_sweep, con las velas y las decisiones del
+bot calculadas una sola vez en memoria compartida.
+
+Salida: calendario de parametros (uno por ventana OOS) y reporte de
+estabilidad (parametros por ventana, eficiencia walk-forward, metricas
+OOS agregadas y la combinacion mas robusta en todas las ventanas).
+
+Uso:
+    python backtest_walkforward.py datos.csv --in-sample 20000 --out-sample 5000 \\
+        --min-confidence 30,35,40,50 --cooldown 15,30,60 --max-concurrent 1,2,3
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import backtest_sweep
+from backtest_sweep import SUMMARY_FIELDS, RANK_METRICS, ColumnSignals, rank_results, sweep_pool, format_params
+from backtest_cache import ColumnCandles, REPLAY_FIELDS, load_columns
+from backtest_metrics import json_safe, trade_metrics
+from backtesting_engine import BacktestEngine
+from portfolio_simulator import PortfolioSimulator
+from trade_gate import DEFAULT_BOT_CONFIG
+
+# Parametros que optimiza el walk-forward (los de learn_and_adapt)
+PARAMETERS = ("min_confidence", "cooldown", "max_concurrent_trades")
+
+DEFAULT_GRID = {
+    "min_confidence": [30, 35, 40, 50, 60],
+    "cooldown": [15, 30, 60, 120],
+    "max_concurrent_trades": [1, 2, 3, 5],
+}
+
+SIGNAL_FIELDS = ("action", "confidence", "sl_pips", "tp_pips", "setup")
+TRADE_FIELDS = ("profit", "pips", "entry_time", "exit_time", "setup")
+
+
+# ==============================
+# VENTANAS Y REJILLA
+# ==============================
+def build_windows(n, in_sample, out_sample, step=None, anchored=False):
+    """
+    Ventanas (is_start, is_stop, oos_start, oos_stop) en indices de vela.
+
+    Args:
+        n: Velas del historico
+        in_sample, out_sample: Velas de cada tramo
+        step: Avance entre ventanas (None = out_sample, OOS contiguos)
+        anchored: IS desde la vela 0 en todas las ventanas
+    """
+    step = step or out_sample
+    windows = []
+    start = 0
+    while start + in_sample + out_sample <= n:
+        is_stop = start + in_sample
+        windows.append((0 if anchored else start, is_stop, is_stop, is_stop + out_sample))
+        start += step
+    return windows
+
+
+def build_grid(min_confidence=None, cooldown=None, max_concurrent_trades=None):
+    """Producto cartesiano de los valores (None = DEFAULT_GRID) -> lista de params"""
+    axes = {
+        "min_confidence": min_confidence or DEFAULT_GRID["min_confidence"],
+        "cooldown": cooldown or DEFAULT_GRID["cooldown"],
+        "max_concurrent_trades": max_concurrent_trades or DEFAULT_GRID["max_concurrent_trades"],
+    }
+    return [dict(zip(axes, values)) for values in itertools.product(*axes.values())]
+
+
+# ==============================
+# WORKER
+# ==============================
+def _run_window(task):
+    """(fase, ventana, start, stop, params) -> fila resumen (+ trades en OOS)"""
+    phase, window, start, stop, params = task
+    worker = backtest_sweep._worker
+    columns = worker["candles"]
+    candles = ColumnCandles({name: columns[name][start:stop] for name in ("timestamp",) + REPLAY_FIELDS},
+                            full=False)
+    signals = None
+    if worker["signals"] is not None:
+        signals = ColumnSignals({name: worker["signals"][name][start:stop] for name in SIGNAL_FIELDS})
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = PortfolioSimulator(candles, {**worker["base_config"], **params}, signals=signals).run()
+    stats = results["stats"]
+
+    row = {"phase": phase, "window": window, "params": params,
+           "seconds": round(time.perf_counter() - started, 3)}
+    for field in SUMMARY_FIELDS:
+        row[field] = stats.get(field, 0)
+    if phase != "is":
+        row["trades"] = [{field: trade.get(field) for field in TRADE_FIELDS} for trade in results["trades"]]
+    return row
+
+
+# ==============================
+# REPORTE
+# ==============================
+def _summary(row):
+    return {field: row.get(field, 0) for field in SUMMARY_FIELDS}
+
+
+def parameter_stability(chosen):
+    """Estabilidad de cada parametro a lo largo de las ventanas"""
+    report = {}
+    for name in PARAMETERS:
+        values = [params[name] for params in chosen]
+        if not values:
+            continue
+        array = np.asarray(values, dtype=np.float64)
+        mode, count = Counter(values).most_common(1)[0]
+        mean = float(array.mean())
+        report[name] = {
+            "values": values,
+            "mode": mode,
+            "mode_share": count / len(values),
+            "mean": mean,
+            "std": float(array.std()),
+            "cv": float(array.std() / mean) if mean else 0.0,
+            "changes": int(sum(a != b for a, b in zip(values, values[1:]))),
+        }
+    return report
+
+
+def robust_params(is_rows, sort_by, min_trades):
+    """
+    Combinacion con mejor puesto medio en los IS de todas las ventanas
+    (percentil 0 = la mejor de su ventana)
+    """
+    by_window = defaultdict(list)
+    for row in is_rows:
+        by_window[row["window"]].append(row)
+
+    percentiles = defaultdict(list)
+    params = {}
+    for rows in by_window.values():
+        ranked = rank_results(rows, sort_by, min_trades)
+        for rank, row in enumerate(ranked):
+            key = json.dumps(row["params"], sort_keys=True)
+            params[key] = row["params"]
+            percentiles[key].append(rank / max(1, len(ranked) - 1))
+
+    if not percentiles:
+        return None
+    key, values = min(percentiles.items(), key=lambda item: (np.mean(item[1]), np.std(item[1])))
+    return {"params": params[key], "mean_rank_pct": float(np.mean(values)),
+            "std_rank_pct": float(np.std(values))}
+
+
+def _oos_metrics(rows, initial_balance):
+    trades = [trade for row in sorted(rows, key=lambda r: r["window"]) for trade in row["trades"]]
+    report = trade_metrics(trades, initial_balance)
+    report.pop("by_hour", None)
+    return report
+
+
+def _efficiency(schedule):
+    """Eficiencia walk-forward: profit por vela OOS / profit por vela IS (ventanas con IS > 0)"""
+    ratios = []
+    for entry in schedule:
+        is_rate = entry["in_sample"]["total_profit"] / max(1, entry["is_bars"])
+        if is_rate > 0:
+            ratios.append(entry["out_of_sample"]["total_profit"] / max(1, entry["oos_bars"]) / is_rate)
+    return float(np.mean(ratios)) if ratios else 0.0
+
+
+# ==============================
+# API
+# ==============================
+def run_walk_forward(historical_data, grid, in_sample, out_sample, step=None, anchored=False,
+                     base_config=None, workers=None, sort_by="profit_factor", min_trades=10,
+                     on_progress=None):
+    """
+    Walk-forward completo
+
+    Args:
+        historical_data: Lista de velas o columnas de backtest_cache (ver iter_sweep)
+        grid: Lista de params (build_grid)
+        in_sample, out_sample, step, anchored: Ver build_windows
+        base_config: Config del bot + BacktestEngine comun a todas las tareas
+        workers: Procesos (None = todos los nucleos)
+        sort_by, min_trades: Criterio para elegir en cada IS (rank_results)
+        on_progress(done, total): Progreso por tarea
+
+    Returns:
+        dict: windows, schedule (params por ventana con metricas IS/OOS),
+        stability, robust, oos (metricas OOS agregadas) y baseline_oos
+    """
+    base_config = {
+        **BacktestEngine([]).get_default_config(),
+        **DEFAULT_BOT_CONFIG,
+        "record_signals": False,
+        # Cada ventana empieza sin historial: sin exploracion ML, los
+        # umbrales probados son los que se aplican
+        "ml_exploration": False,
+        **(base_config or {})
+    }
+    baseline = {name: base_config.get(name) for name in PARAMETERS}
+    windows = build_windows(len(historical_data), in_sample, out_sample, step, anchored)
+    if not windows:
+        raise ValueError(f"Historico insuficiente: {len(historical_data)} velas para IS {in_sample} + OOS {out_sample}")
+
+    timestamps = historical_data["timestamp"] if hasattr(historical_data, "meta") else None
+    total = len(windows) * (len(grid) + 2)
+    done = 0
+    is_rows, oos_rows, baseline_rows = [], [], []
+
+    with sweep_pool(historical_data, base_config, workers) as imap:
+        # Fase IS: todas las ventanas x combinaciones
+        tasks = [("is", w, is_start, is_stop, params)
+                 for w, (is_start, is_stop, _, _) in enumerate(windows) for params in grid]
+        for row in imap(_run_window, tasks):
+            is_rows.append(row)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+        # Mejor combinacion de cada IS
+        chosen = {}
+        for w in range(len(windows)):
+            ranked = rank_results([row for row in is_rows if row["window"] == w], sort_by, min_trades)
+            chosen[w] = ranked[0]
+
+        # Fase OOS: elegida y config base
+        tasks = []
+        for w, (_, _, oos_start, oos_stop) in enumerate(windows):
+            tasks.append(("oos", w, oos_start, oos_stop, chosen[w]["params"]))
+            tasks.append(("baseline", w, oos_start, oos_stop, baseline))
+        for row in imap(_run_window, tasks):
+            (oos_rows if row["phase"] == "oos" else baseline_rows).append(row)
+            done += 1
+            if on_progress:
+                on_progress(done, total)
+
+    oos_by_window = {row["window"]: row for row in oos_rows}
+    schedule = []
+    for w, (is_start, is_stop, oos_start, oos_stop) in enumerate(windows):
+        entry = {
+            "window": w,
+            "is_bars": is_stop - is_start,
+            "oos_bars": oos_stop - oos_start,
+            "oos_start": oos_start,
+            "oos_stop": oos_stop,
+            "params": chosen[w]["params"],
+            "in_sample": _summary(chosen[w]),
+            "out_of_sample": _summary(oos_by_window[w]),
+        }
+        if timestamps is not None:
+            entry["from"] = timestamps[oos_start].decode()
+            entry["to"] = timestamps[oos_stop - 1].decode()
+        elif isinstance(historical_data, list):
+            entry["from"] = historical_data[oos_start].get("timestamp", "")
+            entry["to"] = historical_data[oos_stop - 1].get("timestamp", "")
+        schedule.append(entry)
+
+    initial_balance = base_config.get("initial_balance", 10000.0)
+    oos_profits = [entry["out_of_sample"]["total_profit"] for entry in schedule]
+    return {
+        "windows": len(windows),
+        "in_sample": in_sample,
+        "out_of_sample": out_sample,
+        "anchored": anchored,
+        "sort_by": sort_by,
+        "grid_size": len(grid),
+        "baseline": baseline,
+        "schedule": schedule,
+        "stability": {
+            "parameters": parameter_stability([entry["params"] for entry in schedule]),
+            "wf_efficiency": _efficiency(schedule),
+            "oos_profitable_pct": sum(p > 0 for p in oos_profits) / len(oos_profits) * 100,
+        },
+        "robust": robust_params(is_rows, sort_by, min_trades),
+        "oos": _oos_metrics(oos_rows, initial_balance),
+        "baseline_oos": _oos_metrics(baseline_rows, initial_balance),
+    }
+
+
+def format_report(report):
+    """Calendario y estabilidad en texto"""
+    lines = [f"{'W':>3} {'Desde':<20} {'IS PF':>6} {'OOS PF':>7} {'OOS Profit':>11} {'Trades':>7}  Params"]
+    for entry in report["schedule"]:
+        lines.append(
+            f"{entry['window']:>3} {str(entry.get('from', entry['oos_start']))[:19]:<20} "
+            f"{entry['in_sample']['profit_factor']:>6.2f} {entry['out_of_sample']['profit_factor']:>7.2f} "
+            f"{entry['out_of_sample']['total_profit']:>11.2f} {entry['out_of_sample']['total_trades']:>7}  "
+            f"{format_params(entry['params'])}"
+        )
+
+    stability = report["stability"]
+    lines += ["", "ESTABILIDAD:"]
+    for name, info in stability["parameters"].items():
+        lines.append(f"  {name}: moda {info['mode']} ({info['mode_share'] * 100:.0f}% de ventanas), "
+                     f"media {info['mean']:.1f} +/- {info['std']:.1f}, {info['changes']} cambios")
+    lines.append(f"  Eficiencia walk-forward: {stability['wf_efficiency']:.2f}")
+    lines.append(f"  Ventanas OOS con beneficio: {stability['oos_profitable_pct']:.1f}%")
+    if report["robust"]:
+        lines.append(f"  Mas robusta: {format_params(report['robust']['params'])} "
+                     f"(puesto medio {report['robust']['mean_rank_pct'] * 100:.0f}%)")
+
+    for label, key in (("OOS walk-forward", "oos"), (f"OOS config base ({format_params(report['baseline'])})", "baseline_oos")):
+        metrics = report[key]
+        lines.append(f"\n{label}: {metrics['total_trades']} trades | PF {metrics['profit_factor']:.2f} | "
+                     f"Profit ${metrics['total_profit']:.2f} | DD ${metrics['max_drawdown']:.2f} | "
+                     f"Sharpe {metrics['sharpe_ratio']:.2f}")
+    return "\n".join(lines)
+
+
+# ==============================
+# CLI
+# ==============================
+def _parse_list(text, cast):
+    return [cast(v) for v in text.split(",") if v.strip()] if text else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimizacion walk-forward de los umbrales del bot")
+    parser.add_argument("data", help="Archivo CSV/JSON de datos historicos")
+    parser.add_argument("--in-sample", type=int, required=True, help="Velas de cada ventana IS")
+    parser.add_argument("--out-sample", type=int, required=True, help="Velas de cada ventana OOS")
+    parser.add_argument("--step", type=int, help="Avance entre ventanas (por defecto --out-sample)")
+    parser.add_argument("--anchored", action="store_true", help="IS desde el inicio del historico")
+    parser.add_argument("--min-confidence", help="Valores en %% separados por coma")
+    parser.add_argument("--cooldown", help="Valores en segundos")
+    parser.add_argument("--max-concurrent", help="Valores de max_concurrent_trades")
+    parser.add_argument("--config", help="bot_config.json base (por defecto el de la carpeta)")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto todos los nucleos)")
+    parser.add_argument("--sort-by", default="profit_factor", choices=sorted(RANK_METRICS))
+    parser.add_argument("--min-trades", type=int, default=10, help="Minimo de trades IS para elegir")
+    parser.add_argument("--output", help="Guardar calendario y reporte en JSON")
+    args = parser.parse_args(argv)
+
+    base_config = {}
+    config_file = args.config or "bot_config.json"
+    if os.path.exists(config_file):
+        with open(config_file, "r") as f:
+            base_config.update(json.load(f))
+
+    grid = build_grid(
+        min_confidence=_parse_list(args.min_confidence, float),
+        cooldown=_parse_list(args.cooldown, float),
+        max_concurrent_trades=_parse_list(args.max_concurrent, int),
+    )
+
+    print(f"📂 Cargando {args.data}...")
+    data = load_columns(args.data)
+    windows = build_windows(len(data), args.in_sample, args.out_sample, args.step, args.anchored)
+    print(f"🧪 {len(windows)} ventanas x {len(grid)} combinaciones sobre {len(data)} velas")
+
+    started = time.time()
+
+    def on_progress(done, total):
+        if done % 50 == 0 or done == total:
+            print(f"[{done}/{total}] {time.time() - started:.1f}s")
+
+    report = run_walk_forward(data, grid, args.in_sample, args.out_sample, args.step, args.anchored,
+                              base_config, args.workers, args.sort_by, args.min_trades, on_progress)
+
+    print(f"\n✅ Walk-forward completado en {time.time() - started:.1f}s\n")
+    print(format_report(report))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(json_safe(report), f, indent=4)
+        print(f"\n✅ Reporte exportado a {args.output}")
+
+
+if __name__ == "__main__":
+    main()
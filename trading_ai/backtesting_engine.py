@@ -25,23 +25,122 @@ try:
     from decision_engine.context_analyzer import analyze_market_context
     from decision_engine.setup_selector import select_setup
     from decision_engine.signal_router import evaluate_signal
+    from executor.signal_emitters import MemorySignalEmitter, NullSignalEmitter
     DECISION_ENGINE_AVAILABLE = True
 except Exception as e:
     print(f"⚠️ Decision engine no disponible para backtesting: {e}")
     print("   Backtesting funcionará con lógica simplificada")
 
+from collections import deque
+from collections.abc import Sequence
+
+try:
+    from indicators.streaming import IndicatorSet
+except Exception:
+    IndicatorSet = None
+
+try:
+    import numpy as np
+    from backtest_exits import resolve_exits, EXIT_REASONS
+    VECTORIZED_EXITS_AVAILABLE = True
+except Exception:
+    VECTORIZED_EXITS_AVAILABLE = False
+
+try:
+    from backtest_metrics import RunningMetrics, compute_metrics, json_safe, parse_time, parse_times, PERIOD_SECONDS
+    METRICS_AVAILABLE = True
+except Exception:
+    METRICS_AVAILABLE = False
+    PERIOD_SECONDS = 86400
+
+    def json_safe(value):
+        return value
+
+PIP_VALUE_PRICE = 0.0001  # Para EURUSD
+
+
+class LookaheadBars:
+    """
+    Acceso por indice a un iterador de velas sin materializarlo.
+
+    Mantiene solo la vela actual y las que se piden hacia adelante
+    (lookahead de simulate_trade); las anteriores se descartan al avanzar.
+    """
+
+    def __init__(self, iterable, total_hint=None):
+        self._it = iter(iterable)
+        self._buf = deque()
+        self._offset = 0            # Indice absoluto de _buf[0]
+        self._exhausted = False
+        self.total_hint = total_hint
+
+    def _fill(self, index):
+        while not self._exhausted and self._offset + len(self._buf) <= index:
+            try:
+                self._buf.append(next(self._it))
+            except StopIteration:
+                self._exhausted = True
+
+    def __getitem__(self, index):
+        self._fill(index)
+        pos = index - self._offset
+        if pos < 0 or pos >= len(self._buf):
+            raise IndexError(index)
+        return self._buf[pos]
+
+    def end(self, limit):
+        """min(limit, total de velas) leyendo solo hasta `limit`"""
+        self._fill(limit - 1)
+        return min(limit, self._offset + len(self._buf))
+
+    def __len__(self):
+        if self.total_hint is not None:
+            return self.total_hint
+        raise TypeError("Longitud desconocida: usar total_hint")
+
+    def __iter__(self):
+        index = 0
+        while True:
+            self._fill(index)
+            # Descartar velas ya pasadas
+            while self._buf and self._offset < index:
+                self._buf.popleft()
+                self._offset += 1
+            if not self._buf:
+                return
+            yield self._buf[0]
+            index += 1
+
 
 class BacktestEngine:
     """Motor de backtesting"""
     
-    def __init__(self, historical_data, config=None):
+    def __init__(self, historical_data, config=None, total_hint=None, signals=None):
         """
         Args:
-            historical_data: Lista de datos de mercado históricos
+            historical_data: Lista (o secuencia) de datos de mercado históricos, o un
+                iterable/generador (p.ej. iter_historical_data) que se
+                consume sin cargarlo entero en memoria
             config: Configuración del backtest (opcional)
+            total_hint: Numero de velas esperado (solo para el progreso
+                cuando historical_data es un generador)
+            signals: Senales precalculadas por vela (signals[i] = salida de
+                decide_bar o None). Las decisiones no dependen de la config,
+                asi que un barrido de parametros las calcula una sola vez
         """
+        if not isinstance(historical_data, Sequence):
+            historical_data = LookaheadBars(historical_data, total_hint)
         self.historical_data = historical_data
         self.config = config or self.get_default_config()
+        self.signals = signals
+        
+        # Las señales nunca van al signal.json en vivo: memoria o descartadas
+        self.signal_emitter = None
+        if DECISION_ENGINE_AVAILABLE:
+            if self.config.get("record_signals", True):
+                self.signal_emitter = MemorySignalEmitter()
+            else:
+                self.signal_emitter = NullSignalEmitter()
         
         # Resultados del backtest
         self.trades = []
@@ -49,6 +148,11 @@ class BacktestEngine:
         self.balance = self.config.get("initial_balance", 10000)
         self.initial_balance = self.balance
         
+        # Métricas en curso (opcional, para reportar mientras corre)
+        self.metrics = None
+        if METRICS_AVAILABLE and self.config.get("running_metrics", False):
+            self.metrics = RunningMetrics(self.initial_balance, self.config.get("metrics_period", PERIOD_SECONDS))
+        
         # Stats
         self.stats = {
             "total_trades": 0,
@@ -67,7 +171,13 @@ class BacktestEngine:
             "pip_value": 10,  # Para EURUSD 0.01 lots
             "max_trades_per_day": 20,
             "min_confidence": 0.75,
-            "commission_per_trade": 0.0  # Comisión por trade si aplica
+            "commission_per_trade": 0.0,  # Comisión por trade si aplica
+            "record_signals": True,  # False = descartar señales (benchmarks)
+            "exit_horizon": 100,  # Velas de look-ahead para TP/SL
+            "vectorized_exits": True,  # Resolver salidas en lote con NumPy
+            "sl_tp_by_setup": {},  # {setup: {"sl_pips": x, "tp_pips": y}} sustituye los del evaluador
+            "metrics_period": PERIOD_SECONDS,  # Segundos por periodo de Sharpe/Sortino
+            "running_metrics": False  # Mantener RunningMetrics trade a trade
         }
     
     def run_backtest(self, progress_callback=None):
@@ -80,15 +190,30 @@ class BacktestEngine:
         Returns:
             dict: Resultados del backtest
         """
-        print(f"🧪 Iniciando backtest con {len(self.historical_data)} puntos de datos...")
+        try:
+            total_points = len(self.historical_data)
+        except TypeError:
+            total_points = None
+        
+        # Con datos en memoria las salidas se resuelven todas juntas al final
+        batch_exits = (
+            VECTORIZED_EXITS_AVAILABLE
+            and self.config.get("vectorized_exits", True)
+            and isinstance(self.historical_data, Sequence)
+        )
+        pending = []
+        
+        if total_points is None:
+            print("🧪 Iniciando backtest en streaming...")
+        else:
+            print(f"🧪 Iniciando backtest con {total_points} puntos de datos...")
         
-        total_points = len(self.historical_data)
         trades_today = 0
         current_date = None
         
         for i, market_data in enumerate(self.historical_data):
             # Reportar progreso
-            if progress_callback and i % 100 == 0:
+            if progress_callback and total_points and i % 100 == 0:
                 progress = (i / total_points) * 100
                 progress_callback(progress)
             
@@ -104,7 +229,9 @@ class BacktestEngine:
             
             # Analizar mercado
             try:
-                if not DECISION_ENGINE_AVAILABLE:
+                if self.signals is not None:
+                    signal = self.signals[i]
+                elif not DECISION_ENGINE_AVAILABLE:
                     # Fallback: Usar lógica simplificada sin módulos del bot
                     # Generar señal aleatoria para testing
                     import random
@@ -116,21 +243,13 @@ class BacktestEngine:
                             "tp_pips": 25,
                             "setup_name": "SIMPLIFIED_BACKTEST"
                         }
-                        self.simulate_trade(signal, market_data, i)
+                        self._enter_trade(signal, market_data, i, pending if batch_exits else None)
                         trades_today += 1
                     continue
                 
-                # Usar módulos del bot si están disponibles
-                context = analyze_market_context(market_data)
-                
-                # Seleccionar setup
-                setup = select_setup(context)
-                
-                if not setup:
-                    continue
-                
-                # Evaluar señal
-                signal = evaluate_signal(setup["name"], context, market_data)
+                else:
+                    # Usar módulos del bot si están disponibles
+                    signal = self.decide_bar(market_data)
                 
                 if not signal or signal.get("action") == "NONE":
                     continue
@@ -141,13 +260,16 @@ class BacktestEngine:
                     continue
                 
                 # Simular trade
-                self.simulate_trade(signal, market_data, i)
+                self._enter_trade(signal, market_data, i, pending if batch_exits else None)
                 trades_today += 1
                 
             except Exception as e:
                 # Ignorar errores en datos individuales
                 continue
         
+        if pending:
+            self._resolve_pending(pending)
+        
         # Calcular estadísticas finales
         self.calculate_final_stats()
         
@@ -155,41 +277,113 @@ class BacktestEngine:
         
         return self.get_results()
     
-    def simulate_trade(self, signal, entry_data, index):
-        """
-        Simular un trade individual
+    def decide_bar(self, market_data):
+        """Señal del bot para una vela (antes de los filtros del backtest), o None"""
+        context = analyze_market_context(market_data)
         
-        Args:
-            signal: Señal generada por el bot
-            entry_data: Datos de mercado en el momento de entrada
-            index: Índice en historical_data
-        """
+        # Seleccionar setup
+        setup = select_setup(context, verbose=getattr(self.signal_emitter, "log", False))
+        
+        if not setup:
+            return None
+        
+        # Evaluar señal
+        return evaluate_signal(setup["name"], context, market_data, emitter=self.signal_emitter)
+    
+    def _trade_levels(self, signal, entry_data):
+        """(action, entry_price, sl_price, tp_price) o None si no hay precio"""
         action = signal.get("action")
         entry_price = entry_data.get("bid" if action == "SELL" else "ask", 0)
         sl_pips = signal.get("sl_pips", 15)
         tp_pips = signal.get("tp_pips", 25)
         
         if entry_price == 0:
-            return
-        
-        # Calcular SL y TP
-        pip_value_price = 0.0001  # Para EURUSD
+            return None
         
         if action == "BUY":
-            sl_price = entry_price - (sl_pips * pip_value_price)
-            tp_price = entry_price + (tp_pips * pip_value_price)
+            sl_price = entry_price - (sl_pips * PIP_VALUE_PRICE)
+            tp_price = entry_price + (tp_pips * PIP_VALUE_PRICE)
         else:  # SELL
-            sl_price = entry_price + (sl_pips * pip_value_price)
-            tp_price = entry_price - (tp_pips * pip_value_price)
+            sl_price = entry_price + (sl_pips * PIP_VALUE_PRICE)
+            tp_price = entry_price - (tp_pips * PIP_VALUE_PRICE)
+        
+        return action, entry_price, sl_price, tp_price
+    
+    def apply_sl_tp_override(self, signal):
+        """SL/TP de config["sl_tp_by_setup"] para el setup de la señal, si hay"""
+        override = self.config.get("sl_tp_by_setup", {}).get(signal.get("setup_name"))
+        if override:
+            return {**signal, **override}
+        return signal
+    
+    def _enter_trade(self, signal, entry_data, index, pending=None):
+        """Simular ya, o dejar la entrada pendiente para resolverla en lote"""
+        signal = self.apply_sl_tp_override(signal)
+        if pending is None:
+            self.simulate_trade(signal, entry_data, index)
+            return
+        levels = self._trade_levels(signal, entry_data)
+        if levels is not None:
+            pending.append((signal, entry_data, index, levels))
+    
+    def high_low_arrays(self):
+        """Arrays high/low de todos los datos en memoria (campo ausente -> 0)"""
+        data = self.historical_data
+        if hasattr(data, "column"):
+            # Datos columnares (backtest_cache.ColumnCandles): arrays ya listos
+            return data.column("high"), data.column("low")
+        high = np.fromiter((c.get("high", 0) for c in data), dtype=np.float64, count=len(data))
+        low = np.fromiter((c.get("low", 0) for c in data), dtype=np.float64, count=len(data))
+        return high, low
+    
+    def _resolve_pending(self, pending):
+        """Resolver las salidas de todas las entradas con NumPy y registrarlas en orden"""
+        data = self.historical_data
+        high, low = self.high_low_arrays()
+        
+        entries = np.array([p[2] for p in pending], dtype=np.intp)
+        is_buy = np.array([p[3][0] == "BUY" for p in pending], dtype=bool)
+        sl = np.array([p[3][2] for p in pending], dtype=np.float64)
+        tp = np.array([p[3][3] for p in pending], dtype=np.float64)
+        
+        exit_index, reason = resolve_exits(
+            high, low, entries, is_buy, tp, sl,
+            horizon=self.config.get("exit_horizon", 100)
+        )
+        
+        for (signal, entry_data, index, levels), j, r in zip(pending, exit_index.tolist(), reason.tolist()):
+            action, entry_price, sl_price, tp_price = levels
+            exit_reason = EXIT_REASONS[r]
+            if exit_reason == "TP":
+                exit_price = tp_price
+            elif exit_reason == "SL":
+                exit_price = sl_price
+            else:
+                exit_price = data[j].get("bid" if action == "BUY" else "ask", entry_price)
+                j = index + 1
+            self._record_trade(signal, entry_data, levels, j, exit_price, exit_reason)
+    
+    def simulate_trade(self, signal, entry_data, index):
+        """
+        Simular un trade individual
+        
+        Args:
+            signal: Señal generada por el bot
+            entry_data: Datos de mercado en el momento de entrada
+            index: Índice en historical_data
+        """
+        levels = self._trade_levels(signal, entry_data)
+        if levels is None:
+            return
+        action, entry_price, sl_price, tp_price = levels
         
         # Buscar cierre del trade en datos futuros
         exit_index = index + 1
         exit_reason = "TIMEOUT"
         exit_price = entry_price
-        pips = 0
         
-        # Buscar hasta 100 puntos adelante o fin de datos
-        max_look_ahead = min(index + 100, len(self.historical_data))
+        # Buscar hasta exit_horizon puntos adelante o fin de datos
+        max_look_ahead = self._data_end(index + self.config.get("exit_horizon", 100))
         
         for j in range(index + 1, max_look_ahead):
             candle = self.historical_data[j]
@@ -228,11 +422,17 @@ class BacktestEngine:
             exit_data = self.historical_data[max_look_ahead - 1]
             exit_price = exit_data.get("bid" if action == "BUY" else "ask", entry_price)
         
+        self._record_trade(signal, entry_data, levels, exit_index, exit_price, exit_reason)
+    
+    def _record_trade(self, signal, entry_data, levels, exit_index, exit_price, exit_reason):
+        """Calcular resultado, actualizar balance/stats y guardar el trade"""
+        action, entry_price, sl_price, tp_price = levels
+        
         # Calcular resultado
         if action == "BUY":
-            pips = (exit_price - entry_price) / pip_value_price
+            pips = (exit_price - entry_price) / PIP_VALUE_PRICE
         else:
-            pips = (entry_price - exit_price) / pip_value_price
+            pips = (entry_price - exit_price) / PIP_VALUE_PRICE
         
         profit = pips * self.config["pip_value"] * self.config["lot_size"]
         profit -= self.config["commission_per_trade"]
@@ -244,7 +444,7 @@ class BacktestEngine:
         # Guardar trade
         trade = {
             "entry_time": entry_data.get("timestamp", ""),
-            "exit_time": self.historical_data[exit_index].get("timestamp", "") if exit_index < len(self.historical_data) else "",
+            "exit_time": self.historical_data[exit_index].get("timestamp", "") if exit_index < self._data_end(exit_index + 1) else "",
             "action": action,
             "setup": signal.get("setup_name", "Unknown"),
             "entry_price": entry_price,
@@ -267,12 +467,59 @@ class BacktestEngine:
             self.stats["wins"] += 1
         else:
             self.stats["losses"] += 1
+        
+        if self.metrics is not None:
+            self.metrics.update(profit, trade["pips"], parse_time(trade["entry_time"]),
+                                parse_time(trade["exit_time"]), trade["setup"])
+    
+    def _data_end(self, limit):
+        """min(limit, numero de velas) sin exigir len() a los generadores"""
+        if isinstance(self.historical_data, LookaheadBars):
+            return self.historical_data.end(limit)
+        return min(limit, len(self.historical_data))
     
     def calculate_final_stats(self):
         """Calcular estadísticas finales del backtest"""
         if self.stats["total_trades"] == 0:
             return
         
+        if METRICS_AVAILABLE:
+            self.stats.update(self.metrics_report())
+        else:
+            self._basic_final_stats()
+        
+        # Profit total
+        self.stats["total_profit"] = self.balance - self.initial_balance
+        self.stats["return_pct"] = (self.stats["total_profit"] / self.initial_balance) * 100
+    
+    def metrics_report(self):
+        """
+        Reporte de backtest_metrics sobre los trades (Sharpe/Sortino por
+        periodo, drawdown y su duracion, exposicion, por setup y por hora)
+        """
+        n = len(self.trades)
+        # P&L sin redondear, de la curva de equity
+        profit = np.diff(np.asarray(self.equity_curve, dtype=np.float64))[-n:] if n else np.zeros(0)
+        report = compute_metrics(
+            profit,
+            pips=np.fromiter((t["pips"] for t in self.trades), dtype=np.float64, count=n),
+            entry_time=parse_times([t["entry_time"] for t in self.trades]),
+            exit_time=parse_times([t["exit_time"] for t in self.trades]),
+            setup=[t["setup"] for t in self.trades],
+            initial_balance=self.initial_balance,
+            period=self.config.get("metrics_period", PERIOD_SECONDS)
+        )
+        # Contadores de _record_trade (pips sin redondear)
+        for key in ("total_trades", "wins", "losses", "total_pips"):
+            report.pop(key)
+        return report
+    
+    def running_report(self):
+        """Métricas hasta el último trade registrado (config running_metrics)"""
+        return self.metrics.report() if self.metrics is not None else {}
+    
+    def _basic_final_stats(self):
+        """Estadísticas sin NumPy (Sharpe simplificado por trade)"""
         # Win rate
         self.stats["win_rate"] = (self.stats["wins"] / self.stats["total_trades"]) * 100
         
@@ -315,10 +562,6 @@ class BacktestEngine:
                 std_return = statistics.stdev(returns) if len(returns) > 1 else 0
                 self.stats["sharpe_ratio"] = (avg_return / std_return) if std_return > 0 else 0
         
-        # Profit total
-        self.stats["total_profit"] = self.balance - self.initial_balance
-        self.stats["return_pct"] = (self.stats["total_profit"] / self.initial_balance) * 100
-        
         # Mejor/peor trade
         if self.trades:
             self.stats["best_trade"] = max(t["pips"] for t in self.trades)
@@ -337,60 +580,215 @@ class BacktestEngine:
         """Exportar resultados a archivo JSON"""
         results = self.get_results()
         
+        # Sortino puede ser inf (sin periodos en perdida): JSON estricto
         with open(filepath, "w") as f:
-            json.dump(results, f, indent=4)
+            json.dump(json_safe(results), f, indent=4)
         
         print(f"✅ Resultados exportados a {filepath}")
 
 
-def load_historical_data(filepath):
+def _csv_row_to_candle(row, indicators):
+    """Fila CSV -> vela en formato del bot (indicadores incrementales)"""
+    high = float(row.get("high", 0))
+    low = float(row.get("low", 0))
+    close = float(row.get("close", 0))
+    return {
+        "timestamp": row.get("timestamp") or row.get("time") or row.get("date"),
+        "open": float(row.get("open", 0)),
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": int(float(row.get("volume", 0) or 0)),
+        # Campos requeridos por el bot
+        "bid": close,  # Aproximación
+        "ask": close + 0.0002,  # Spread aprox
+        "spread": 2.0,
+        "indicators": indicators.update_ohlc(high, low, close)
+    }
+
+
+def iter_historical_data(filepath, indicator_mode="legacy"):
     """
-    Cargar datos históricos desde archivo
-    
-    Formatos soportados:
-    - JSON: Array de objetos con datos de velas
-    - CSV: Timestamp, Open, High, Low, Close, Volume
+    Generador de velas: recorre el CSV en una sola pasada con estado de
+    indicadores rodante (memoria constante por fila). JSON se carga entero
+    (el formato no permite streaming) y se recorre.
     """
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
     
-    # Detectar formato
     ext = filepath.split(".")[-1].lower()
     
     if ext == "json":
         with open(filepath, "r") as f:
             data = json.load(f)
-        return data
+        yield from data
     
     elif ext == "csv":
         import csv
-        data = []
+        indicators = CandleIndicatorStream(indicator_mode)
         
-        with open(filepath, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Convertir CSV a formato del bot
-                candle = {
-                    "timestamp": row.get("timestamp") or row.get("time") or row.get("date"),
-                    "open": float(row.get("open", 0)),
-                    "high": float(row.get("high", 0)),
-                    "low": float(row.get("low", 0)),
-                    "close": float(row.get("close", 0)),
-                    "volume": int(row.get("volume", 0)),
-                    # Campos requeridos por el bot
-                    "bid": float(row.get("close", 0)),  # Aproximación
-                    "ask": float(row.get("close", 0)) + 0.0002,  # Spread aprox
-                    "spread": 2.0,
-                    "indicators": generate_indicators_from_candles(data + [row])
-                }
-                data.append(candle)
-        
-        return data
+        with open(filepath, "r", newline="", buffering=1 << 20) as f:
+            for row in csv.DictReader(f):
+                yield _csv_row_to_candle(row, indicators)
     
     else:
         raise ValueError(f"Formato no soportado: {ext}")
 
 
+def iter_historical_chunks(filepath, chunk_size=50000, indicator_mode="legacy"):
+    """Igual que iter_historical_data pero en listas de hasta chunk_size velas"""
+    chunk = []
+    for candle in iter_historical_data(filepath, indicator_mode):
+        chunk.append(candle)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def load_historical_data(filepath, generator=False, indicator_mode="legacy", columnar=False):
+    """
+    Cargar datos históricos desde archivo
+    
+    Formatos soportados:
+    - JSON: Array de objetos con datos de velas
+    - CSV: Timestamp, Open, High, Low, Close, Volume
+    
+    Args:
+        generator: Si True devuelve un generador (BacktestEngine lo acepta)
+        indicator_mode: "legacy" o "streaming" (ver CandleIndicatorStream)
+        columnar: Si True devuelve una secuencia de velas sobre la cache
+            columnar en disco (backtest_cache): sin parsear tras la primera vez
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Archivo no encontrado: {filepath}")
+    
+    ext = filepath.split(".")[-1].lower()
+    if ext not in ("json", "csv"):
+        raise ValueError(f"Formato no soportado: {ext}")
+    
+    if columnar:
+        from backtest_cache import load_columns
+        return load_columns(filepath, indicator_mode).candles()
+    
+    candles = iter_historical_data(filepath, indicator_mode)
+    if generator:
+        return candles
+    return list(candles)
+
+
+class CandleIndicatorStream:
+    """
+    Indicadores por vela en O(1) respecto al historial acumulado.
+
+    mode="legacy": mismos valores que generate_indicators_from_candles
+        (solo mira las ultimas 20 velas, que se guardan en una ventana fija)
+    mode="streaming": EMA/RSI/MACD/Bollinger/ATR reales con el motor
+        incremental compartido (indicators.streaming.IndicatorSet)
+    """
+
+    WINDOW = 20
+    RSI_PERIOD = 14
+
+    def __init__(self, mode="legacy"):
+        if mode == "streaming" and IndicatorSet is None:
+            mode = "legacy"
+        self.mode = mode
+        self._set = IndicatorSet() if mode == "streaming" else None
+
+        # Ventanas del modo legacy (floats, sumadas en el mismo orden que
+        # generate_indicators_from_candles para dar valores identicos)
+        self._count = 0
+        self._closes = deque(maxlen=self.WINDOW)
+        self._highs = deque(maxlen=self.RSI_PERIOD)
+        self._lows = deque(maxlen=self.RSI_PERIOD)
+        self._gains = deque(maxlen=self.RSI_PERIOD)
+        self._losses = deque(maxlen=self.RSI_PERIOD)
+
+    def update(self, candle):
+        return self.update_ohlc(
+            float(candle.get("high", 0)),
+            float(candle.get("low", 0)),
+            float(candle.get("close", 0)),
+        )
+
+    def update_ohlc(self, high, low, close):
+        if self._set is not None:
+            indicators = self._set.update(high, low, close)
+            # Igual que el modo legacy: vacio hasta tener todos los valores
+            if indicators["ema"]["long"] is None or indicators["macd"]["main"] is None:
+                return {}
+            return indicators
+
+        if self._closes:
+            change = close - self._closes[-1]
+            if change > 0:
+                self._gains.append(change)
+                self._losses.append(0)
+            else:
+                self._gains.append(0)
+                self._losses.append(abs(change))
+        self._closes.append(close)
+        self._highs.append(high)
+        self._lows.append(low)
+        self._count += 1
+
+        if self._count < self.WINDOW:
+            return {}
+
+        avg_gain = sum(self._gains) / 14
+        avg_loss = sum(self._losses) / 14
+
+        if avg_loss == 0:
+            rsi = 100
+        else:
+            rs = avg_gain / avg_loss
+            rsi = 100 - (100 / (1 + rs))
+
+        sma = sum(self._closes) / 20
+
+        return {
+            "rsi": rsi,
+            "ema": {
+                "fast": sma,
+                "slow": sma,
+                "long": sma
+            },
+            "macd": {
+                "main": 0,
+                "signal": 0,
+                "histogram": 0
+            },
+            "bollinger": {
+                "upper": max(self._closes),
+                "middle": sma,
+                "lower": min(self._closes)
+            },
+            "atr": max(self._highs) - min(self._lows)
+        }
+
+    def snapshot(self):
+        if self._set is not None:
+            return {"mode": self.mode, "set": self._set.snapshot()}
+        return {
+            "mode": self.mode,
+            "count": self._count,
+            "windows": {name: list(getattr(self, name)) for name in
+                        ("_closes", "_highs", "_lows", "_gains", "_losses")}
+        }
+
+    def restore(self, state):
+        self.__init__(state["mode"])
+        if self._set is not None:
+            self._set.restore(state["set"])
+        else:
+            self._count = state["count"]
+            for name, values in state["windows"].items():
+                getattr(self, name).extend(values)
+        return self
+
+
 def generate_indicators_from_candles(candles):
     """
     Generar indicadores técnicos desde velas
@@ -0,0 +1,555 @@
+"""
+bingx_async.py — Variante asyncio del cliente de BingX
+
+AsyncBingXClient tiene los mismos métodos que BingXClient (como corrutinas),
+la misma firma HMAC y los mismos BingXError. Las lecturas independientes se
+lanzan a la vez (fan-out), así un ciclo tarda lo que la llamada más lenta y
+no la suma de todas:
+
+    snap = await client.bot_snapshot("BTC-USDT", "15m")     # posiciones + balance + velas
+    snap = await client.account_snapshot("BTC-USDT")         # + ticker + funding
+
+HTTP/1.1 sobre asyncio.open_connection (solo stdlib), con conexiones
+keep-alive reutilizadas como en ConnectionPool.
+
+LoopThread permite usarlo desde los hilos de la GUI: un event loop en un
+hilo de fondo y run(corrutina) bloqueante desde cualquier otro hilo.
+"""
+
+import asyncio
+import http.client
+import os
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bingx_client import (
+    BingXClient, BingXError, sign_params, request_url, parse_response, market_order_params,
+    kline_params, contracts_rules, CONTRACTS_REFRESH, DEFAULT_SYMBOL_RULES,
+)
+
+# Errores de un socket keep-alive que el servidor ya cerró
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    asyncio.IncompleteReadError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+    ssl.SSLEOFError,
+)
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# HTTP/1.1 asíncrono
+# ──────────────────────────────────────────────────────────────────────────────
+
+class _AsyncConnection:
+    """Par reader/writer de asyncio con contadores de uso."""
+
+    def __init__(self, reader, writer, conn_id: int):
+        self.reader   = reader
+        self.writer   = writer
+        self.id       = conn_id
+        self.created  = time.time()
+        self.last_use = self.created
+        self.requests = 0
+
+    def is_stale(self, max_idle: float) -> bool:
+        return self.reader.at_eof() or self.writer.is_closing() or time.time() - self.last_use > max_idle
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+async def _read_response(reader) -> tuple:
+    """Lee una respuesta HTTP/1.1 -> (status, cuerpo, will_close)."""
+    line = await reader.readline()
+    if not line:
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+    parts = line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise http.client.BadStatusLine(line)
+    status = int(parts[1])
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    will_close = headers.get("connection", "").lower() == "close" or parts[0] == "HTTP/1.0"
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                # Trailers hasta la línea vacía
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        will_close = True
+    return status, body, will_close
+
+
+class AsyncConnectionPool:
+    """
+    Conexiones keep-alive para un event loop (ver ConnectionPool).
+    Mismas reglas: reintento único sobre un socket reutilizado caducado,
+    y los POST solo si el fallo ocurrió al enviar.
+    """
+
+    MAX_IDLE = 20
+
+    def __init__(
+        self,
+        host:        str,
+        port:        int = None,
+        use_tls:     bool = True,
+        timeout:     float = 12,
+        size:        int = 8,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        self.host    = host
+        self.port    = port or (443 if use_tls else 80)
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self.size    = max(1, int(size))
+        self.ssl_context = ssl_context if ssl_context is not None else (
+            ssl.create_default_context() if use_tls else None
+        )
+        self._idle    = []
+        self._next_id = 0
+        self.created    = 0
+        self.reused     = 0
+        self.reconnects = 0
+
+    async def _new_connection(self) -> _AsyncConnection:
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port,
+            ssl=self.ssl_context if self.use_tls else None,
+            server_hostname=self.host if self.use_tls else None,
+        )
+        self._next_id += 1
+        self.created  += 1
+        return _AsyncConnection(reader, writer, self._next_id)
+
+    async def _acquire(self) -> _AsyncConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if not conn.is_stale(self.MAX_IDLE):
+                return conn
+            conn.close()
+        return await self._new_connection()
+
+    def _release(self, conn: _AsyncConnection):
+        if len(self._idle) < self.size:
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+    async def _send(self, conn, method, url, body, headers):
+        host = self.host if self.port in (80, 443) else f"{self.host}:{self.port}"
+        lines = [f"{method} {url} HTTP/1.1", f"Host: {host}", "Connection: keep-alive",
+                 f"Content-Length: {len(body)}"]
+        lines += [f"{k}: {v}" for k, v in headers.items()]
+        conn.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await conn.writer.drain()
+
+    async def request(self, method: str, url: str, body: bytes = b"", headers: dict = None) -> tuple:
+        """Devuelve (status, cuerpo en bytes)."""
+        method = method.upper()
+        for attempt in (0, 1):
+            conn   = await asyncio.wait_for(self._acquire(), self.timeout)
+            reused = conn.requests > 0
+            sent   = False
+            try:
+                await asyncio.wait_for(self._send(conn, method, url, body or b"", headers or {}), self.timeout)
+                sent = True
+                status, raw, will_close = await asyncio.wait_for(_read_response(conn.reader), self.timeout)
+            except _STALE_ERRORS:
+                conn.close()
+                # Un POST ya enviado podría haberse ejecutado en el servidor
+                if attempt or not reused or (sent and method == "POST"):
+                    raise
+                self.reconnects += 1
+                continue
+            except BaseException:
+                conn.close()
+                raise
+
+            conn.requests += 1
+            conn.last_use = time.time()
+            if reused:
+                self.reused += 1
+            if will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            return status, raw
+
+    def stats(self) -> dict:
+        return {
+            "size":       self.size,
+            "created":    self.created,
+            "reused":     self.reused,
+            "reconnects": self.reconnects,
+            "idle":       len(self._idle),
+        }
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+            try:
+                await conn.writer.wait_closed()
+            except Exception:
+                pass
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Cliente
+# ──────────────────────────────────────────────────────────────────────────────
+
+class AsyncBingXClient:
+    """
+    Cliente REST asíncrono para BingX Perpetual Swap API.
+    Mismos métodos que BingXClient, como corrutinas. Un cliente pertenece al
+    event loop en el que se usa por primera vez.
+    """
+
+    HOST      = BingXClient.HOST
+    TIMEOUT   = BingXClient.TIMEOUT
+    POOL_SIZE = 8   # el fan-out abre varias conexiones a la vez
+
+    def __init__(
+        self,
+        api_key:     str,
+        api_secret:  str,
+        pool_size:   int = POOL_SIZE,
+        base_url:    str = None,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        if not api_key or not api_secret:
+            raise BingXError(0, "API Key y Secret son obligatorios")
+        self.api_key    = api_key.strip()
+        self.api_secret = api_secret.strip()
+
+        url = urllib.parse.urlsplit(base_url or f"https://{self.HOST}")
+        self.pool = AsyncConnectionPool(
+            url.hostname,
+            url.port,
+            use_tls=url.scheme == "https",
+            timeout=self.TIMEOUT,
+            size=pool_size,
+            ssl_context=ssl_context,
+        )
+        self._rules        = {}     # símbolo -> symbol_rules (solo desde el event loop)
+        self._rules_loaded = 0.0
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def connection_stats(self) -> dict:
+        return self.pool.stats()
+
+    # ──────────────────────────────────────────
+    # Firma y HTTP interno
+    # ──────────────────────────────────────────
+
+    async def _request(
+        self,
+        method:  str,
+        path:    str,
+        params:  dict = None,
+        signed:  bool = False,
+    ) -> object:
+        """Realiza la petición HTTP y devuelve data del JSON de respuesta."""
+        p = dict(params or {})
+        if signed:
+            p = sign_params(self.api_secret, p)
+
+        headers = {
+            "X-BX-APIKEY":  self.api_key,
+            "Content-Type": "application/json",
+        }
+        # POST: params en query string, body vacío
+        _, body = await self.pool.request(method, request_url(path, p), b"", headers)
+        return parse_response(body.decode("utf-8"))
+
+    # ──────────────────────────────────────────
+    # Fan-out
+    # ──────────────────────────────────────────
+
+    @staticmethod
+    async def fanout(calls: dict) -> dict:
+        """
+        Ejecuta {nombre: corrutina} a la vez.
+        Devuelve {nombre: resultado o excepción}.
+        """
+        names   = list(calls)
+        results = await asyncio.gather(*calls.values(), return_exceptions=True)
+        return dict(zip(names, results))
+
+    async def bot_snapshot(
+        self, symbol: str, interval: str = "15m", limit: int = 150, start_time: int = None
+    ) -> dict:
+        """
+        Lecturas de un ciclo del bot: positions, balance, klines.
+        start_time: solo velas desde ese ms (relleno incremental de KlineStore).
+        """
+        return await self.fanout({
+            "positions": self.get_positions(symbol),
+            "balance":   self.get_balance(),
+            "klines":    self.get_klines(symbol, interval, limit, start_time),
+        })
+
+    async def account_snapshot(self, symbol: str) -> dict:
+        """Lecturas del refresco del panel: balance, positions, ticker, funding."""
+        return await self.fanout({
+            "balance":   self.get_balance(),
+            "positions": self.get_positions(),
+            "ticker":    self.get_ticker(symbol),
+            "funding":   self.get_funding_rate(symbol),
+        })
+
+    # ──────────────────────────────────────────
+    # Cuenta / Balance
+    # ──────────────────────────────────────────
+
+    async def ping(self) -> bool:
+        try:
+            await self._request("GET", "/openApi/swap/v2/server/time")
+            return True
+        except Exception:
+            return False
+
+    async def get_balance(self) -> dict:
+        data = await self._request("GET", "/openApi/swap/v2/user/balance", signed=True)
+        if isinstance(data, dict) and "balance" in data:
+            return data["balance"]
+        return data
+
+    async def get_uid(self) -> str:
+        try:
+            data = await self._request("GET", "/openApi/account/v1/uid", signed=True)
+            if isinstance(data, dict):
+                return str(data.get("uid", data.get("userId", "—")))
+            return str(data)
+        except Exception:
+            return "—"
+
+    # ──────────────────────────────────────────
+    # Datos de mercado
+    # ──────────────────────────────────────────
+
+    async def get_price(self, symbol: str) -> float:
+        data = await self._request("GET", "/openApi/swap/v2/quote/price", {"symbol": symbol})
+        return float(data.get("price", 0))
+
+    async def get_ticker(self, symbol: str) -> dict:
+        return await self._request("GET", "/openApi/swap/v2/quote/ticker", {"symbol": symbol})
+
+    async def get_klines(
+        self, symbol: str, interval: str = "15m", limit: int = 150,
+        start_time: int = None, end_time: int = None,
+    ) -> list:
+        data = await self._request(
+            "GET",
+            "/openApi/swap/v3/quote/klines",
+            kline_params(symbol, interval, limit, start_time, end_time),
+        )
+        return data if isinstance(data, list) else []
+
+    async def get_contracts(self) -> list:
+        data = await self._request("GET", "/openApi/swap/v2/quote/contracts")
+        return data if isinstance(data, list) else []
+
+    async def get_symbol_rules(self, symbol: str) -> dict:
+        rules = self._rules.get(symbol)
+        if rules is None and time.monotonic() - self._rules_loaded >= CONTRACTS_REFRESH:
+            self._rules_loaded = time.monotonic()
+            try:
+                self._rules.update(contracts_rules(await self.get_contracts()))
+            except Exception:
+                self._rules_loaded = 0.0
+            rules = self._rules.get(symbol)
+        return dict(rules or DEFAULT_SYMBOL_RULES)
+
+    async def get_funding_rate(self, symbol: str) -> float:
+        try:
+            data = await self._request("GET", "/openApi/swap/v2/quote/fundingRate", {"symbol": symbol})
+            rate = data.get("fundingRate") if isinstance(data, dict) else None
+            return float(rate) if rate is not None else 0.0
+        except Exception:
+            return 0.0
+
+    # ──────────────────────────────────────────
+    # Posiciones abiertas
+    # ──────────────────────────────────────────
+
+    async def get_positions(self, symbol: str = None) -> list:
+        params = {}
+        if symbol:
+            params["symbol"] = symbol
+        data = await self._request("GET", "/openApi/swap/v2/user/positions", params=params, signed=True)
+        positions = data if isinstance(data, list) else []
+        return [p for p in positions if float(p.get("positionAmt", 0)) != 0]
+
+    # ──────────────────────────────────────────
+    # Configurar apalancamiento / margen
+    # ──────────────────────────────────────────
+
+    async def _set_side_leverage(self, symbol: str, side: str, leverage: int) -> None:
+        try:
+            await self._request(
+                "POST",
+                "/openApi/swap/v2/trade/leverage",
+                {"symbol": symbol, "side": side, "leverage": leverage},
+                signed=True,
+            )
+        except BingXError as e:
+            # Ignorar error de "leverage sin cambio"
+            if e.code not in (80012, 80013):
+                raise
+
+    async def set_leverage(self, symbol: str, leverage: int) -> None:
+        """LONG y SHORT a la vez."""
+        results = await asyncio.gather(
+            *(self._set_side_leverage(symbol, side, leverage) for side in ("LONG", "SHORT")),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    async def set_margin_type(self, symbol: str, margin_type: str) -> None:
+        try:
+            await self._request(
+                "POST",
+                "/openApi/swap/v2/trade/marginType",
+                {"symbol": symbol, "marginType": margin_type},
+                signed=True,
+            )
+        except BingXError as e:
+            if e.code not in (80012, 80013, 80014):
+                raise
+
+    async def configure_symbol(self, symbol: str, margin_type: str, leverage: int) -> None:
+        """
+        Primero el tipo de margen (BingX puede rechazar el cambio mientras
+        se ajusta el apalancamiento) y después LONG y SHORT a la vez.
+        """
+        await self.set_margin_type(symbol, margin_type)
+        await self.set_leverage(symbol, leverage)
+
+    # ──────────────────────────────────────────
+    # Órdenes
+    # ──────────────────────────────────────────
+
+    async def place_market_order(
+        self,
+        symbol:        str,
+        side:          str,
+        position_side: str,
+        quantity:      float,
+        stop_loss:     float = None,
+        take_profit:   float = None,
+        price_precision:    int = None,
+        quantity_precision: int = None,
+    ) -> dict:
+        params = market_order_params(
+            symbol, side, position_side, quantity, stop_loss, take_profit,
+            price_precision, quantity_precision,
+        )
+        return await self._request("POST", "/openApi/swap/v2/trade/order", params, signed=True)
+
+    async def close_position(self, symbol: str, position_side: str, quantity: float) -> dict:
+        close_side = "SELL" if position_side == "LONG" else "BUY"
+        rules      = await self.get_symbol_rules(symbol)
+        return await self.place_market_order(
+            symbol, close_side, position_side, quantity,
+            quantity_precision=rules["quantity_precision"],
+        )
+
+    async def get_open_orders(self, symbol: str = None) -> list:
+        params = {}
+        if symbol:
+            params["symbol"] = symbol
+        data = await self._request("GET", "/openApi/swap/v2/trade/openOrders", params=params, signed=True)
+        return data if isinstance(data, list) else []
+
+    async def cancel_order(self, symbol: str, order_id) -> dict:
+        return await self._request(
+            "DELETE",
+            "/openApi/swap/v2/trade/order",
+            {"symbol": symbol, "orderId": order_id},
+            signed=True,
+        )
+
+    async def get_trade_history(self, symbol: str, limit: int = 50) -> list:
+        try:
+            data = await self._request(
+                "GET",
+                "/openApi/swap/v2/trade/allOrders",
+                {"symbol": symbol, "limit": limit},
+                signed=True,
+            )
+            return data if isinstance(data, list) else []
+        except Exception:
+            return []
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Event loop en un hilo de fondo (para la GUI)
+# ──────────────────────────────────────────────────────────────────────────────
+
+class LoopThread:
+    """
+    Event loop propio en un hilo daemon. run(corrutina) se puede llamar
+    desde cualquier hilo y bloquea hasta el resultado; así el cliente
+    asíncrono (y sus conexiones) se comparte entre el bot y la GUI.
+    """
+
+    def __init__(self):
+        self.loop    = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+
+    def run(self, coro, timeout: float = None):
+        return self.submit(coro).result(timeout)
+
+    def submit(self, coro):
+        """Sin bloquear: devuelve un concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self, client: AsyncBingXClient = None):
+        """Detiene el loop (cerrando antes las conexiones del cliente)."""
+        if client is not None:
+            try:
+                self.run(client.close(), timeout=5)
+            except Exception:
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
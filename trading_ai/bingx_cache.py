@@ -0,0 +1,236 @@
+"""
+bingx_cache.py — Caché TTL y coalescencia de lecturas para BingX
+
+El refresco de la GUI, el hilo del bot, "Refrescar posiciones" y la prueba
+de conexión piden balance y posiciones por su cuenta, muchas veces a la vez.
+Esta capa va delante de BingXClient / AsyncBingXClient:
+
+  - TTL por endpoint de lectura (READ_TTLS, en segundos)
+  - Single-flight: si una lectura idéntica ya está en curso (en cualquier
+    hilo o en el event loop del cliente asíncrono) se espera su resultado
+    en lugar de repetirla
+  - Invalidación explícita tras órdenes (place_market_order,
+    close_position, cancel_order) y cambios de leverage/margen
+
+Los clientes síncrono y asíncrono pueden compartir la misma ReadCache.
+Los valores devueltos son compartidos: no modificarlos.
+
+    cache   = ReadCache()
+    client  = CachedBingXClient(BingXClient(key, secret), cache)
+    aclient = CachedAsyncBingXClient(AsyncBingXClient(key, secret), cache)
+"""
+
+import asyncio
+import concurrent.futures
+import inspect
+import threading
+import time
+
+# TTL por método de lectura (segundos)
+READ_TTLS = {
+    "get_balance":       2.0,
+    "get_positions":     2.0,
+    "get_open_orders":   2.0,
+    "get_price":         1.0,
+    "get_ticker":        2.0,
+    "get_klines":        5.0,
+    "get_funding_rate":  60.0,
+    "get_trade_history": 10.0,
+    "get_uid":           3600.0,
+}
+
+# Escrituras -> lecturas que dejan obsoletas
+INVALIDATES = {
+    "place_market_order": ("get_balance", "get_positions", "get_open_orders", "get_trade_history"),
+    "close_position":     ("get_balance", "get_positions", "get_open_orders", "get_trade_history"),
+    "cancel_order":       ("get_open_orders", "get_trade_history"),
+    "set_leverage":       ("get_positions", "get_balance"),
+    "set_margin_type":    ("get_positions", "get_balance"),
+}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Caché compartida
+# ──────────────────────────────────────────────────────────────────────────────
+
+class ReadCache:
+    """
+    Valores con caducidad y lecturas en curso, por clave (método, args).
+    Segura entre hilos; las lecturas en curso son concurrent.futures.Future,
+    así un hilo puede esperar una lectura lanzada desde el event loop y al
+    revés.
+    """
+
+    def __init__(self, ttls: dict = None):
+        self.ttls        = {**READ_TTLS, **(ttls or {})}
+        self._lock       = threading.Lock()
+        self._values     = {}   # clave -> (expira, valor)
+        self._inflight   = {}   # clave -> Future
+        self._generation = {}   # método -> contador de invalidaciones
+        self.hits        = 0
+        self.misses      = 0
+        self.coalesced   = 0
+        self.invalidations = 0
+
+    def _lookup(self, key):
+        """
+        Bajo el lock: ("hit", valor) | ("wait", future) | ("fetch", future, generación)
+        """
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return "hit", entry[1]
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return "wait", future
+        self.misses += 1
+        future = concurrent.futures.Future()
+        self._inflight[key] = future
+        return "fetch", future, self._generation.get(key[0], 0)
+
+    def _finish(self, key, future, generation, value=None, error=None):
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            # Si hubo una invalidación mientras tanto, no se guarda
+            if error is None and self._generation.get(key[0], 0) == generation:
+                self._values[key] = (time.monotonic() + self.ttls.get(key[0], 0.0), value)
+        if error is None:
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    def get(self, key: tuple, fetch):
+        """Lectura síncrona: fetch() solo si no hay valor vigente ni lectura en curso."""
+        with self._lock:
+            state = self._lookup(key)
+        if state[0] == "hit":
+            return state[1]
+        if state[0] == "wait":
+            return state[1].result()
+
+        _, future, generation = state
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._finish(key, future, generation, error=e)
+            raise
+        self._finish(key, future, generation, value)
+        return value
+
+    async def aget(self, key: tuple, fetch):
+        """Lectura asíncrona: await fetch() con las mismas reglas que get()."""
+        with self._lock:
+            state = self._lookup(key)
+        if state[0] == "hit":
+            return state[1]
+        if state[0] == "wait":
+            return await asyncio.wrap_future(state[1])
+
+        _, future, generation = state
+        try:
+            value = await fetch()
+        except BaseException as e:
+            self._finish(key, future, generation, error=e)
+            raise
+        self._finish(key, future, generation, value)
+        return value
+
+    def invalidate(self, *methods):
+        """Descarta valores y lecturas en curso de esos métodos (todos si no se indica)."""
+        with self._lock:
+            methods = set(methods) or {key[0] for key in self._values} | {key[0] for key in self._inflight}
+            for method in methods:
+                self._generation[method] = self._generation.get(method, 0) + 1
+            # Las lecturas en curso terminan para quien ya espera, pero
+            # las peticiones nuevas lanzan otra
+            self._values   = {k: v for k, v in self._values.items() if k[0] not in methods}
+            self._inflight = {k: f for k, f in self._inflight.items() if k[0] not in methods}
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses + self.coalesced
+            return {
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "coalesced":     self.coalesced,
+                "invalidations": self.invalidations,
+                "saved_pct":     (self.hits + self.coalesced) / total * 100 if total else 0.0,
+                "entries":       len(self._values),
+            }
+
+
+def _cache_key(method, name: str, args: tuple, kwargs: dict) -> tuple:
+    """(método, argumentos normalizados): get_klines(s, "15m") == get_klines(s, interval="15m")"""
+    try:
+        bound = inspect.signature(method).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (name, tuple(bound.arguments.values()))
+    except TypeError:
+        return (name, args, tuple(sorted(kwargs.items())))
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Clientes con caché
+# ──────────────────────────────────────────────────────────────────────────────
+
+class CachedBingXClient:
+    """BingXClient con lecturas cacheadas; el resto de métodos pasa tal cual."""
+
+    def __init__(self, client, cache: ReadCache = None):
+        self.client = client
+        self.cache  = cache if cache is not None else ReadCache()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name in self.cache.ttls and callable(attr):
+            def read(*args, **kwargs):
+                key = _cache_key(attr, name, args, kwargs)
+                return self.cache.get(key, lambda: attr(*args, **kwargs))
+            return read
+        if name in INVALIDATES and callable(attr):
+            def write(*args, **kwargs):
+                try:
+                    return attr(*args, **kwargs)
+                finally:
+                    self.cache.invalidate(*INVALIDATES[name])
+            return write
+        return attr
+
+
+class CachedAsyncBingXClient:
+    """AsyncBingXClient con lecturas cacheadas (misma ReadCache posible)."""
+
+    def __init__(self, client, cache: ReadCache = None):
+        self.client = client
+        self.cache  = cache if cache is not None else ReadCache()
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name in self.cache.ttls and callable(attr):
+            async def read(*args, **kwargs):
+                key = _cache_key(attr, name, args, kwargs)
+                return await self.cache.aget(key, lambda: attr(*args, **kwargs))
+            return read
+        if name in INVALIDATES and callable(attr):
+            async def write(*args, **kwargs):
+                try:
+                    return await attr(*args, **kwargs)
+                finally:
+                    self.cache.invalidate(*INVALIDATES[name])
+            return write
+        return attr
+
+    # El fan-out del cliente llamando a los métodos cacheados de este objeto
+    async def bot_snapshot(
+        self, symbol: str, interval: str = "15m", limit: int = 150, start_time: int = None
+    ) -> dict:
+        return await type(self.client).bot_snapshot(self, symbol, interval, limit, start_time)
+
+    async def account_snapshot(self, symbol: str) -> dict:
+        return await type(self.client).account_snapshot(self, symbol)
+
+    async def configure_symbol(self, symbol: str, margin_type: str, leverage: int) -> None:
+        return await type(self.client).configure_symbol(self, symbol, margin_type, leverage)
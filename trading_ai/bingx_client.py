@@ -12,8 +12,18 @@ import hashlib
 import hmac
 import http.client
 import json
+import math
+import os
+import select
+import ssl
+import sys
+import threading
 import time
 import urllib.parse
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from indicators.streaming import StreamingEMA, StreamingRSI, StreamingATR
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -27,6 +37,354 @@ class BingXError(Exception):
         super().__init__(f"BingX [{code}]: {msg}")
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# Firma y respuesta (comunes al cliente síncrono y al asíncrono)
+# ──────────────────────────────────────────────────────────────────────────────
+
+def sign_params(api_secret: str, params: dict) -> dict:
+    """Añade timestamp y firma HMAC-SHA256."""
+    p = dict(params)
+    p["timestamp"] = int(time.time() * 1000)
+    # La firma se calcula sobre los params ordenados
+    raw = "&".join(f"{k}={v}" for k, v in sorted(p.items()))
+    sig = hmac.new(
+        api_secret.encode("utf-8"),
+        raw.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+    p["signature"] = sig
+    return p
+
+
+def request_url(path: str, params: dict) -> str:
+    query = urllib.parse.urlencode(params)
+    return f"{path}?{query}" if query else path
+
+
+def parse_response(raw: str) -> object:
+    """JSON de BingX -> data; BingXError si code != 0."""
+    try:
+        data = json.loads(raw)
+    except Exception:
+        raise BingXError(-1, f"Respuesta no JSON: {raw[:300]}")
+
+    code = data.get("code", -1)
+    if code != 0:
+        raise BingXError(code, data.get("msg", raw[:200]))
+
+    return data.get("data", data)
+
+
+def kline_params(
+    symbol: str, interval: str, limit: int, start_time: int = None, end_time: int = None
+) -> dict:
+    params = {"symbol": symbol, "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = int(start_time)
+    if end_time is not None:
+        params["endTime"] = int(end_time)
+    return params
+
+
+def market_order_params(
+    symbol:             str,
+    side:               str,
+    position_side:      str,
+    quantity:           float,
+    stop_loss:          float = None,
+    take_profit:        float = None,
+    price_precision:    int = None,
+    quantity_precision: int = None,
+) -> dict:
+    """
+    Parámetros de una orden de mercado con TP/SL opcionales.
+    price_precision / quantity_precision: decimales del contrato
+    (symbol_rules); por defecto los de BTC-USDT.
+    """
+    pp = DEFAULT_SYMBOL_RULES["price_precision"] if price_precision is None else price_precision
+    qp = DEFAULT_SYMBOL_RULES["quantity_precision"] if quantity_precision is None else quantity_precision
+    params = {
+        "symbol":       symbol,
+        "side":         side,
+        "positionSide": position_side,
+        "type":         "MARKET",
+        "quantity":     f"{quantity:.{qp}f}",
+    }
+    if take_profit:
+        params["takeProfit"] = json.dumps({
+            "type":        "TAKE_PROFIT_MARKET",
+            "stopPrice":   f"{take_profit:.{pp}f}",
+            "workingType": "MARK_PRICE",
+        })
+    if stop_loss:
+        params["stopLoss"] = json.dumps({
+            "type":        "STOP_MARKET",
+            "stopPrice":   f"{stop_loss:.{pp}f}",
+            "workingType": "MARK_PRICE",
+        })
+    return params
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Reglas de precisión por contrato
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Lo que se asumía antes para todos los símbolos (tamaño BTC)
+DEFAULT_SYMBOL_RULES = {"price_precision": 2, "quantity_precision": 4, "min_qty": 0.001}
+
+CONTRACTS_REFRESH = 300.0   # segundos mínimos entre recargas por símbolo desconocido
+
+
+def symbol_rules(contract: dict) -> dict:
+    """Entrada de /quote/contracts -> {price_precision, quantity_precision, min_qty}."""
+    def as_int(key, default):
+        try:
+            return int(contract.get(key))
+        except (TypeError, ValueError):
+            return default
+
+    pp = as_int("pricePrecision", DEFAULT_SYMBOL_RULES["price_precision"])
+    qp = as_int("quantityPrecision", DEFAULT_SYMBOL_RULES["quantity_precision"])
+    try:
+        min_qty = float(contract.get("tradeMinQuantity") or 0)
+    except (TypeError, ValueError):
+        min_qty = 0.0
+    return {
+        "price_precision":    pp,
+        "quantity_precision": qp,
+        "min_qty":            max(min_qty, 10 ** -qp),
+    }
+
+
+def contracts_rules(contracts) -> dict:
+    """Lista de contratos -> {símbolo: reglas}."""
+    if not isinstance(contracts, list):
+        return {}
+    return {c["symbol"]: symbol_rules(c) for c in contracts if isinstance(c, dict) and c.get("symbol")}
+
+
+def round_quantity(quantity: float, precision: int, min_qty: float = 0.0) -> float:
+    """Redondea hacia abajo al paso del contrato (nunca más riesgo del calculado)."""
+    step = 10 ** -precision
+    qty  = math.floor(quantity / step + 1e-9) * step
+    if qty < min_qty:
+        qty = math.ceil(min_qty / step - 1e-9) * step
+    return round(qty, precision)
+
+
+def round_levels(side: str, entry: float, stop_loss: float, take_profit: float,
+                 precision: int):
+    """
+    SL/TP redondeados a la precisión de precio del contrato.
+    None si al redondear quedan sobre la entrada, del lado equivocado o en 0.
+    """
+    entry = round(entry, precision)
+    sl    = round(stop_loss, precision)
+    tp    = round(take_profit, precision)
+    if sl <= 0 or tp <= 0:
+        return None
+    if side == "BUY" and not sl < entry < tp:
+        return None
+    if side == "SELL" and not tp < entry < sl:
+        return None
+    return sl, tp
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Pool de conexiones keep-alive
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Errores de un socket keep-alive que el servidor ya cerró
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+    ssl.SSLEOFError,
+)
+
+
+class _PooledConnection:
+    """HTTP(S)Connection con contadores de uso."""
+
+    def __init__(self, conn, conn_id: int):
+        self.conn     = conn
+        self.id       = conn_id
+        self.created  = time.time()
+        self.last_use = self.created
+        self.requests = 0
+
+    def is_stale(self, max_idle: float) -> bool:
+        """
+        Un socket inactivo que se puede leer está cerrado por el servidor
+        (EOF) o tiene datos inesperados: no se reutiliza. Tampoco uno
+        inactivo más de max_idle segundos (el servidor puede cerrarlo
+        justo mientras se envía la petición).
+        """
+        sock = self.conn.sock
+        if sock is None:
+            return False
+        if time.time() - self.last_use > max_idle:
+            return True
+        try:
+            readable, _, _ = select.select([sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def close(self):
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Conexiones persistentes (keep-alive) a un host, seguras entre hilos.
+
+    Cada petición toma una conexión libre (o abre una nueva) y la devuelve
+    al terminar; se guardan hasta `size` conexiones libres. Una conexión
+    caducada (cerrada por el servidor, RemoteDisconnected...) se sustituye
+    por una nueva y la petición se repite una vez. Los POST solo se repiten
+    si el fallo ocurrió al enviar, para no duplicar órdenes.
+    """
+
+    MAX_IDLE = 20  # segundos sin uso antes de descartar una conexión libre
+
+    def __init__(
+        self,
+        host:        str,
+        port:        int = None,
+        use_tls:     bool = True,
+        timeout:     float = 12,
+        size:        int = 4,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        self.host        = host
+        self.port        = port
+        self.use_tls     = use_tls
+        self.timeout     = timeout
+        self.size        = max(1, int(size))
+        self.ssl_context = ssl_context
+
+        self._lock    = threading.Lock()
+        self._idle    = []          # LIFO: la más reciente tiene el socket más "vivo"
+        self._next_id = 0
+        self._live    = {}                  # id -> conexión abierta (libre o en uso)
+        self._closed  = deque(maxlen=50)    # últimas conexiones cerradas
+        self.created    = 0
+        self.reused     = 0
+        self.reconnects = 0
+
+    def _new_connection(self) -> _PooledConnection:
+        if self.use_tls:
+            conn = http.client.HTTPSConnection(
+                self.host, self.port, timeout=self.timeout, context=self.ssl_context
+            )
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        with self._lock:
+            self._next_id += 1
+            self.created  += 1
+            pooled = _PooledConnection(conn, self._next_id)
+            self._live[pooled.id] = pooled
+        return pooled
+
+    def _acquire(self) -> _PooledConnection:
+        while True:
+            with self._lock:
+                pooled = self._idle.pop() if self._idle else None
+            if pooled is None:
+                return self._new_connection()
+            if not pooled.is_stale(self.MAX_IDLE):
+                return pooled
+            self._discard(pooled)
+
+    def _release(self, pooled: _PooledConnection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(pooled)
+                return
+        self._discard(pooled)
+
+    def _discard(self, pooled: _PooledConnection):
+        pooled.close()
+        with self._lock:
+            if self._live.pop(pooled.id, None) is not None:
+                self._closed.append(self._conn_stats(pooled))
+
+    @staticmethod
+    def _conn_stats(pooled: _PooledConnection) -> dict:
+        return {
+            "id":       pooled.id,
+            "requests": pooled.requests,
+            "reuses":   max(0, pooled.requests - 1),
+            "age":      round(time.time() - pooled.created, 1),
+        }
+
+    def request(self, method: str, url: str, body: bytes = None, headers: dict = None) -> tuple:
+        """
+        Envía la petición por una conexión del pool.
+        Devuelve (status, cuerpo en bytes).
+        """
+        method = method.upper()
+        for attempt in (0, 1):
+            pooled = self._acquire()
+            reused = pooled.requests > 0
+            sent   = False
+            try:
+                pooled.conn.request(method, url, body=body, headers=headers or {})
+                sent = True
+                resp = pooled.conn.getresponse()
+                raw  = resp.read()
+            except _STALE_ERRORS:
+                self._discard(pooled)
+                # Solo se reintenta sobre un socket reutilizado; un POST ya
+                # enviado podría haberse ejecutado en el servidor
+                if attempt or not reused or (sent and method == "POST"):
+                    raise
+                with self._lock:
+                    self.reconnects += 1
+                continue
+            except BaseException:
+                self._discard(pooled)
+                raise
+
+            pooled.requests += 1
+            pooled.last_use = time.time()
+            if reused:
+                with self._lock:
+                    self.reused += 1
+            if resp.will_close:
+                self._discard(pooled)
+            else:
+                self._release(pooled)
+            return resp.status, raw
+
+    def stats(self) -> dict:
+        """Contadores del pool y peticiones por conexión."""
+        with self._lock:
+            return {
+                "size":        self.size,
+                "created":     self.created,
+                "reused":      self.reused,
+                "reconnects":  self.reconnects,
+                "idle":        len(self._idle),
+                "connections": [self._conn_stats(p) for p in self._live.values()],
+                "closed":      list(self._closed),
+            }
+
+    def close(self):
+        """Cierra las conexiones libres."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._discard(pooled)
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Cliente principal
 # ──────────────────────────────────────────────────────────────────────────────
@@ -37,32 +395,54 @@ class BingXClient:
     Usa únicamente módulos de la stdlib (http.client, hmac, hashlib).
     """
 
-    HOST    = "open-api.bingx.com"
-    TIMEOUT = 12  # segundos
+    HOST      = "open-api.bingx.com"
+    TIMEOUT   = 12  # segundos
+    POOL_SIZE = 4   # conexiones keep-alive libres que se conservan
 
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(
+        self,
+        api_key:     str,
+        api_secret:  str,
+        pool_size:   int = POOL_SIZE,
+        base_url:    str = None,
+        ssl_context: ssl.SSLContext = None,
+    ):
+        """
+        base_url: p.ej. "http://127.0.0.1:8080" para un servidor de pruebas
+                  (por defecto https://HOST).
+        """
         if not api_key or not api_secret:
             raise BingXError(0, "API Key y Secret son obligatorios")
         self.api_key    = api_key.strip()
         self.api_secret = api_secret.strip()
 
+        url = urllib.parse.urlsplit(base_url or f"https://{self.HOST}")
+        self.pool = ConnectionPool(
+            url.hostname,
+            url.port,
+            use_tls=url.scheme == "https",
+            timeout=self.TIMEOUT,
+            size=pool_size,
+            ssl_context=ssl_context,
+        )
+        self._rules        = {}     # símbolo -> symbol_rules
+        self._rules_loaded = 0.0
+        self._rules_lock   = threading.Lock()
+
+    def close(self) -> None:
+        """Cierra las conexiones persistentes."""
+        self.pool.close()
+
+    def connection_stats(self) -> dict:
+        return self.pool.stats()
+
     # ──────────────────────────────────────────
     # Firma y HTTP interno
     # ──────────────────────────────────────────
 
     def _sign(self, params: dict) -> dict:
         """Añade timestamp y firma HMAC-SHA256."""
-        p = dict(params)
-        p["timestamp"] = int(time.time() * 1000)
-        # La firma se calcula sobre los params ordenados
-        raw = "&".join(f"{k}={v}" for k, v in sorted(p.items()))
-        sig = hmac.new(
-            self.api_secret.encode("utf-8"),
-            raw.encode("utf-8"),
-            hashlib.sha256,
-        ).hexdigest()
-        p["signature"] = sig
-        return p
+        return sign_params(self.api_secret, params)
 
     def _request(
         self,
@@ -76,36 +456,18 @@ class BingXClient:
         if signed:
             p = self._sign(p)
 
-        query = urllib.parse.urlencode(p)
-        url   = f"{path}?{query}" if query else path
+        url = request_url(path, p)
 
-        conn = http.client.HTTPSConnection(self.HOST, timeout=self.TIMEOUT)
         headers = {
             "X-BX-APIKEY":  self.api_key,
             "Content-Type": "application/json",
         }
-        try:
-            if method.upper() in ("GET", "DELETE"):
-                conn.request(method.upper(), url, headers=headers)
-            else:
-                # POST: params en query string, body vacío
-                conn.request("POST", url, body=b"", headers=headers)
-
-            resp = conn.getresponse()
-            raw  = resp.read().decode("utf-8")
-        finally:
-            conn.close()
-
-        try:
-            data = json.loads(raw)
-        except Exception:
-            raise BingXError(-1, f"Respuesta no JSON: {raw[:300]}")
-
-        code = data.get("code", -1)
-        if code != 0:
-            raise BingXError(code, data.get("msg", raw[:200]))
-
-        return data.get("data", data)
+        if method.upper() in ("GET", "DELETE"):
+            _, body = self.pool.request(method, url, headers=headers)
+        else:
+            # POST: params en query string, body vacío
+            _, body = self.pool.request("POST", url, body=b"", headers=headers)
+        return parse_response(body.decode("utf-8"))
 
     # ──────────────────────────────────────────
     # Cuenta / Balance
@@ -159,18 +521,43 @@ class BingXClient:
             "GET", "/openApi/swap/v2/quote/ticker", {"symbol": symbol}
         )
 
+    def get_contracts(self) -> list:
+        """Contratos perpetuos con pricePrecision, quantityPrecision, tradeMinQuantity..."""
+        data = self._request("GET", "/openApi/swap/v2/quote/contracts")
+        return data if isinstance(data, list) else []
+
+    def get_symbol_rules(self, symbol: str) -> dict:
+        """
+        Precisión de precio/cantidad y cantidad mínima del símbolo.
+        Los contratos se cargan una vez y se recargan (como mucho cada
+        CONTRACTS_REFRESH s) si aparece un símbolo desconocido; si no se
+        pueden obtener se usa DEFAULT_SYMBOL_RULES.
+        """
+        with self._rules_lock:
+            rules = self._rules.get(symbol)
+            if rules is None and time.monotonic() - self._rules_loaded >= CONTRACTS_REFRESH:
+                self._rules_loaded = time.monotonic()
+                try:
+                    self._rules.update(contracts_rules(self.get_contracts()))
+                except Exception:
+                    self._rules_loaded = 0.0
+                rules = self._rules.get(symbol)
+        return dict(rules or DEFAULT_SYMBOL_RULES)
+
     def get_klines(
-        self, symbol: str, interval: str = "15m", limit: int = 150
+        self, symbol: str, interval: str = "15m", limit: int = 150,
+        start_time: int = None, end_time: int = None,
     ) -> list:
         """
         Velas OHLCV.
         interval: 1m 3m 5m 15m 30m 1h 2h 4h 6h 12h 1d 3d 1w 1M
+        start_time / end_time: ms, opcionales (solo velas de ese rango)
         Devuelve lista de dicts con claves: o h l c v time
         """
         data = self._request(
             "GET",
             "/openApi/swap/v3/quote/klines",
-            {"symbol": symbol, "interval": interval, "limit": limit},
+            kline_params(symbol, interval, limit, start_time, end_time),
         )
         return data if isinstance(data, list) else []
 
@@ -246,30 +633,18 @@ class BingXClient:
         quantity:      float,
         stop_loss:     float = None,
         take_profit:   float = None,
+        price_precision:    int = None,
+        quantity_precision: int = None,
     ) -> dict:
         """
         Orden de mercado con TP/SL opcionales adjuntos.
+        price_precision / quantity_precision: de get_symbol_rules(symbol).
         Devuelve el dict de la orden creada.
         """
-        params = {
-            "symbol":       symbol,
-            "side":         side,
-            "positionSide": position_side,
-            "type":         "MARKET",
-            "quantity":     f"{quantity:.4f}",
-        }
-        if take_profit:
-            params["takeProfit"] = json.dumps({
-                "type":        "TAKE_PROFIT_MARKET",
-                "stopPrice":   f"{take_profit:.2f}",
-                "workingType": "MARK_PRICE",
-            })
-        if stop_loss:
-            params["stopLoss"] = json.dumps({
-                "type":        "STOP_MARKET",
-                "stopPrice":   f"{stop_loss:.2f}",
-                "workingType": "MARK_PRICE",
-            })
+        params = market_order_params(
+            symbol, side, position_side, quantity, stop_loss, take_profit,
+            price_precision, quantity_precision,
+        )
         return self._request(
             "POST", "/openApi/swap/v2/trade/order", params, signed=True
         )
@@ -279,7 +654,11 @@ class BingXClient:
     ) -> dict:
         """Cierra una posición en su totalidad con orden de mercado."""
         close_side = "SELL" if position_side == "LONG" else "BUY"
-        return self.place_market_order(symbol, close_side, position_side, quantity)
+        rules      = self.get_symbol_rules(symbol)
+        return self.place_market_order(
+            symbol, close_side, position_side, quantity,
+            quantity_precision=rules["quantity_precision"],
+        )
 
     def get_open_orders(self, symbol: str = None) -> list:
         """Órdenes pendientes (LIMIT / TP / SL sin ejecutar)."""
@@ -366,6 +745,15 @@ def _kf(k, full, short, default=0.0):
     return float(v) if v not in (None, "", "null") else default
 
 
+def _kline_time(k):
+    """Tiempo de apertura de la vela (ms), None si no viene."""
+    v = k.get("time", k.get("t"))
+    try:
+        return int(float(v))
+    except (TypeError, ValueError):
+        return None
+
+
 def generate_signal(klines: list) -> tuple:
     """
     Genera señal de trading con estrategia multicapa:
@@ -379,10 +767,21 @@ def generate_signal(klines: list) -> tuple:
     if len(klines) < 30:
         return None, 50.0, 0.0
 
-    opens  = [_kf(k, "open",  "o")  for k in klines]
     highs  = [_kf(k, "high",  "h")  for k in klines]
     lows   = [_kf(k, "low",   "l")  for k in klines]
     closes = [_kf(k, "close", "c")  for k in klines]
+    return signal_from_series(highs, lows, closes)
+
+
+def signal_from_series(highs, lows, closes) -> tuple:
+    """
+    generate_signal() sobre series ya parseadas (listas o arrays NumPy,
+    p. ej. las de KlineSeries.arrays()).
+    """
+    if len(closes) < 30:
+        return None, 50.0, 0.0
+
+    highs, lows, closes = list(map(float, highs)), list(map(float, lows)), list(map(float, closes))
 
     ema9  = _ema_series(closes, 9)
     ema21 = _ema_series(closes, 21)
@@ -395,6 +794,11 @@ def generate_signal(klines: list) -> tuple:
     e21_now  = ema21[min_len - 1]
     e21_prev = ema21[min_len - 2]
 
+    return _decide_signal(e9_now, e9_prev, e21_now, e21_prev, rsi, atr)
+
+
+def _decide_signal(e9_now, e9_prev, e21_now, e21_prev, rsi, atr) -> tuple:
+    """Reglas de entrada comunes a generate_signal y KlineSignalEngine."""
     trend_bull = e9_now > e21_now   # EMA9 por encima de EMA21 → tendencia alcista
     trend_bear = e9_now < e21_now   # EMA9 por debajo de EMA21 → tendencia bajista
 
@@ -421,6 +825,135 @@ def generate_signal(klines: list) -> tuple:
     return None, rsi, atr
 
 
+class KlineSignalEngine:
+    """
+    generate_signal() incremental: EMA9/EMA21/RSI14/ATR14 se actualizan
+    en O(1) por vela cerrada nueva en lugar de recalcularse sobre las 150
+    velas en cada ciclo. La ultima vela (en curso) se evalua con peek()
+    sin consolidarla.
+
+    La primera llamada (o tras un salto de velas / cambio de simbolo)
+    arranca en caliente con la ventana recibida y da exactamente lo mismo
+    que generate_signal(); despues los valores siguen el historial completo.
+    """
+
+    # generate_signal alinea ambas EMA por el final de la serie EMA21, asi que
+    # la EMA9 que compara es la de hace (21 - 9) velas: se mantiene igual.
+    _EMA9_LAG = 21 - 9
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, key=None):
+        self._key       = key
+        self._last_time = None
+        self._ema9      = StreamingEMA(9)
+        self._ema21     = StreamingEMA(21)
+        self._rsi       = StreamingRSI(14)
+        self._atr       = StreamingATR(14)
+        self._ema9_hist = deque(maxlen=self._EMA9_LAG + 1)
+
+    def _push(self, time, high, low, close):
+        self._ema9.update(close)
+        self._ema21.update(close)
+        self._rsi.update(close)
+        self._atr.update(high, low, close)
+        if self._ema9.value is not None:
+            self._ema9_hist.append(self._ema9.value)
+        self._last_time = time
+
+    def snapshot(self) -> dict:
+        return {
+            "key":       self._key,
+            "last_time": self._last_time,
+            "ema9":      self._ema9.snapshot(),
+            "ema21":     self._ema21.snapshot(),
+            "rsi":       self._rsi.snapshot(),
+            "atr":       self._atr.snapshot(),
+            "ema9_hist": list(self._ema9_hist),
+        }
+
+    def restore(self, state: dict):
+        self.reset(state.get("key"))
+        self._last_time = state["last_time"]
+        self._ema9.restore(state["ema9"])
+        self._ema21.restore(state["ema21"])
+        self._rsi.restore(state["rsi"])
+        self._atr.restore(state["atr"])
+        self._ema9_hist.extend(state["ema9_hist"])
+        return self
+
+    def update(self, klines: list, key=None) -> tuple:
+        """
+        Mismo contrato que generate_signal(klines) -> (signal, rsi, atr).
+        key: identifica simbolo/intervalo; si cambia se reinicia el estado.
+        """
+        if len(klines) < 30:
+            return None, 50.0, 0.0
+        if _kline_time(klines[-1]) is None:
+            return generate_signal(klines)
+
+        def bar_at(i):
+            k = klines[i]
+            return _kf(k, "high", "h"), _kf(k, "low", "l"), _kf(k, "close", "c")
+
+        return self._update(
+            len(klines), lambda i: _kline_time(klines[i]) or 0, bar_at,
+            lambda: generate_signal(klines), key,
+        )
+
+    def update_arrays(self, times, highs, lows, closes, key=None) -> tuple:
+        """
+        update() sobre arrays ya parseados (KlineSeries.arrays()): sin
+        dicts ni _kf, solo se leen las velas nuevas.
+        """
+        if len(closes) < 30:
+            return None, 50.0, 0.0
+
+        return self._update(
+            len(closes), lambda i: int(times[i]),
+            lambda i: (float(highs[i]), float(lows[i]), float(closes[i])),
+            lambda: signal_from_series(highs, lows, closes), key,
+        )
+
+    def _update(self, n: int, time_at, bar_at, fallback, key) -> tuple:
+        """
+        n velas (la ultima en curso); time_at(i) -> ms, bar_at(i) -> (h, l, c).
+        fallback() da el resultado completo mientras no hay historial.
+        """
+        if key != self._key:
+            self.reset(key)
+
+        # Velas cerradas posteriores a la ultima consolidada
+        i = n - 2
+        if self._last_time is not None:
+            while i >= 0 and time_at(i) > self._last_time:
+                i -= 1
+        if self._last_time is None or i < 0 or time_at(i) != self._last_time:
+            # Primer ciclo o hueco: arranque en caliente con la ventana
+            self.reset(key)
+            i = -1
+        for j in range(i + 1, n - 1):
+            self._push(time_at(j), *bar_at(j))
+
+        if len(self._ema9_hist) <= self._EMA9_LAG or self._ema21.value is None:
+            return fallback()
+
+        high, low, close = bar_at(n - 1)
+        e21_now  = self._ema21.peek(close)
+        e21_prev = self._ema21.value
+        e9_now   = self._ema9_hist[-self._EMA9_LAG]
+        e9_prev  = self._ema9_hist[-self._EMA9_LAG - 1]
+        rsi      = self._rsi.peek(close)
+        atr      = self._atr.peek(high, low, close)
+
+        return _decide_signal(
+            e9_now, e9_prev, e21_now, e21_prev,
+            50.0 if rsi is None else rsi,
+            0.0 if atr is None else atr,
+        )
+
+
 def calc_quantity(
     available_margin: float,
     risk_pct:         float,
@@ -428,17 +961,18 @@ def calc_quantity(
     stop_loss:        float,
     leverage:         int,
     min_qty:          float = 0.001,
+    quantity_precision: int = 4,
 ) -> float:
     """
     Calcula la cantidad a operar basada en riesgo %.
     risk_pct: porcentaje del balance a arriesgar (ej. 1.0 → 1 %).
+    min_qty / quantity_precision: reglas del contrato (symbol_rules).
     """
     if entry_price <= 0 or stop_loss <= 0:
-        return min_qty
+        return round_quantity(min_qty, quantity_precision, min_qty)
     price_risk = abs(entry_price - stop_loss)
     if price_risk == 0:
-        return min_qty
+        return round_quantity(min_qty, quantity_precision, min_qty)
     risk_usdt = available_margin * (risk_pct / 100.0)
     qty = risk_usdt / price_risk
-    qty = max(qty, min_qty)
-    return round(qty, 4)
+    return round_quantity(qty, quantity_precision, min_qty)
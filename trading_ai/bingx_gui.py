@@ -101,6 +101,9 @@ BINGX_DEFAULTS = {
     "max_positions":    3,
     "max_daily_trades": 20,
     "max_losses":       3,
+    "pool_size":        4,     # conexiones HTTPS keep-alive con BingX
+    "watchlist":        "",    # símbolos separados por comas; vacío = solo default_symbol
+    "scan_rate":        10.0,  # peticiones/s del escáner de watchlist
     # Estrategia (gestionados en pestaña Configuración del bot)
     "timeframe":        "15m",
     "ema_short":        9,
@@ -145,6 +148,13 @@ def _save_json(path, data):
         json.dump(data, f, indent=4, ensure_ascii=False)
 
 
+def _unwrap(value):
+    """Resultado de un fan-out: lanza la excepción si la lectura falló."""
+    if isinstance(value, BaseException):
+        raise value
+    return value
+
+
 # ──────────────────────────────────────────────────────────────────────────────
 # Widget helper: fila label / valor
 # ──────────────────────────────────────────────────────────────────────────────
@@ -180,6 +190,8 @@ class BingXPanel(tk.Frame):
 
         # Estado de conexión
         self._client       = None
+        self._aclient      = None   # AsyncBingXClient (lecturas en paralelo)
+        self._aloop        = None   # LoopThread donde corre _aclient
         self._conn_status  = "DISCONNECTED"
         self._balance_data = {}
         self._uid          = "—"
@@ -1016,6 +1028,8 @@ class BingXPanel(tk.Frame):
         op_f = section("OPERACIÓN DEL BOT", C_GREEN)
         field(op_f, 0, "Cooldown (seg):",              "cooldown",         "10–600")
         field(op_f, 1, "Confianza mínima (0-100):",    "min_confidence",   "0–100")
+        field(op_f, 2, "Watchlist (coma):",            "watchlist",        "vacío = solo símbolo por defecto")
+        field(op_f, 3, "Peticiones/s escáner:",        "scan_rate",        "default 10")
 
         # Botones
         save_f = tk.Frame(inner, bg=BG_DARK)
@@ -1140,26 +1154,55 @@ class BingXPanel(tk.Frame):
             self.after(10_000, _loop)
         self.after(10_000, _loop)
 
+    def _fanout(self, make_coro, calls: dict) -> dict:
+        """
+        Lecturas independientes -> {nombre: resultado o excepción}.
+        Con el cliente asíncrono van todas a la vez (make_coro(aclient));
+        sin él, una tras otra con el cliente síncrono (calls: {nombre: función}).
+        """
+        if self._aclient is not None:
+            try:
+                return self._aloop.run(make_coro(self._aclient), timeout=60)
+            except Exception as e:
+                return {name: e for name in calls}
+        results = {}
+        for name, call in calls.items():
+            try:
+                results[name] = call()
+            except Exception as e:
+                results[name] = e
+        return results
+
     def _fetch_and_update_all(self):
+        sym  = self.cfg.get("default_symbol", "BTC-USDT")
+        snap = self._fanout(
+            lambda c: c.account_snapshot(sym),
+            {
+                "balance":   lambda: self._client.get_balance(),
+                "positions": lambda: self._client.get_positions(),
+                "ticker":    lambda: self._client.get_ticker(sym),
+                "funding":   lambda: self._client.get_funding_rate(sym),
+            },
+        )
+
         try:
-            bal = self._client.get_balance()
+            bal = _unwrap(snap["balance"])
             self.after(0, lambda b=bal: self._apply_balance(b))
         except Exception:
             pass
 
         try:
-            pos = self._client.get_positions()
+            pos = _unwrap(snap["positions"])
             self.after(0, lambda p=pos: self._apply_positions(p))
         except Exception:
             pass
 
         try:
-            sym   = self.cfg.get("default_symbol", "BTC-USDT")
-            tkr   = self._client.get_ticker(sym)
+            tkr   = _unwrap(snap["ticker"])
             price = float(tkr.get("lastPrice", tkr.get("price", 0)))
             chg   = float(tkr.get("priceChangePercent", 0))
             vol   = float(tkr.get("quoteVolume", tkr.get("volume", 0)))
-            fr    = self._client.get_funding_rate(sym)
+            fr    = _unwrap(snap["funding"])
             self.after(0, lambda: self._apply_market(sym, price, chg, vol, fr))
         except Exception:
             pass
@@ -1182,7 +1225,23 @@ class BingXPanel(tk.Frame):
     def _do_connect(self, key, secret):
         try:
             from bingx_client import BingXClient
-            client = BingXClient(key, secret)
+            from bingx_cache import ReadCache, CachedBingXClient, CachedAsyncBingXClient
+
+            # Bot, refresco y paneles comparten lecturas (TTL + single-flight)
+            cache  = ReadCache()
+            client = CachedBingXClient(
+                BingXClient(key, secret, pool_size=int(self.cfg.get("pool_size", 4))), cache
+            )
+
+            # Cliente asíncrono para las lecturas en paralelo (opcional)
+            aclient = None
+            try:
+                from bingx_async import AsyncBingXClient, LoopThread
+                if self._aloop is None:
+                    self._aloop = LoopThread()
+                aclient = CachedAsyncBingXClient(AsyncBingXClient(key, secret), cache)
+            except Exception as e:
+                print(f"⚠️ Cliente asíncrono no disponible: {e}")
 
             # 1. Balance (verifica autenticación)
             bal = client.get_balance()
@@ -1205,7 +1264,12 @@ class BingXPanel(tk.Frame):
                 positions = []
 
             def _apply():
+                if self._client is not None and self._client is not client:
+                    self._client.close()
+                if self._aclient is not None and self._aclient is not aclient:
+                    self._aloop.submit(self._aclient.close())
                 self._client    = client
+                self._aclient   = aclient
                 self._uid       = uid
                 self._positions = positions
                 self._set_conn_status("CONNECTED")
@@ -1461,7 +1525,7 @@ class BingXPanel(tk.Frame):
                           "cooldown", "max_daily_trades", "max_losses",
                           "ema_short", "ema_long", "rsi_period",
                           "rsi_overbought", "rsi_oversold"}
-            float_keys = {"risk_percent", "atr_sl_mult", "atr_tp_mult"}
+            float_keys = {"risk_percent", "atr_sl_mult", "atr_tp_mult", "scan_rate"}
             for key, var in self._cfg_vars.items():
                 val = var.get().strip()
                 if key in int_keys:
@@ -1558,12 +1622,21 @@ class BingXPanel(tk.Frame):
     # ──────────────────────────────────────────
 
     def _bot_loop(self):
-        from bingx_client import generate_signal, calc_quantity
+        from bingx_client import KlineSignalEngine, calc_quantity
+        from bingx_klines import KlineStore
+        from bingx_scanner import WatchlistScanner
         self._log_safe("Hilo del bot activo.", "dim")
 
+        # Indicadores incrementales: solo procesan las velas nuevas de cada ciclo
+        engine  = KlineSignalEngine()
+        # Velas: ventana completa una vez, después solo las nuevas
+        store   = KlineStore(backfill=150)
+        # Watchlist: peticiones/s limitadas por scan_rate
+        scanner = WatchlistScanner(rate=float(self.cfg.get("scan_rate", 10.0)), store=store)
+
         while self.bot_state == "RUNNING":
             try:
-                self._bot_cycle(generate_signal, calc_quantity)
+                self._bot_cycle(engine, store, scanner, calc_quantity)
             except Exception as e:
                 self._log_safe(f"Error en ciclo: {e}", "err")
 
@@ -1575,12 +1648,10 @@ class BingXPanel(tk.Frame):
 
         self._log_safe("Hilo del bot finalizado.", "dim")
 
-    def _bot_cycle(self, gen_signal, calc_qty):
+    def _bot_cycle(self, engine, store, scanner, calc_qty):
+        from bingx_scanner import parse_watchlist
         cfg    = self.cfg
         sym    = cfg.get("default_symbol",   "BTC-USDT")
-        lev    = int(cfg.get("default_leverage", 10))
-        mtp    = cfg.get("margin_type",      "ISOLATED")
-        rsk    = float(cfg.get("risk_percent", 1.0))
         max_d  = int(cfg.get("max_daily_trades", 20))
         max_l  = int(cfg.get("max_losses",       3))
         max_p  = int(cfg.get("max_positions",    3))
@@ -1595,9 +1666,27 @@ class BingXPanel(tk.Frame):
             self.after(0, self._stop_bot)
             return
 
+        # Con watchlist se escanean todos sus símbolos en lugar de default_symbol
+        watchlist = parse_watchlist(cfg.get("watchlist", ""))
+        if watchlist:
+            self._scan_cycle(scanner, watchlist, calc_qty, ts)
+            return
+
+        # Posiciones, balance y velas se piden a la vez
+        tf   = cfg.get("timeframe", "15m")
+        kp   = store.fetch_params(sym, tf)
+        snap = self._fanout(
+            lambda c: c.bot_snapshot(sym, tf, kp["limit"], kp["start_time"]),
+            {
+                "positions": lambda: self._client.get_positions(sym),
+                "balance":   lambda: self._client.get_balance(),
+                "klines":    lambda: self._client.get_klines(sym, interval=tf, **kp),
+            },
+        )
+
         # Posiciones actuales
         try:
-            positions = self._client.get_positions(sym)
+            positions = _unwrap(snap["positions"])
             active    = [p for p in positions if float(p.get("positionAmt", 0)) != 0]
             if len(active) >= max_p:
                 self._log_safe(f"[{ts}] Máx. posiciones abiertas ({max_p}).", "dim")
@@ -1611,7 +1700,7 @@ class BingXPanel(tk.Frame):
 
         # Balance
         try:
-            bal   = self._client.get_balance()
+            bal   = _unwrap(snap["balance"])
             avail = float(bal.get("availableMargin", 0))
             self.after(0, lambda b=bal: self._apply_balance(b))
         except Exception as e:
@@ -1623,20 +1712,20 @@ class BingXPanel(tk.Frame):
             return
 
         # Velas
-        tf = cfg.get("timeframe", "15m")
         try:
-            klines = self._client.get_klines(sym, interval=tf, limit=150)
-            if len(klines) < 30:
-                self._log_safe(f"[{ts}] Pocas velas ({len(klines)}).", "dim")
+            series = store.merge(sym, tf, _unwrap(snap["klines"]), kp["start_time"])
+            if len(series) < 30:
+                self._log_safe(f"[{ts}] Pocas velas ({len(series)}).", "dim")
                 return
         except Exception as e:
             self._log_safe(f"[{ts}] Error velas: {e}", "warn")
             return
 
         # Señal
-        signal, rsi, atr = gen_signal(klines)
-        last = klines[-1]
-        price = float(last.get("close", last.get("c", 0)))
+        signal, rsi, atr = engine.update_arrays(
+            series.time, series.high, series.low, series.close, key=f"{sym}:{tf}"
+        )
+        price = float(series.close[-1])
 
         # Actualizar panel IA con análisis de mercado (siempre, con o sin señal)
         self._ai_rsi   = rsi
@@ -1657,6 +1746,112 @@ class BingXPanel(tk.Frame):
         if signal is None:
             return
 
+        self._execute_signal(sym, signal, price, rsi, atr, avail, calc_qty, ts)
+
+    def _scan_cycle(self, scanner, watchlist, calc_qty, ts):
+        """
+        Ciclo con watchlist: escanea los símbolos sin posición y abre los
+        mejor puntuados hasta max_positions.
+        """
+        cfg   = self.cfg
+        tf    = cfg.get("timeframe", "15m")
+        max_p = int(cfg.get("max_positions", 3))
+        max_d = int(cfg.get("max_daily_trades", 20))
+
+        snap = self._fanout(
+            lambda c: c.fanout({"positions": c.get_positions(), "balance": c.get_balance()}),
+            {
+                "positions": lambda: self._client.get_positions(),
+                "balance":   lambda: self._client.get_balance(),
+            },
+        )
+
+        # Posiciones abiertas en cualquier símbolo
+        try:
+            positions = _unwrap(snap["positions"])
+            active    = [p for p in positions if float(p.get("positionAmt", 0)) != 0]
+            held      = {p.get("symbol") for p in active}
+            slots     = max_p - len(active)
+            if slots <= 0:
+                self._log_safe(f"[{ts}] Máx. posiciones abiertas ({max_p}).", "dim")
+                return
+        except Exception as e:
+            self._log_safe(f"[{ts}] Error posiciones: {e}", "warn")
+            return
+
+        try:
+            bal   = _unwrap(snap["balance"])
+            avail = float(bal.get("availableMargin", 0))
+            self.after(0, lambda b=bal: self._apply_balance(b))
+        except Exception as e:
+            self._log_safe(f"[{ts}] Error balance: {e}", "warn")
+            return
+
+        if avail < 5:
+            self._log_safe(f"[{ts}] Margen insuficiente ({avail:.2f} USDT).", "warn")
+            return
+
+        # El escaneo tiene que caber en el cooldown
+        cooldown = max(10, int(cfg.get("cooldown", 60)))
+        try:
+            ranked = scanner.scan(
+                [s for s in watchlist if s not in held], tf,
+                self._client, self._aclient, self._aloop,
+                deadline=0.75 * cooldown,
+                min_score=float(cfg.get("min_confidence", 0)),
+            )
+        except Exception as e:
+            self._log_safe(f"[{ts}] Error escaneando watchlist: {e}", "warn")
+            return
+
+        st = scanner.last_stats
+        self._log_safe(
+            f"[{ts}] Watchlist: {st['scanned']}/{st['symbols']} símbolos en {st['seconds']:.1f}s | "
+            f"señales: {st['signals']} | candidatos: {st['candidates']}"
+            + (f" | saltados: {st['skipped']}" if st["skipped"] else "")
+            + (f" | errores: {len(st['errors'])}" if st["errors"] else ""),
+            "info",
+        )
+        for c in ranked[:3]:
+            self._log_safe(
+                f"    {c['symbol']} {c['signal']} | score {c['score']:.1f} | RSI: {c['rsi']:.1f} | "
+                f"ATR: {c['atr']:.4f} | funding: {c['funding'] * 100:+.4f}%",
+                "dim",
+            )
+
+        if not ranked:
+            self.after(0, lambda s=f"NINGUNA  ({ts})": self._v_signal.set(s))
+            return
+
+        best = ranked[0]
+        self._ai_rsi = best["rsi"]
+        self._ai_atr = best["atr"]
+        self.after(0, lambda c=best: self._update_ai_panel(
+            c["rsi"], c["atr"], c["signal"], c["price"], c["symbol"]))
+
+        # Si un candidato no se puede abrir (SL/TP inválidos, error...) se pasa al siguiente
+        opened = 0
+        for c in ranked:
+            if opened >= slots or self._daily_trades >= max_d or avail < 5:
+                break
+            used = self._execute_signal(
+                c["symbol"], c["signal"], c["price"], c["rsi"], c["atr"], avail, calc_qty, ts
+            )
+            if used > 0:
+                opened += 1
+                avail  -= used
+
+    def _execute_signal(self, sym, signal, price, rsi, atr, avail, calc_qty, ts) -> float:
+        """
+        Abre la posición de una señal (SL/TP por ATR, leverage/margen, orden,
+        historial). Devuelve el margen usado (0 si no se abrió).
+        """
+        from bingx_client import DEFAULT_SYMBOL_RULES, round_levels
+        cfg    = self.cfg
+        lev    = int(cfg.get("default_leverage", 10))
+        mtp    = cfg.get("margin_type",      "ISOLATED")
+        rsk    = float(cfg.get("risk_percent", 1.0))
+
         # SL / TP usando multiplicadores de config
         sl_mult = float(cfg.get("atr_sl_mult", 1.5))
         tp_mult = float(cfg.get("atr_tp_mult", 3.0))
@@ -1665,20 +1860,40 @@ class BingXPanel(tk.Frame):
         else:
             sl, tp, side, pside = price + atr * sl_mult, price - atr * tp_mult, "SELL", "SHORT"
 
-        qty = calc_qty(avail, rsk, price, sl, lev)
+        # Precisión de precio/cantidad del contrato (los de BTC no valen para todos)
+        try:
+            rules = self._client.get_symbol_rules(sym)
+        except Exception:
+            rules = dict(DEFAULT_SYMBOL_RULES)
+        pp, qp = rules["price_precision"], rules["quantity_precision"]
+        levels = round_levels(side, price, sl, tp, pp)
+        if levels is None:
+            self._log_safe(
+                f"[{ts}] {sym}: SL/TP sobre la entrada al redondear a {pp} decimales. Se omite.",
+                "warn",
+            )
+            return 0.0
+        sl, tp = levels
+
+        qty = calc_qty(avail, rsk, price, sl, lev, min_qty=rules["min_qty"], quantity_precision=qp)
         if qty <= 0:
             self._log_safe(f"[{ts}] Cantidad inválida ({qty}).", "warn")
-            return
+            return 0.0
 
         self._log_safe(
-            f"[{ts}] SEÑAL {signal} {sym} | Qty: {qty} | SL: {sl:.4f} | TP: {tp:.4f}",
+            f"[{ts}] SEÑAL {signal} {sym} | Qty: {qty:.{qp}f} | SL: {sl:.{pp}f} | TP: {tp:.{pp}f}",
             "trade",
         )
 
         # Configurar leverage/margen
+        margin = "ISOLATED" if mtp == "ISOLATED" else "CROSSED"
         try:
-            self._client.set_margin_type(sym, "ISOLATED" if mtp == "ISOLATED" else "CROSSED")
-            self._client.set_leverage(sym, lev)
+            if self._aclient is not None:
+                # Margen + leverage LONG/SHORT a la vez
+                self._aloop.run(self._aclient.configure_symbol(sym, margin, lev), timeout=60)
+            else:
+                self._client.set_margin_type(sym, margin)
+                self._client.set_leverage(sym, lev)
         except Exception as e:
             self._log_safe(f"[{ts}] Advertencia leverage/margen: {e}", "warn")
 
@@ -1687,6 +1902,7 @@ class BingXPanel(tk.Frame):
             order    = self._client.place_market_order(
                 symbol=sym, side=side, position_side=pside,
                 quantity=qty, stop_loss=sl, take_profit=tp,
+                price_precision=pp, quantity_precision=qp,
             )
             order_id = order.get("orderId", "—")
             self._log_safe(f"[{ts}] ✔ Orden ejecutada — ID: {order_id}", "ok")
@@ -1724,8 +1940,10 @@ class BingXPanel(tk.Frame):
                 "order_id":  str(order_id),
             })
             self.after(0, self._load_history_tab)
+            return qty * price / lev
         except Exception as e:
             self._log_safe(f"[{ts}] Error ejecutando orden: {e}", "err")
+            return 0.0
 
     # ──────────────────────────────────────────
     # Panel de análisis IA
@@ -1871,10 +2089,15 @@ class BingXPanel(tk.Frame):
             else:
                 try:
                     from bingx_client import BingXClient
-                    c   = BingXClient(key, secret)
+                    # Con la misma cuenta conectada se reutiliza su cliente (y su caché)
+                    shared = self._client is not None and self._client.api_key == key
+                    c   = self._client if shared else BingXClient(key, secret)
                     bal = c.get_balance()
                     uid = c.get_uid()
                     pos = c.get_positions()
+                    net = c.connection_stats()
+                    if not shared:
+                        c.close()
                     lines += [
                         "✔ Conexión exitosa",
                         f"  UID:               {uid}",
@@ -1883,6 +2106,7 @@ class BingXPanel(tk.Frame):
                         f"  Margen disponible: {bal.get('availableMargin','?')} USDT",
                         f"  PnL no realizado:  {bal.get('unrealizedProfit','?')} USDT",
                         f"  Posiciones abiertas: {len(pos)}",
+                        f"  Conexiones HTTPS:  {net['created']} abierta(s), {net['reused']} reutilizada(s)",
                     ]
                 except Exception as e:
                     lines.append(f"✘ Error: {e}")
@@ -0,0 +1,228 @@
+"""
+bingx_klines.py — Almacén incremental de velas por símbolo e intervalo
+
+El bot pedía en cada ciclo las últimas 150 velas y las volvía a parsear
+todas, aunque solo hubiera cambiado la vela en curso. KlineStore descarga
+la ventana completa una vez y después pide solo las velas desde la última
+que tiene (startTime), que es la que estaba en curso en el ciclo anterior:
+
+  - las velas nuevas se añaden al final
+  - una vela con el mismo time sustituye a la guardada (vela en curso,
+    o su valor definitivo al cerrarse)
+  - si la respuesta no enlaza con lo guardado (hueco), se rehace la serie
+
+Las series se guardan en arrays NumPy (time int64, OHLCV float64) y se
+exponen como vistas, listas para los indicadores:
+
+    store  = KlineStore()
+    params = store.fetch_params("BTC-USDT", "15m")   # {"limit": .., "start_time": ..}
+    series = store.merge("BTC-USDT", "15m", client.get_klines("BTC-USDT", "15m", **params))
+    engine.update_arrays(series.time, series.high, series.low, series.close)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bingx_client import _kf, _kline_time
+
+# Duración de cada intervalo de BingX (ms); "1M" no es fijo y siempre se
+# descarga la ventana completa
+INTERVAL_MS = {
+    "1m":  60_000,
+    "3m":  3 * 60_000,
+    "5m":  5 * 60_000,
+    "15m": 15 * 60_000,
+    "30m": 30 * 60_000,
+    "1h":  3_600_000,
+    "2h":  2 * 3_600_000,
+    "4h":  4 * 3_600_000,
+    "6h":  6 * 3_600_000,
+    "8h":  8 * 3_600_000,
+    "12h": 12 * 3_600_000,
+    "1d":  86_400_000,
+    "3d":  3 * 86_400_000,
+    "1w":  7 * 86_400_000,
+}
+
+DEFAULT_BACKFILL = 150     # velas de la descarga inicial
+DEFAULT_MAXLEN   = 500     # velas que se conservan por serie
+FETCH_SLACK      = 2       # velas extra por desfase de reloj con el servidor
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Serie de velas
+# ──────────────────────────────────────────────────────────────────────────────
+
+class KlineSeries:
+    """
+    Velas de un símbolo/intervalo en orden temporal, en arrays NumPy.
+    Se reserva el doble de maxlen y se compacta al llenarse, así añadir
+    una vela no copia la serie.
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(self, maxlen: int = DEFAULT_MAXLEN):
+        self.maxlen    = max(1, int(maxlen))
+        capacity       = 2 * self.maxlen
+        self._time     = np.zeros(capacity, dtype=np.int64)
+        self._ohlcv    = np.zeros((len(self.FIELDS), capacity), dtype=np.float64)
+        self._start    = 0
+        self._end      = 0
+        self.resets    = 0
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def last_time(self):
+        return int(self._time[self._end - 1]) if len(self) else None
+
+    # Vistas de solo lectura (válidas hasta el siguiente merge)
+    @property
+    def time(self) -> np.ndarray:
+        return self._time[self._start:self._end]
+
+    def _field(self, i: int) -> np.ndarray:
+        return self._ohlcv[i, self._start:self._end]
+
+    open   = property(lambda self: self._field(0))
+    high   = property(lambda self: self._field(1))
+    low    = property(lambda self: self._field(2))
+    close  = property(lambda self: self._field(3))
+    volume = property(lambda self: self._field(4))
+
+    def arrays(self) -> dict:
+        """{"time", "open", "high", "low", "close", "volume"} como vistas."""
+        out = {"time": self.time}
+        for i, name in enumerate(self.FIELDS):
+            out[name] = self._field(i)
+        return out
+
+    def clear(self):
+        self._start = self._end = 0
+
+    def _append(self, t: int, row):
+        if self._end == len(self._time):
+            # Compactar: las últimas maxlen - 1 velas al principio
+            keep = min(len(self), self.maxlen - 1)
+            src  = self._end - keep
+            self._time[:keep]     = self._time[src:self._end]
+            self._ohlcv[:, :keep] = self._ohlcv[:, src:self._end]
+            self._start, self._end = 0, keep
+        self._time[self._end]     = t
+        self._ohlcv[:, self._end] = row
+        self._end += 1
+        if len(self) > self.maxlen:
+            self._start = self._end - self.maxlen
+
+    def merge(self, klines: list) -> int:
+        """
+        Incorpora velas de la API (dicts v2 o v3, en cualquier orden).
+        Devuelve el número de velas nuevas añadidas al final.
+        """
+        bars = []
+        for k in klines:
+            t = _kline_time(k)
+            if t is None:
+                continue
+            bars.append((int(t), (
+                _kf(k, "open", "o"), _kf(k, "high", "h"), _kf(k, "low", "l"),
+                _kf(k, "close", "c"), _kf(k, "volume", "v"),
+            )))
+        if not bars:
+            return 0
+        bars.sort(key=lambda b: b[0])
+
+        # Hueco: la respuesta empieza después de la última vela guardada
+        if len(self) and bars[0][0] > self.last_time:
+            self.clear()
+            self.resets += 1
+
+        added = 0
+        for t, row in bars:
+            last = self.last_time
+            if last is None or t > last:
+                self._append(t, row)
+                added += 1
+            elif t == last:
+                self._ohlcv[:, self._end - 1] = row
+            else:
+                # Corrección de una vela anterior ya guardada
+                i = self._start + int(np.searchsorted(self.time, t))
+                if i < self._end and self._time[i] == t:
+                    self._ohlcv[:, i] = row
+        return added
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Almacén por (símbolo, intervalo)
+# ──────────────────────────────────────────────────────────────────────────────
+
+class KlineStore:
+    """
+    Una KlineSeries por (símbolo, intervalo) más los parámetros de la
+    siguiente petición: ventana completa la primera vez (o tras un hueco
+    demasiado grande) y después solo desde la última vela.
+    """
+
+    def __init__(self, backfill: int = DEFAULT_BACKFILL, maxlen: int = DEFAULT_MAXLEN):
+        self.backfill = int(backfill)
+        self.maxlen   = max(int(maxlen), self.backfill)
+        self._series  = {}
+        self._lock    = threading.Lock()
+        self.requests     = 0
+        self.backfills    = 0
+        self.bars_fetched = 0
+
+    def series(self, symbol: str, interval: str) -> KlineSeries:
+        with self._lock:
+            key = (symbol, interval)
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = KlineSeries(self.maxlen)
+            return s
+
+    def fetch_params(self, symbol: str, interval: str, now_ms: int = None) -> dict:
+        """kwargs para get_klines(symbol, interval, **params)."""
+        series = self.series(symbol, interval)
+        step   = INTERVAL_MS.get(interval)
+        last   = series.last_time
+        if step and last is not None and len(series) >= min(self.backfill, 30):
+            now_ms  = int(time.time() * 1000) if now_ms is None else now_ms
+            elapsed = max(0, (now_ms - last) // step)
+            limit   = elapsed + 1 + FETCH_SLACK
+            if limit < self.backfill:
+                return {"limit": int(limit), "start_time": last}
+        return {"limit": self.backfill, "start_time": None}
+
+    def merge(self, symbol: str, interval: str, klines: list, start_time: int = None) -> KlineSeries:
+        """
+        Incorpora la respuesta de get_klines. start_time: el usado en la
+        petición (None = ventana completa, se rehace la serie).
+        """
+        series = self.series(symbol, interval)
+        with self._lock:
+            self.requests     += 1
+            self.bars_fetched += len(klines)
+            if start_time is None:
+                self.backfills += 1
+        if start_time is None:
+            series.clear()
+        series.merge(klines)
+        return series
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "series":       len(self._series),
+                "requests":     self.requests,
+                "backfills":    self.backfills,
+                "bars_fetched": self.bars_fetched,
+                "bars_per_req": self.bars_fetched / self.requests if self.requests else 0.0,
+            }
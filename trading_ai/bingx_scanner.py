@@ -0,0 +1,362 @@
+"""
+bingx_scanner.py — Escáner de watchlist multi-símbolo para el bot BingX
+
+El bot solo miraba default_symbol. WatchlistScanner revisa una lista de
+perpetuos en cada ciclo:
+
+  1) Velas de todos los símbolos a la vez (cliente asíncrono o pool de
+     hilos con el síncrono), incrementales vía KlineStore
+  2) Presupuesto de peticiones compartido (RateBudget): como mucho `rate`
+     peticiones/s; lo que no cabe antes del deadline se salta y va primero
+     en el siguiente escaneo
+  3) Señal con KlineSignalEngine por símbolo (mismas reglas que
+     generate_signal) y funding solo de los que tienen señal
+  4) Puntuación 0-100: fuerza de tendencia (EMA9-EMA21 en ATR), margen de
+     RSI, ATR en rango operable y funding a favor/en contra
+
+Con 10 peticiones/s, 100 símbolos cuestan ~10 s por escaneo (más el
+funding de los candidatos), dentro del cooldown por defecto (60 s).
+
+Uso:
+    scanner = WatchlistScanner(rate=10)
+    ranked  = scanner.scan(["BTC-USDT", "ETH-USDT"], "15m", client, aclient, loop, deadline=45)
+
+    python bingx_scanner.py --stub --count 120 --latency 0.1
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bingx_client import KlineSignalEngine, _ema_series
+from bingx_klines import KlineStore
+
+DEFAULT_RATE    = 10.0   # peticiones/s a BingX (margen bajo el límite por IP)
+DEFAULT_WORKERS = 8      # peticiones en vuelo a la vez
+
+# Peso de cada componente en la puntuación (suman 1)
+SCORE_WEIGHTS = {
+    "trend":   0.40,
+    "rsi":     0.25,
+    "atr":     0.20,
+    "funding": 0.15,
+}
+
+ATR_PCT_RANGE   = (0.15, 2.0)   # ATR % del precio con TP alcanzable y SL razonable
+FUNDING_SCALE   = 0.002         # funding (por 8 h) que lleva la nota a 0 o 1
+
+_SKIPPED = object()             # petición que no cupo antes del deadline
+
+
+def parse_watchlist(value) -> list:
+    """'BTC-USDT, eth-usdt' o lista -> ['BTC-USDT', 'ETH-USDT'] sin repetidos."""
+    if isinstance(value, str):
+        value = value.replace(";", ",").replace("\n", ",").split(",")
+    out = []
+    for sym in value or []:
+        sym = str(sym).strip().upper()
+        if sym and sym not in out:
+            out.append(sym)
+    return out
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Presupuesto de peticiones
+# ──────────────────────────────────────────────────────────────────────────────
+
+class RateBudget:
+    """
+    Token bucket: `rate` peticiones/s con ráfagas de hasta `burst`.
+    Cada acquire reserva su turno; si el turno cae después del deadline
+    (time.monotonic()) se devuelve el token y no se espera.
+    Válido a la vez desde hilos y desde el event loop.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = None):
+        self.rate   = max(0.1, float(rate))
+        self.burst  = float(burst) if burst else self.rate
+        self._lock  = threading.Lock()
+        self._tokens = self.burst
+        self._stamp  = time.monotonic()
+
+    def _reserve(self, deadline: float = None) -> float:
+        """Segundos a esperar por el turno, o None si no llega a tiempo."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp  = now
+            wait = max(0.0, (1.0 - self._tokens) / self.rate)
+            if deadline is not None and now + wait > deadline:
+                return None
+            self._tokens -= 1.0
+            return wait
+
+    def acquire(self, deadline: float = None) -> bool:
+        wait = self._reserve(deadline)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, deadline: float = None) -> bool:
+        wait = self._reserve(deadline)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Puntuación
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _clip(x: float) -> float:
+    return max(0.0, min(1.0, x))
+
+
+def score_candidate(signal: str, rsi: float, atr: float, price: float,
+                    ema_fast: float, ema_slow: float, funding: float = 0.0) -> dict:
+    """
+    Notas 0-1 por componente y puntuación 0-100 de una señal BUY/SELL.
+
+    trend:   separación EMA9-EMA21 en ATR a favor de la señal (1 ATR = 1)
+    rsi:     recorrido que queda hasta sobrecompra (BUY) o sobreventa (SELL)
+    atr:     1 dentro de ATR_PCT_RANGE, baja fuera (sin movimiento / demasiado)
+    funding: 0.5 neutro; sube si la posición cobra funding, baja si lo paga
+    """
+    side = 1.0 if signal == "BUY" else -1.0
+    parts = {}
+
+    parts["trend"] = _clip(side * (ema_fast - ema_slow) / atr) if atr > 0 else 0.0
+    parts["rsi"]   = _clip((70.0 - rsi) / 40.0) if side > 0 else _clip((rsi - 30.0) / 40.0)
+
+    atr_pct = atr / price * 100 if price > 0 else 0.0
+    lo, hi = ATR_PCT_RANGE
+    if atr_pct < lo:
+        parts["atr"] = _clip(atr_pct / lo)
+    else:
+        parts["atr"] = _clip(1.0 - (atr_pct - hi) / (2 * hi)) if atr_pct > hi else 1.0
+
+    # Funding positivo: los largos pagan a los cortos
+    parts["funding"] = _clip(0.5 - side * funding / FUNDING_SCALE)
+
+    score = 100.0 * sum(SCORE_WEIGHTS[k] * v for k, v in parts.items())
+    return {"score": round(score, 2), "parts": parts}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Escáner
+# ──────────────────────────────────────────────────────────────────────────────
+
+class WatchlistScanner:
+    """
+    Estado entre escaneos: velas (KlineStore), indicadores por símbolo y
+    el orden de visita. Los clientes se pasan en cada scan() porque la GUI
+    puede reconectar mientras el bot sigue activo.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, workers: int = DEFAULT_WORKERS,
+                 backfill: int = 150, store: KlineStore = None):
+        self.budget   = RateBudget(rate)
+        self.workers  = max(1, int(workers))
+        self.store    = store or KlineStore(backfill=backfill)
+        self._engines = {}
+        self._pending = []     # símbolos saltados en el último escaneo
+        self.last_stats = {}
+
+    # Peticiones concurrentes con presupuesto
+    def _call_all(self, calls: dict, client, aclient, loop, deadline: float) -> dict:
+        """
+        calls: {símbolo: (método, args, kwargs)} -> {símbolo: resultado,
+        excepción o _SKIPPED}. Con aclient+loop en el event loop del
+        cliente; si no, con un pool de hilos y el cliente síncrono.
+        """
+        if not calls:
+            return {}
+
+        if aclient is not None and loop is not None:
+            async def run_all():
+                sem = asyncio.Semaphore(self.workers)
+
+                async def one(method, args, kwargs):
+                    if not await self.budget.aacquire(deadline):
+                        return _SKIPPED
+                    async with sem:
+                        return await getattr(aclient, method)(*args, **kwargs)
+
+                names = list(calls)
+                results = await asyncio.gather(
+                    *(one(*calls[n]) for n in names), return_exceptions=True
+                )
+                return dict(zip(names, results))
+
+            timeout = max(1.0, deadline - time.monotonic()) + 30 if deadline else None
+            return loop.run(run_all(), timeout=timeout)
+
+        def one_sync(method, args, kwargs):
+            if not self.budget.acquire(deadline):
+                return _SKIPPED
+            try:
+                return getattr(client, method)(*args, **kwargs)
+            except Exception as e:
+                return e
+
+        with concurrent.futures.ThreadPoolExecutor(self.workers) as pool:
+            futures = {n: pool.submit(one_sync, *c) for n, c in calls.items()}
+            return {n: f.result() for n, f in futures.items()}
+
+    def _evaluate(self, sym: str, interval: str, series):
+        engine = self._engines.get(sym)
+        if engine is None:
+            engine = self._engines[sym] = KlineSignalEngine()
+        signal, rsi, atr = engine.update_arrays(
+            series.time, series.high, series.low, series.close, key=f"{sym}:{interval}"
+        )
+        if signal is None:
+            return None
+        closes = series.close.tolist()
+        ema9, ema21 = _ema_series(closes, 9), _ema_series(closes, 21)
+        return {
+            "symbol":   sym,
+            "signal":   signal,
+            "rsi":      rsi,
+            "atr":      atr,
+            "price":    closes[-1],
+            "ema_fast": ema9[-1],
+            "ema_slow": ema21[-1],
+        }
+
+    def scan(self, symbols: list, interval: str = "15m", client=None, aclient=None,
+             loop=None, deadline: float = None, min_score: float = 0.0) -> list:
+        """
+        Candidatos con señal ordenados por puntuación (mayor primero):
+        dicts symbol/signal/score/parts/rsi/atr/price/funding.
+        deadline: segundos disponibles para las peticiones de este escaneo.
+        """
+        t0  = time.monotonic()
+        end = t0 + deadline if deadline else None
+
+        # Primero los que se quedaron fuera la última vez
+        symbols = parse_watchlist(symbols)
+        order   = [s for s in self._pending if s in symbols]
+        order  += [s for s in symbols if s not in order]
+
+        params = {s: self.store.fetch_params(s, interval) for s in order}
+        calls  = {s: ("get_klines", (s, interval), dict(params[s])) for s in order}
+        raw    = self._call_all(calls, client, aclient, loop, end)
+
+        self._pending = [s for s in order if raw.get(s) is _SKIPPED]
+        errors, found = {}, []
+        for sym in order:
+            result = raw.get(sym)
+            if result is _SKIPPED:
+                continue
+            if isinstance(result, BaseException):
+                errors[sym] = result
+                continue
+            series = self.store.merge(sym, interval, result, params[sym]["start_time"])
+            if len(series) < 30:
+                continue
+            cand = self._evaluate(sym, interval, series)
+            if cand is not None:
+                found.append(cand)
+
+        # Funding solo de los candidatos; si no cabe en el deadline cuenta como neutro
+        funding = self._call_all(
+            {c["symbol"]: ("get_funding_rate", (c["symbol"],), {}) for c in found},
+            client, aclient, loop, end,
+        )
+        ranked = []
+        for cand in found:
+            rate = funding.get(cand["symbol"], 0.0)
+            cand["funding"] = rate if isinstance(rate, float) else 0.0
+            cand.update(score_candidate(
+                cand["signal"], cand["rsi"], cand["atr"], cand["price"],
+                cand["ema_fast"], cand["ema_slow"], cand["funding"],
+            ))
+            if cand["score"] >= min_score:
+                ranked.append(cand)
+        ranked.sort(key=lambda c: c["score"], reverse=True)
+
+        self.last_stats = {
+            "symbols":    len(order),
+            "scanned":    len(order) - len(self._pending),
+            "skipped":    len(self._pending),
+            "errors":     errors,
+            "signals":    len(found),
+            "candidates": len(ranked),
+            "seconds":    time.monotonic() - t0,
+        }
+        return ranked
+
+
+def format_report(ranked: list, stats: dict, top: int = 10) -> str:
+    lines = [
+        f"Escaneados {stats.get('scanned', 0)}/{stats.get('symbols', 0)} símbolos "
+        f"en {stats.get('seconds', 0.0):.2f} s | señales: {stats.get('signals', 0)} | "
+        f"saltados: {stats.get('skipped', 0)} | errores: {len(stats.get('errors', {}))}",
+    ]
+    for i, c in enumerate(ranked[:top], 1):
+        lines.append(
+            f"  {i:>2}. {c['symbol']:<14} {c['signal']:<4} score {c['score']:5.1f} | "
+            f"RSI {c['rsi']:5.1f} | ATR {c['atr']:.4f} | funding {c['funding'] * 100:+.4f}%"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Escáner de watchlist BingX")
+    parser.add_argument("--symbols", default="", help="Lista separada por comas")
+    parser.add_argument("--count", type=int, default=0, help="Con --stub: N símbolos sintéticos")
+    parser.add_argument("--interval", default="15m")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Peticiones/s")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--deadline", type=float, default=45.0, help="Segundos por escaneo")
+    parser.add_argument("--scans", type=int, default=2, help="Escaneos consecutivos")
+    parser.add_argument("--url", help="base_url de la API (por defecto BingX)")
+    parser.add_argument("--stub", action="store_true", help="Usar bingx_stub local")
+    parser.add_argument("--latency", type=float, default=0.1, help="Latencia del stub (s)")
+    parser.add_argument("--sync", action="store_true", help="Pool de hilos en vez de asyncio")
+    args = parser.parse_args(argv)
+
+    from bingx_async import AsyncBingXClient, LoopThread
+    from bingx_client import BingXClient
+
+    symbols = parse_watchlist(args.symbols) or [f"S{i:03d}-USDT" for i in range(args.count or 20)]
+    stub = None
+    url  = args.url
+    if args.stub:
+        from bingx_stub import StubServer
+        stub = StubServer(latency=args.latency).start()
+        url  = stub.url
+
+    key, secret = os.environ.get("BINGX_API_KEY", "key"), os.environ.get("BINGX_API_SECRET", "secret")
+    client  = BingXClient(key, secret, pool_size=args.workers, **({"base_url": url} if url else {}))
+    aclient = loop = None
+    if not args.sync:
+        loop    = LoopThread()
+        aclient = AsyncBingXClient(key, secret, pool_size=args.workers, **({"base_url": url} if url else {}))
+
+    scanner = WatchlistScanner(rate=args.rate, workers=args.workers)
+    try:
+        for _ in range(max(1, args.scans)):
+            ranked = scanner.scan(symbols, args.interval, client, aclient, loop, args.deadline)
+            print(format_report(ranked, scanner.last_stats))
+            print(f"  velas: {scanner.store.stats()}")
+    finally:
+        if loop is not None:
+            loop.stop(aclient)
+        client.close()
+        if stub is not None:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+bingx_stub.py — Servidor local que imita la API de BingX para pruebas
+
+Responde a los endpoints que usan BingXClient / AsyncBingXClient con datos
+sintéticos y una latencia configurable por petición, para medir el efecto
+del pool keep-alive o del fan-out concurrente sin tocar el exchange.
+
+  - HTTP/1.1 keep-alive, un hilo por conexión (peticiones concurrentes)
+  - TLS opcional (certificado y clave PEM)
+  - Firma HMAC verificada con el secret dado (error 100001 si no coincide)
+  - Las órdenes abren/cierran posiciones en memoria
+
+Uso:
+    python bingx_stub.py --port 8080 --latency 0.15 --jitter 0.05
+    BingXClient("key", "secret", base_url="http://127.0.0.1:8080")
+
+En código:
+    with StubServer(latency=0.1) as stub:
+        client = AsyncBingXClient("key", "secret", base_url=stub.url)
+"""
+
+import argparse
+import hashlib
+import hmac
+import http.server
+import json
+import math
+import os
+import random
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bingx_klines import INTERVAL_MS
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Estado simulado
+# ──────────────────────────────────────────────────────────────────────────────
+
+# Contratos con precio y precisión propios; el resto usa `price` y no
+# aparece en /quote/contracts
+STUB_CONTRACTS = {
+    "BTC-USDT":  {"price": 60000.0, "pricePrecision": 1, "quantityPrecision": 4, "tradeMinQuantity": 0.0001},
+    "ETH-USDT":  {"price": 3000.0,  "pricePrecision": 2, "quantityPrecision": 2, "tradeMinQuantity": 0.01},
+    "DOGE-USDT": {"price": 0.12,    "pricePrecision": 5, "quantityPrecision": 0, "tradeMinQuantity": 1},
+}
+
+
+class StubState:
+    """Mercado y cuenta sintéticos (seguros entre hilos)."""
+
+    def __init__(self, price: float = 60000.0, contracts: dict = None):
+        self._lock     = threading.Lock()
+        self.price     = price
+        self.contracts = dict(STUB_CONTRACTS if contracts is None else contracts)
+        self.last_order = None
+        self.balance   = 1000.0
+        self.positions = {}     # (symbol, positionSide) -> dict
+        self.leverage  = {}
+        self.orders    = 0
+        self.requests  = 0
+
+    def price_of(self, symbol: str) -> float:
+        contract = self.contracts.get(symbol)
+        return contract["price"] if contract else self.price
+
+    def contract_list(self) -> list:
+        return [
+            {"symbol": sym, **{k: v for k, v in c.items() if k != "price"}}
+            for sym, c in self.contracts.items()
+        ]
+
+    def _bar_close(self, symbol: str, interval: str, t: int) -> float:
+        """Cierre de la vela que abre en t: depende solo de (símbolo, intervalo, t)."""
+        rng = random.Random(f"{symbol}:{interval}:{t}")
+        return self.price_of(symbol) * (1 + 0.02 * math.sin(t / 3.6e6 / 7) + rng.gauss(0, 0.002))
+
+    def klines(
+        self, symbol: str, interval: str, limit: int, start_time: int = None, end_time: int = None
+    ) -> list:
+        """
+        Velas deterministas por tiempo de apertura: pedir un rango o la
+        ventana completa da las mismas velas. La vela en curso varía con
+        cada petición.
+        """
+        step = INTERVAL_MS.get(interval, 60_000)
+        now  = int(time.time() * 1000)
+        last = min(now, end_time if end_time is not None else now) // step * step
+        if start_time is not None:
+            first = -(-int(start_time) // step) * step
+            last  = min(last, first + (limit - 1) * step)
+        else:
+            first = last - (limit - 1) * step
+        out = []
+        for t in range(first, last + 1, step):
+            o = self._bar_close(symbol, interval, t - step)
+            c = self._bar_close(symbol, interval, t)
+            if t + step > now:
+                c *= 1 + random.gauss(0, 0.0005)
+            rng = random.Random(f"{symbol}:{interval}:{t}:hl")
+            h = max(o, c) * (1 + abs(rng.gauss(0, 0.001)))
+            l = min(o, c) * (1 - abs(rng.gauss(0, 0.001)))
+            out.append({
+                "open": f"{o:.8g}", "high": f"{h:.8g}", "low": f"{l:.8g}",
+                "close": f"{c:.8g}", "volume": f"{rng.uniform(1, 50):.3f}",
+                "time": t,
+            })
+        return out
+
+    def balance_data(self) -> dict:
+        with self._lock:
+            used = sum(p["margin"] for p in self.positions.values())
+            return {"balance": {
+                "userId": "1", "asset": "USDT",
+                "balance": f"{self.balance:.4f}", "equity": f"{self.balance:.4f}",
+                "unrealizedProfit": "0", "realisedProfit": "0",
+                "availableMargin": f"{self.balance - used:.4f}",
+                "usedMargin": f"{used:.4f}", "freezedMargin": "0",
+            }}
+
+    def position_list(self, symbol: str = None) -> list:
+        with self._lock:
+            return [
+                {k: v for k, v in p.items() if k != "margin"}
+                for (sym, _), p in self.positions.items() if not symbol or sym == symbol
+            ]
+
+    def set_leverage(self, params: dict) -> dict:
+        leverage = int(params.get("leverage", 10))
+        with self._lock:
+            self.leverage[(params.get("symbol"), params.get("side"))] = leverage
+        return {"leverage": leverage, "symbol": params.get("symbol")}
+
+    def order(self, params: dict) -> dict:
+        symbol = params.get("symbol", "BTC-USDT")
+        pside  = params.get("positionSide", "LONG")
+        side   = params.get("side", "BUY")
+        qty    = float(params.get("quantity", 0))
+        opening = (side == "BUY") == (pside == "LONG")
+        price = self.price_of(symbol)
+        with self._lock:
+            self.orders += 1
+            self.last_order = dict(params)
+            key = (symbol, pside)
+            if opening:
+                lev = self.leverage.get(key, 10)
+                pos = self.positions.setdefault(key, {
+                    "symbol": symbol, "positionSide": pside, "positionAmt": "0",
+                    "avgPrice": f"{price:.8g}", "leverage": lev, "margin": 0.0,
+                })
+                amt = float(pos["positionAmt"]) + qty
+                pos["positionAmt"] = f"{amt:.4f}"
+                pos["margin"] += qty * price / lev
+            else:
+                self.positions.pop(key, None)
+            return {"order": {
+                "symbol": symbol, "orderId": 100000 + self.orders, "side": side,
+                "positionSide": pside, "type": "MARKET", "quantity": f"{qty:.4f}",
+            }}
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Servidor HTTP
+# ──────────────────────────────────────────────────────────────────────────────
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize         = 65536    # cabeceras y cuerpo en un solo envío
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, code: int, data=None, msg: str = ""):
+        body = json.dumps({"code": code, "msg": msg, "data": data if data is not None else {}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        url    = urllib.parse.urlsplit(self.path)
+        params = dict(urllib.parse.parse_qsl(url.query, keep_blank_values=True))
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        state = server.state
+        with state._lock:
+            state.requests += 1
+
+        if "signature" in params and server.api_secret:
+            signature = params.pop("signature")
+            raw = "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+            expected = hmac.new(server.api_secret.encode(), raw.encode(), hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(signature, expected):
+                return self._reply(100001, msg="Signature verification failed")
+
+        route = server.routes.get((self.command, url.path))
+        if route is None:
+            return self._reply(100400, msg=f"Unknown endpoint {self.command} {url.path}")
+        try:
+            self._reply(0, route(state, params))
+        except Exception as e:
+            self._reply(100500, msg=str(e))
+
+    do_GET = do_POST = do_DELETE = _handle
+
+
+ROUTES = {
+    ("GET", "/openApi/swap/v2/server/time"):     lambda s, p: {"serverTime": int(time.time() * 1000)},
+    ("GET", "/openApi/swap/v2/user/balance"):    lambda s, p: s.balance_data(),
+    ("GET", "/openApi/account/v1/uid"):          lambda s, p: {"uid": 123456789},
+    ("GET", "/openApi/swap/v2/quote/price"):     lambda s, p: {
+        "symbol": p.get("symbol"), "price": f"{s.price_of(p.get('symbol')):.8g}",
+    },
+    ("GET", "/openApi/swap/v2/quote/contracts"): lambda s, p: s.contract_list(),
+    ("GET", "/openApi/swap/v2/quote/ticker"):    lambda s, p: {
+        "symbol": p.get("symbol"), "lastPrice": f"{s.price_of(p.get('symbol')):.8g}",
+        "priceChangePercent": "1.25", "quoteVolume": "123456789.0",
+    },
+    ("GET", "/openApi/swap/v3/quote/klines"):    lambda s, p: s.klines(
+        p.get("symbol", ""), p.get("interval", "15m"), int(p.get("limit", 150)),
+        int(p["startTime"]) if "startTime" in p else None,
+        int(p["endTime"]) if "endTime" in p else None,
+    ),
+    ("GET", "/openApi/swap/v2/quote/fundingRate"): lambda s, p: {"symbol": p.get("symbol"), "fundingRate": "0.0001"},
+    ("GET", "/openApi/swap/v2/user/positions"):  lambda s, p: s.position_list(p.get("symbol")),
+    ("POST", "/openApi/swap/v2/trade/leverage"): lambda s, p: s.set_leverage(p),
+    ("POST", "/openApi/swap/v2/trade/marginType"): lambda s, p: {},
+    ("POST", "/openApi/swap/v2/trade/order"):    lambda s, p: s.order(p),
+    ("GET", "/openApi/swap/v2/trade/openOrders"): lambda s, p: {"orders": []},
+    ("DELETE", "/openApi/swap/v2/trade/order"):  lambda s, p: {"orderId": p.get("orderId")},
+    ("GET", "/openApi/swap/v2/trade/allOrders"): lambda s, p: [],
+}
+
+
+class StubServer(http.server.ThreadingHTTPServer):
+    """
+    Servidor stub en un hilo de fondo.
+
+    latency/jitter: segundos añadidos a cada petición (uniforme ±jitter)
+    api_secret:     si se da, se verifica la firma de las peticiones firmadas
+    certfile/keyfile: PEM para servir HTTPS
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        host:       str = "127.0.0.1",
+        port:       int = 0,
+        latency:    float = 0.0,
+        jitter:     float = 0.0,
+        api_secret: str = None,
+        certfile:   str = None,
+        keyfile:    str = None,
+        state:      StubState = None,
+    ):
+        super().__init__((host, port), _Handler)
+        self.latency    = latency
+        self.jitter     = jitter
+        self.api_secret = api_secret
+        self.state      = state or StubState()
+        self.routes     = dict(ROUTES)
+        self.scheme     = "http"
+        if certfile:
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(certfile, keyfile)
+            self.socket = ctx.wrap_socket(self.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local que imita la API de BingX")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.1, help="Segundos por petición")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variación ± de la latencia")
+    parser.add_argument("--secret", help="Verificar firmas con este API secret")
+    parser.add_argument("--cert", help="Certificado PEM (HTTPS)")
+    parser.add_argument("--key", help="Clave PEM (HTTPS)")
+    args = parser.parse_args(argv)
+
+    server = StubServer(args.host, args.port, args.latency, args.jitter, args.secret, args.cert, args.key)
+    print(f"Stub BingX en {server.url} (latencia {args.latency * 1000:.0f} ms ± {args.jitter * 1000:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
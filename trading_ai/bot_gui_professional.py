@@ -51,6 +51,7 @@ def write_bot_status(running: bool):
 
 # Módulos de análisis - importación simple
 BACKTESTING_AVAILABLE = False
+MONTECARLO_AVAILABLE = False
 ML_ANALYSIS_AVAILABLE = False
 
 try:
@@ -60,6 +61,12 @@ try:
 except Exception as e:
     print(f"⚠️ Backtesting no disponible: {e}")
 
+try:
+    from backtest_montecarlo import MonteCarloWorker, pnl_from_results, format_report
+    MONTECARLO_AVAILABLE = True
+except Exception as e:
+    print(f"⚠️ Monte Carlo no disponible: {e}")
+
 try:
     from ml_analyzer import MLAnalyzer
     ML_ANALYSIS_AVAILABLE = True
@@ -988,6 +995,22 @@ class TradingBotGUI:
                  bg="#4895ef", fg="white", relief=tk.FLAT, cursor="hand2",
                  font=("Segoe UI", 10, "bold")).pack(side=tk.LEFT, padx=5)
         
+        self.bt_mc_btn = tk.Button(btn_row, text="🎲 Monte Carlo", command=self.run_monte_carlo,
+                                   bg="#ffbe0b", fg="#0a0e27", relief=tk.FLAT, cursor="hand2",
+                                   font=("Segoe UI", 10, "bold"))
+        self.bt_mc_btn.pack(side=tk.LEFT, padx=5)
+        
+        tk.Label(btn_row, text="Simulaciones:", bg="#151b3d", fg="#e0e6ff",
+                font=("Segoe UI", 10)).pack(side=tk.LEFT, padx=(15, 0))
+        
+        self.bt_mc_sims_var = tk.IntVar(value=10000)
+        tk.Entry(btn_row, textvariable=self.bt_mc_sims_var, bg="#1e2749", fg="#e0e6ff",
+                font=("Segoe UI", 9), relief=tk.FLAT, width=8).pack(side=tk.LEFT, padx=5)
+        
+        self.bt_mc_method_var = tk.StringVar(value="bootstrap")
+        ttk.Combobox(btn_row, textvariable=self.bt_mc_method_var, values=["bootstrap", "permutation"],
+                    state="readonly", width=12).pack(side=tk.LEFT, padx=5)
+        
         # Progress bar
         self.bt_progress = ttk.Progressbar(config_frame, orient=tk.HORIZONTAL, 
                                           length=400, mode='determinate')
@@ -1016,6 +1039,7 @@ class TradingBotGUI:
         
         # Variables para almacenar resultados
         self.backtest_results = None
+        self.mc_worker = None
     
     def create_backtest_results_panel(self, parent):
         """Panel de resultados del backtest"""
@@ -1290,13 +1314,98 @@ class TradingBotGUI:
         
         if filepath:
             try:
+                from backtest_metrics import json_safe
                 with open(filepath, "w") as f:
-                    json.dump(self.backtest_results, f, indent=4)
+                    json.dump(json_safe(self.backtest_results), f, indent=4)
                 
                 messagebox.showinfo("Éxito", f"Resultados exportados a:\n{filepath}")
             except Exception as e:
                 messagebox.showerror("Error", f"No se pudo exportar:\n{e}")
     
+    def run_monte_carlo(self):
+        """Monte Carlo sobre los trades del ultimo backtest (en un proceso aparte)"""
+        if not MONTECARLO_AVAILABLE:
+            messagebox.showwarning("Advertencia", "Modulo Monte Carlo no disponible.")
+            return
+        if not self.backtest_results or not self.backtest_results.get('trades'):
+            messagebox.showwarning("Advertencia", "Ejecuta primero un backtest con trades.")
+            return
+        if self.mc_worker is not None:
+            return
+        
+        try:
+            simulations = max(100, int(self.bt_mc_sims_var.get()))
+        except Exception:
+            simulations = 10000
+        
+        balance = self.backtest_results.get('config', {}).get('initial_balance', self.bt_balance_var.get())
+        self.mc_worker = MonteCarloWorker(
+            pnl_from_results(self.backtest_results),
+            simulations=simulations,
+            method=self.bt_mc_method_var.get(),
+            initial_balance=float(balance)
+        ).start()
+        
+        self.bt_mc_btn.config(state=tk.DISABLED, text="SIMULANDO...")
+        self.bt_progress['value'] = 0
+        self.root.after(200, self._poll_monte_carlo)
+    
+    def _poll_monte_carlo(self):
+        """Leer el progreso del worker sin bloquear la GUI"""
+        worker = self.mc_worker
+        if worker is None:
+            return
+        
+        if not worker.poll():
+            self.bt_progress['value'] = worker.progress
+            self.root.after(200, self._poll_monte_carlo)
+            return
+        
+        self.mc_worker = None
+        self.bt_mc_btn.config(state=tk.NORMAL, text="🎲 Monte Carlo")
+        self.bt_progress['value'] = 100
+        
+        if worker.error:
+            self.bt_results_text.insert(tk.END, f"\n❌ Monte Carlo: {worker.error}\n", "error")
+            return
+        
+        self.display_monte_carlo(worker.result)
+        if MATPLOTLIB_AVAILABLE:
+            self.update_monte_carlo_charts(worker.result)
+    
+    def display_monte_carlo(self, report):
+        """Agregar el resumen Monte Carlo a los resultados"""
+        self.bt_results_text.insert(tk.END, "═══════════════════════════════════════\n", "header")
+        self.bt_results_text.insert(tk.END, "  MONTE CARLO\n", "header")
+        self.bt_results_text.insert(tk.END, "═══════════════════════════════════════\n\n", "header")
+        self.bt_results_text.insert(tk.END, format_report(report) + "\n\n")
+        self.bt_results_text.see(tk.END)
+    
+    def update_monte_carlo_charts(self, report):
+        """Histogramas de drawdown y retorno final simulados"""
+        self.bt_fig.clear()
+        
+        panels = (
+            (121, report['max_drawdown'], report['original']['max_drawdown'], '#ff006e', 'Max Drawdown $'),
+            (122, report['final_return'], report['original']['final_return'], '#06ffa5', 'Retorno Final $'),
+        )
+        for position, dist, original, color, title in panels:
+            ax = self.bt_fig.add_subplot(position, facecolor='#1e2749')
+            counts = dist['histogram']['counts']
+            edges = dist['histogram']['edges']
+            ax.bar(edges[:-1], counts, width=[b - a for a, b in zip(edges[:-1], edges[1:])],
+                   align='edge', color=color, alpha=0.7)
+            ax.axvline(original, color='#ffbe0b', linewidth=1.5, label='Backtest')
+            ax.axvline(dist['percentiles']['p95'], color='#e0e6ff', linewidth=1, linestyle='--', label='P95')
+            ax.set_title(title, color='#e0e6ff', fontsize=10)
+            ax.set_ylabel('Simulaciones', color='#8b9dc3', fontsize=8)
+            ax.tick_params(colors='#8b9dc3')
+            ax.legend(facecolor='#1e2749', edgecolor='#4895ef', fontsize=8)
+            ax.grid(True, alpha=0.2, color='#4895ef', axis='y')
+        
+        self.bt_fig.tight_layout()
+        self.bt_canvas.draw()
+    
 # ==================== PESTAÑA 8 Debugs ====================
     
     def create_debug_tab(self):
@@ -1309,7 +1418,7 @@ class TradingBotGUI:
 
         tk.Label(
             header,
-            text="DEBUG DEL BOT (debug.json)",
+            text="DEBUG DEL BOT (debug.jsonl)",
             bg="#151b3d",
             fg="#4895ef",
             font=("Segoe UI", 18, "bold")
@@ -1348,35 +1457,27 @@ class TradingBotGUI:
 
 
     def update_debug_view(self):
-        debug_file = os.path.join(
+        from debug_journal import read_tail as read_debug_tail
+
+        debug_dir = os.path.join(
             os.path.dirname(os.path.abspath(__file__)),
-            "logs",
-            "debug.json"
+            "logs"
         )
 
         self.debug_text.delete(1.0, tk.END)
 
-        if not os.path.exists(debug_file):
-            self.debug_text.insert(
-                tk.END,
-                "❌ debug.json no existe\n",
-                "ERROR"
-            )
-            return
-
         try:
-            with open(debug_file, "r", encoding="utf-8") as f:
-                data = json.load(f)   # 👈 AQUÍ ESTABA LA CLAVE
+            data = read_debug_tail(100, debug_dir)  # últimos 100 eventos
 
-            if not isinstance(data, list):
+            if not data:
                 self.debug_text.insert(
                     tk.END,
-                    "⚠️ debug.json no es una lista de eventos\n",
-                    "WARN"
+                    "❌ debug.jsonl no existe o está vacío\n",
+                    "ERROR"
                 )
                 return
 
-            for entry in data[-100:]:  # últimos 100 eventos
+            for entry in data:
                 level = str(entry.get("level", "INFO")).upper()
                 msg = entry.get("message", "")
                 ts = entry.get("timestamp", "")
@@ -1398,7 +1499,7 @@ class TradingBotGUI:
         except Exception as e:
             self.debug_text.insert(
                 tk.END,
-                f"❌ Error leyendo debug.json:\n{e}\n",
+                f"❌ Error leyendo debug.jsonl:\n{e}\n",
                 "ERROR"
             )
 
@@ -1719,12 +1820,9 @@ Reason: {signal.get('reason', 'N/A')}
     
     def update_statistics_tab(self):
         """Actualizar pestaña de estadísticas"""
-        # Cargar historial
-        history = self.load_trade_history()
-        
-        # Filtrar por período
+        # Cargar historial del período (filtrado en SQLite)
         period = self.period_var.get()
-        filtered = self.filter_history_by_period(history, period)
+        filtered = self.load_trade_history_period(period)
         
         # Calcular métricas
         if filtered:
@@ -2000,33 +2098,33 @@ Reason: {signal.get('reason', 'N/A')}
             messagebox.showerror("Error", f"No se pudo exportar:\n{e}")
     
     def load_trade_history(self):
-        """Cargar historial de trades desde archivo"""
-        history_file = "learning_data/trade_history.json"
-        
-        if os.path.exists(history_file):
-            try:
-                with open(history_file, "r") as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        """Cargar historial de trades desde trade_store (SQLite)"""
+        try:
+            from trade_store import get_trade_store
+            return get_trade_store().all()
+        except:
+            return []
     
-    def filter_history_by_period(self, history, period):
-        """Filtrar historial por período"""
+    def period_start(self, period):
+        """Inicio del período (fecha ISO) o None para el total"""
         if period == "Hoy":
-            today = datetime.now().strftime("%Y-%m-%d")
-            return [t for t in history if t.get("timestamp", "").startswith(today)]
-        
+            return datetime.now().strftime("%Y-%m-%d")
         elif period == "Esta Semana":
-            week_ago = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
-            return [t for t in history if t.get("timestamp", "") >= week_ago]
-        
+            return (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
         elif period == "Este Mes":
-            month_ago = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
-            return [t for t in history if t.get("timestamp", "") >= month_ago]
-        
-        else:  # Total
-            return history
+            return (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        return None
+    
+    def load_trade_history_period(self, period):
+        """Trades del período consultados por rango de timestamp en trade_store"""
+        start = self.period_start(period)
+        if start is None:
+            return self.load_trade_history()
+        try:
+            from trade_store import get_trade_store
+            return get_trade_store().between(start)
+        except:
+            return []
     
     def load_config(self):
         """Cargar configuración desde archivo"""
@@ -2079,7 +2177,7 @@ Reason: {signal.get('reason', 'N/A')}
             ("Trade Feedback (legacy)", "/home/travieso/.wine/drive_c/Program Files/MetaTrader 5/MQL5/Files/trade_feedback.json"),
             ("Feedback Queue", "/home/travieso/.wine/drive_c/Program Files/MetaTrader 5/MQL5/Files/trade_feedback"),
             ("Setup Stats", "learning_data/setup_stats.json"),
-            ("Trade History", "learning_data/trade_history.json"),
+            ("Trade History", "learning_data/trade_history.db"),
             ("Processed Signals", "learning_data/processed_signals.txt")
         ]
         
@@ -4,6 +4,97 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from mt5_paths import MARKET_DATA_FILE as MT5_MARKET_FILE
 
+try:
+    from indicators.streaming import IndicatorSet
+except Exception:
+    IndicatorSet = None
+
+try:
+    from indicators.technical_indicators import analyze_price_action_array
+except Exception:
+    analyze_price_action_array = None
+
+try:
+    from data_providers.ohlcv_buffer import OHLCVRingBuffer
+except Exception:
+    OHLCVRingBuffer = None
+
+# Historial vivo de barras construido a partir de cada lectura
+_market_buffer = None
+
+# Indicadores incrementales sobre las barras cerradas del buffer
+# (mismos periodos por defecto que el EA)
+_live_indicators = IndicatorSet() if IndicatorSet is not None else None
+_live_last_time = None
+
+# Barras del historial vivo para el price action (S/R, patrones, momentum,
+# perfil de volumen) y minimo para calcularlo (lookback de soporte/resistencia)
+PRICE_ACTION_BARS = 100
+PRICE_ACTION_MIN_BARS = 20
+
+
+def get_market_buffer(capacity=5000, bar_seconds=60):
+    """Buffer OHLCV del proceso (None si NumPy no esta disponible)"""
+    global _market_buffer
+    if _market_buffer is None and OHLCVRingBuffer is not None:
+        _market_buffer = OHLCVRingBuffer(capacity, bar_seconds)
+    return _market_buffer
+
+
+def read_market_bars(n=None):
+    """Ultimas n barras como dict de arrays NumPy contiguos (vistas, sin copia)"""
+    buffer = get_market_buffer()
+    if buffer is None:
+        return None
+    return buffer.arrays(n)
+
+
+def _update_live_indicators(buffer):
+    """Consolidar en los indicadores solo las barras cerradas nuevas (O(nuevas))"""
+    global _live_indicators, _live_last_time
+    arrays = buffer.arrays()
+    times = arrays["time"]
+    closed = len(times) - 1          # La ultima barra sigue abierta
+
+    i = closed
+    while i > 0 and (_live_last_time is None or times[i - 1] > _live_last_time):
+        i -= 1
+    if _live_last_time is not None and i > 0 and times[i - 1] != _live_last_time:
+        # El buffer ya no contiene la ultima barra consolidada: reiniciar
+        _live_indicators = IndicatorSet()
+        i = 0
+
+    for j in range(i, closed):
+        _live_indicators.update(arrays["high"][j], arrays["low"][j], arrays["close"][j])
+        _live_last_time = float(times[j])
+
+
+def get_live_indicators():
+    """
+    Indicadores calculados en Python sobre el historial vivo, incluyendo
+    la barra en curso (formato 'indicators' de market_data.json)
+    """
+    buffer = get_market_buffer()
+    if buffer is None or len(buffer) == 0 or _live_indicators is None:
+        return None
+    _update_live_indicators(buffer)
+    arrays = buffer.arrays(1)
+    return _live_indicators.peek(arrays["high"][-1], arrays["low"][-1], arrays["close"][-1])
+
+
+def get_live_price_action(n=PRICE_ACTION_BARS):
+    """
+    analyze_price_action sobre las ultimas n barras del historial vivo
+    (arrays contiguos del buffer), None si aun no hay barras suficientes
+    """
+    if analyze_price_action_array is None:
+        return None
+    bars = read_market_bars(n)
+    if bars is None or len(bars["close"]) < PRICE_ACTION_MIN_BARS:
+        return None
+    return analyze_price_action_array(bars["open"], bars["high"], bars["low"],
+                                      bars["close"], bars["volume"])
+
 
 def read_market_data():
     if not os.path.exists(MT5_MARKET_FILE):
@@ -14,6 +105,23 @@ def read_market_data():
         with open(MT5_MARKET_FILE, "r") as f:
             data = json.load(f)
 
+        buffer = get_market_buffer()
+        if buffer is not None:
+            try:
+                buffer.ingest_market_data(data)
+                # Si el EA no envia indicadores, usar los calculados en Python
+                if "indicators" not in data:
+                    live = get_live_indicators()
+                    if live and live["rsi"] is not None:
+                        data["indicators"] = live
+                # Price action del historial vivo para el analisis de contexto
+                if "price_action" not in data:
+                    price_action = get_live_price_action()
+                    if price_action:
+                        data["price_action"] = price_action
+            except Exception as e:
+                print("⚠️ Error actualizando buffer OHLCV:", e)
+
         print("📥 Market data cargado desde MT5")
         return data
 
@@ -0,0 +1,211 @@
+"""
+Buffer OHLCV circular sobre NumPy
+
+Acumula barras (y snapshots bid/ask de market_data.json) en arrays
+preasignados de capacidad fija. Cada campo se escribe dos veces (posicion i
+e i + capacity), de modo que las ultimas N barras son SIEMPRE un slice
+contiguo: last(n) devuelve vistas sin copiar y sin asignar memoria por ciclo.
+
+Orden de las vistas: cronologico (la barra mas reciente es la ULTIMA),
+al reves que las listas de velas de technical_indicators (mas reciente
+primero). candles(n) hace la conversion para el codigo legacy.
+"""
+
+import math
+import time
+from datetime import datetime
+
+import numpy as np
+
+FIELDS = ("time", "open", "high", "low", "close", "volume", "bid", "ask", "spread")
+_IDX = {name: i for i, name in enumerate(FIELDS)}
+
+# Formato de TimeToString(TIME_DATE|TIME_SECONDS) del EA
+MT5_TIME_FORMAT = "%Y.%m.%d %H:%M:%S"
+
+
+def parse_mt5_time(value):
+    """Timestamp del EA (o epoch / ISO) -> epoch en segundos, None si no se puede"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    for fmt in (MT5_TIME_FORMAT, "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"):
+        try:
+            return datetime.strptime(str(value)[:19], fmt).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+class OHLCVRingBuffer:
+    """Ventana movil de barras OHLCV + bid/ask/spread"""
+
+    def __init__(self, capacity=5000, bar_seconds=60):
+        """
+        Args:
+            capacity: Maximo de barras retenidas
+            bar_seconds: Duracion de barra al agregar snapshots (60 = M1)
+        """
+        self.capacity = int(capacity)
+        self.bar_seconds = bar_seconds
+        self._data = np.full((len(FIELDS), 2 * self.capacity), np.nan, dtype=np.float64)
+        self._head = 0      # Proxima posicion a escribir (0..capacity-1)
+        self._size = 0
+        self._last_snapshot = None  # (timestamp, bid, ask) del ultimo snapshot agregado
+
+    def __len__(self):
+        return self._size
+
+    # ==============================
+    # ESCRITURA
+    # ==============================
+    def _write(self, pos, values):
+        self._data[:, pos] = values
+        self._data[:, pos + self.capacity] = values
+
+    def _last_pos(self):
+        return (self._head - 1) % self.capacity
+
+    def push_bar(self, t, open_, high, low, close, volume=0.0,
+                 bid=math.nan, ask=math.nan, spread=math.nan):
+        """Anexar una barra cerrada o nueva"""
+        self._write(self._head, (t, open_, high, low, close, volume, bid, ask, spread))
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def update_last(self, **fields):
+        """Modificar campos de la barra en curso (p.ej. close/high/low)"""
+        if self._size == 0:
+            return
+        pos = self._last_pos()
+        for name, value in fields.items():
+            row = _IDX[name]
+            self._data[row, pos] = value
+            self._data[row, pos + self.capacity] = value
+
+    def push_snapshot(self, bid, ask=None, t=None):
+        """
+        Agregar un tick bid/ask a la barra de su intervalo: si cae en la
+        barra actual la actualiza, si no abre una nueva. volume = ticks.
+
+        Releer un market_data.json sin cambios (mismo timestamp y bid/ask)
+        no es un tick nuevo y se ignora.
+        """
+        if ask is None:
+            ask = bid
+        if t is not None:
+            snapshot = (t, float(bid), float(ask))
+            if snapshot == self._last_snapshot:
+                return
+            self._last_snapshot = snapshot
+        else:
+            t = time.time()
+        price = float(bid)
+        spread = float(ask) - price
+        bar_time = t - (t % self.bar_seconds) if self.bar_seconds else t
+
+        if self._size > 0:
+            pos = self._last_pos()
+            last_time = self._data[_IDX["time"], pos]
+            if bar_time == last_time:
+                high = max(self._data[_IDX["high"], pos], price)
+                low = min(self._data[_IDX["low"], pos], price)
+                volume = self._data[_IDX["volume"], pos] + 1
+                self.update_last(high=high, low=low, close=price, volume=volume,
+                                 bid=price, ask=float(ask), spread=spread)
+                return
+            if bar_time < last_time:
+                return  # Snapshot viejo (archivo reescrito con datos atrasados)
+
+        self.push_bar(bar_time, price, price, price, price, 1.0, price, float(ask), spread)
+
+    def push_candles(self, candles):
+        """
+        Fusionar una lista de velas (dicts, mas reciente primero como en
+        market_data) anexando solo las mas nuevas que la ultima retenida.
+        La vela mas reciente sustituye a la barra en curso si comparte tiempo.
+        """
+        last_time = self.last_time()
+        for c in reversed(candles):
+            t = parse_mt5_time(c.get("time", c.get("timestamp")))
+            if t is None:
+                continue
+            values = dict(
+                open=c.get("open", math.nan), high=c.get("high", math.nan),
+                low=c.get("low", math.nan), close=c.get("close", math.nan),
+                volume=c.get("volume", c.get("tick_volume", 0.0)),
+            )
+            if last_time is not None and t < last_time:
+                continue
+            if last_time is not None and t == last_time:
+                self.update_last(**values)
+                continue
+            self.push_bar(t, values["open"], values["high"], values["low"],
+                          values["close"], values["volume"])
+            last_time = t
+
+    def ingest_market_data(self, data):
+        """Alimentar el buffer con un market_data.json (velas si vienen, si no bid/ask)"""
+        if not data:
+            return
+        candles = data.get("candles")
+        if candles:
+            self.push_candles(candles)
+            return
+        bid = data.get("bid")
+        if bid is None:
+            return
+        t = parse_mt5_time(data.get("timestamp"))
+        self.push_snapshot(bid, data.get("ask"), t)
+
+    def clear(self):
+        self._data.fill(np.nan)
+        self._head = 0
+        self._size = 0
+        self._last_snapshot = None
+
+    # ==============================
+    # LECTURA (vistas sin copia)
+    # ==============================
+    def last_time(self):
+        if self._size == 0:
+            return None
+        return float(self._data[_IDX["time"], self._last_pos()])
+
+    def _slice(self, n):
+        n = self._size if n is None else max(0, min(int(n), self._size))
+        end = self._head + self.capacity
+        return slice(end - n, end)
+
+    def last(self, n=None, field="close"):
+        """Vista contigua (solo lectura) de las ultimas n barras de un campo"""
+        view = self._data[_IDX[field], self._slice(n)]
+        view.flags.writeable = False
+        return view
+
+    def arrays(self, n=None):
+        """Dict campo -> vista contigua de las ultimas n barras"""
+        sl = self._slice(n)
+        result = {}
+        for name, row in _IDX.items():
+            view = self._data[row, sl]
+            view.flags.writeable = False
+            result[name] = view
+        return result
+
+    def matrix(self, n=None):
+        """Vista 2D (campos x barras) de las ultimas n barras"""
+        view = self._data[:, self._slice(n)]
+        view.flags.writeable = False
+        return view
+
+    def candles(self, n=None):
+        """Lista de dicts (mas reciente primero) para las funciones legacy"""
+        arrays = self.arrays(n)
+        count = len(arrays["time"])
+        return [
+            {name: float(arrays[name][i]) for name in FIELDS}
+            for i in range(count - 1, -1, -1)
+        ]
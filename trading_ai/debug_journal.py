@@ -0,0 +1,150 @@
+"""
+debug_journal.py - Journal de debug append-only con rotacion por tamano
+
+Sustituye al antiguo logs/debug.json (lista JSON reescrita entera en cada
+write_debug). Ahora:
+
+  - Cada entrada es una linea JSON anexada a logs/debug.jsonl (O(1))
+  - Al superar max_bytes el segmento activo rota a debug.jsonl.1, .2, ...
+  - Los lectores (API, GUI) leen las ultimas N lineas desde el final del
+    archivo, sin parsear el archivo completo
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_DIR = Path(__file__).parent / "logs"
+JOURNAL_NAME = "debug.jsonl"
+
+DEFAULT_MAX_BYTES = 1024 * 1024
+DEFAULT_BACKUPS = 2
+
+_READ_BLOCK = 8192
+
+
+# ==============================
+# LECTURA DESDE EL FINAL
+# ==============================
+def _tail_lines(path, n):
+    """Devuelve hasta n lineas finales de un archivo leyendo bloques hacia atras."""
+    if n <= 0:
+        return []
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b""
+            while pos > 0 and buf.count(b"\n") <= n:
+                step = min(_READ_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+    except OSError:
+        return []
+
+    lines = [line for line in buf.split(b"\n") if line.strip()]
+    return lines[-n:]
+
+
+def _parse_lines(lines):
+    entries = []
+    for line in lines:
+        try:
+            entries.append(json.loads(line))
+        except ValueError:
+            # Linea truncada (escritura en curso o rotacion): ignorar
+            continue
+    return entries
+
+
+def read_tail(n=100, directory=DEFAULT_DIR, backups=DEFAULT_BACKUPS):
+    """
+    Lee las ultimas n entradas del journal (mas antigua primero).
+    Si el segmento activo tiene menos de n, completa con los rotados.
+    """
+    directory = Path(directory)
+    entries = []
+    segments = [directory / JOURNAL_NAME] + [
+        directory / f"{JOURNAL_NAME}.{i}" for i in range(1, backups + 1)
+    ]
+    for segment in segments:
+        missing = n - len(entries)
+        if missing <= 0:
+            break
+        entries = _parse_lines(_tail_lines(segment, missing)) + entries
+    return entries[-n:] if n > 0 else []
+
+
+# ==============================
+# ESCRITOR
+# ==============================
+class DebugJournal:
+    """
+    Journal de eventos de debug sobre un segmento JSONL rotado por tamano.
+    Las lecturas van siempre al archivo (read_tail), tambien en el proceso
+    que escribe.
+
+    Uso:
+        journal = DebugJournal()
+        journal.append("INFO", "mensaje")
+        read_tail(50, journal.directory)
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 backups=DEFAULT_BACKUPS):
+        self.directory = Path(directory)
+        self.path = self.directory / JOURNAL_NAME
+        self.max_bytes = max_bytes
+        self.backups = backups
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for i in range(self.backups, 0, -1):
+            src = self.path if i == 1 else self.directory / f"{JOURNAL_NAME}.{i - 1}"
+            dst = self.directory / f"{JOURNAL_NAME}.{i}"
+            if src.exists():
+                os.replace(src, dst)
+        if self.backups <= 0 and self.path.exists():
+            os.remove(self.path)
+        self._open()
+
+    def append(self, level, message):
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "level": level,
+            "message": message
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                self._file.write(line)
+                self._file.flush()
+                self._size += len(line.encode("utf-8"))
+                if self._size >= self.max_bytes:
+                    self._rotate()
+            except OSError:
+                # El debug nunca debe tumbar el bot
+                self._file = None
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
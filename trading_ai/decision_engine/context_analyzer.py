@@ -1,6 +1,23 @@
 # decision_engine/context_analyzer.py
 # VERSIÓN CORREGIDA v3.0 - Sin bloqueo de volatilidad LOW
 
+
+def classify_regime(trend, volatility):
+    """Régimen de mercado a partir de tendencia y volatilidad"""
+    if volatility == "HIGH":
+        if trend in ["STRONG_UP", "STRONG_DOWN"]:
+            return "TRENDING_VOLATILE"
+        return "CHOPPY"
+    elif volatility == "LOW":
+        return "QUIET"
+    else:
+        if trend in ["STRONG_UP", "STRONG_DOWN"]:
+            return "TRENDING"
+        elif trend == "SIDEWAYS":
+            return "RANGING"
+        return "TRANSITIONING"
+
+
 def analyze_market_context(market_data: dict) -> dict:
     """
     Analiza el contexto del mercado.
@@ -15,7 +32,12 @@ def analyze_market_context(market_data: dict) -> dict:
         "rsi_state": "NEUTRAL",
         "macd_state": "NEUTRAL",
         "bb_position": "MIDDLE",
-        "market_regime": "UNDEFINED"
+        "market_regime": "UNDEFINED",
+        "candle_pattern": "NONE",
+        "pattern_signal": "NEUTRAL",
+        "momentum_state": "NEUTRAL",
+        "support": None,
+        "resistance": None
     }
     
     # VALIDACIÓN
@@ -51,6 +73,9 @@ def analyze_market_context(market_data: dict) -> dict:
     trend_ea = analysis.get("trend", "SIDEWAYS")
     volatility_ea = analysis.get("volatility", "NORMAL")
     
+    # Price action del historial vivo de barras (solo en vivo, ver mt5_reader)
+    price_action = market_data.get("price_action") or {}
+    
     # ANÁLISIS TENDENCIA
     context["trend"] = trend_ea
     
@@ -118,21 +143,18 @@ def analyze_market_context(market_data: dict) -> dict:
             else:
                 context["bb_position"] = "MIDDLE"
     
+    # PRICE ACTION (patrones, momentum y S/R sobre las barras vivas)
+    if price_action:
+        pattern = price_action.get("candlestick_pattern", {})
+        context["candle_pattern"] = pattern.get("pattern", "NONE")
+        context["pattern_signal"] = pattern.get("signal", "NEUTRAL")
+        context["momentum_state"] = price_action.get("momentum", {}).get("signal", "NEUTRAL")
+        levels = price_action.get("support_resistance", {})
+        context["support"] = levels.get("support")
+        context["resistance"] = levels.get("resistance")
+    
     # RÉGIMEN DE MERCADO
-    if context["volatility"] == "HIGH":
-        if context["trend"] in ["STRONG_UP", "STRONG_DOWN"]:
-            context["market_regime"] = "TRENDING_VOLATILE"
-        else:
-            context["market_regime"] = "CHOPPY"
-    elif context["volatility"] == "LOW":
-        context["market_regime"] = "QUIET"
-    else:
-        if context["trend"] in ["STRONG_UP", "STRONG_DOWN"]:
-            context["market_regime"] = "TRENDING"
-        elif context["trend"] == "SIDEWAYS":
-            context["market_regime"] = "RANGING"
-        else:
-            context["market_regime"] = "TRANSITIONING"
+    context["market_regime"] = classify_regime(context["trend"], context["volatility"])
     
     # ========================================
     # BLOQUEOS DE TRADING (SIMPLIFICADOS)
@@ -168,11 +190,19 @@ def analyze_market_context(market_data: dict) -> dict:
                 confirmations += 1
             if context["rsi_state"] in ["STRONG", "NEUTRAL"]:
                 confirmations += 1
+            if context["pattern_signal"] == "BULLISH":
+                confirmations += 1
+            if context["momentum_state"] in ["BULLISH", "STRONG_BULLISH"]:
+                confirmations += 1
         elif context["trend"] in ["STRONG_DOWN", "DOWN"]:
             if context["macd_state"] in ["BEARISH", "STRONG_BEARISH"]:
                 confirmations += 1
             if context["rsi_state"] in ["WEAK", "NEUTRAL"]:
                 confirmations += 1
+            if context["pattern_signal"] == "BEARISH":
+                confirmations += 1
+            if context["momentum_state"] in ["BEARISH", "STRONG_BEARISH"]:
+                confirmations += 1
         
         context["confidence"] = min(0.95, context["confidence"] + (confirmations * 0.1))
     
@@ -0,0 +1,387 @@
+# decision_engine/decision_table.py
+
+"""
+Tabla de decision precompilada sobre el espacio discreto de contextos
+
+analyze_market_context reduce cada vela a unos pocos estados discretos:
+
+    trend x volatility x rsi_state x macd_state x bb_position
+    (market_regime y trade_allowed se derivan de trend + volatility)
+
+Son 6 x 3 x 5 x 5 x 5 = 2250 contextos. Aqui se recorren todos una vez y
+se guardan en arrays densos:
+
+  - ScoreTable: score y prioridad ML de cada estrategia del selector
+    (intelligent_selector o setup_selector) por contexto
+  - SignalTable: resultado de cada evaluador de signal_router por contexto,
+    como indice a una paleta de resultados unicos. Si el resultado cambia
+    con valores crudos (RSI real, confianza del contexto) la celda queda
+    DYNAMIC y se sigue llamando al evaluador
+
+En el ciclo en vivo y en el backtest, elegir estrategia y evaluar la senal
+pasa a ser una consulta a la tabla. Las tablas se recompilan solas si
+cambian las definiciones de estrategias, las prioridades ML o las
+estadisticas de aprendizaje (firma), y export_decision_map vuelca el mapa
+completo a CSV para auditarlo.
+
+Uso:
+    python decision_engine/decision_table.py --selector intelligent --output decision_map.csv
+"""
+
+import argparse
+import copy
+import csv
+import os
+import sys
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decision_engine.context_analyzer import classify_regime
+
+# Desactivar para forzar el camino original (scoring y evaluadores en cada llamada)
+ENABLED = True
+
+# ==============================
+# ESPACIO DE CONTEXTOS
+# ==============================
+TRENDS = ("STRONG_UP", "UP", "SIDEWAYS", "DOWN", "STRONG_DOWN", "NONE")
+VOLATILITIES = ("LOW", "NORMAL", "HIGH")
+RSI_STATES = ("OVERSOLD", "WEAK", "NEUTRAL", "STRONG", "OVERBOUGHT")
+MACD_STATES = ("STRONG_BEARISH", "BEARISH", "NEUTRAL", "BULLISH", "STRONG_BULLISH")
+BB_POSITIONS = ("NEAR_LOWER", "LOWER_HALF", "MIDDLE", "UPPER_HALF", "NEAR_UPPER")
+
+DIMENSIONS = (
+    ("trend", TRENDS),
+    ("volatility", VOLATILITIES),
+    ("rsi_state", RSI_STATES),
+    ("macd_state", MACD_STATES),
+    ("bb_position", BB_POSITIONS),
+)
+# Claves de contexto que puede leer una condicion de estrategia
+CONTEXT_KEYS = tuple(key for key, _ in DIMENSIONS) + ("market_regime", "trade_allowed")
+
+N_STATES = int(np.prod([len(values) for _, values in DIMENSIONS]))
+
+_VALUE_INDEX = [{value: i for i, value in enumerate(values)} for _, values in DIMENSIONS]
+_STRIDES = tuple(int(np.prod([len(v) for _, v in DIMENSIONS[d + 1:]])) for d in range(len(DIMENSIONS)))
+# Regimen de cada (trend, volatility), en el orden de la tabla
+_REGIMES = tuple(classify_regime(t, v) for t in TRENDS for v in VOLATILITIES)
+
+# Sondas de valores crudos por celda: RSI dentro de la banda de su rsi_state
+# (umbrales de analyze_market_context) y confianza del contexto
+RSI_PROBES = {
+    "OVERSOLD": (0.0, 10.0, 20.0, 25.0, 29.9),
+    "WEAK": (30.0, 32.5, 35.0, 37.5, 39.9),
+    "NEUTRAL": tuple(40.0 + 0.5 * i for i in range(41)),
+    "STRONG": (60.1, 62.5, 65.0, 67.5, 70.0),
+    "OVERBOUGHT": (70.1, 75.0, 80.0, 90.0, 100.0),
+}
+CONFIDENCE_PROBES = (0.0, 0.4, 0.7, 0.95)
+
+# Marca de timeframe tomado de market_data (los evaluadores lo copian)
+TIMEFRAME_PROBE = "__timeframe__"
+
+DYNAMIC = -1
+
+
+def state_context(index):
+    """Contexto representativo (dict) de un indice de la tabla"""
+    context = {}
+    for (key, values), stride in zip(DIMENSIONS, _STRIDES):
+        context[key] = values[(index // stride) % len(values)]
+    regime = classify_regime(context["trend"], context["volatility"])
+    context["market_regime"] = regime
+    context["trade_allowed"] = regime != "CHOPPY"
+    context["confidence"] = 0.0
+    return context
+
+
+def state_index(context):
+    """
+    Indice del contexto en la tabla, o None si algun valor queda fuera del
+    espacio compilado (o market_regime/trade_allowed no son los derivados)
+    """
+    try:
+        index = 0
+        for (key, _), lookup, stride in zip(DIMENSIONS, _VALUE_INDEX, _STRIDES):
+            index += lookup[context[key]] * stride
+    except (KeyError, TypeError):
+        return None
+    regime = _REGIMES[index // _STRIDES[1]]
+    if context.get("market_regime") != regime or context.get("trade_allowed") != (regime != "CHOPPY"):
+        return None
+    return index
+
+
+# ==============================
+# SCORES DE ESTRATEGIAS
+# ==============================
+class ScoreTable:
+    """Score y prioridad ML de cada estrategia en cada contexto"""
+
+    def __init__(self, strategies, score_fn, priorities_fn=None, signature=None):
+        """
+        Args:
+            strategies: Lista de estrategias (name, type, best/avoid_conditions...)
+            score_fn: (strategy, context, ml_priority) -> score
+            priorities_fn: (names, context) -> {name: prioridad ML}, o None
+            signature: Firma extra con la que se compilo (p.ej. estado ML)
+        """
+        # Copia: se compara con las definiciones actuales para saber si recompilar
+        self.strategies = copy.deepcopy(strategies)
+        self.names = [s["name"] for s in strategies]
+        self.signature = signature
+        self.scores = np.zeros((N_STATES, len(strategies)), dtype=np.float64)
+        self.priorities = np.ones((N_STATES, len(strategies)), dtype=np.float64)
+        self._compile(score_fn, priorities_fn)
+        # Mejor estrategia por contexto (empate: la primera, como el sort estable)
+        self.best = np.argmax(self.scores, axis=1) if len(strategies) else np.zeros(N_STATES, dtype=np.int64)
+
+    def _compile(self, score_fn, priorities_fn):
+        for index in range(N_STATES):
+            context = state_context(index)
+            priorities = {}
+            if priorities_fn is not None:
+                try:
+                    priorities = priorities_fn(self.names, context)
+                except Exception:
+                    priorities = {}
+            for j, strategy in enumerate(self.strategies):
+                priority = priorities.get(strategy["name"], 1.0)
+                self.priorities[index, j] = priority
+                self.scores[index, j] = score_fn(strategy, context, priority)
+
+    @staticmethod
+    def supports(strategies):
+        """Solo se puede compilar si las condiciones leen claves discretas de la tabla"""
+        for strategy in strategies:
+            for group in ("best_conditions", "avoid_conditions"):
+                if any(key not in CONTEXT_KEYS for key in strategy.get(group, {})):
+                    return False
+        return True
+
+    def lookup(self, context):
+        """(scores, prioridades) por estrategia para el contexto, o None si no esta en la tabla"""
+        index = state_index(context)
+        if index is None:
+            return None
+        return self.scores[index].tolist(), self.priorities[index].tolist()
+
+
+# ==============================
+# RESULTADOS DE EVALUADORES
+# ==============================
+class SignalTable:
+    """Resultado de cada evaluador de signal_router en cada contexto"""
+
+    def __init__(self, routes, signature=None):
+        """
+        Args:
+            routes: {setup_name: evaluate(context, market_data)}
+            signature: Firma con la que se compilo
+        """
+        self.setups = list(routes)
+        self.setup_index = {name: j for j, name in enumerate(self.setups)}
+        self.signature = signature
+        self.outcomes = []      # paleta de resultados unicos (dicts)
+        self.index = np.full((N_STATES, len(self.setups)), DYNAMIC, dtype=np.int32)
+        self._compile(routes)
+
+    def _compile(self, routes):
+        palette = {}
+        for index in range(N_STATES):
+            context = state_context(index)
+            probes = [
+                ({**context, "confidence": CONFIDENCE_PROBES[k % len(CONFIDENCE_PROBES)]},
+                 {"indicators": {"rsi": rsi}, "timeframe": TIMEFRAME_PROBE})
+                for k, rsi in enumerate(RSI_PROBES[context["rsi_state"]])
+            ]
+            for j, name in enumerate(self.setups):
+                key = _probe_outcome(routes[name], probes)
+                if key is None:
+                    continue
+                if key not in palette:
+                    palette[key] = len(self.outcomes)
+                    self.outcomes.append(dict(key))
+                self.index[index, j] = palette[key]
+
+    def evaluation(self, setup_name, context, market_data):
+        """
+        Resultado del evaluador (mismo dict que devolveria) o None si la
+        celda es dinamica o el contexto/setup no esta en la tabla
+        """
+        j = self.setup_index.get(setup_name)
+        if j is None:
+            return None
+        index = state_index(context)
+        if index is None:
+            return None
+        k = self.index[index, j]
+        if k == DYNAMIC:
+            return None
+        result = dict(self.outcomes[k])
+        if result.get("timeframe") == TIMEFRAME_PROBE:
+            result["timeframe"] = market_data.get("timeframe", "M5")
+        return result
+
+    def dynamic_cells(self):
+        return int(np.count_nonzero(self.index == DYNAMIC))
+
+
+def _probe_outcome(evaluate, probes):
+    """Clave hashable del resultado si es igual en todas las sondas; None si no"""
+    key = None
+    for context, market_data in probes:
+        try:
+            result = evaluate(context, market_data)
+        except Exception:
+            return None
+        if not isinstance(result, dict):
+            return None
+        try:
+            probe_key = tuple(sorted(result.items()))
+            hash(probe_key)
+        except TypeError:
+            return None
+        if key is None:
+            key = probe_key
+        elif probe_key != key:
+            return None
+    return key
+
+
+# ==============================
+# CACHE DE TABLAS
+# ==============================
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def get_score_table(name, strategies, score_fn, priorities_fn=None, extra_signature=None):
+    """
+    ScoreTable compilada para un selector; se recompila si cambian las
+    definiciones de estrategias o extra_signature (p.ej. estado ML).
+
+    Returns:
+        ScoreTable o None (tabla desactivada o estrategias no compilables)
+    """
+    if not ENABLED:
+        return None
+    with _tables_lock:
+        table = _tables.get(("score", name))
+        if table is not None and table.signature == extra_signature and table.strategies == strategies:
+            return table
+        if not ScoreTable.supports(strategies):
+            return None
+        table = ScoreTable(strategies, score_fn, priorities_fn, extra_signature)
+        _tables[("score", name)] = table
+        return table
+
+
+def get_signal_table(routes):
+    """SignalTable de los evaluadores (se recompila si cambia algun evaluador)"""
+    if not ENABLED:
+        return None
+    signature = tuple(routes.items())
+    with _tables_lock:
+        table = _tables.get("signal")
+        if table is None or table.signature != signature:
+            table = SignalTable(routes, signature)
+            _tables["signal"] = table
+        return table
+
+
+def invalidate():
+    """Olvidar las tablas compiladas (se recompilan en la siguiente consulta)"""
+    with _tables_lock:
+        _tables.clear()
+
+
+# ==============================
+# MAPA DE DECISION
+# ==============================
+def decision_rows(score_table, signal_table, min_score):
+    """
+    Una fila por contexto: estrategia elegida, score y resultado de su
+    evaluador (o DYNAMIC si depende de valores crudos)
+    """
+    for index in range(N_STATES):
+        context = state_context(index)
+        row = {key: context[key] for key in CONTEXT_KEYS}
+        best = int(score_table.best[index]) if score_table.names else None
+        score = float(score_table.scores[index, best]) if best is not None else 0.0
+        row["strategy"] = score_table.names[best] if best is not None and score >= min_score else ""
+        row["score"] = round(score, 4)
+        row["ml_priority"] = float(score_table.priorities[index, best]) if best is not None else 1.0
+        row.update({"action": "", "confidence": "", "sl_pips": "", "tp_pips": "", "reason": ""})
+
+        j = signal_table.setup_index.get(row["strategy"])
+        if j is not None:
+            k = signal_table.index[index, j]
+            if k == DYNAMIC:
+                row["action"] = "DYNAMIC"
+            else:
+                outcome = signal_table.outcomes[k]
+                row["action"] = outcome.get("signal") or "NONE"
+                row["confidence"] = outcome.get("confidence", 0.0)
+                row["sl_pips"] = outcome.get("sl_pips", "")
+                row["tp_pips"] = outcome.get("tp_pips", "")
+                row["reason"] = outcome.get("reason", "")
+        yield row
+
+
+def export_decision_map(path, selector="intelligent"):
+    """
+    Compilar las tablas del selector indicado y volcar el mapa a CSV
+
+    Returns:
+        dict: resumen (contextos, celdas dinamicas, acciones por tipo)
+    """
+    from decision_engine import signal_router
+
+    if selector == "intelligent":
+        from decision_engine import intelligent_selector as module
+        min_score = module.MIN_SCORE
+    else:
+        from decision_engine import setup_selector as module
+        min_score = module.MIN_SCORE
+
+    score_table = module.get_score_table()
+    signal_table = signal_router.get_signal_table()
+    if score_table is None or signal_table is None:
+        raise RuntimeError("Tabla de decision no disponible (desactivada o estrategias no compilables)")
+
+    summary = {"states": N_STATES, "dynamic_cells": signal_table.dynamic_cells(), "actions": {}}
+    fields = list(CONTEXT_KEYS) + ["strategy", "score", "ml_priority", "action",
+                                   "confidence", "sl_pips", "tp_pips", "reason"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for row in decision_rows(score_table, signal_table, min_score):
+            writer.writerow(row)
+            action = row["action"] or "NO_SETUP"
+            summary["actions"][action] = summary["actions"].get(action, 0) + 1
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mapa de decision precompilado por contexto")
+    parser.add_argument("--selector", choices=("intelligent", "basic"), default="intelligent",
+                        help="Selector de estrategia (intelligent_selector o setup_selector)")
+    parser.add_argument("--output", default="learning_data/decision_map.csv", help="CSV de salida")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    summary = export_decision_map(args.output, args.selector)
+
+    print(f"✅ Mapa de decision: {summary['states']} contextos -> {args.output}")
+    print(f"   Celdas dinamicas (dependen de valores crudos): {summary['dynamic_cells']}")
+    for action, count in sorted(summary["actions"].items()):
+        print(f"   {action}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,12 +23,17 @@ except:
         ]
 
 try:
-    from ml_adaptive_system import get_ml_strategy_priority
+    from ml_adaptive_system import get_ml_strategy_priorities, get_ml_priorities_signature
     ML_AVAILABLE = True
 except:
     ML_AVAILABLE = False
     print("⚠️ Sistema ML no disponible, usando selector básico")
 
+from decision_engine import decision_table
+
+# Umbral mínimo de score
+MIN_SCORE = 0.30  # Más permisivo para testing
+
 
 def score_strategy(strategy, context, ml_priority=1.0):
     """
@@ -75,12 +80,13 @@ def score_strategy(strategy, context, ml_priority=1.0):
     return final_score
 
 
-def select_intelligent_strategy(context):
+def select_intelligent_strategy(context, verbose=True):
     """
     Selecciona la mejor estrategia usando ML
     
     Args:
         context: Contexto actual del mercado
+        verbose: Imprimir el ranking (False en backtesting, una vez por vela)
     
     Returns:
         dict: {
@@ -95,25 +101,33 @@ def select_intelligent_strategy(context):
     strategies = get_all_strategies()
     
     if not strategies:
-        print("⚠️ No hay estrategias disponibles")
+        if verbose:
+            print("⚠️ No hay estrategias disponibles")
         return None
     
-    # Calcular scores con ML
-    scored_strategies = []
+    # Scores precompilados para el contexto (tabla de decisión)
+    table = get_score_table(strategies)
+    row = table.lookup(context) if table is not None else None
     
-    for strategy in strategies:
-        strategy_name = strategy["name"]
-        
-        # Obtener prioridad ML si está disponible
-        ml_priority = 1.0
+    if row is not None:
+        scores, priorities = row
+    else:
+        # Prioridades ML de todas las estrategias en una sola llamada
+        ml_priorities = {}
         if ML_AVAILABLE:
             try:
-                ml_priority = get_ml_strategy_priority(strategy_name, context)
+                ml_priorities = get_ml_strategy_priorities([s["name"] for s in strategies], context)
             except:
-                ml_priority = 1.0
+                ml_priorities = {}
         
-        # Calcular score final
-        score = score_strategy(strategy, context, ml_priority)
+        # Calcular scores con ML
+        priorities = [ml_priorities.get(s["name"], 1.0) for s in strategies]
+        scores = [score_strategy(s, context, p) for s, p in zip(strategies, priorities)]
+    
+    scored_strategies = []
+    
+    for strategy, score, ml_priority in zip(strategies, scores, priorities):
+        strategy_name = strategy["name"]
         
         scored_strategies.append({
             "name": strategy_name,
@@ -128,19 +142,18 @@ def select_intelligent_strategy(context):
     scored_strategies.sort(key=lambda x: x["score"], reverse=True)
     
     # Mostrar top 3
-    print("\n📊 TOP 3 ESTRATEGIAS:")
-    for i, s in enumerate(scored_strategies[:3], 1):
-        ml_tag = f" [ML: {s['ml_priority']:.2f}x]" if ML_AVAILABLE else ""
-        print(f"   {i}. {s['name']}: {s['score']:.2f}{ml_tag}")
+    if verbose:
+        print("\n📊 TOP 3 ESTRATEGIAS:")
+        for i, s in enumerate(scored_strategies[:3], 1):
+            ml_tag = f" [ML: {s['ml_priority']:.2f}x]" if ML_AVAILABLE else ""
+            print(f"   {i}. {s['name']}: {s['score']:.2f}{ml_tag}")
     
     # Seleccionar la mejor
     best = scored_strategies[0]
     
-    # Umbral mínimo
-    MIN_SCORE = 0.30  # Más permisivo para testing
-    
     if best["score"] < MIN_SCORE:
-        print(f"❌ Mejor estrategia ({best['name']}) tiene score muy bajo ({best['score']:.2f})")
+        if verbose:
+            print(f"❌ Mejor estrategia ({best['name']}) tiene score muy bajo ({best['score']:.2f})")
         return None
     
     # Construir reason
@@ -154,17 +167,39 @@ def select_intelligent_strategy(context):
     
     best["reason"] = ", ".join(reason_parts) if reason_parts else "Mejor opción disponible"
     
-    print(f"✅ Estrategia seleccionada: {best['name']} (score: {best['score']:.2f})")
-    if reason_parts:
-        print(f"   Razón: {best['reason']}")
+    if verbose:
+        print(f"✅ Estrategia seleccionada: {best['name']} (score: {best['score']:.2f})")
+        if reason_parts:
+            print(f"   Razón: {best['reason']}")
     
     return best
 
 
+def get_score_table(strategies=None):
+    """
+    Tabla de scores del selector (decision_table), recompilada si cambian
+    las estrategias o el estado ML. None si no se puede usar.
+    """
+    if strategies is None:
+        strategies = get_all_strategies()
+    
+    priorities_fn = None
+    ml_signature = None
+    if ML_AVAILABLE:
+        try:
+            ml_signature = get_ml_priorities_signature()
+        except:
+            return None
+        priorities_fn = get_ml_strategy_priorities
+    
+    return decision_table.get_score_table("intelligent", strategies, score_strategy,
+                                          priorities_fn, ml_signature)
+
+
 # Para compatibilidad con código existente
-def select_setup(context):
+def select_setup(context, verbose=True):
     """Wrapper para compatibilidad con código existente"""
-    return select_intelligent_strategy(context)
+    return select_intelligent_strategy(context, verbose)
 
 
 if __name__ == "__main__":
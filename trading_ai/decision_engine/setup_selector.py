@@ -8,8 +8,18 @@ Selector mejorado de estrategias (setups) que:
 """
 
 import os
+import sys
 import json
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decision_engine import decision_table
+
+LEARNING_STATS_FILE = "learning_data/setup_stats.json"
+
+# Umbral mínimo de calidad
+MIN_SCORE = 0.50
+
 
 # ========== DEFINICIÓN DE SETUPS DISPONIBLES ==========
 
@@ -150,30 +160,40 @@ def score_setup(setup, context, learning_stats=None):
 
 # ========== SELECTOR PRINCIPAL ==========
 
-def select_setup(context):
+def select_setup(context, verbose=True):
     """
     Decide qué setup usar según el contexto y el scoring dinámico.
     Puede devolver None si NO hay setup válido.
     
     VERSIÓN MEJORADA: Usa learning stats
+    
+    Args:
+        verbose: Imprimir los scores (False en backtesting, una vez por vela)
     """
     
     # Obtener setups disponibles
     setups = get_available_setups()
     
     if not setups:
-        print("⚠️ No hay setups disponibles")
+        if verbose:
+            print("⚠️ No hay setups disponibles")
         return None
     
-    # Cargar estadísticas de aprendizaje
-    learning_stats = _load_learning_stats()
+    # Scores precompilados para el contexto (tabla de decisión)
+    table = get_score_table(setups)
+    row = table.lookup(context) if table is not None else None
+    
+    if row is not None:
+        scores = row[0]
+    else:
+        # Cargar estadísticas de aprendizaje
+        learning_stats = _load_learning_stats(verbose)
+        scores = [score_setup(setup, context, learning_stats) for setup in setups]
     
-    # Calcular scores para cada setup
+    # Construir lista con scores
     scored_setups = []
     
-    for setup in setups:
-        score = score_setup(setup, context, learning_stats)
-        
+    for setup, score in zip(setups, scores):
         scored_setups.append({
             "name": setup["name"],
             "type": setup["type"],
@@ -185,31 +205,55 @@ def select_setup(context):
     scored_setups.sort(key=lambda x: x["score"], reverse=True)
     
     # Mostrar scores
-    print("\n📊 SCORES DE SETUPS:")
-    for s in scored_setups:
-        print(f"   {s['name']}: {s['score']:.2f}")
+    if verbose:
+        print("\n📊 SCORES DE SETUPS:")
+        for s in scored_setups:
+            print(f"   {s['name']}: {s['score']:.2f}")
     
     # Seleccionar el mejor
     best = scored_setups[0]
     
-    # Umbral mínimo de calidad
-    MIN_SCORE = 0.50
-    
     if best["score"] < MIN_SCORE:
-        print(f"❌ Mejor setup ({best['name']}) tiene score muy bajo ({best['score']:.2f})")
+        if verbose:
+            print(f"❌ Mejor setup ({best['name']}) tiene score muy bajo ({best['score']:.2f})")
         return None
     
-    print(f"✅ Setup seleccionado: {best['name']} (score: {best['score']:.2f})")
+    if verbose:
+        print(f"✅ Setup seleccionado: {best['name']} (score: {best['score']:.2f})")
     
     return best
 
 
 # ========== HELPERS ==========
 
-def _load_learning_stats():
+def get_score_table(setups=None):
+    """
+    Tabla de scores de setups (decision_table), recompilada si cambian los
+    setups o learning_data/setup_stats.json. None si no se puede usar.
+    """
+    if setups is None:
+        setups = get_available_setups()
+    
+    try:
+        st = os.stat(LEARNING_STATS_FILE)
+        stats_signature = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        stats_signature = None
+    
+    # Las stats solo se leen si hay que recompilar
+    loaded = {}
+    def score_fn(setup, context, ml_priority):
+        if "stats" not in loaded:
+            loaded["stats"] = _load_learning_stats()
+        return score_setup(setup, context, loaded["stats"])
+    
+    return decision_table.get_score_table("basic", setups, score_fn, None, stats_signature)
+
+
+def _load_learning_stats(verbose=True):
     """Carga estadísticas de aprendizaje desde archivo JSON"""
     
-    stats_file = "learning_data/setup_stats.json"
+    stats_file = LEARNING_STATS_FILE
     
     if not os.path.exists(stats_file):
         return {}
@@ -218,7 +262,8 @@ def _load_learning_stats():
         with open(stats_file, "r") as f:
             stats = json.load(f)
         
-        print(f"📚 Learning stats cargadas: {len(stats)} setups con historial")
+        if verbose:
+            print(f"📚 Learning stats cargadas: {len(stats)} setups con historial")
         return stats
         
     except Exception as e:
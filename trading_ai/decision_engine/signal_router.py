@@ -1,6 +1,5 @@
 # decision_engine/signal_router.py
 
-import json
 import os
 from datetime import datetime
 
@@ -30,61 +29,90 @@ except Exception:
     # Fallback: carpeta local del VPS
     SIGNAL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "mt5_exchange", "signals", "signal.json")
 
+from executor.signal_emitters import FileSignalEmitter
+from decision_engine import decision_table
 
-def evaluate_signal(setup_name, context, market_data):
+# Emisor por defecto: el signal.json que lee el EA
+LIVE_EMITTER = FileSignalEmitter(SIGNAL_PATH)
+
+
+def evaluate_signal(setup_name, context, market_data, emitter=None):
     """
     VERSIÓN MEJORADA
     Evalúa señal según el setup seleccionado usando evaluadores especializados
+    y la entrega al emisor (por defecto escribe signal.json para el EA).
+    
+    Args:
+        emitter: Destino de la señal (FileSignalEmitter, MemorySignalEmitter,
+            NullSignalEmitter). None = LIVE_EMITTER.
     """
+    if emitter is None:
+        emitter = LIVE_EMITTER
     
-    signal = None
+    final_signal = decide(setup_name, context, market_data, verbose=emitter.log)
     
-    # ========== ROUTING A EVALUADORES ESPECÍFICOS ==========
+    if final_signal.get("action") == "NONE":
+        return final_signal
     
-    if setup_name == "TREND_FOLLOWING":
-        if eval_trend_following:
-            signal = eval_trend_following(context, market_data)
-        else:
-            signal = _evaluate_trend_following_fallback(context, market_data)
+    # ========== EMITIR ==========
     
-    elif setup_name == "MEAN_REVERSION":
-        if eval_mean_reversion:
-            signal = eval_mean_reversion(context, market_data)
-        else:
-            signal = _evaluate_mean_reversion_fallback(context, market_data)
+    if not emitter.emit(final_signal):
+        return None
     
-    elif setup_name == "TREND_PULLBACK":
-        signal = _evaluate_trend_pullback(context, market_data)
-
-    elif setup_name == "BREAKOUT":
-        signal = _evaluate_breakout(context, market_data)
-
-    elif setup_name == "MOMENTUM":
-        signal = _evaluate_momentum(context, market_data)
-
-    elif setup_name == "SCALPING":
-        signal = _evaluate_scalping(context, market_data)
-
-    elif setup_name == "RANGE_TRADING":
-        signal = _evaluate_range_trading(context, market_data)
+    # ========== LOGS ==========
+    
+    if emitter.log:
+        print("✅ SEÑAL GENERADA:")
+        print(f"   Setup: {setup_name}")
+        print(f"   Action: {final_signal['action']}")
+        print(f"   Confidence: {final_signal['confidence']:.2%}")
+        print(f"   SL/TP: {final_signal['sl_pips']}/{final_signal['tp_pips']} pips")
+        print(f"   Reason: {final_signal['reason'] or 'N/A'}")
+    
+    return final_signal
 
-    elif setup_name == "VOLATILITY_BREAKOUT":
-        signal = _evaluate_volatility_breakout(context, market_data)
 
-    else:
-        print(f"⚠️ Setup desconocido: {setup_name}")
+def decide(setup_name, context, market_data, now=None, verbose=False):
+    """
+    Decisión pura: enruta al evaluador y construye la señal final, sin
+    escribir archivos ni imprimir (salvo verbose=True).
+    
+    Args:
+        now: datetime UTC para el signal_id/timestamp (None = ahora)
+    
+    Returns:
+        dict: Señal final, o señal NONE si no hay operación
+    """
+    
+    # ========== ROUTING A EVALUADORES ESPECÍFICOS ==========
+    
+    routes = get_routes()
+    evaluator = routes.get(setup_name)
+    
+    if evaluator is None:
+        if verbose:
+            print(f"⚠️ Setup desconocido: {setup_name}")
         return _create_no_signal()
     
+    # Resultado precompilado para el contexto (tabla de decisión)
+    table = get_signal_table(routes)
+    signal = table.evaluation(setup_name, context, market_data) if table is not None else None
+    
+    if signal is None:
+        signal = evaluator(context, market_data)
+    
     # ========== VALIDACIÓN DE SEÑAL ==========
     
     if not signal or signal.get("signal") is None:
-        print(f"❌ Evaluador {setup_name} no generó señal válida")
+        if verbose:
+            print(f"❌ Evaluador {setup_name} no generó señal válida")
         return _create_no_signal()
     
     # Verificar confianza mínima
     confidence = signal.get("confidence", 0)
     if confidence < 0.10:
-        print(f"⚠️ Confianza muy baja ({confidence:.2f}), no se genera señal")
+        if verbose:
+            print(f"⚠️ Confianza muy baja ({confidence:.2f}), no se genera señal")
         return _create_no_signal()
     
     # ========== CONSTRUCCIÓN DE SEÑAL FINAL ==========
@@ -94,7 +122,8 @@ def evaluate_signal(setup_name, context, market_data):
     tp_pips = signal.get("tp_pips", 25)
     
     # Generar ID único
-    now = datetime.utcnow()
+    if now is None:
+        now = datetime.utcnow()
     signal_id = f"{now.strftime('%Y%m%d_%H%M%S')}_{action}_{setup_name}"
     
     final_signal = {
@@ -110,44 +139,26 @@ def evaluate_signal(setup_name, context, market_data):
         "reason": signal.get("reason", "")
     }
     
-    # ========== ESCRIBIR ARCHIVO ==========
-    
-    if not _write_signal_file(final_signal):
-        return None
-    
-    # ========== LOGS ==========
-    
-    print("✅ SEÑAL GENERADA:")
-    print(f"   Setup: {setup_name}")
-    print(f"   Action: {action}")
-    print(f"   Confidence: {confidence:.2%}")
-    print(f"   SL/TP: {sl_pips}/{tp_pips} pips")
-    print(f"   Reason: {signal.get('reason', 'N/A')}")
-    
     return final_signal
 
 
-def _write_signal_file(signal):
-    """Escribe el archivo signal.json de forma segura"""
-    
-    try:
-        # Garantizar directorio
-        os.makedirs(os.path.dirname(SIGNAL_PATH), exist_ok=True)
-        
-        # Escritura atómica usando archivo temporal
-        temp_path = SIGNAL_PATH + ".tmp"
-        
-        with open(temp_path, "w", encoding="utf-8") as f:
-            json.dump(signal, f, indent=4)
-        
-        os.replace(temp_path, SIGNAL_PATH)
-        
-        print("📍 signal.json escrito en:", SIGNAL_PATH)
-        return True
-        
-    except Exception as e:
-        print("❌ ERROR escribiendo signal.json:", e)
-        return False
+def get_routes():
+    """Evaluador de cada setup (los mejorados si cargaron, si no el fallback)"""
+    return {
+        "TREND_FOLLOWING": eval_trend_following or _evaluate_trend_following_fallback,
+        "MEAN_REVERSION": eval_mean_reversion or _evaluate_mean_reversion_fallback,
+        "TREND_PULLBACK": _evaluate_trend_pullback,
+        "BREAKOUT": _evaluate_breakout,
+        "MOMENTUM": _evaluate_momentum,
+        "SCALPING": _evaluate_scalping,
+        "RANGE_TRADING": _evaluate_range_trading,
+        "VOLATILITY_BREAKOUT": _evaluate_volatility_breakout,
+    }
+
+
+def get_signal_table(routes=None):
+    """Tabla de resultados de los evaluadores (decision_table), o None si está desactivada"""
+    return decision_table.get_signal_table(routes or get_routes())
 
 
 def _create_no_signal():
@@ -0,0 +1,71 @@
+# executor/signal_emitters.py
+
+"""
+Destinos para las senales generadas por decision_engine.signal_router
+
+- FileSignalEmitter: escribe signal.json para el EA (bot en vivo)
+- MemorySignalEmitter: guarda las senales en memoria (backtesting)
+- NullSignalEmitter: las descarta (benchmarks)
+
+Solo FileSignalEmitter toca el disco y solo el emisor en vivo imprime logs.
+"""
+
+import json
+import os
+from collections import deque
+
+
+class FileSignalEmitter:
+    """Escritura atomica de signal.json (tmp + os.replace)"""
+
+    log = True
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, signal):
+        try:
+            # Garantizar directorio
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+            # Escritura atómica usando archivo temporal
+            temp_path = self.path + ".tmp"
+
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(signal, f, indent=4)
+
+            os.replace(temp_path, self.path)
+
+            print("📍 signal.json escrito en:", self.path)
+            return True
+
+        except Exception as e:
+            print("❌ ERROR escribiendo signal.json:", e)
+            return False
+
+
+class MemorySignalEmitter:
+    """Acumula las senales en memoria (sin E/S)"""
+
+    log = False
+
+    def __init__(self, maxlen=None):
+        # Con maxlen se conservan solo las ultimas senales (descarte O(1))
+        self.signals = deque(maxlen=maxlen)
+        self.maxlen = maxlen
+
+    def emit(self, signal):
+        self.signals.append(signal)
+        return True
+
+    def clear(self):
+        self.signals.clear()
+
+
+class NullSignalEmitter:
+    """Descarta las senales"""
+
+    log = False
+
+    def emit(self, signal):
+        return True
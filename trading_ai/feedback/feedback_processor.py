@@ -7,45 +7,47 @@ Cambios principales:
 - Lee de carpeta trade_feedback/ (archivos individuales por trade)
 - Procesa TODOS los feedbacks en un ciclo (cierres masivos)
 - Mantiene compatibilidad con el archivo unico legacy
-- Acumula historial completo sin limites
+- Acumula historial completo sin limites (trade_store, SQLite append-only)
 """
 
 import os
 import json
 import glob
-from datetime import datetime
+from datetime import datetime, timedelta
 
 
 import sys, os as _os
 sys.path.insert(0, _os.path.dirname(_os.path.dirname(__file__)))
 from mt5_paths import FEEDBACK_FILE_LEGACY, FEEDBACK_FOLDER
+from trade_store import get_trade_store, HISTORY_DB, LEGACY_HISTORY_JSON
+from feedback.processed_index import get_processed_index
 
 STATS_FILE = "learning_data/setup_stats.json"
-HISTORY_FILE = "learning_data/trade_history.json"
+HISTORY_FILE = LEGACY_HISTORY_JSON
 PROCESSED_SIGNALS_FILE = "learning_data/processed_signals.txt"
 
 
-def is_already_processed(signal_id):
-    """Verificar si una senal ya fue procesada"""
-    if not os.path.exists(PROCESSED_SIGNALS_FILE):
-        return False
+# Con historiales enormes, activar un Bloom filter delante del set (None = no)
+PROCESSED_BLOOM_THRESHOLD = None
+
 
+def processed_index():
+    """Indice residente de senales procesadas (se carga una sola vez)"""
+    return get_processed_index(PROCESSED_SIGNALS_FILE, bloom_threshold=PROCESSED_BLOOM_THRESHOLD)
+
+
+def is_already_processed(signal_id):
+    """Verificar si una senal ya fue procesada (O(1))"""
     try:
-        with open(PROCESSED_SIGNALS_FILE, "r") as f:
-            processed = f.read().splitlines()
-        return signal_id in processed
+        return signal_id in processed_index()
     except:
         return False
 
 
 def mark_as_processed(signal_id):
     """Marcar una senal como procesada"""
-    os.makedirs(os.path.dirname(PROCESSED_SIGNALS_FILE), exist_ok=True)
-
     try:
-        with open(PROCESSED_SIGNALS_FILE, "a") as f:
-            f.write(signal_id + "\n")
-        return True
+        return processed_index().add(signal_id)
     except:
         return False
 
@@ -75,27 +77,26 @@ def save_stats(stats):
         return False
 
 
+def get_history_store():
+    """Historial de trades compartido (SQLite, migra el JSON legacy una vez)"""
+    return get_trade_store(HISTORY_DB, HISTORY_FILE)
+
+
 def load_history():
     """Cargar historial completo de trades"""
-    if not os.path.exists(HISTORY_FILE):
-        return []
-
     try:
-        with open(HISTORY_FILE, "r") as f:
-            return json.load(f)
-    except:
+        return get_history_store().all()
+    except Exception:
         return []
 
 
-def save_history(history):
-    """Guardar historial de trades SIN LIMITE"""
-    os.makedirs(os.path.dirname(HISTORY_FILE), exist_ok=True)
-
+def append_history(trade_records):
+    """Anexar trades al historial SIN LIMITE (sin reescribir lo anterior)"""
     try:
-        with open(HISTORY_FILE, "w") as f:
-            json.dump(history, f, indent=4)
+        get_history_store().append_many(trade_records)
         return True
-    except:
+    except Exception as e:
+        print(f"Error guardando historial: {e}")
         return False
 
 
@@ -237,14 +238,17 @@ def process_feedback():
     if not pending:
         return False
 
+    # Recoger cambios hechos por otro proceso (un stat por lote)
+    processed_index().refresh()
+
     processed_count = 0
-    history = load_history()
+    new_records = []
 
     for filepath, feedback in pending:
         trade_record = _process_single_feedback(feedback)
 
         if trade_record:
-            history.append(trade_record)
+            new_records.append(trade_record)
             processed_count += 1
 
             print(f"FEEDBACK PROCESADO: {trade_record['setup']} "
@@ -256,11 +260,18 @@ def process_feedback():
         except:
             pass
 
-    # Guardar historial una sola vez (eficiente para cierres masivos)
+    # Anexar al historial en una sola transaccion (eficiente para cierres masivos)
     if processed_count > 0:
-        save_history(history)
+        append_history(new_records)
         print(f"Total feedbacks procesados en este ciclo: {processed_count}")
-        print(f"Historial total: {len(history)} trades")
+        print(f"Historial total: {get_history_store().count()} trades")
+
+        # Actualizar contadores del servicio ML (sin recontar el historial)
+        try:
+            from ml_adaptive_system import ml_record_trades
+            ml_record_trades(new_records)
+        except Exception:
+            pass
 
     return processed_count > 0
 
@@ -316,7 +327,10 @@ def get_overall_stats():
         total_pips += s.get("total_pips", 0.0)
         total_trades += s.get("total_trades", 0)
 
-    history = load_history()
+    try:
+        history_count = get_history_store().count()
+    except Exception:
+        history_count = 0
 
     win_rate = (total_wins / total_trades * 100) if total_trades > 0 else 0
 
@@ -326,22 +340,26 @@ def get_overall_stats():
         "total_losses": total_losses,
         "win_rate": win_rate,
         "total_pips": total_pips,
-        "history_count": len(history)
+        "history_count": history_count
     }
 
 
 def get_today_stats():
     """Obtener estadisticas solo del dia de hoy"""
-    history = load_history()
-    today = datetime.now().strftime("%Y-%m-%d")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
 
-    today_trades = [t for t in history if t.get("timestamp", "").startswith(today)]
+    try:
+        summary = get_history_store().summary(today, tomorrow)
+    except Exception:
+        summary = {"total": 0, "wins": 0, "losses": 0, "pips": 0.0}
 
-    wins = sum(1 for t in today_trades if t.get("result") == "WIN")
-    losses = sum(1 for t in today_trades if t.get("result") == "LOSS")
-    total = len(today_trades)
+    wins = summary["wins"]
+    losses = summary["losses"]
+    total = summary["total"]
 
-    total_pips = sum(t.get("pips", 0) for t in today_trades)
+    total_pips = summary["pips"]
 
     win_rate = (wins / total * 100) if total > 0 else 0
 
@@ -0,0 +1,196 @@
+# feedback/processed_index.py
+
+"""
+Indice residente de senales ya procesadas
+
+processed_signals.txt se carga UNA vez en un set; cada nueva senal se anexa
+al archivo y al set. Asi la comprobacion de duplicados es O(1) sin importar
+cuantos trades haya cerrado la cuenta.
+
+- compact(): reescribe el archivo sin duplicados (escritura atomica)
+- Bloom filter opcional como pre-chequeo para historiales muy grandes
+- Si otro proceso modifica el archivo, se recarga al detectar el cambio
+"""
+
+import hashlib
+import os
+import threading
+
+PROCESSED_SIGNALS_FILE = "learning_data/processed_signals.txt"
+
+# Compactar cuando las lineas del archivo superan en este factor a los IDs unicos
+COMPACT_RATIO = 1.5
+COMPACT_MIN_EXTRA = 1000
+
+
+class BloomFilter:
+    """Bloom filter simple (bytearray + doble hashing sobre blake2b)"""
+
+    def __init__(self, capacity, error_rate=0.001):
+        import math
+        capacity = max(int(capacity), 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class ProcessedSignalIndex:
+    """
+    Set residente de signal_id procesados, respaldado por un archivo
+    de texto append-only (un ID por linea).
+    """
+
+    def __init__(self, path=PROCESSED_SIGNALS_FILE, bloom_threshold=None):
+        """
+        Args:
+            path: Archivo de IDs procesados
+            bloom_threshold: Si hay al menos tantos IDs, usar Bloom filter
+                como pre-chequeo (None = desactivado)
+        """
+        self.path = path
+        self.bloom_threshold = bloom_threshold
+
+        self._lock = threading.Lock()
+        self._ids = set()
+        self._lines = 0
+        self._file_sig = None
+        self._bloom = None
+
+        self._load()
+
+    # ==============================
+    # CARGA
+    # ==============================
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def _load(self):
+        ids = set()
+        lines = 0
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    for line in f:
+                        signal_id = line.strip()
+                        if signal_id:
+                            ids.add(signal_id)
+                            lines += 1
+            except Exception as e:
+                print(f"Error leyendo {self.path}: {e}")
+
+        self._ids = ids
+        self._lines = lines
+        self._file_sig = self._stat()
+        self._rebuild_bloom()
+
+    def _rebuild_bloom(self):
+        if self.bloom_threshold is None or len(self._ids) < self.bloom_threshold:
+            self._bloom = None
+            return
+        self._bloom = BloomFilter(len(self._ids) * 2)
+        for signal_id in self._ids:
+            self._bloom.add(signal_id)
+
+    def refresh(self):
+        """Recargar si el archivo cambio fuera de este indice (otro proceso)"""
+        with self._lock:
+            if self._stat() != self._file_sig:
+                self._load()
+
+    # ==============================
+    # CONSULTA / ALTA
+    # ==============================
+    def __contains__(self, signal_id):
+        if self._bloom is not None and signal_id not in self._bloom:
+            return False
+        return signal_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, signal_id):
+        """Marcar un signal_id como procesado (set + append al archivo)"""
+        with self._lock:
+            if signal_id in self._ids:
+                return True
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            try:
+                with open(self.path, "a") as f:
+                    f.write(signal_id + "\n")
+            except Exception:
+                return False
+
+            self._ids.add(signal_id)
+            self._lines += 1
+            self._file_sig = self._stat()
+
+            if self._bloom is not None:
+                self._bloom.add(signal_id)
+            elif self.bloom_threshold is not None and len(self._ids) >= self.bloom_threshold:
+                self._rebuild_bloom()
+
+            if self._lines > len(self._ids) * COMPACT_RATIO + COMPACT_MIN_EXTRA:
+                self._compact_locked()
+            return True
+
+    # ==============================
+    # COMPACTACION
+    # ==============================
+    def _compact_locked(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                for signal_id in sorted(self._ids):
+                    f.write(signal_id + "\n")
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error compactando {self.path}: {e}")
+            return False
+
+        self._lines = len(self._ids)
+        self._file_sig = self._stat()
+        return True
+
+    def compact(self):
+        """Reescribir el archivo sin duplicados ni lineas vacias"""
+        with self._lock:
+            return self._compact_locked()
+
+
+# ==============================
+# INSTANCIA COMPARTIDA
+# ==============================
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_processed_index(path=PROCESSED_SIGNALS_FILE, bloom_threshold=None):
+    """Indice compartido por proceso para cada archivo de IDs"""
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = ProcessedSignalIndex(path, bloom_threshold=bloom_threshold)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,280 @@
+"""
+file_watcher.py - Notificaciones de cambios en la carpeta de intercambio MT5
+
+Despierta el loop principal justo cuando ocurre algo relevante, en lugar de
+dormir un intervalo fijo:
+
+  - MARKET    : el EA reescribio market_data.json
+  - SIGNAL    : el EA consumio (borro) signal.json
+  - FEEDBACK  : aparecio un nuevo fb_*.json en trade_feedback/
+
+En Linux usa inotify (via ctypes, sin dependencias externas).
+En otros sistemas, o si inotify falla, cae a un modo polling con stat().
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+from mt5_paths import MARKET_DATA_FILE, SIGNAL_FILE, FEEDBACK_FOLDER
+
+# ==============================
+# EVENTOS
+# ==============================
+EVENT_MARKET = "MARKET"
+EVENT_SIGNAL = "SIGNAL"
+EVENT_FEEDBACK = "FEEDBACK"
+
+FEEDBACK_PREFIX = "fb_"
+FEEDBACK_SUFFIX = ".json"
+
+# Mascaras inotify (linux/inotify.h)
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def _is_feedback_name(name):
+    return name.startswith(FEEDBACK_PREFIX) and name.endswith(FEEDBACK_SUFFIX)
+
+
+# ==============================
+# BACKEND INOTIFY
+# ==============================
+class _InotifyBackend:
+    """Backend basado en inotify. Lanza OSError si no esta disponible."""
+
+    name = "inotify"
+
+    def __init__(self, market_file, signal_file, feedback_folder):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify solo disponible en Linux")
+
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 fallo")
+
+        # wd -> [(nombre_archivo o None, mascara, evento)]
+        self._rules = {}
+        try:
+            self._add(os.path.dirname(market_file), os.path.basename(market_file),
+                      _IN_CLOSE_WRITE | _IN_MOVED_TO, EVENT_MARKET)
+            self._add(os.path.dirname(signal_file), os.path.basename(signal_file),
+                      _IN_DELETE | _IN_MOVED_FROM, EVENT_SIGNAL)
+            self._add(feedback_folder, None,
+                      _IN_CLOSE_WRITE | _IN_MOVED_TO, EVENT_FEEDBACK)
+        except OSError:
+            os.close(self._fd)
+            raise
+
+        # Self-pipe para poder despertar wait() desde otro hilo
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+
+    def _add(self, directory, filename, mask, event):
+        os.makedirs(directory, exist_ok=True)
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch fallo en {directory}")
+        self._rules.setdefault(wd, []).append((filename, mask, event))
+
+    def _drain(self):
+        events = set()
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buf:
+                break
+
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(buf):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, offset)
+                offset += _EVENT_HEADER.size
+                name = buf[offset:offset + length].rstrip(b"\0").decode("utf-8", "replace")
+                offset += length
+
+                for filename, rule_mask, event in self._rules.get(wd, []):
+                    if not mask & rule_mask:
+                        continue
+                    if filename is None:
+                        if _is_feedback_name(name):
+                            events.add(event)
+                    elif name == filename:
+                        events.add(event)
+        return events
+
+    def wait(self, timeout):
+        # Otros archivos de la carpeta (bot_status.json, temporales de un
+        # tmp+rename...) tambien despiertan select: se descartan y se sigue
+        # esperando el tiempo restante
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            try:
+                readable, _, _ = select.select([self._fd, self._wake_r], [], [], remaining)
+            except InterruptedError:
+                readable = []
+
+            events = self._drain() if self._fd in readable else set()
+
+            if self._wake_r in readable:
+                try:
+                    while os.read(self._wake_r, 512):
+                        pass
+                except BlockingIOError:
+                    pass
+                return events
+
+            if events or time.monotonic() >= deadline:
+                return events
+
+    def wake(self):
+        try:
+            os.write(self._wake_w, b"x")
+        except (BlockingIOError, OSError):
+            pass
+
+    def close(self):
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+# ==============================
+# BACKEND POLLING (FALLBACK)
+# ==============================
+class _PollingBackend:
+    """Compara stat() de los archivos vigilados cada poll_interval segundos."""
+
+    name = "polling"
+
+    def __init__(self, market_file, signal_file, feedback_folder, poll_interval=0.25):
+        self._market_file = market_file
+        self._signal_file = signal_file
+        self._feedback_folder = feedback_folder
+        self._poll_interval = poll_interval
+        self._wake_event = threading.Event()
+
+        self._market_sig = self._stat_market()
+        self._signal_exists = os.path.exists(signal_file)
+        self._feedback_names = self._list_feedback()
+
+    def _stat_market(self):
+        try:
+            st = os.stat(self._market_file)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _list_feedback(self):
+        try:
+            return {e.name for e in os.scandir(self._feedback_folder) if _is_feedback_name(e.name)}
+        except OSError:
+            return set()
+
+    def _check(self):
+        events = set()
+
+        market_sig = self._stat_market()
+        if market_sig is not None and market_sig != self._market_sig:
+            events.add(EVENT_MARKET)
+        self._market_sig = market_sig
+
+        signal_exists = os.path.exists(self._signal_file)
+        if self._signal_exists and not signal_exists:
+            events.add(EVENT_SIGNAL)
+        self._signal_exists = signal_exists
+
+        feedback_names = self._list_feedback()
+        if feedback_names - self._feedback_names:
+            events.add(EVENT_FEEDBACK)
+        self._feedback_names = feedback_names
+
+        return events
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            events = self._check()
+            if events:
+                return events
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return set()
+            if self._wake_event.wait(min(self._poll_interval, remaining)):
+                self._wake_event.clear()
+                return self._check()
+
+    def wake(self):
+        self._wake_event.set()
+
+    def close(self):
+        pass
+
+
+# ==============================
+# API PUBLICA
+# ==============================
+class FileWatcher:
+    """
+    Vigila la carpeta de intercambio MT5 y bloquea en wait() hasta que
+    ocurre un evento o vence el timeout.
+
+    Uso:
+        watcher = FileWatcher()
+        events = watcher.wait(30)   # set() si vencio el timeout
+        watcher.close()
+    """
+
+    def __init__(self, market_file=MARKET_DATA_FILE, signal_file=SIGNAL_FILE,
+                 feedback_folder=FEEDBACK_FOLDER, use_inotify=True, poll_interval=0.25):
+        self.backend = None
+        if use_inotify:
+            try:
+                self.backend = _InotifyBackend(market_file, signal_file, feedback_folder)
+            except (OSError, AttributeError):
+                self.backend = None
+
+        if self.backend is None:
+            self.backend = _PollingBackend(market_file, signal_file, feedback_folder,
+                                           poll_interval=poll_interval)
+
+    @property
+    def mode(self):
+        return self.backend.name
+
+    def wait(self, timeout):
+        """
+        Espera eventos durante como maximo `timeout` segundos.
+
+        Returns:
+            set: Eventos ocurridos (EVENT_MARKET, EVENT_SIGNAL, EVENT_FEEDBACK)
+        """
+        return self.backend.wait(max(0.0, timeout))
+
+    def wake(self):
+        """Despierta un wait() en curso (p.ej. al detener el bot)"""
+        self.backend.wake()
+
+    def close(self):
+        self.backend.close()
@@ -1,6 +1,18 @@
+from indicators.streaming import StreamingEMA
+
+
 def ema(prices, period):
     k = 2 / (period + 1)
     ema_val = prices[0]
     for p in prices[1:]:
         ema_val = p * k + ema_val * (1 - k)
     return ema_val
+
+
+def ema_many(prices, periods):
+    """Varias EMA (mismo calculo que ema()) en una sola pasada"""
+    emas = [StreamingEMA(period, seed="first") for period in periods]
+    for p in prices:
+        for e in emas:
+            e.update(p)
+    return tuple(e.value for e in emas)
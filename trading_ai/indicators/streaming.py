@@ -0,0 +1,405 @@
+# indicators/streaming.py
+
+"""
+Indicadores incrementales: O(1) por vela nueva
+
+Cada indicador guarda su estado y se actualiza con update() al cerrar una
+vela, en lugar de recorrer todo el historial en cada ciclo. Comun a todos:
+
+  - update(...)  -> consolida una vela cerrada y devuelve el valor
+  - peek(...)    -> valor que daria una vela SIN consolidarla (vela en curso)
+  - value        -> ultimo valor (None hasta tener datos suficientes)
+  - warm(serie)  -> arranque en caliente desde historial
+  - snapshot() / restore(estado) -> estado serializable (dict)
+
+Los EMA/RSI/ATR replican las formulas de bingx_client (semilla SMA +
+suavizado Wilder), y los valores convergen a los de la serie completa.
+"""
+
+import math
+from collections import deque
+
+
+class _Streaming:
+    """Base: snapshot/restore de los atributos declarados en _STATE"""
+
+    _STATE = ()
+
+    def snapshot(self):
+        state = {}
+        for name in self._STATE:
+            value = getattr(self, name)
+            state[name] = list(value) if isinstance(value, deque) else value
+        return state
+
+    def restore(self, state):
+        for name in self._STATE:
+            current = getattr(self, name)
+            value = state[name]
+            if isinstance(current, deque):
+                value = deque(value, maxlen=current.maxlen)
+            setattr(self, name, value)
+        return self
+
+    def warm(self, values):
+        """Consumir historial (escalares o tuplas de argumentos de update)"""
+        for v in values:
+            if isinstance(v, tuple):
+                self.update(*v)
+            else:
+                self.update(v)
+        return self.value
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+
+class StreamingEMA(_Streaming):
+    """
+    EMA incremental.
+
+    seed="sma": primer valor = media de las primeras `period` velas
+                (como bingx_client._ema_series)
+    seed="first": primer valor = primer precio (como indicators.ema.ema)
+    """
+
+    _STATE = ("period", "seed", "value", "_count", "_seed_sum")
+
+    def __init__(self, period, seed="sma"):
+        self.period = period
+        self.seed = seed
+        self.k = 2.0 / (period + 1)
+        self.value = None
+        self._count = 0
+        self._seed_sum = 0.0
+
+    def _next(self, price):
+        if self.value is not None:
+            return price * self.k + self.value * (1.0 - self.k)
+        if self.seed == "first":
+            return price
+        if self._count + 1 >= self.period:
+            return (self._seed_sum + price) / self.period
+        return None
+
+    def update(self, price):
+        new_value = self._next(price)
+        if self.value is None and new_value is None:
+            self._seed_sum += price
+        self._count += 1
+        self.value = new_value
+        return self.value
+
+    def peek(self, price):
+        return self._next(price)
+
+    def restore(self, state):
+        super().restore(state)
+        self.k = 2.0 / (self.period + 1)
+        return self
+
+
+class StreamingSMA(_Streaming):
+    """Media movil simple con suma rodante"""
+
+    _STATE = ("period", "value", "_window", "_sum", "_updates")
+
+    # Re-sumar la ventana cada tantas actualizaciones para acotar el error de redondeo
+    RESUM_EVERY = 10000
+
+    def __init__(self, period):
+        self.period = period
+        self.value = None
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, price):
+        if len(self._window) == self.period:
+            self._sum -= self._window[0]
+        self._window.append(price)
+        self._sum += price
+        self._updates += 1
+        if self._updates % self.RESUM_EVERY == 0:
+            self._sum = math.fsum(self._window)
+        if len(self._window) == self.period:
+            self.value = self._sum / self.period
+        return self.value
+
+    def peek(self, price):
+        if len(self._window) < self.period - 1:
+            return None
+        total = self._sum + price
+        if len(self._window) == self.period:
+            total -= self._window[0]
+        return total / self.period
+
+
+class StreamingRSI(_Streaming):
+    """
+    RSI de Wilder (semilla = media simple de las primeras `period` variaciones).
+    Igual que bingx_client._rsi: devuelve None (-> 50) con menos de period+2 cierres.
+    """
+
+    _STATE = ("period", "value", "_prev", "_count", "_gain_sum", "_loss_sum", "_ag", "_al")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self._prev = None
+        self._count = 0        # Cierres recibidos
+        self._gain_sum = 0.0
+        self._loss_sum = 0.0
+        self._ag = None
+        self._al = None
+
+    @staticmethod
+    def _rsi(ag, al):
+        if al == 0:
+            return 100.0
+        return 100.0 - (100.0 / (1.0 + ag / al))
+
+    def _advance(self, close):
+        """Estado tras anadir `close` -> (ag, al, gain_sum, loss_sum, value)"""
+        n = self.period
+        ag, al = self._ag, self._al
+        gain_sum, loss_sum = self._gain_sum, self._loss_sum
+        value = None
+
+        if self._prev is not None:
+            delta = close - self._prev
+            gain, loss = max(delta, 0.0), abs(min(delta, 0.0))
+            deltas = self._count          # Variaciones tras anadir esta
+            if ag is None:
+                gain_sum += gain
+                loss_sum += loss
+                if deltas == n:
+                    ag, al = gain_sum / n, loss_sum / n
+            else:
+                ag = (ag * (n - 1) + gain) / n
+                al = (al * (n - 1) + loss) / n
+
+        if ag is not None and self._count + 1 >= n + 2:
+            value = self._rsi(ag, al)
+        return ag, al, gain_sum, loss_sum, value
+
+    def update(self, close):
+        self._ag, self._al, self._gain_sum, self._loss_sum, self.value = self._advance(close)
+        self._prev = close
+        self._count += 1
+        return self.value
+
+    def peek(self, close):
+        return self._advance(close)[4]
+
+
+class StreamingATR(_Streaming):
+    """
+    ATR de Wilder. Igual que bingx_client._atr: mientras haya menos de
+    `period` rangos verdaderos, media simple de los disponibles.
+    """
+
+    _STATE = ("period", "value", "_prev_close", "_trs", "_tr_sum")
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self._prev_close = None
+        self._trs = 0
+        self._tr_sum = 0.0
+
+    def _advance(self, high, low, close):
+        if self._prev_close is None:
+            return self.value, self._trs, self._tr_sum
+        pc = self._prev_close
+        tr = max(high - low, abs(high - pc), abs(low - pc))
+        trs = self._trs + 1
+        if trs <= self.period:
+            tr_sum = self._tr_sum + tr
+            return tr_sum / trs, trs, tr_sum
+        return (self.value * (self.period - 1) + tr) / self.period, trs, self._tr_sum
+
+    def update(self, high, low, close):
+        self.value, self._trs, self._tr_sum = self._advance(high, low, close)
+        self._prev_close = close
+        return self.value
+
+    def peek(self, high, low, close):
+        return self._advance(high, low, close)[0]
+
+
+class StreamingMACD(_Streaming):
+    """
+    MACD = EMA(fast) - EMA(slow); senal EMA (o SMA, como iMACD de MT5) del MACD.
+    value = (main, signal, histogram)
+    """
+
+    _STATE = ("value",)
+
+    def __init__(self, fast=12, slow=26, signal=9, signal_mode="ema"):
+        self.fast = StreamingEMA(fast)
+        self.slow = StreamingEMA(slow)
+        self.signal = StreamingSMA(signal) if signal_mode == "sma" else StreamingEMA(signal)
+        self.value = None
+
+    def _compose(self, main, signal):
+        if main is None or signal is None:
+            return None
+        return (main, signal, main - signal)
+
+    def update(self, close):
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if fast is None or slow is None:
+            return None
+        self.value = self._compose(fast - slow, self.signal.update(fast - slow))
+        return self.value
+
+    def peek(self, close):
+        fast, slow = self.fast.peek(close), self.slow.peek(close)
+        if fast is None or slow is None:
+            return None
+        return self._compose(fast - slow, self.signal.peek(fast - slow))
+
+    def snapshot(self):
+        return {
+            "value": self.value,
+            "fast": self.fast.snapshot(),
+            "slow": self.slow.snapshot(),
+            "signal": self.signal.snapshot(),
+        }
+
+    def restore(self, state):
+        self.value = tuple(state["value"]) if state["value"] is not None else None
+        self.fast.restore(state["fast"])
+        self.slow.restore(state["slow"])
+        self.signal.restore(state["signal"])
+        return self
+
+
+class StreamingBollinger(_Streaming):
+    """
+    Bandas de Bollinger (SMA +- k * desviacion poblacional, como iBands).
+    value = (upper, middle, lower)
+    """
+
+    _STATE = ("period", "deviation", "value", "_window", "_sum", "_sumsq", "_updates")
+
+    RESUM_EVERY = 10000
+
+    def __init__(self, period=20, deviation=2.0):
+        self.period = period
+        self.deviation = deviation
+        self.value = None
+        self._window = deque(maxlen=period)
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def _bands(self, total, total_sq):
+        n = self.period
+        mean = total / n
+        std = math.sqrt(max(total_sq / n - mean * mean, 0.0))
+        return (mean + self.deviation * std, mean, mean - self.deviation * std)
+
+    def update(self, close):
+        if len(self._window) == self.period:
+            old = self._window[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._window.append(close)
+        self._sum += close
+        self._sumsq += close * close
+        self._updates += 1
+        if self._updates % self.RESUM_EVERY == 0:
+            self._sum = math.fsum(self._window)
+            self._sumsq = math.fsum(x * x for x in self._window)
+        if len(self._window) == self.period:
+            self.value = self._bands(self._sum, self._sumsq)
+        return self.value
+
+    def peek(self, close):
+        if len(self._window) < self.period - 1:
+            return None
+        total, total_sq = self._sum + close, self._sumsq + close * close
+        if len(self._window) == self.period:
+            old = self._window[0]
+            total -= old
+            total_sq -= old * old
+        return self._bands(total, total_sq)
+
+    def restore(self, state):
+        super().restore(state)
+        if self.value is not None:
+            self.value = tuple(self.value)
+        return self
+
+
+class IndicatorSet:
+    """
+    Conjunto de indicadores alimentado con velas OHLC, con el mismo formato
+    de 'indicators' que escribe el EA en market_data.json.
+    """
+
+    def __init__(self, rsi_period=14, ema_fast=20, ema_slow=50, ema_long=200,
+                 macd=(12, 26, 9), bb_period=20, bb_deviation=2.0, atr_period=14,
+                 macd_signal_mode="sma"):
+        self.rsi = StreamingRSI(rsi_period)
+        self.ema_fast = StreamingEMA(ema_fast)
+        self.ema_slow = StreamingEMA(ema_slow)
+        self.ema_long = StreamingEMA(ema_long)
+        self.macd = StreamingMACD(*macd, signal_mode=macd_signal_mode)
+        self.bollinger = StreamingBollinger(bb_period, bb_deviation)
+        self.atr = StreamingATR(atr_period)
+        self.bars = 0
+
+    def _parts(self):
+        return ("rsi", "ema_fast", "ema_slow", "ema_long", "macd", "bollinger", "atr")
+
+    def update(self, high, low, close):
+        """Consolidar una vela cerrada"""
+        self.rsi.update(close)
+        self.ema_fast.update(close)
+        self.ema_slow.update(close)
+        self.ema_long.update(close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.bars += 1
+        return self.as_dict()
+
+    def warm(self, highs, lows, closes):
+        for h, l, c in zip(highs, lows, closes):
+            self.update(h, l, c)
+        return self.as_dict()
+
+    def as_dict(self, values=None):
+        """Indicadores en formato market_data (None donde aun no hay datos)"""
+        if values is None:
+            values = {name: getattr(self, name).value for name in self._parts()}
+        macd = values["macd"] or (None, None, None)
+        bb = values["bollinger"] or (None, None, None)
+        return {
+            "rsi": values["rsi"],
+            "macd": {"main": macd[0], "signal": macd[1], "histogram": macd[2]},
+            "ema": {"fast": values["ema_fast"], "slow": values["ema_slow"], "long": values["ema_long"]},
+            "bollinger": {"upper": bb[0], "middle": bb[1], "lower": bb[2]},
+            "atr": values["atr"],
+        }
+
+    def peek(self, high, low, close):
+        """Indicadores incluyendo una vela en curso, sin consolidarla"""
+        values = {name: getattr(self, name).peek(close) for name in self._parts() if name != "atr"}
+        values["atr"] = self.atr.peek(high, low, close)
+        return self.as_dict(values)
+
+    def snapshot(self):
+        state = {name: getattr(self, name).snapshot() for name in self._parts()}
+        state["bars"] = self.bars
+        return state
+
+    def restore(self, state):
+        for name in self._parts():
+            getattr(self, name).restore(state[name])
+        self.bars = state.get("bars", 0)
+        return self
@@ -6,6 +6,7 @@ usando los datos crudos de velas del market_data.json
 """
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 def calculate_support_resistance(candles, lookback=20):
@@ -319,3 +320,315 @@ def analyze_price_action(candles):
     }
     
     return analysis
+
+
+# ============================================================
+# API VECTORIZADA (arrays NumPy)
+# ============================================================
+#
+# Variantes array-in/array-out de las funciones anteriores.
+# Convencion: arrays en orden CRONOLOGICO (la vela mas reciente es la
+# ultima), igual que data_providers.ohlcv_buffer. Con series=False se
+# evalua solo la ultima vela (mismo resultado que la version de listas);
+# con series=True se calcula para TODAS las velas de una vez (las que no
+# tienen historial suficiente quedan en NaN / NONE).
+
+PATTERN_NAMES = (
+    "NONE",
+    "HAMMER",
+    "SHOOTING_STAR",
+    "ENGULFING_BULLISH",
+    "ENGULFING_BEARISH",
+    "DOJI",
+    "THREE_WHITE_SOLDIERS",
+    "THREE_BLACK_CROWS",
+)
+PATTERN_SIGNALS = ("NEUTRAL", "BULLISH", "BEARISH", "BULLISH", "BEARISH", "NEUTRAL", "BULLISH", "BEARISH")
+PATTERN_STRENGTHS = (0, 0.7, 0.7, 0.8, 0.8, 0.5, 0.9, 0.9)
+
+# Codigos de divergencia
+DIVERGENCE_NONE = 0
+DIVERGENCE_BULLISH = 1
+DIVERGENCE_BEARISH = -1
+
+
+def candles_to_arrays(candles, fields=("open", "high", "low", "close", "volume")):
+    """
+    Convierte una lista de velas (mas reciente primero) a arrays cronologicos
+
+    Returns:
+        dict campo -> np.ndarray float64
+    """
+    ordered = candles[::-1]
+    return {
+        name: np.fromiter((c.get(name, 0) for c in ordered), dtype=np.float64, count=len(ordered))
+        for name in fields
+    }
+
+
+def _rolling(values, window, func):
+    """max/min movil; las primeras window-1 posiciones quedan en NaN"""
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = func(sliding_window_view(values, window), axis=1)
+    return out
+
+
+def support_resistance_array(high, low, lookback=20, series=False):
+    """
+    Soporte/resistencia como min de lows / max de highs de las ultimas velas
+
+    Returns:
+        dict con 'support', 'resistance', 'range' (escalares o arrays)
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+
+    if series:
+        resistance = _rolling(high, lookback, np.max)
+        support = _rolling(low, lookback, np.min)
+        return {"support": support, "resistance": resistance, "range": resistance - support}
+
+    if len(high) < lookback:
+        return {"support": None, "resistance": None}
+
+    resistance = float(high[-lookback:].max())
+    support = float(low[-lookback:].min())
+    return {"support": support, "resistance": resistance, "range": resistance - support}
+
+
+def momentum_array(close, period=5, series=False):
+    """
+    Momentum porcentual del cierre contra el de hace `period` velas
+
+    Returns:
+        dict con 'momentum' y 'signal' (en modo serie, arrays)
+    """
+    close = np.asarray(close, dtype=np.float64)
+
+    if series:
+        momentum = np.full(len(close), np.nan)
+        if len(close) > period:
+            past = close[:-period]
+            momentum[period:] = (close[period:] - past) / past * 100
+        signal = np.select(
+            [momentum > 0.5, momentum > 0.1, momentum < -0.5, momentum < -0.1],
+            ["STRONG_BULLISH", "BULLISH", "STRONG_BEARISH", "BEARISH"],
+            default="NEUTRAL"
+        )
+        return {"momentum": np.round(momentum, 4), "signal": signal}
+
+    if len(close) < period + 1:
+        return {"momentum": 0, "signal": "NEUTRAL"}
+
+    past_close = close[-1 - period]
+    momentum = float((close[-1] - past_close) / past_close * 100)
+
+    signal = "NEUTRAL"
+    if momentum > 0.5:
+        signal = "STRONG_BULLISH"
+    elif momentum > 0.1:
+        signal = "BULLISH"
+    elif momentum < -0.5:
+        signal = "STRONG_BEARISH"
+    elif momentum < -0.1:
+        signal = "BEARISH"
+
+    return {"momentum": round(momentum, 4), "signal": signal}
+
+
+def divergence_array(close, rsi, lookback=10, series=False):
+    """
+    Divergencia precio/RSI (misma regla que detect_divergence)
+
+    Args:
+        close: Cierres cronologicos
+        rsi: RSI actual (escalar) o serie alineada con close
+        lookback: Velas a analizar
+
+    Returns:
+        Modo ultima vela: dict como detect_divergence.
+        Modo serie: array int8 con DIVERGENCE_BULLISH / BEARISH / NONE.
+    """
+    close = np.asarray(close, dtype=np.float64)
+
+    if series:
+        rsi = np.broadcast_to(np.asarray(rsi, dtype=np.float64), close.shape)
+        price_max = _rolling(close, lookback, np.max)
+        price_min = _rolling(close, lookback, np.min)
+        bearish = (close >= price_max * 0.99) & (rsi < 60)
+        bullish = (close <= price_min * 1.01) & (rsi > 40) & ~bearish
+        codes = np.zeros(len(close), dtype=np.int8)
+        codes[bearish] = DIVERGENCE_BEARISH
+        codes[bullish] = DIVERGENCE_BULLISH
+        return codes
+
+    if len(close) < lookback:
+        return {"divergence": "NONE", "type": None}
+
+    window = close[-lookback:]
+    current_price = close[-1]
+    rsi = float(np.asarray(rsi, dtype=np.float64).reshape(-1)[-1])
+
+    if current_price >= window.max() * 0.99 and rsi < 60:
+        return {"divergence": "BEARISH", "type": "REGULAR", "strength": 0.7}
+    if current_price <= window.min() * 1.01 and rsi > 40:
+        return {"divergence": "BULLISH", "type": "REGULAR", "strength": 0.7}
+    return {"divergence": "NONE", "type": None}
+
+
+def volume_profile_array(high, low, volume, bins=10, lookback=None, series=False):
+    """
+    Perfil de volumen con histograma ponderado (np.bincount)
+
+    Args:
+        high, low, volume: Arrays cronologicos
+        bins: Niveles de precio
+        lookback: Velas a usar (None = todas, como calculate_volume_profile)
+        series: Si True, devuelve el POC de la ventana `lookback` (20 por
+            defecto) terminada en cada vela
+
+    Returns:
+        dict con 'high_volume_zones' (ordenadas por precio), 'poc' y
+        'volume_by_bin'; en modo serie, array de POC.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    prices = (high + low) / 2
+
+    if series:
+        window = lookback or 20
+        poc = np.full(len(prices), np.nan)
+        if len(prices) < window:
+            return poc
+        p = sliding_window_view(prices, window)
+        v = sliding_window_view(volume, window)
+        p_min = p.min(axis=1, keepdims=True)
+        bin_size = (p.max(axis=1, keepdims=True) - p_min) / bins
+        with np.errstate(divide="ignore", invalid="ignore"):
+            idx = np.floor((p - p_min) / bin_size)
+        idx = np.clip(np.nan_to_num(idx), 0, bins - 1).astype(np.intp)
+        rows = np.arange(len(p))[:, None]
+        hist = np.bincount((rows * bins + idx).ravel(), weights=v.ravel(),
+                           minlength=len(p) * bins).reshape(len(p), bins)
+        # Empates: gana el nivel tocado mas recientemente (como la version de listas)
+        last_seen = np.full(len(p) * bins, -1, dtype=np.intp)
+        np.maximum.at(last_seen, (rows * bins + idx).ravel(), np.broadcast_to(np.arange(window), p.shape).ravel())
+        last_seen = last_seen.reshape(len(p), bins)
+        poc_bin = np.where(hist == hist.max(axis=1, keepdims=True), last_seen, -1).argmax(axis=1)
+        valid = (bin_size[:, 0] > 0) & (hist.sum(axis=1) > 0)
+        poc[window - 1:] = np.where(valid, p_min[:, 0] + poc_bin * bin_size[:, 0] + bin_size[:, 0] / 2, np.nan)
+        return poc
+
+    if lookback is not None:
+        prices = prices[-lookback:]
+        volume = volume[-lookback:]
+
+    empty = {"high_volume_zones": [], "poc": None}
+    if len(prices) < 20 or volume.sum() == 0:
+        return empty
+
+    price_min = prices.min()
+    price_range = prices.max() - price_min
+    if price_range == 0:
+        return empty
+
+    bin_size = price_range / bins
+    idx = np.minimum(((prices - price_min) / bin_size).astype(np.intp), bins - 1)
+    volume_by_bin = np.bincount(idx, weights=volume, minlength=bins)
+    present = np.bincount(idx, minlength=bins) > 0
+
+    centers = price_min + np.arange(bins) * bin_size + bin_size / 2
+    avg_volume = volume_by_bin[present].mean()
+    zones = centers[present & (volume_by_bin > avg_volume * 1.3)]
+
+    # Empates: gana el nivel tocado mas recientemente (como la version de listas)
+    last_seen = np.full(bins, -1, dtype=np.intp)
+    np.maximum.at(last_seen, idx, np.arange(len(idx)))
+    poc_bin = np.where(volume_by_bin == volume_by_bin.max(), last_seen, -1).argmax()
+
+    return {
+        "high_volume_zones": zones.tolist(),
+        "poc": float(centers[poc_bin]),
+        "volume_by_bin": volume_by_bin
+    }
+
+
+def candlestick_patterns_array(open_, high, low, close, series=False):
+    """
+    Patrones de velas como mascaras booleanas sobre toda la serie
+
+    Returns:
+        Modo ultima vela: dict como detect_candlestick_patterns.
+        Modo serie: dict nombre -> mascara bool, mas 'pattern' (indice en
+        PATTERN_NAMES con la misma prioridad que la version de listas).
+    """
+    o = np.asarray(open_, dtype=np.float64)
+    h = np.asarray(high, dtype=np.float64)
+    l = np.asarray(low, dtype=np.float64)
+    c = np.asarray(close, dtype=np.float64)
+    n = len(c)
+
+    if not series:
+        if n < 3:
+            return {"pattern": "NONE", "signal": "NEUTRAL"}
+        tail = candlestick_patterns_array(o[-3:], h[-3:], l[-3:], c[-3:], series=True)
+        code = int(tail["pattern"][-1])
+        return {
+            "pattern": PATTERN_NAMES[code],
+            "signal": PATTERN_SIGNALS[code],
+            "strength": PATTERN_STRENGTHS[code]
+        }
+
+    bullish = c > o
+    bearish = c < o
+    body = np.abs(c - o)
+    upper = h - np.maximum(o, c)
+    lower = np.minimum(o, c) - l
+    total_range = h - l
+
+    # Velas previas desplazadas (la primera posicion no tiene anterior)
+    def shift(a, k, fill):
+        out = np.full_like(a, fill)
+        if k < len(a):
+            out[k:] = a[:len(a) - k]
+        return out
+
+    o1, c1, c2 = shift(o, 1, np.nan), shift(c, 1, np.nan), shift(c, 2, np.nan)
+    bull1, bear1 = shift(bullish, 1, False), shift(bearish, 1, False)
+    bull2, bear2 = shift(bullish, 2, False), shift(bearish, 2, False)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        doji = (total_range > 0) & (body / total_range < 0.1)
+
+    masks = {
+        "HAMMER": bullish & (lower > body * 2) & (upper < body * 0.5),
+        "SHOOTING_STAR": bearish & (upper > body * 2) & (lower < body * 0.5),
+        "ENGULFING_BULLISH": bear1 & bullish & (c > o1) & (o < c1),
+        "ENGULFING_BEARISH": bull1 & bearish & (c < o1) & (o > c1),
+        "DOJI": doji,
+        "THREE_WHITE_SOLDIERS": bullish & bull1 & bull2 & (c > c1) & (c1 > c2),
+        "THREE_BLACK_CROWS": bearish & bear1 & bear2 & (c < c1) & (c1 < c2),
+    }
+
+    pattern = np.select(
+        [masks[name] for name in PATTERN_NAMES[1:]],
+        np.arange(1, len(PATTERN_NAMES)),
+        default=0
+    ).astype(np.int8)
+    # Igual que la version de listas: sin 3 velas no hay patron
+    pattern[:2] = 0
+
+    masks["pattern"] = pattern
+    return masks
+
+
+def analyze_price_action_array(open_, high, low, close, volume):
+    """Equivalente vectorizado de analyze_price_action (ultima vela)"""
+    return {
+        "support_resistance": support_resistance_array(high, low),
+        "candlestick_pattern": candlestick_patterns_array(open_, high, low, close),
+        "momentum": momentum_array(close),
+        "volume_profile": volume_profile_array(high, low, volume)
+    }
@@ -48,38 +48,16 @@ def write_bot_status(running: bool):
 
 
 # ==============================
-# DEBUG JSON
+# DEBUG JOURNAL
 # ==============================
-DEBUG_FILE = Path(__file__).parent / "logs" / "debug.json"
+from debug_journal import DebugJournal
 
-def write_debug(level, message):
-    entry = {
-        "timestamp": datetime.now().isoformat(),
-        "level": level,
-        "message": message
-    }
-
-    DEBUG_FILE.parent.mkdir(exist_ok=True)
-
-    if DEBUG_FILE.exists():
-        try:
-            with open(DEBUG_FILE, "r") as f:
-                data = json.load(f)
-                if not isinstance(data, list):
-                    data = []
-        except:
-            data = []
-    else:
-        data = []
-
-    data.append(entry)
+DEBUG_DIR = Path(__file__).parent / "logs"
+_debug_journal = DebugJournal(DEBUG_DIR)
 
-    # Mantener solo ultimas 500 entradas
-    if len(data) > 500:
-        data = data[-500:]
-
-    with open(DEBUG_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def write_debug(level, message):
+    """Anexa una entrada al journal de debug (logs/debug.jsonl)"""
+    _debug_journal.append(level, message)
 
 
 # ==============================
@@ -169,6 +147,9 @@ except Exception as e:
 # ==============================
 # CONFIG
 # ==============================
+from trade_gate import TradeGate, DEFAULT_BOT_CONFIG
+
+
 def load_config():
     config_file = "bot_config.json"
 
@@ -185,19 +166,7 @@ def load_config():
 
     logger.info("Usando config por defecto")
     write_debug("INFO", "Usando configuracion por defecto")
-    return {
-        "min_confidence": 35,
-        "cooldown": 30,
-        "max_daily_trades": 50,
-        "max_losses": 5,
-        "lot_size": 0.01,
-        "start_hour": "00:00",
-        "end_hour": "23:59",
-        "max_concurrent_trades": 3,
-        "min_signal_interval": 60,
-        "avoid_repeat_strategy": True,
-        "auto_optimize": True
-    }
+    return dict(DEFAULT_BOT_CONFIG)
 
 
 # ==============================
@@ -205,77 +174,63 @@ def load_config():
 # ==============================
 RUNNING = False
 CONFIG = {}
-last_trade_time = 0
 consecutive_losses = 0
 paused_until = 0
 cycle_count = 0
 
+_watcher = None
+
 SIGNAL_FILE_PATH = _SIGNAL_FILE_PATH
 FEEDBACK_FILE_PATH = _FEEDBACK_FILE_PATH
 
 # ==============================
 # MULTI-TRADE TRACKING
 # ==============================
+# Reglas de entrada compartidas con el simulador de cartera (trade_gate)
+GATE = TradeGate(CONFIG, log=write_debug)
+
 # Senales activas: {signal_id: {strategy, direction, timestamp, context_snapshot}}
-active_signals = {}
+active_signals = GATE.active_signals
 
 # Historial reciente de senales para anti-spam
-# Lista de {strategy, direction, timestamp, signal_id}
-recent_signals = []
-MAX_RECENT_SIGNALS = 50
+recent_signals = GATE.recent_signals
 
 # Contador de repeticiones fallidas por estrategia
-strategy_fail_count = {}
+strategy_fail_count = GATE.strategy_fail_count
+
+
+def set_config(config):
+    """Sustituir la config activa (tambien la del gate)"""
+    global CONFIG
+    CONFIG = config
+    GATE.config = config
 
 
 def get_active_count():
     """Numero de trades activos del bot"""
-    return len(active_signals)
+    return GATE.active_count()
 
 
 def add_active_signal(signal_id, strategy, direction, context):
     """Registrar nueva senal activa"""
-    active_signals[signal_id] = {
-        "strategy": strategy,
-        "direction": direction,
-        "timestamp": time.time(),
-        "context_snapshot": {
-            "trend": context.get("trend"),
-            "volatility": context.get("volatility"),
-            "market_regime": context.get("market_regime"),
-            "rsi_state": context.get("rsi_state"),
-        }
-    }
+    GATE.add_active(signal_id, strategy, direction, context)
 
 
 def remove_active_signal(signal_id):
     """Eliminar senal activa (cuando recibimos feedback)"""
-    if signal_id in active_signals:
-        del active_signals[signal_id]
+    GATE.remove_active(signal_id)
 
 
 def add_recent_signal(strategy, direction, signal_id):
     """Registrar senal en historial reciente"""
-    recent_signals.append({
-        "strategy": strategy,
-        "direction": direction,
-        "timestamp": time.time(),
-        "signal_id": signal_id
-    })
-    while len(recent_signals) > MAX_RECENT_SIGNALS:
-        recent_signals.pop(0)
+    GATE.add_recent(strategy, direction, signal_id)
 
 
 def cleanup_expired_signals():
     """Limpiar senales activas que expiraron (timeout de 10 min)"""
-    timeout = 600
-    now = time.time()
-    expired = [sid for sid, data in active_signals.items()
-               if now - data["timestamp"] > timeout]
-    for sid in expired:
+    for sid in GATE.cleanup_expired():
         logger.warning(f"Signal expirada (timeout): {sid}")
         write_debug("WARN", f"Signal expirada: {sid}")
-        del active_signals[sid]
 
 
 def is_signal_consumed():
@@ -287,56 +242,13 @@ def is_signal_consumed():
 
 
 def is_strategy_spam(strategy, direction):
-    """
-    Verifica si estariamos haciendo spam con la misma estrategia+direccion.
-
-    Reglas anti-spam:
-    1. No repetir misma estrategia+direccion dentro de min_signal_interval
-    2. No tener 2 trades activos con la misma estrategia+direccion
-    3. Si una estrategia tiene 3+ fallos consecutivos, pausarla temporalmente
-    """
-    min_interval = CONFIG.get("min_signal_interval", 60)
-    avoid_repeat = CONFIG.get("avoid_repeat_strategy", True)
-    now = time.time()
-
-    # Regla 1: No repetir misma estrategia+direccion dentro del intervalo
-    for sig in reversed(recent_signals):
-        age = now - sig["timestamp"]
-        if age > min_interval:
-            break
-        if sig["strategy"] == strategy and sig["direction"] == direction:
-            write_debug("INFO", f"Anti-spam: {strategy}/{direction} ya enviada hace {age:.0f}s")
-            return True
-
-    # Regla 2: No duplicar estrategia+direccion en trades activos
-    if avoid_repeat:
-        for sig_data in active_signals.values():
-            if sig_data["strategy"] == strategy and sig_data["direction"] == direction:
-                write_debug("INFO", f"Anti-spam: {strategy}/{direction} ya tiene trade activo")
-                return True
-
-    # Regla 3: Estrategia con muchos fallos consecutivos
-    fail_key = f"{strategy}_{direction}"
-    if strategy_fail_count.get(fail_key, 0) >= 3:
-        last_fail_time = strategy_fail_count.get(f"{fail_key}_time", 0)
-        if now - last_fail_time < 300:  # Pausa de 5 minutos
-            write_debug("INFO", f"Anti-repeticion: {strategy}/{direction} pausada por fallos consecutivos")
-            return True
-        else:
-            strategy_fail_count[fail_key] = 0
-
-    return False
+    """Verifica si estariamos haciendo spam con la misma estrategia+direccion (ver TradeGate.is_spam)"""
+    return GATE.is_spam(strategy, direction)
 
 
 def update_strategy_fail_count(strategy, direction, result):
     """Actualizar contador de fallos por estrategia"""
-    fail_key = f"{strategy}_{direction}"
-
-    if result == "LOSS":
-        strategy_fail_count[fail_key] = strategy_fail_count.get(fail_key, 0) + 1
-        strategy_fail_count[f"{fail_key}_time"] = time.time()
-    elif result == "WIN":
-        strategy_fail_count[fail_key] = 0
+    GATE.update_fail_count(strategy, direction, result)
 
 
 def clear_signal_file():
@@ -383,7 +295,7 @@ def create_stop_signal():
 
 
 def run_cycle():
-    global last_trade_time, consecutive_losses, paused_until, cycle_count
+    global consecutive_losses, paused_until, cycle_count
 
     cycle_count += 1
 
@@ -394,11 +306,10 @@ def run_cycle():
     write_debug("INFO", f"Ciclo #{cycle_count} | Activos: {get_active_count()}")
 
     # SISTEMA ML
-    global CONFIG
     if ML_AVAILABLE and CONFIG.get("auto_optimize", True):
         try:
             if ml_auto_adjust():
-                CONFIG = load_config()
+                set_config(load_config())
                 write_debug("INFO", "ML ajusto configuracion")
         except Exception as e:
             logger.debug(f"ML adjust: {e}")
@@ -409,7 +320,7 @@ def run_cycle():
         if process_feedback():
             logger.info("Feedback procesado")
             write_debug("INFO", "Feedback procesado")
-            last_trade_time = time.time()
+            GATE.touch()
             _sync_active_with_feedback()
     except:
         pass
@@ -421,7 +332,7 @@ def run_cycle():
     max_concurrent = CONFIG.get("max_concurrent_trades", 3)
     active_count = get_active_count()
 
-    if active_count >= max_concurrent:
+    if GATE.at_capacity():
         write_debug("INFO", f"Limite de trades concurrentes alcanzado ({active_count}/{max_concurrent})")
         return
 
@@ -432,8 +343,8 @@ def run_cycle():
 
     # COOLDOWN
     cooldown = CONFIG.get("cooldown", 30)
-    elapsed_since_trade = time.time() - last_trade_time
-    if last_trade_time > 0 and elapsed_since_trade < cooldown:
+    if GATE.in_cooldown():
+        elapsed_since_trade = GATE.clock() - GATE.last_trade_time
         write_debug("INFO", f"Cooldown activo ({elapsed_since_trade:.0f}s/{cooldown}s)")
         return
 
@@ -454,6 +365,8 @@ def run_cycle():
     try:
         context = analyze_market_context(market_data)
         write_debug("INFO", f"Contexto: trend={context.get('trend')} vol={context.get('volatility')} regime={context.get('market_regime')}")
+        if "price_action" in market_data:
+            write_debug("INFO", f"Price action: patron={context.get('candle_pattern')} momentum={context.get('momentum_state')} S/R={context.get('support')}/{context.get('resistance')}")
     except Exception as e:
         logger.error(f"Error: {e}")
         write_debug("ERROR", f"Error analizando contexto: {e}")
@@ -491,15 +404,15 @@ def run_cycle():
         return
 
     confidence = signal.get("confidence", 0)
-    min_conf = CONFIG.get("min_confidence", 35) / 100.0
 
     # MODO EXPLORACION ML
+    total_ml_trades = None
     if ML_AVAILABLE:
         ml_status = get_ml_status()
         total_ml_trades = ml_status.get("total_trades", 0)
         if total_ml_trades < 20:
             logger.info("MODO EXPLORACION ML ACTIVO (min_conf reducido a 10%)")
-            min_conf = 0.10
+    min_conf = GATE.min_confidence(total_ml_trades)
 
     if confidence < min_conf:
         write_debug("WARN", f"Confianza insuficiente: {confidence:.2f} < {min_conf:.2f}")
@@ -518,10 +431,7 @@ def run_cycle():
 
     write_debug("OK", f"SENAL VALIDA: {strategy_name}/{direction} conf={confidence:.2f}")
 
-    add_active_signal(signal_id, strategy_name, direction, context)
-    add_recent_signal(strategy_name, direction, signal_id)
-
-    last_trade_time = time.time()
+    GATE.register(signal_id, strategy_name, direction, context)
 
     logger.info(f"SENAL ENVIADA: {strategy_name} {direction} | Conf: {confidence:.2f} | Activos: {get_active_count()}/{max_concurrent}")
 
@@ -530,45 +440,63 @@ def _sync_active_with_feedback():
     """
     Sincronizar active_signals eliminando los que ya tienen feedback.
     """
-    processed_file = "learning_data/processed_signals.txt"
-    if not os.path.exists(processed_file):
-        return
-
     try:
-        with open(processed_file, "r") as f:
-            processed = set(f.read().splitlines())
+        from feedback.feedback_processor import processed_index
+        processed = processed_index()
     except:
         return
 
     # Leer resultados recientes para contadores de fallo
-    history_file = "learning_data/trade_history.json"
     recent_results = {}
-    if os.path.exists(history_file):
-        try:
-            with open(history_file, "r") as f:
-                history = json.load(f)
-            for trade in history[-20:]:
-                recent_results[trade.get("signal_id", "")] = trade.get("result", "")
-        except:
-            pass
-
-    to_remove = []
-    for signal_id, data in active_signals.items():
-        if signal_id in processed:
-            to_remove.append(signal_id)
-            result = recent_results.get(signal_id, "")
-            if result:
-                update_strategy_fail_count(data["strategy"], data["direction"], result)
+    try:
+        from trade_store import get_trade_store
+        for trade in get_trade_store().recent(20):
+            recent_results[trade.get("signal_id", "")] = trade.get("result", "")
+    except:
+        pass
+
+    to_remove = [signal_id for signal_id in active_signals if signal_id in processed]
 
     for signal_id in to_remove:
-        del active_signals[signal_id]
+        GATE.close_signal(signal_id, recent_results.get(signal_id, ""))
         write_debug("INFO", f"Signal sincronizada (feedback recibido): {signal_id}")
 
 
+def _create_watcher():
+    """
+    Crea el vigilante de archivos MT5 (inotify o polling).
+    Devuelve None si el modo por eventos esta desactivado o falla.
+    """
+    if not CONFIG.get("event_driven", True):
+        return None
+    try:
+        from file_watcher import FileWatcher
+        watcher = FileWatcher()
+        logger.info(f"Loop por eventos activo (modo: {watcher.mode})")
+        write_debug("INFO", f"Loop por eventos activo (modo: {watcher.mode})")
+        return watcher
+    except Exception as e:
+        logger.warning(f"Vigilante de archivos no disponible: {e}")
+        write_debug("WARN", f"Vigilante de archivos no disponible, usando sleep fijo: {e}")
+        return None
+
+
+def _next_wait_timeout():
+    """
+    Tiempo maximo a esperar eventos antes de forzar un ciclo.
+    Si hay cooldown activo, despertar justo cuando termina.
+    """
+    timeout = float(CONFIG.get("max_idle_wait", 30))
+    remaining = GATE.cooldown_remaining()
+    if remaining > 0:
+        timeout = min(timeout, remaining + 0.05)
+    return timeout
+
+
 def start_bot():
-    global RUNNING, paused_until, consecutive_losses, CONFIG, cycle_count
+    global RUNNING, paused_until, consecutive_losses, cycle_count, _watcher
 
-    CONFIG = load_config()
+    set_config(load_config())
 
     RUNNING = True
     write_bot_status(True)
@@ -577,19 +505,31 @@ def start_bot():
     consecutive_losses = 0
     cycle_count = 0
 
-    loop_interval = 5
+    loop_interval = CONFIG.get("loop_interval", 5)
+    _watcher = _create_watcher()
 
     while RUNNING:
         write_bot_status(True)
         try:
             run_cycle()
-            time.sleep(loop_interval)
+            if _watcher is None:
+                time.sleep(loop_interval)
+                continue
+            # Dormir hasta que el EA escriba mercado, consuma la senal o
+            # deje un feedback nuevo (o hasta que venza el timeout)
+            events = _watcher.wait(_next_wait_timeout())
+            if events:
+                logger.debug(f"Eventos: {', '.join(sorted(events))}")
         except KeyboardInterrupt:
             break
         except Exception as e:
             write_debug("ERROR", f"ERROR LOOP: {e}")
             time.sleep(5)
 
+    if _watcher is not None:
+        _watcher.close()
+        _watcher = None
+
     write_bot_status(False)
     write_debug("INFO", "Bot detenido")
     clear_signal_file()
@@ -599,6 +539,8 @@ def start_bot():
 def stop_bot():
     global RUNNING
     RUNNING = False
+    if _watcher is not None:
+        _watcher.wake()
     write_bot_status(False)
     write_debug("INFO", "Solicitud de parada")
 
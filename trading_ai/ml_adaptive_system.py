@@ -13,17 +13,22 @@ Nuevas capacidades:
 
 import json
 import os
+import threading
 from datetime import datetime, timedelta
 from collections import defaultdict
 import statistics
 
+from trade_store import get_trade_store, HISTORY_DB, LEGACY_HISTORY_JSON
+from ml_aggregates import RollingAggregates, LONG_WINDOW
+
 
 class MLAdaptiveSystem:
 
     def __init__(self):
         self.config_file = "bot_config.json"
         self.ml_state_file = "learning_data/ml_state.json"
-        self.history_file = "learning_data/trade_history.json"
+        self.history_file = LEGACY_HISTORY_JSON
+        self.history_db = HISTORY_DB
         self.setup_stats_file = "learning_data/setup_stats.json"
 
         self.EXPLORATION_TRADES = 50
@@ -31,7 +36,17 @@ class MLAdaptiveSystem:
 
         os.makedirs("learning_data", exist_ok=True)
 
+        # Contadores incrementales (total/wins/losses/pips) del trade_store
+        self._counters = None
+        self._counters_version = None
+
+        # Ventanas moviles para analyze_performance (se construyen al primer uso)
+        self._aggregates = None
+
         self.state = self.load_ml_state()
+        self._state_sig = self._stat_state_file()
+        # Sube en cada carga/guardado del estado (firma de las prioridades)
+        self._state_revision = 0
 
     def load_ml_state(self):
         if os.path.exists(self.ml_state_file):
@@ -59,6 +74,82 @@ class MLAdaptiveSystem:
     def save_ml_state(self):
         with open(self.ml_state_file, 'w') as f:
             json.dump(self.state, f, indent=4)
+        self._state_sig = self._stat_state_file()
+        self._state_revision += 1
+
+    def _stat_state_file(self):
+        try:
+            st = os.stat(self.ml_state_file)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def refresh_state(self):
+        """Recargar ml_state.json solo si cambio en disco (p.ej. otro proceso)"""
+        sig = self._stat_state_file()
+        if sig != self._state_sig:
+            self.state = self.load_ml_state()
+            self._state_sig = sig
+            self._state_revision += 1
+
+    def _sync_counters(self):
+        """Recalcular contadores solo si el trade_store cambio por otra via"""
+        store = self._trade_store()
+        version = store.version()
+        if self._counters is None or version != self._counters_version:
+            summary = store.summary()
+            self._counters = {
+                "total": summary["total"],
+                "wins": summary["wins"],
+                "losses": summary["losses"],
+                "pips": summary["pips"]
+            }
+            self._counters_version = version
+            self._aggregates = None
+        return self._counters
+
+    def _get_aggregates(self, last_n):
+        """Agregados moviles al dia con el trade_store (carga inicial: ultimos trades)"""
+        self._sync_counters()
+        if self._aggregates is None or self._aggregates.last_n != last_n:
+            aggregates = RollingAggregates(last_n)
+            aggregates.extend(self._trade_store().recent(max(last_n, LONG_WINDOW)))
+            self._aggregates = aggregates
+        return self._aggregates
+
+    def record_trades(self, trades):
+        """
+        Sumar a los contadores trades recien anexados por este proceso,
+        sin volver a consultar el historial.
+        """
+        if self._counters is None:
+            return
+
+        if self._aggregates is not None:
+            try:
+                self._aggregates.extend(trades)
+            except Exception:
+                self._aggregates = None
+
+        for trade in trades:
+            self._counters["total"] += 1
+            result = trade.get("result", "")
+            if result == "WIN":
+                self._counters["wins"] += 1
+            elif result == "LOSS":
+                self._counters["losses"] += 1
+            try:
+                self._counters["pips"] += float(trade.get("pips", trade.get("profit_pips", 0)))
+            except (TypeError, ValueError):
+                pass
+
+        # Si otro proceso tambien escribio (data_version distinto), resincronizar
+        version = self._trade_store().version()
+        if self._counters_version is not None and version[1] == self._counters_version[1]:
+            self._counters_version = version
+        else:
+            self._counters = None
+            self._aggregates = None
 
     def get_current_mode(self):
         total = self.get_total_trades()
@@ -69,20 +160,23 @@ class MLAdaptiveSystem:
         else:
             return "OPTIMIZATION"
 
-    def _load_trades(self):
-        if not os.path.exists(self.history_file):
-            return []
+    def _trade_store(self):
+        return get_trade_store(self.history_db, self.history_file)
+
+    def _load_trades(self, last_n=None):
+        """Historial completo, o solo los ultimos last_n trades"""
         try:
-            with open(self.history_file, 'r') as f:
-                history = json.load(f)
-            if isinstance(history, list):
-                return history
-            return history.get("trades", [])
-        except:
+            if last_n is None:
+                return self._trade_store().all()
+            return self._trade_store().recent(last_n)
+        except Exception:
             return []
 
     def get_total_trades(self):
-        return len(self._load_trades())
+        try:
+            return self._sync_counters()["total"]
+        except Exception:
+            return 0
 
     def _detect_losing_patterns(self, trades):
         """
@@ -206,8 +300,23 @@ class MLAdaptiveSystem:
         return adjustments
 
     def analyze_performance(self, last_n=50):
+        # Camino incremental: O(buckets) en lugar de recorrer la ventana
+        try:
+            aggregates = self._get_aggregates(last_n)
+            performance = aggregates.performance()
+            if performance is not None:
+                self.state["hourly_performance"] = aggregates.hourly_performance()
+            return performance
+        except Exception:
+            pass
+
+        return self._analyze_performance_full(last_n)
+
+    def _analyze_performance_full(self, last_n=50):
+        """Analisis recorriendo los trades (respaldo si los agregados fallan)"""
         try:
-            trades = self._load_trades()
+            # Ningun analisis mira mas alla de los ultimos 100 trades
+            trades = self._load_trades(max(last_n, 100))
             if len(trades) < 10:
                 return None
 
@@ -543,9 +652,10 @@ class MLAdaptiveSystem:
             "sl_tp_analysis": performance.get("sl_tp_analysis", {})
         }
 
-    def get_strategy_priority(self, strategy_name, market_context):
+    def get_strategy_priority(self, strategy_name, market_context, mode=None):
         base_priority = self.state.get("current_strategy_priority", {}).get(strategy_name, 1.0)
-        mode = self.get_current_mode()
+        if mode is None:
+            mode = self.get_current_mode()
 
         if mode == "OPTIMIZATION":
             context_key = f"{market_context.get('trend', 'NONE')}_{market_context.get('volatility', 'NORMAL')}"
@@ -560,6 +670,18 @@ class MLAdaptiveSystem:
 
         return base_priority
 
+    def get_strategy_priorities(self, strategy_names, market_context):
+        """Prioridades de todas las estrategias con una sola consulta de modo"""
+        mode = self.get_current_mode()
+        return {
+            name: self.get_strategy_priority(name, market_context, mode)
+            for name in strategy_names
+        }
+
+    def priorities_signature(self):
+        """Cambia cuando pueden cambiar las prioridades: modo o estado ML"""
+        return (self.get_current_mode(), self._state_revision)
+
     def should_adjust(self):
         total = self.get_total_trades()
         mode = self.get_current_mode()
@@ -581,7 +703,7 @@ class MLAdaptiveSystem:
         report = {
             "mode": mode,
             "total_trades": total,
-            "progress": {},
+            "progress": self._progress(mode, total),
             "current_performance": performance,
             "strategy_priorities": self.state.get("current_strategy_priority", {}),
             "learned_mappings": self.state.get("best_strategy_per_context", {}),
@@ -591,27 +713,80 @@ class MLAdaptiveSystem:
             "hourly_performance": self.state.get("hourly_performance", {})
         }
 
+        return report
+
+    def _progress(self, mode, total):
         if mode == "EXPLORATION":
-            report["progress"] = {
+            return {
                 "phase": "Recoleccion de datos",
                 "current": total,
                 "needed": self.EXPLORATION_TRADES,
                 "percent": (total / self.EXPLORATION_TRADES) * 100
             }
         elif mode == "LEARNING":
-            report["progress"] = {
+            return {
                 "phase": "Aprendizaje activo",
                 "current": total,
                 "needed": self.LEARNING_TRADES,
                 "percent": (total / self.LEARNING_TRADES) * 100
             }
         else:
-            report["progress"] = {
+            return {
                 "phase": "Optimizacion continua",
                 "trades": total
             }
 
-        return report
+    def get_status(self):
+        """
+        Estado ligero O(1) para el ciclo en vivo: modo y contadores.
+        No analiza el historial (para eso esta get_ml_report).
+        """
+        try:
+            counters = self._sync_counters()
+        except Exception:
+            counters = {"total": 0, "wins": 0, "losses": 0, "pips": 0.0}
+
+        total = counters["total"]
+        mode = self.get_current_mode()
+
+        return {
+            "mode": mode,
+            "total_trades": total,
+            "wins": counters["wins"],
+            "losses": counters["losses"],
+            "win_rate": (counters["wins"] / total) if total > 0 else 0,
+            "total_pips": counters["pips"],
+            "progress": self._progress(mode, total)
+        }
+
+
+# ==========================================
+# SERVICIO COMPARTIDO
+# ==========================================
+_ml_service = None
+_ml_service_lock = threading.Lock()
+
+
+def get_ml_service():
+    """
+    MLAdaptiveSystem unico por proceso. Mantiene estado y numero de trades
+    en memoria; solo relee ml_state.json si cambia su mtime y solo recuenta
+    trades si el trade_store cambio.
+    """
+    global _ml_service
+    with _ml_service_lock:
+        if _ml_service is None:
+            _ml_service = MLAdaptiveSystem()
+        else:
+            _ml_service.refresh_state()
+        return _ml_service
+
+
+def ml_record_trades(trades):
+    """Llamar tras anexar feedback al historial: actualiza los contadores en memoria"""
+    with _ml_service_lock:
+        if _ml_service is not None:
+            _ml_service.record_trades(trades)
 
 
 # ==========================================
@@ -619,7 +794,7 @@ class MLAdaptiveSystem:
 # ==========================================
 
 def ml_auto_adjust():
-    ml = MLAdaptiveSystem()
+    ml = get_ml_service()
 
     if ml.should_adjust():
         result = ml.learn_and_adapt()
@@ -655,12 +830,29 @@ def ml_auto_adjust():
 
 
 def get_ml_strategy_priority(strategy_name, market_context):
-    ml = MLAdaptiveSystem()
+    ml = get_ml_service()
     return ml.get_strategy_priority(strategy_name, market_context)
 
 
+def get_ml_strategy_priorities(strategy_names, market_context):
+    ml = get_ml_service()
+    return ml.get_strategy_priorities(strategy_names, market_context)
+
+
+def get_ml_priorities_signature():
+    ml = get_ml_service()
+    return ml.priorities_signature()
+
+
 def get_ml_status():
-    ml = MLAdaptiveSystem()
+    """Estado ligero (modo + contadores); apto para cada ciclo"""
+    ml = get_ml_service()
+    return ml.get_status()
+
+
+def get_ml_report():
+    """Reporte completo con analisis de rendimiento (bajo demanda: API/GUI)"""
+    ml = get_ml_service()
     return ml.get_ml_report()
 
 
@@ -0,0 +1,387 @@
+"""
+ml_aggregates.py - Agregados de rendimiento en ventanas moviles
+
+Alimenta MLAdaptiveSystem.analyze_performance() trade a trade en lugar de
+recorrer el historial en cada llamada:
+
+  - Ventana principal (last_n, por defecto 50): overall, por estrategia,
+    por contexto y por umbral de confianza
+  - Ventana de 30: rachas perdedoras por estrategia
+  - Ventana de 100: rendimiento por hora y pips medios de SL/TP
+
+Cada alta es O(numero de ventanas) y leer los resultados es O(numero de
+buckets). Las medias se acumulan con Fraction para devolver exactamente
+lo mismo que statistics.mean() sobre la ventana.
+"""
+
+from collections import deque
+from fractions import Fraction
+
+CONFIDENCE_THRESHOLDS = (30, 35, 40, 45, 50, 55, 60)
+STREAK_WINDOW = 30
+LONG_WINDOW = 100
+
+
+def _trade_hour(timestamp):
+    try:
+        return int(timestamp[11:13]) if len(timestamp) > 13 else -1
+    except (ValueError, IndexError, TypeError):
+        return -1
+
+
+class _Mean:
+    """Media exacta con altas y bajas (mismo resultado que statistics.mean)"""
+
+    __slots__ = ("total", "n", "non_int")
+
+    def __init__(self):
+        self.total = Fraction(0)
+        self.n = 0
+        self.non_int = 0
+
+    def add(self, value):
+        self.total += Fraction(value)
+        self.n += 1
+        if not isinstance(value, int):
+            self.non_int += 1
+
+    def remove(self, value):
+        self.total -= Fraction(value)
+        self.n -= 1
+        if not isinstance(value, int):
+            self.non_int -= 1
+
+    def mean(self):
+        value = self.total / self.n
+        if self.non_int == 0 and value.denominator == 1:
+            return int(value)
+        return float(value)
+
+
+class _Trade:
+    """Proyeccion minima de un trade con lo que usan los agregados"""
+
+    __slots__ = ("seq", "setup", "result", "profit", "sltp_pips", "context", "conf", "hour")
+
+    def __init__(self, seq, trade):
+        context = trade.get("market_context", {})
+        confidence = trade.get("confidence", 0)
+
+        self.seq = seq
+        self.setup = trade.get("setup", "UNKNOWN")
+        self.result = trade.get("result", "")
+        self.profit = trade.get("pips", trade.get("profit_pips", 0))
+        self.sltp_pips = trade.get("pips", 0)
+        self.context = f"{context.get('trend', 'UNKNOWN')}_{context.get('volatility', 'UNKNOWN')}"
+        self.conf = tuple(confidence * 100 >= th for th in CONFIDENCE_THRESHOLDS)
+        self.hour = _trade_hour(trade.get("timestamp", ""))
+
+        # Validar tipos ahora y no al leer los resultados
+        Fraction(self.profit)
+        Fraction(self.sltp_pips)
+
+
+def _ordered(buckets):
+    """Buckets en orden de primera aparicion dentro de la ventana"""
+    return sorted(buckets.items(), key=lambda item: item[1]["seqs"][0])
+
+
+class RollingAggregates:
+    """Ventanas moviles de los ultimos trades, actualizadas de forma incremental"""
+
+    def __init__(self, last_n=50):
+        self.last_n = last_n
+        self._trades = deque()
+        self._maxlen = max(last_n, STREAK_WINDOW, LONG_WINDOW)
+        self._seq = 0
+
+        # Ventana principal
+        self._wins = 0
+        self._losses = 0
+        self._profit = _Mean()
+        self._strategies = {}
+        self._contexts = {}
+        self._confidence = [[0, 0] for _ in CONFIDENCE_THRESHOLDS]
+
+        # Ventana de rachas
+        self._streaks = {}
+
+        # Ventana larga
+        self._hours = {}
+        self._sltp = {}
+
+    def __len__(self):
+        return len(self._trades)
+
+    # ==============================
+    # ALTAS / BAJAS
+    # ==============================
+    def add(self, trade):
+        t = _Trade(self._seq, trade)
+        self._seq += 1
+
+        self._trades.append(t)
+        self._enter_main(t)
+        self._enter_streak(t)
+        self._enter_long(t)
+
+        size = len(self._trades)
+        if size > self.last_n:
+            self._leave_main(self._trades[-self.last_n - 1])
+        if size > STREAK_WINDOW:
+            self._leave_streak(self._trades[-STREAK_WINDOW - 1])
+        if size > LONG_WINDOW:
+            self._leave_long(self._trades[-LONG_WINDOW - 1])
+        if size > self._maxlen:
+            self._trades.popleft()
+
+    def extend(self, trades):
+        for trade in trades:
+            self.add(trade)
+
+    def _enter_main(self, t):
+        if t.result == "WIN":
+            self._wins += 1
+        elif t.result == "LOSS":
+            self._losses += 1
+        self._profit.add(t.profit)
+
+        s = self._strategies.get(t.setup)
+        if s is None:
+            s = self._strategies[t.setup] = {"wins": 0, "total": 0, "profits": _Mean(), "seqs": deque()}
+        s["total"] += 1
+        s["profits"].add(t.profit)
+        s["seqs"].append(t.seq)
+        if t.result == "WIN":
+            s["wins"] += 1
+
+        c = self._contexts.get(t.context)
+        if c is None:
+            c = self._contexts[t.context] = {"wins": 0, "total": 0, "seqs": deque()}
+        c["total"] += 1
+        c["seqs"].append(t.seq)
+        if t.result == "WIN":
+            c["wins"] += 1
+
+        for bucket, eligible in zip(self._confidence, t.conf):
+            if eligible:
+                bucket[0] += 1
+                if t.result == "WIN":
+                    bucket[1] += 1
+
+    def _leave_main(self, t):
+        if t.result == "WIN":
+            self._wins -= 1
+        elif t.result == "LOSS":
+            self._losses -= 1
+        self._profit.remove(t.profit)
+
+        s = self._strategies[t.setup]
+        s["total"] -= 1
+        s["profits"].remove(t.profit)
+        s["seqs"].popleft()
+        if t.result == "WIN":
+            s["wins"] -= 1
+        if s["total"] == 0:
+            del self._strategies[t.setup]
+
+        c = self._contexts[t.context]
+        c["total"] -= 1
+        c["seqs"].popleft()
+        if t.result == "WIN":
+            c["wins"] -= 1
+        if c["total"] == 0:
+            del self._contexts[t.context]
+
+        for bucket, eligible in zip(self._confidence, t.conf):
+            if eligible:
+                bucket[0] -= 1
+                if t.result == "WIN":
+                    bucket[1] -= 1
+
+    def _enter_streak(self, t):
+        s = self._streaks.get(t.setup)
+        if s is None:
+            s = self._streaks[t.setup] = {"count": 0, "streak": 0, "seqs": deque()}
+        s["count"] += 1
+        s["seqs"].append(t.seq)
+        s["streak"] = s["streak"] + 1 if t.result == "LOSS" else 0
+
+    def _leave_streak(self, t):
+        s = self._streaks[t.setup]
+        s["count"] -= 1
+        s["seqs"].popleft()
+        # La racha son los ultimos trades de la estrategia: nunca mas que los que quedan
+        s["streak"] = min(s["streak"], s["count"])
+        if s["count"] == 0:
+            del self._streaks[t.setup]
+
+    def _enter_long(self, t):
+        if t.result not in ("WIN", "LOSS"):
+            return
+
+        if t.hour >= 0:
+            h = self._hours.get(t.hour)
+            if h is None:
+                h = self._hours[t.hour] = {"wins": 0, "losses": 0, "seqs": deque()}
+            h["wins" if t.result == "WIN" else "losses"] += 1
+            h["seqs"].append(t.seq)
+
+        p = self._sltp.get(t.setup)
+        if p is None:
+            p = self._sltp[t.setup] = {"win_pips": _Mean(), "loss_pips": _Mean(), "seqs": deque()}
+        if t.result == "WIN":
+            p["win_pips"].add(t.sltp_pips)
+        else:
+            p["loss_pips"].add(abs(t.sltp_pips))
+        p["seqs"].append(t.seq)
+
+    def _leave_long(self, t):
+        if t.result not in ("WIN", "LOSS"):
+            return
+
+        if t.hour >= 0:
+            h = self._hours[t.hour]
+            h["wins" if t.result == "WIN" else "losses"] -= 1
+            h["seqs"].popleft()
+            if not h["seqs"]:
+                del self._hours[t.hour]
+
+        p = self._sltp[t.setup]
+        if t.result == "WIN":
+            p["win_pips"].remove(t.sltp_pips)
+        else:
+            p["loss_pips"].remove(abs(t.sltp_pips))
+        p["seqs"].popleft()
+        if not p["seqs"]:
+            del self._sltp[t.setup]
+
+    # ==============================
+    # RESULTADOS
+    # ==============================
+    def overall(self):
+        total = min(len(self._trades), self.last_n)
+        return {
+            "win_rate": self._wins / total if total > 0 else 0,
+            "avg_profit": self._profit.mean() if total > 0 else 0,
+            "total_trades": total,
+            "wins": self._wins,
+            "losses": self._losses
+        }
+
+    def by_strategy(self):
+        analysis = {}
+        for strat, data in _ordered(self._strategies):
+            if data["total"] >= 3:
+                wr = data["wins"] / data["total"]
+                avg_p = data["profits"].mean()
+                analysis[strat] = {
+                    "win_rate": wr,
+                    "avg_profit": avg_p,
+                    "total_trades": data["total"],
+                    "score": wr * max(avg_p, 0.1)
+                }
+        return analysis
+
+    def by_context(self):
+        analysis = {}
+        for ctx, data in _ordered(self._contexts):
+            if data["total"] >= 3:
+                analysis[ctx] = {
+                    "win_rate": data["wins"] / data["total"],
+                    "total_trades": data["total"]
+                }
+        return analysis
+
+    def by_confidence(self):
+        analysis = {}
+        for threshold, (eligible, wins) in zip(CONFIDENCE_THRESHOLDS, self._confidence):
+            if eligible >= 5:
+                analysis[threshold] = {
+                    "win_rate": wins / eligible,
+                    "trades": eligible
+                }
+        return analysis
+
+    def hourly_performance(self):
+        return {
+            str(h): {"wins": d["wins"], "losses": d["losses"]}
+            for h, d in _ordered(self._hours)
+        }
+
+    def losing_patterns(self):
+        """Igual que MLAdaptiveSystem._detect_losing_patterns()"""
+        patterns = []
+
+        if len(self._trades) < 10:
+            return patterns
+
+        for strat, data in _ordered(self._streaks):
+            streak = data["streak"]
+            if streak >= 3:
+                patterns.append({
+                    "type": "LOSING_STREAK",
+                    "strategy": strat,
+                    "streak": streak,
+                    "action": "PAUSE",
+                    "reason": f"{strat} tiene {streak} perdidas consecutivas"
+                })
+
+        for hour, data in _ordered(self._hours):
+            total = data["wins"] + data["losses"]
+            if total >= 5:
+                wr = data["wins"] / total
+                if wr < 0.30:
+                    patterns.append({
+                        "type": "BAD_HOUR",
+                        "hour": hour,
+                        "win_rate": wr,
+                        "total": total,
+                        "action": "AVOID",
+                        "reason": f"Hora {hour}:00 tiene solo {wr:.0%} win rate en {total} trades"
+                    })
+
+        return patterns
+
+    def sl_tp_analysis(self):
+        """Igual que MLAdaptiveSystem._analyze_sl_tp_effectiveness()"""
+        adjustments = {}
+
+        if len(self._trades) < 20:
+            return adjustments
+
+        for strat, data in _ordered(self._sltp):
+            if data["win_pips"].n >= 3 and data["loss_pips"].n >= 3:
+                avg_win = data["win_pips"].mean()
+                avg_loss = data["loss_pips"].mean()
+
+                if avg_loss > avg_win * 1.5:
+                    adjustments[strat] = {
+                        "suggestion": "TIGHTEN_SL",
+                        "avg_win_pips": round(avg_win, 1),
+                        "avg_loss_pips": round(avg_loss, 1),
+                        "reason": f"Perdidas promedio ({avg_loss:.1f}) >> Ganancias ({avg_win:.1f})"
+                    }
+                elif avg_win > avg_loss * 2:
+                    adjustments[strat] = {
+                        "suggestion": "WIDEN_TP",
+                        "avg_win_pips": round(avg_win, 1),
+                        "avg_loss_pips": round(avg_loss, 1),
+                        "reason": f"Ganancias promedio ({avg_win:.1f}) >> Perdidas ({avg_loss:.1f})"
+                    }
+
+        return adjustments
+
+    def performance(self):
+        """Mismo dict que analyze_performance(), o None con menos de 10 trades"""
+        if len(self._trades) < 10:
+            return None
+
+        return {
+            "overall": self.overall(),
+            "by_strategy": self.by_strategy(),
+            "by_context": self.by_context(),
+            "by_confidence": self.by_confidence(),
+            "losing_patterns": self.losing_patterns(),
+            "sl_tp_analysis": self.sl_tp_analysis()
+        }
@@ -36,9 +36,8 @@ class MLAnalyzer:
                 self.stats = json.load(f)
         
         # Cargar historial
-        if os.path.exists(self.history_file):
-            with open(self.history_file, "r") as f:
-                self.history = json.load(f)
+        from trade_store import get_trade_store, HISTORY_DB
+        self.history = get_trade_store(HISTORY_DB, self.history_file).all()
         
         # Cargar señales procesadas
         if os.path.exists(self.processed_file):
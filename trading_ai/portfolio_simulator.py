@@ -0,0 +1,277 @@
+# portfolio_simulator.py
+
+"""
+Simulador de cartera por eventos con las reglas del bot en vivo
+
+BacktestEngine abre y resuelve cada trade al momento, sin posiciones
+simultaneas. Aqui cada vela es un ciclo de main.run_cycle:
+
+  1. Feedback: se cierran las posiciones cuya salida cae en esta vela
+     (heap de salidas pendientes, O(log n)) y se reinicia el cooldown
+  2. Caducidad de senales activas, limite de concurrentes, cooldown
+  3. Senal del bot -> confianza minima (con modo exploracion ML) -> anti-spam
+  4. Entrada: la salida (TP/SL/timeout) se calcula ya y se encola en el heap
+
+Los filtros son los de trade_gate.TradeGate (los mismos objetos que usa
+main.py), con el reloj en el tiempo de cada vela. El balance, la curva de
+equity y las estadisticas se llevan con BacktestEngine, en orden de cierre.
+"""
+
+import argparse
+import heapq
+import json
+import os
+import sys
+from collections import Counter
+from collections.abc import Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import backtesting_engine
+from backtesting_engine import BacktestEngine, load_historical_data
+from backtest_exits import first_touch, EXIT_REASONS
+from backtest_cache import ColumnCandles
+from trade_gate import TradeGate, DEFAULT_BOT_CONFIG
+from backtest_metrics import parse_times
+
+BLOCK_REASONS = ("capacity", "cooldown", "no_signal", "confidence", "spam")
+
+
+class PortfolioSimulator:
+    """Backtest multi-posicion con las reglas de entrada de main.run_cycle"""
+
+    def __init__(self, historical_data, config=None, signals=None, bar_seconds=60):
+        """
+        Args:
+            historical_data: Velas en memoria (lista, o ColumnCandles de
+                backtest_cache); un generador se materializa
+            config: Config del bot (bot_config.json: min_confidence en %,
+                cooldown, max_concurrent_trades, min_signal_interval...) mas
+                la de BacktestEngine (lot_size, exit_horizon, sl_tp_by_setup...)
+            signals: Senales precalculadas por vela (ver BacktestEngine)
+            bar_seconds: Duracion de vela si un timestamp no se puede leer
+        """
+        if not isinstance(historical_data, Sequence):
+            historical_data = list(historical_data)
+        elif signals is not None and isinstance(historical_data, ColumnCandles) and historical_data.full:
+            # Con senales precalculadas bastan los campos de la simulacion
+            historical_data = ColumnCandles(historical_data.columns, full=False)
+
+        self.config = {
+            **BacktestEngine([]).get_default_config(),
+            **DEFAULT_BOT_CONFIG,
+            "record_signals": False,
+            "ml_exploration": True,  # min_conf 10% con menos de 20 trades cerrados
+            **(config or {})
+        }
+        self.bar_seconds = bar_seconds
+        self.engine = BacktestEngine(historical_data, self.config, signals=signals)
+
+        self._now = 0.0
+        self.gate = TradeGate(self.config, clock=lambda: self._now)
+
+        # Metricas de la cartera
+        self.signals_sent = 0
+        self.signals_by_hour = Counter()
+        self.blocked = Counter()
+        self.expired = 0
+        self.max_open_positions = 0
+
+    # ==============================
+    # HELPERS
+    # ==============================
+    def _bar_times(self, data):
+        """Tiempo (epoch s) de cada vela; sin timestamp legible, posicion de la vela"""
+        columns = getattr(data, "columns", None)
+        if columns is not None:
+            times = parse_times(np.asarray(columns["timestamp"]))
+        else:
+            times = parse_times([c.get("timestamp") for c in data])
+
+        missing = np.isnan(times)
+        if missing.any():
+            times[missing] = np.flatnonzero(missing) * float(self.bar_seconds)
+        return times.tolist()
+
+    def _signal_at(self, index, candle):
+        if self.engine.signals is not None:
+            return self.engine.signals[index]
+        if backtesting_engine.DECISION_ENGINE_AVAILABLE:
+            return self.engine.decide_bar(candle)
+        return None
+
+    def _close(self, signal_id, position):
+        """Registrar el cierre de una posicion y pasar el feedback al gate"""
+        signal, entry_data, levels, exit_index, reason = position
+        action, entry_price, sl_price, tp_price = levels
+        exit_reason = EXIT_REASONS[reason]
+
+        if exit_reason == "TP":
+            exit_price = tp_price
+        elif exit_reason == "SL":
+            exit_price = sl_price
+        else:
+            exit_data = self.engine.historical_data[exit_index]
+            exit_price = exit_data.get("bid" if action == "BUY" else "ask", entry_price)
+
+        self.engine._record_trade(signal, entry_data, levels, exit_index, exit_price, exit_reason)
+        result = "WIN" if self.engine.trades[-1]["pips"] > 0 else "LOSS"
+        self.gate.close_signal(signal_id, result)
+
+    # ==============================
+    # SIMULACION
+    # ==============================
+    def run(self, progress_callback=None):
+        """
+        Ejecutar la simulacion completa
+
+        Returns:
+            dict: Resultados de BacktestEngine + "portfolio" con senales por
+            hora, bloqueos por regla y maximo de posiciones abiertas
+        """
+        data = self.engine.historical_data
+        n = len(data)
+        high, low = (a.tolist() for a in self.engine.high_low_arrays())
+        bar_times = self._bar_times(data)
+        horizon = self.config.get("exit_horizon", 100)
+        ml_exploration = self.config.get("ml_exploration", True)
+
+        exits = []           # heap (exit_index, seq, signal_id)
+        positions = {}       # signal_id -> (signal, entry_data, levels, exit_index, reason)
+        seq = 0
+        first_time = None
+
+        print(f"🧪 Simulando cartera sobre {n} velas "
+              f"(max {self.config.get('max_concurrent_trades', 3)} concurrentes)...")
+
+        for i in range(n):
+            if progress_callback and i % 1000 == 0:
+                progress_callback(i / n * 100)
+
+            self._now = bar_times[i]
+            if first_time is None:
+                first_time = self._now
+
+            # FEEDBACK - cierres de esta vela
+            if exits and exits[0][0] <= i:
+                while exits and exits[0][0] <= i:
+                    _, _, signal_id = heapq.heappop(exits)
+                    self._close(signal_id, positions.pop(signal_id))
+                self.gate.touch()
+
+            self.expired += len(self.gate.cleanup_expired())
+
+            # LIMITES
+            if self.gate.at_capacity():
+                self.blocked["capacity"] += 1
+                continue
+            if self.gate.in_cooldown():
+                self.blocked["cooldown"] += 1
+                continue
+
+            # SENAL (la vela solo se construye si pasa los limites)
+            candle = data[i]
+            try:
+                signal = self._signal_at(i, candle)
+            except Exception:
+                signal = None
+            if not signal or signal.get("action") not in ("BUY", "SELL"):
+                self.blocked["no_signal"] += 1
+                continue
+
+            ml_total = self.engine.stats["total_trades"] if ml_exploration else None
+            if signal.get("confidence", 0) < self.gate.min_confidence(ml_total):
+                self.blocked["confidence"] += 1
+                continue
+
+            # ANTI-SPAM
+            strategy = signal.get("setup_name", "Unknown")
+            direction = signal["action"]
+            if self.gate.is_spam(strategy, direction):
+                self.blocked["spam"] += 1
+                continue
+
+            signal = self.engine.apply_sl_tp_override(signal)
+            levels = self.engine._trade_levels(signal, candle)
+            if levels is None:
+                continue
+
+            # ENTRADA
+            signal_id = f"{i}_{direction}_{strategy}"
+            self.gate.register(signal_id, strategy, direction, {})
+
+            exit_index, reason = first_touch(high, low, i, direction == "BUY", levels[3], levels[2], horizon)
+            heapq.heappush(exits, (exit_index, seq, signal_id))
+            positions[signal_id] = (signal, candle, levels, exit_index, reason)
+            seq += 1
+
+            self.signals_sent += 1
+            timestamp = str(candle.get("timestamp") or "")
+            if len(timestamp) > 13 and timestamp[11:13].isdigit():
+                self.signals_by_hour[int(timestamp[11:13])] += 1
+            if len(positions) > self.max_open_positions:
+                self.max_open_positions = len(positions)
+
+        # Cerrar lo que quede abierto (salidas ya resueltas dentro de los datos)
+        while exits:
+            _, _, signal_id = heapq.heappop(exits)
+            self._close(signal_id, positions.pop(signal_id))
+
+        self.engine.calculate_final_stats()
+
+        hours = (self._now - first_time) / 3600 if first_time is not None else 0
+        results = self.engine.get_results()
+        results["portfolio"] = {
+            "signals": self.signals_sent,
+            "simulated_hours": hours,
+            "signals_per_hour": self.signals_sent / hours if hours > 0 else 0,
+            "signals_by_hour": {str(h): c for h, c in sorted(self.signals_by_hour.items())},
+            "blocked": {reason: self.blocked[reason] for reason in BLOCK_REASONS},
+            "expired": self.expired,
+            "max_open_positions": self.max_open_positions
+        }
+
+        print(f"✅ Simulacion completada: {self.signals_sent} senales, "
+              f"{results['portfolio']['signals_per_hour']:.2f}/hora, "
+              f"max {self.max_open_positions} posiciones abiertas")
+
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de cartera con las reglas del bot en vivo")
+    parser.add_argument("data", help="Archivo CSV/JSON de datos historicos")
+    parser.add_argument("--config", help="bot_config.json a usar (por defecto el de la carpeta)")
+    parser.add_argument("--max-concurrent", type=int, help="max_concurrent_trades")
+    parser.add_argument("--cooldown", type=float, help="Segundos de cooldown")
+    parser.add_argument("--min-interval", type=float, help="min_signal_interval en segundos")
+    parser.add_argument("--min-confidence", type=float, help="Confianza minima en %%")
+    args = parser.parse_args(argv)
+
+    config = {}
+    config_file = args.config or "bot_config.json"
+    if os.path.exists(config_file):
+        with open(config_file, "r") as f:
+            config.update(json.load(f))
+    for key, value in (("max_concurrent_trades", args.max_concurrent), ("cooldown", args.cooldown),
+                       ("min_signal_interval", args.min_interval), ("min_confidence", args.min_confidence)):
+        if value is not None:
+            config[key] = value
+
+    data = load_historical_data(args.data, columnar=True)
+    results = PortfolioSimulator(data, config).run()
+
+    stats = results["stats"]
+    portfolio = results["portfolio"]
+    print("\n📊 RESULTADOS DE LA CARTERA:")
+    print(f"Total Trades: {stats['total_trades']}")
+    print(f"Win Rate: {stats.get('win_rate', 0):.2f}%")
+    print(f"Total Profit: ${stats.get('total_profit', 0):.2f}")
+    print(f"Senales/hora: {portfolio['signals_per_hour']:.2f}")
+    print(f"Max posiciones abiertas: {portfolio['max_open_positions']}")
+    print(f"Bloqueos: {portfolio['blocked']}")
+
+
+if __name__ == "__main__":
+    main()
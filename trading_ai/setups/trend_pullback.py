@@ -1,9 +1,8 @@
-from indicators.ema import ema
+from indicators.ema import ema_many
 
 def check(market, tf):
     closes = market["timeframes"][tf]["close"]
-    ema20 = ema(closes[-50:], 20)
-    ema50 = ema(closes[-50:], 50)
+    ema20, ema50 = ema_many(closes[-50:], (20, 50))
 
     if ema20 > ema50:
         return {"valid": True, "direction": "BUY"}
@@ -0,0 +1,36 @@
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# Los modulos de trading_ai se importan por nombre (sin paquete)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def ea_history():
+    """1500 velas JSON como las del EA: con analysis, symbol y timeframe"""
+    from backtesting_engine import CandleIndicatorStream
+
+    rng = random.Random(7)
+    stream = CandleIndicatorStream("streaming")
+    start = datetime(2024, 1, 1)
+    price = 1.1
+    candles = []
+    for i in range(1500):
+        open_ = price
+        price += rng.gauss(0, 0.0008)
+        high = max(open_, price) + abs(rng.gauss(0, 0.0003))
+        low = min(open_, price) - abs(rng.gauss(0, 0.0003))
+        candles.append({
+            "timestamp": (start + timedelta(minutes=5 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+            "open": open_, "high": high, "low": low, "close": price, "volume": 100,
+            "bid": price, "ask": price + 0.0002, "spread": 2.0,
+            "symbol": "GBPUSD", "timeframe": "M15",
+            "analysis": {"trend": rng.choice(["BULLISH", "BEARISH", "SIDEWAYS"]),
+                         "volatility": rng.choice(["LOW", "NORMAL", "HIGH"])},
+            "indicators": stream.update_ohlc(high, low, price),
+        })
+    return candles
@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+import backtest_cache
+from backtest_cache import CACHE_VERSION, load_columns
+from backtesting_engine import BacktestEngine
+
+
+@pytest.fixture
+def history_file(tmp_path, ea_history):
+    path = tmp_path / "history.json"
+    path.write_text(json.dumps(ea_history))
+    return str(path)
+
+
+def test_cache_dir_is_anchored_to_module():
+    assert os.path.isabs(backtest_cache.CACHE_DIR)
+    assert backtest_cache.CACHE_DIR.startswith(os.path.dirname(os.path.abspath(backtest_cache.__file__)))
+
+
+def test_cached_candles_match_direct_backtest(tmp_path, history_file, ea_history):
+    config = {**BacktestEngine([]).get_default_config(), "min_confidence": 0}
+    direct = BacktestEngine(ea_history, config).run_backtest()["stats"]
+
+    cache_dir = str(tmp_path / "cache")
+    load_columns(history_file, cache_dir=cache_dir).close()
+    store = load_columns(history_file, cache_dir=cache_dir)   # ya desde memmap
+    candles = store.candles()
+    assert candles[10]["analysis"] == ea_history[10]["analysis"]
+    assert candles[10]["symbol"] == "GBPUSD"
+
+    cached = BacktestEngine(candles, config).run_backtest()["stats"]
+    assert direct["total_trades"] > 0
+    assert cached["total_trades"] == direct["total_trades"]
+    assert cached["total_profit"] == pytest.approx(direct["total_profit"])
+
+
+def test_entries_from_older_format_are_rebuilt(tmp_path, history_file):
+    cache_dir = str(tmp_path / "cache")
+    store = load_columns(history_file, cache_dir=cache_dir)
+    meta_path = os.path.join(store.path, "meta.json")
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta["version"] = CACHE_VERSION - 1
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+    rebuilt = load_columns(history_file, cache_dir=cache_dir)
+    assert rebuilt.meta["version"] == CACHE_VERSION
+    assert "txt_analysis_trend" in rebuilt.meta["columns"]
@@ -0,0 +1,50 @@
+import json
+import math
+
+import numpy as np
+
+from backtest_metrics import compute_metrics, json_safe
+from backtest_sweep import rank_results
+
+DAY = 86400
+
+
+def _report(profits):
+    n = len(profits)
+    entry = [i * DAY for i in range(n)]
+    return compute_metrics(np.array(profits, dtype=float), entry_time=entry,
+                           exit_time=[t + 60 for t in entry])
+
+
+def test_sortino_infinite_without_losing_periods():
+    assert math.isinf(_report([10.0, 5.0, 3.0])["sortino_ratio"])
+    assert _report([0.0, 0.0])["sortino_ratio"] == 0.0
+    assert _report([-10.0, -5.0])["sortino_ratio"] < 0
+
+
+def test_loss_free_run_ranks_first_by_sortino():
+    rows = [
+        {"sortino_ratio": _report([10.0, -4.0, 6.0])["sortino_ratio"], "total_trades": 3, "id": "mixed"},
+        {"sortino_ratio": _report([10.0, 5.0, 3.0])["sortino_ratio"], "total_trades": 3, "id": "clean"},
+    ]
+    assert rank_results(rows, "sortino_ratio")[0]["id"] == "clean"
+
+
+def test_json_safe_output_is_strict_json():
+    text = json.dumps(json_safe(_report([10.0, 5.0])), allow_nan=False)
+    assert json.loads(text)["sortino_ratio"] == "Infinity"
+
+
+def test_export_results_writes_strict_json(tmp_path):
+    from backtesting_engine import BacktestEngine
+
+    engine = BacktestEngine([])
+    engine.stats["sortino_ratio"] = math.inf
+    path = tmp_path / "results.json"
+    engine.export_results(str(path))
+
+    def reject(token):
+        raise ValueError(f"token no estandar: {token}")
+
+    data = json.loads(path.read_text(), parse_constant=reject)
+    assert data["stats"]["sortino_ratio"] == "Infinity"
@@ -0,0 +1,24 @@
+import pytest
+
+from backtest_cache import candles_from_columns, columns_from_candles
+from backtest_sweep import run_sweep
+from backtesting_engine import BacktestEngine
+
+
+def test_columns_keep_fields_used_by_decisions(ea_history):
+    restored = candles_from_columns(columns_from_candles(ea_history))
+    for original, candle in zip(ea_history[::97], restored[::97]):
+        assert candle["analysis"] == original["analysis"]
+        assert candle["symbol"] == "GBPUSD"
+        assert candle["timeframe"] == "M15"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sweep_matches_direct_backtest(ea_history, workers):
+    config = {**BacktestEngine([]).get_default_config(), "min_confidence": 0}
+    direct = BacktestEngine(ea_history, config).run_backtest()["stats"]
+
+    rows = run_sweep(ea_history, [{"min_confidence": 0}], base_config=config, workers=workers)
+    assert direct["total_trades"] > 0
+    assert rows[0]["total_trades"] == direct["total_trades"]
+    assert rows[0]["total_profit"] == pytest.approx(direct["total_profit"])
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from bingx_async import AsyncBingXClient, LoopThread
+from bingx_client import BingXClient
+from bingx_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer(latency=0.01) as server:
+        yield server
+
+
+@pytest.fixture
+def aclient(stub):
+    loop = LoopThread()
+    client = AsyncBingXClient("key", "secret", base_url=stub.url)
+    yield loop, client
+    loop.stop(client)
+
+
+def test_fanout_matches_sync_client(stub, aclient):
+    loop, client = aclient
+    sync = BingXClient("key", "secret", base_url=stub.url)
+    try:
+        snap = loop.run(client.account_snapshot("BTC-USDT"), timeout=10)
+        assert snap["balance"] == sync.get_balance()
+        assert snap["positions"] == sync.get_positions()
+        assert snap["ticker"] == sync.get_ticker("BTC-USDT")
+        assert snap["funding"] == sync.get_funding_rate("BTC-USDT")
+
+        bot = loop.run(client.bot_snapshot("ETH-USDT", "1h", 20), timeout=10)
+        klines = sync.get_klines("ETH-USDT", "1h", 20)
+        assert bot["positions"] == sync.get_positions("ETH-USDT")
+        # La vela en curso cambia en cada petición: se comparan las cerradas
+        assert bot["klines"][:-1] == klines[:-1]
+        assert [k["time"] for k in bot["klines"]] == [k["time"] for k in klines]
+    finally:
+        sync.close()
+
+
+def test_configure_symbol_sets_margin_before_leverage(stub, aclient):
+    loop, client = aclient
+    calls = []
+    for path in ("/openApi/swap/v2/trade/marginType", "/openApi/swap/v2/trade/leverage"):
+        route = stub.routes[("POST", path)]
+        name = path.rsplit("/", 1)[1]
+        def recorder(state, params, route=route, name=name):
+            calls.append(f"{name}:start")
+            if name == "marginType":
+                time.sleep(0.1)
+            calls.append(f"{name}:end")
+            return route(state, params)
+        stub.routes[("POST", path)] = recorder
+
+    loop.run(client.configure_symbol("BTC-USDT", "ISOLATED", 7), timeout=10)
+    # El apalancamiento no empieza hasta que termina el cambio de margen
+    assert calls[:2] == ["marginType:start", "marginType:end"]
+    assert sorted(calls[2:]) == ["leverage:end"] * 2 + ["leverage:start"] * 2
+    assert stub.state.leverage == {("BTC-USDT", "LONG"): 7, ("BTC-USDT", "SHORT"): 7}
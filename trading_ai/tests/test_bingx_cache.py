@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from bingx_async import AsyncBingXClient, LoopThread
+from bingx_cache import CachedAsyncBingXClient, CachedBingXClient, ReadCache
+from bingx_client import BingXClient
+from bingx_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer(latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    raw = BingXClient("key", "secret", base_url=stub.url)
+    yield CachedBingXClient(raw, ReadCache({"get_balance": 0.3}))
+    raw.close()
+
+
+def test_ttl_hit_then_expiry(stub, client):
+    first = client.get_balance()
+    assert client.get_balance() is first
+    assert stub.state.requests == 1
+
+    time.sleep(0.35)
+    client.get_balance()
+    assert stub.state.requests == 2
+    assert client.cache.stats()["hits"] == 1
+    assert client.cache.stats()["misses"] == 2
+
+
+def test_concurrent_reads_are_coalesced(stub, client):
+    barrier = threading.Barrier(8)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(client.get_positions("BTC-USDT"))
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert stub.state.requests == 1
+    assert all(r is results[0] for r in results)
+    stats = client.cache.stats()
+    assert stats["misses"] == 1
+    assert stats["hits"] + stats["coalesced"] == 7
+
+
+def test_async_reads_are_coalesced(stub):
+    loop = LoopThread()
+    raw = AsyncBingXClient("key", "secret", base_url=stub.url)
+    aclient = CachedAsyncBingXClient(raw)
+
+    async def burst():
+        return await asyncio.gather(*(aclient.get_ticker("ETH-USDT") for _ in range(5)))
+
+    try:
+        results = loop.run(burst(), timeout=10)
+    finally:
+        loop.stop(raw)
+    assert stub.state.requests == 1
+    assert aclient.cache.stats()["coalesced"] == 4
+    assert all(r is results[0] for r in results)
+
+
+def test_order_invalidates_positions_and_balance(stub, client):
+    assert client.get_positions("BTC-USDT") == []
+    before = client.get_balance()
+
+    client.place_market_order("BTC-USDT", "BUY", "LONG", 0.01)
+    assert client.cache.stats()["invalidations"] == 1
+
+    positions = client.get_positions("BTC-USDT")
+    assert len(positions) == 1 and positions[0]["positionSide"] == "LONG"
+    after = client.get_balance()
+    assert after is not before
+    assert float(after["usedMargin"]) > 0
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from bingx_client import BingXClient
+from bingx_klines import INTERVAL_MS, KlineSeries, KlineStore
+from bingx_stub import StubServer, StubState
+
+STEP = INTERVAL_MS["15m"]
+T0 = 1_700_000_100_000 // STEP * STEP
+
+
+def bars(first, count):
+    """Velas del stub (deterministas) desde first, ya cerradas."""
+    return StubState().klines("BTC-USDT", "15m", count, start_time=first)
+
+
+def test_merge_appends_and_replaces_forming_bar():
+    series = KlineSeries(maxlen=50)
+    assert series.merge(bars(T0, 10)) == 10
+
+    # La respuesta incremental empieza en la última vela (en curso)
+    update = bars(T0 + 9 * STEP, 3)
+    update[0]["close"] = "123.5"
+    assert series.merge(update) == 2
+    assert len(series) == 12
+    assert series.close[9] == 123.5
+    assert series.resets == 0
+    assert np.all(np.diff(series.time) == STEP)
+
+
+def test_merge_after_gap_rebuilds_series():
+    series = KlineSeries(maxlen=50)
+    series.merge(bars(T0, 10))
+
+    later = bars(T0 + 30 * STEP, 5)
+    assert series.merge(later) == 5
+    assert series.resets == 1
+    assert list(series.time) == [k["time"] for k in later]
+
+
+def test_compaction_keeps_last_maxlen_bars():
+    series = KlineSeries(maxlen=5)
+    window = bars(T0, 23)
+    series.merge(window[:1])
+    # Como en vivo: cada respuesta repite la última vela guardada
+    for i in range(1, len(window)):
+        series.merge(window[i - 1:i + 1])
+    assert series.resets == 0
+    assert len(series) == 5
+    assert list(series.time) == [k["time"] for k in window[-5:]]
+    assert list(series.close) == [float(k["close"]) for k in window[-5:]]
+    # Sigue sin copiar: capacidad fija de 2 * maxlen
+    assert len(series._time) == 10
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def test_store_incremental_fetch_matches_full_window(stub):
+    client = BingXClient("key", "secret", base_url=stub.url)
+    store = KlineStore(backfill=40, maxlen=40)
+    try:
+        now = T0 + 100 * STEP
+        params = store.fetch_params("BTC-USDT", "15m", now_ms=now)
+        assert params == {"limit": 40, "start_time": None}
+        series = store.merge("BTC-USDT", "15m",
+                             client.get_klines("BTC-USDT", "15m", end_time=now, **params),
+                             params["start_time"])
+
+        now += 3 * STEP
+        params = store.fetch_params("BTC-USDT", "15m", now_ms=now)
+        assert params["start_time"] == series.last_time
+        assert params["limit"] < 40
+        store.merge("BTC-USDT", "15m",
+                    client.get_klines("BTC-USDT", "15m", end_time=now, **params),
+                    params["start_time"])
+
+        full = client.get_klines("BTC-USDT", "15m", 40, end_time=now)
+        assert list(series.time) == [k["time"] for k in full]
+        assert np.allclose(series.close, [float(k["close"]) for k in full])
+        assert store.stats()["backfills"] == 1
+    finally:
+        client.close()
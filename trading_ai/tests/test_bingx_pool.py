@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bingx_client import BingXClient
+from bingx_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def test_sequential_requests_reuse_one_connection(stub):
+    client = BingXClient("key", "secret", base_url=stub.url)
+    try:
+        for _ in range(20):
+            client.get_price("BTC-USDT")
+        stats = client.connection_stats()
+        assert stats["created"] == 1
+        assert stats["reused"] == 19
+        assert stats["connections"][0]["requests"] == 20
+        assert stub.state.requests == 20
+    finally:
+        client.close()
+    assert client.connection_stats()["idle"] == 0
+
+
+def test_concurrent_requests_keep_at_most_pool_size_idle():
+    with StubServer(latency=0.02) as stub:
+        client = BingXClient("key", "secret", pool_size=2, base_url=stub.url)
+        try:
+            with ThreadPoolExecutor(6) as executor:
+                list(executor.map(lambda _: client.get_balance(), range(30)))
+            stats = client.connection_stats()
+            assert stats["created"] + stats["reused"] == 30
+            assert stats["idle"] <= 2
+        finally:
+            client.close()
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from bingx_client import (
+    BingXClient, DEFAULT_SYMBOL_RULES, calc_quantity, round_levels, round_quantity, symbol_rules,
+)
+from bingx_stub import StubServer
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+def test_round_levels_rejects_collapsed_sl_tp():
+    # Precio < 1 $ con 2 decimales: SL y TP caen sobre la entrada
+    assert round_levels("BUY", 0.1234, 0.1221, 0.1260, 2) is None
+    assert round_levels("BUY", 0.1234, 0.1221, 0.1260, 5) == (0.1221, 0.126)
+    assert round_levels("SELL", 0.1234, 0.1260, 0.1221, 5) == (0.126, 0.1221)
+    # Lado equivocado o a cero
+    assert round_levels("SELL", 0.1234, 0.1221, 0.1260, 5) is None
+    assert round_levels("BUY", 0.004, 0.001, 0.009, 2) is None
+
+
+def test_round_quantity_floors_to_step_and_respects_minimum():
+    assert round_quantity(833.9, 0, 1) == 833
+    assert round_quantity(0.4, 0, 1) == 1
+    assert round_quantity(0.123456, 4, 0.0001) == 0.1234
+    assert calc_quantity(100, 1.0, 0.12, 0.118, 10, min_qty=1, quantity_precision=0) == 500
+
+
+def test_symbol_rules_from_contract():
+    rules = symbol_rules({"pricePrecision": 5, "quantityPrecision": 0, "tradeMinQuantity": "1"})
+    assert rules == {"price_precision": 5, "quantity_precision": 0, "min_qty": 1.0}
+
+
+def test_rules_loaded_once_and_used_in_orders(stub):
+    client = BingXClient("key", "secret", base_url=stub.url)
+    try:
+        rules = client.get_symbol_rules("DOGE-USDT")
+        assert rules["price_precision"] == 5 and rules["quantity_precision"] == 0
+        requests = stub.state.requests
+        assert client.get_symbol_rules("ETH-USDT")["quantity_precision"] == 2
+        assert stub.state.requests == requests   # desde la caché
+
+        sl, tp = round_levels("BUY", 0.12, 0.1187, 0.1239, rules["price_precision"])
+        client.place_market_order(
+            "DOGE-USDT", "BUY", "LONG", 833.0, sl, tp,
+            price_precision=rules["price_precision"],
+            quantity_precision=rules["quantity_precision"],
+        )
+        order = stub.state.last_order
+        assert order["quantity"] == "833"
+        assert json.loads(order["stopLoss"])["stopPrice"] == "0.11870"
+        assert json.loads(order["takeProfit"])["stopPrice"] == "0.12390"
+
+        # Símbolo sin contrato: reglas por defecto
+        assert client.get_symbol_rules("S001-USDT") == DEFAULT_SYMBOL_RULES
+    finally:
+        client.close()
@@ -0,0 +1,12 @@
+from debug_journal import JOURNAL_NAME, DebugJournal, read_tail
+
+
+def test_read_tail_spans_rotated_segments(tmp_path):
+    journal = DebugJournal(tmp_path, max_bytes=400, backups=2)
+    for i in range(20):
+        journal.append("INFO", f"mensaje {i}")
+    journal.close()
+
+    assert (tmp_path / f"{JOURNAL_NAME}.1").exists()
+    tail = read_tail(6, tmp_path)
+    assert [e["message"] for e in tail] == [f"mensaje {i}" for i in range(14, 20)]
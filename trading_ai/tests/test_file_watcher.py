@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from file_watcher import EVENT_MARKET, FileWatcher
+
+
+@pytest.fixture
+def exchange(tmp_path):
+    feedback = tmp_path / "trade_feedback"
+    signals = tmp_path / "signals"
+    feedback.mkdir()
+    signals.mkdir()
+    return {
+        "market_file": str(tmp_path / "market_data.json"),
+        "signal_file": str(signals / "signal.json"),
+        "feedback_folder": str(feedback),
+    }
+
+
+def _write_later(path, delay=0.05):
+    def write():
+        time.sleep(delay)
+        with open(path, "w") as f:
+            f.write("{}")
+    t = threading.Thread(target=write)
+    t.start()
+    return t
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_unrelated_file_does_not_end_wait(exchange, tmp_path, use_inotify):
+    watcher = FileWatcher(use_inotify=use_inotify, poll_interval=0.02, **exchange)
+    try:
+        writer = _write_later(str(tmp_path / "bot_status.json"))
+        start = time.monotonic()
+        events = watcher.wait(0.4)
+        elapsed = time.monotonic() - start
+        writer.join()
+    finally:
+        watcher.close()
+    assert events == set()
+    assert elapsed >= 0.35
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_market_write_wakes_wait(exchange, use_inotify):
+    watcher = FileWatcher(use_inotify=use_inotify, poll_interval=0.02, **exchange)
+    try:
+        writer = _write_later(exchange["market_file"])
+        start = time.monotonic()
+        events = watcher.wait(2.0)
+        elapsed = time.monotonic() - start
+        writer.join()
+    finally:
+        watcher.close()
+    assert EVENT_MARKET in events
+    assert elapsed < 1.0
+
+
+def test_wake_interrupts_wait(exchange):
+    watcher = FileWatcher(**exchange)
+    try:
+        threading.Timer(0.05, watcher.wake).start()
+        start = time.monotonic()
+        watcher.wait(2.0)
+        assert time.monotonic() - start < 1.0
+    finally:
+        watcher.close()
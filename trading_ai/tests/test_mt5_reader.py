@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from data_providers import mt5_reader
+from decision_engine.context_analyzer import analyze_market_context
+
+INDICATORS = {
+    "rsi": 55,
+    "ema": {"fast": 1.2000, "slow": 1.1005, "long": 1.1000},
+    "macd": {"main": 0.0002, "signal": 0.0001, "histogram": 0.0001},
+    "bollinger": {"upper": 1.1100, "middle": 1.1000, "lower": 1.0900},
+    "atr": 0.0010,
+}
+
+
+@pytest.fixture
+def market_file(tmp_path, monkeypatch):
+    path = tmp_path / "market_data.json"
+    monkeypatch.setattr(mt5_reader, "MT5_MARKET_FILE", str(path))
+    monkeypatch.setattr(mt5_reader, "_market_buffer", None)
+    return path
+
+
+def _snapshot(path, minute, bid):
+    path.write_text(json.dumps({
+        "bid": bid, "ask": bid + 0.0002,
+        "timestamp": f"2024.01.02 10:{minute:02d}:00",
+        "analysis": {"trend": "UP", "volatility": "NORMAL"},
+        "indicators": INDICATORS,
+    }))
+
+
+def test_live_bars_reach_the_context(market_file):
+    for minute in range(25):
+        _snapshot(market_file, minute, 1.1000 + 0.0005 * minute)
+        data = mt5_reader.read_market_data()
+
+    bars = mt5_reader.read_market_bars()
+    assert len(bars["close"]) == 25
+    assert bars["close"].flags["C_CONTIGUOUS"]
+
+    assert data["price_action"]["momentum"]["signal"] in ("BULLISH", "STRONG_BULLISH")
+    assert data["price_action"]["support_resistance"]["resistance"] == pytest.approx(1.1120)
+
+    context = analyze_market_context(data)
+    assert context["momentum_state"] == data["price_action"]["momentum"]["signal"]
+    assert context["resistance"] == pytest.approx(1.1120)
+
+    without = analyze_market_context({k: v for k, v in data.items() if k != "price_action"})
+    assert context["confidence"] > without["confidence"]
+
+
+def test_no_price_action_until_enough_bars(market_file):
+    for minute in range(5):
+        _snapshot(market_file, minute, 1.1)
+        data = mt5_reader.read_market_data()
+    assert "price_action" not in data
+    assert analyze_market_context(data)["candle_pattern"] == "NONE"
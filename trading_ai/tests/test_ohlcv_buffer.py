@@ -0,0 +1,21 @@
+from data_providers.ohlcv_buffer import OHLCVRingBuffer
+
+
+def test_repeated_snapshot_is_not_a_new_tick():
+    buf = OHLCVRingBuffer(capacity=10, bar_seconds=60)
+    data = {"bid": 1.1000, "ask": 1.1002, "timestamp": "2024.01.02 10:00:05"}
+    for _ in range(5):
+        buf.ingest_market_data(data)
+    assert buf.last(1, "volume")[0] == 1
+
+    buf.ingest_market_data(dict(data, bid=1.1001))
+    buf.ingest_market_data(dict(data, timestamp="2024.01.02 10:00:09"))
+    assert buf.last(1, "volume")[0] == 3
+    assert len(buf) == 1
+
+
+def test_snapshots_without_timestamp_still_count():
+    buf = OHLCVRingBuffer(capacity=10, bar_seconds=3600)
+    buf.push_snapshot(1.5, 1.6)
+    buf.push_snapshot(1.5, 1.6)
+    assert buf.last(1, "volume")[0] == 2
@@ -0,0 +1,24 @@
+from decision_engine import setup_selector
+from executor.signal_emitters import MemorySignalEmitter
+
+
+def test_memory_emitter_keeps_last_maxlen():
+    emitter = MemorySignalEmitter(maxlen=3)
+    for i in range(10):
+        emitter.emit({"signal_id": i})
+    assert [s["signal_id"] for s in emitter.signals] == [7, 8, 9]
+
+    unbounded = MemorySignalEmitter()
+    for i in range(10):
+        unbounded.emit({"signal_id": i})
+    assert len(unbounded.signals) == 10
+
+
+def test_select_setup_quiet(capsys):
+    context = {"trend": "BULLISH", "volatility": "MEDIUM", "market_state": "TRENDING"}
+    quiet = setup_selector.select_setup(context, verbose=False)
+    assert capsys.readouterr().out == ""
+
+    loud = setup_selector.select_setup(context)
+    assert "SCORES DE SETUPS" in capsys.readouterr().out
+    assert quiet == loud
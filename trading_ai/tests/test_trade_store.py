@@ -0,0 +1,51 @@
+import json
+import multiprocessing
+
+import pytest
+
+from trade_store import TradeStore
+
+
+def _open_store(db_path, legacy_json, barrier):
+    barrier.wait()
+    TradeStore(db_path, legacy_json).close()
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    path = tmp_path / "trade_history.json"
+    trades = [
+        {"signal_id": f"s{i}", "setup": "A", "result": "WIN" if i % 2 else "LOSS",
+         "pips": i, "timestamp": f"2024-01-{i + 1:02d}T10:00:00"}
+        for i in range(20)
+    ]
+    path.write_text(json.dumps(trades))
+    return str(path)
+
+
+def test_concurrent_processes_migrate_once(tmp_path, legacy):
+    db_path = str(tmp_path / "trade_history.db")
+    ctx = multiprocessing.get_context("fork")
+    barrier = ctx.Barrier(4)
+    procs = [ctx.Process(target=_open_store, args=(db_path, legacy, barrier)) for _ in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    store = TradeStore(db_path, legacy)
+    try:
+        assert store.count() == 20
+    finally:
+        store.close()
+
+
+def test_between_filters_by_timestamp(tmp_path, legacy):
+    store = TradeStore(str(tmp_path / "trade_history.db"), legacy)
+    try:
+        trades = store.between("2024-01-10", "2024-01-15")
+        assert [t["signal_id"] for t in trades] == ["s9", "s10", "s11", "s12", "s13"]
+        assert len(store.between("2024-01-18")) == 3
+    finally:
+        store.close()
@@ -0,0 +1,219 @@
+"""
+trade_gate.py - Reglas de entrada del bot multi-trade
+
+Estado y filtros que main.run_cycle aplica antes de enviar una senal:
+
+  - Limite de trades concurrentes (max_concurrent_trades)
+  - Cooldown desde el ultimo trade o feedback (cooldown)
+  - Confianza minima (min_confidence en %, 10% en modo exploracion ML)
+  - Anti-spam: misma estrategia+direccion dentro de min_signal_interval,
+    duplicada en trades activos, o pausada por 3+ fallos seguidos
+  - Caducidad de senales activas sin feedback (10 min)
+
+El reloj es inyectable (clock), asi el bot en vivo usa time.time y el
+simulador de cartera (portfolio_simulator) el tiempo de cada vela, con
+exactamente las mismas reglas. Las operaciones sobre senales activas son
+O(1) u O(log n) para soportar miles de posiciones abiertas.
+"""
+
+import heapq
+import time
+from collections import Counter, deque
+
+# Config por defecto del bot (bot_config.json)
+DEFAULT_BOT_CONFIG = {
+    "min_confidence": 35,
+    "cooldown": 30,
+    "max_daily_trades": 50,
+    "max_losses": 5,
+    "lot_size": 0.01,
+    "start_hour": "00:00",
+    "end_hour": "23:59",
+    "max_concurrent_trades": 3,
+    "min_signal_interval": 60,
+    "avoid_repeat_strategy": True,
+    "auto_optimize": True,
+    "event_driven": True,
+    "max_idle_wait": 30
+}
+
+SIGNAL_TIMEOUT = 600       # Senal activa sin feedback -> se olvida
+MAX_RECENT_SIGNALS = 50
+FAIL_LIMIT = 3             # Fallos seguidos que pausan estrategia+direccion
+FAIL_PAUSE = 300           # Segundos de pausa
+EXPLORATION_TRADES = 20    # Por debajo, modo exploracion ML
+EXPLORATION_MIN_CONF = 0.10
+
+
+class TradeGate:
+    """Estado de senales activas/recientes y filtros de entrada"""
+
+    def __init__(self, config=None, clock=time.time, log=None):
+        """
+        Args:
+            config: Config del bot (dict, se puede sustituir con .config)
+            clock: Funcion que devuelve el tiempo actual en segundos
+            log: Funcion (level, message) para el journal de debug
+        """
+        self.config = config if config is not None else {}
+        self.clock = clock
+        self.log = log or (lambda level, message: None)
+
+        # Senales activas: {signal_id: {strategy, direction, timestamp, context_snapshot}}
+        self.active_signals = {}
+        # Historial reciente para anti-spam: {strategy, direction, timestamp, signal_id}
+        self.recent_signals = deque(maxlen=MAX_RECENT_SIGNALS)
+        # Contador de fallos seguidos por estrategia_direccion (+ "_time")
+        self.strategy_fail_count = {}
+        self.last_trade_time = 0
+
+        self._active_pairs = Counter()   # (strategy, direction) -> activos
+        self._expiry = []                # heap (timestamp, signal_id)
+
+    # ==============================
+    # SENALES ACTIVAS
+    # ==============================
+    def active_count(self):
+        return len(self.active_signals)
+
+    def add_active(self, signal_id, strategy, direction, context):
+        """Registrar nueva senal activa"""
+        self.remove_active(signal_id)
+        now = self.clock()
+        self.active_signals[signal_id] = {
+            "strategy": strategy,
+            "direction": direction,
+            "timestamp": now,
+            "context_snapshot": {
+                "trend": context.get("trend"),
+                "volatility": context.get("volatility"),
+                "market_regime": context.get("market_regime"),
+                "rsi_state": context.get("rsi_state"),
+            }
+        }
+        self._active_pairs[(strategy, direction)] += 1
+        heapq.heappush(self._expiry, (now, signal_id))
+
+    def remove_active(self, signal_id):
+        """Eliminar senal activa; devuelve sus datos o None"""
+        data = self.active_signals.pop(signal_id, None)
+        if data is not None:
+            pair = (data["strategy"], data["direction"])
+            self._active_pairs[pair] -= 1
+            if self._active_pairs[pair] <= 0:
+                del self._active_pairs[pair]
+        return data
+
+    def add_recent(self, strategy, direction, signal_id):
+        """Registrar senal en historial reciente"""
+        self.recent_signals.append({
+            "strategy": strategy,
+            "direction": direction,
+            "timestamp": self.clock(),
+            "signal_id": signal_id
+        })
+
+    def cleanup_expired(self):
+        """Olvidar senales activas sin feedback tras SIGNAL_TIMEOUT; devuelve sus ids"""
+        now = self.clock()
+        expired = []
+        while self._expiry and now - self._expiry[0][0] > SIGNAL_TIMEOUT:
+            timestamp, signal_id = heapq.heappop(self._expiry)
+            data = self.active_signals.get(signal_id)
+            # Entrada vieja del heap (senal ya cerrada o re-registrada)
+            if data is None or data["timestamp"] != timestamp:
+                continue
+            self.remove_active(signal_id)
+            expired.append(signal_id)
+        if not self.active_signals:
+            self._expiry.clear()
+        return expired
+
+    def close_signal(self, signal_id, result):
+        """Feedback recibido: quitar de activas y actualizar fallos (solo si seguia activa)"""
+        data = self.remove_active(signal_id)
+        if data is not None and result:
+            self.update_fail_count(data["strategy"], data["direction"], result)
+        return data
+
+    def register(self, signal_id, strategy, direction, context):
+        """Senal enviada: activa + reciente + reinicio del cooldown"""
+        self.add_active(signal_id, strategy, direction, context)
+        self.add_recent(strategy, direction, signal_id)
+        self.touch()
+
+    # ==============================
+    # FILTROS
+    # ==============================
+    def touch(self):
+        """Marcar actividad (senal enviada o feedback procesado) para el cooldown"""
+        self.last_trade_time = self.clock()
+
+    def at_capacity(self):
+        return self.active_count() >= self.config.get("max_concurrent_trades", 3)
+
+    def cooldown_remaining(self):
+        """Segundos de cooldown pendientes (0 si no hay)"""
+        if self.last_trade_time <= 0:
+            return 0
+        cooldown = self.config.get("cooldown", 30)
+        return max(0, cooldown - (self.clock() - self.last_trade_time))
+
+    def in_cooldown(self):
+        return self.cooldown_remaining() > 0
+
+    def min_confidence(self, ml_total_trades=None):
+        """Confianza minima (0-1); None = sin ML (no hay modo exploracion)"""
+        min_conf = self.config.get("min_confidence", 35) / 100.0
+        if ml_total_trades is not None and ml_total_trades < EXPLORATION_TRADES:
+            min_conf = EXPLORATION_MIN_CONF
+        return min_conf
+
+    def is_spam(self, strategy, direction):
+        """
+        Verifica si estariamos haciendo spam con la misma estrategia+direccion.
+
+        Reglas anti-spam:
+        1. No repetir misma estrategia+direccion dentro de min_signal_interval
+        2. No tener 2 trades activos con la misma estrategia+direccion
+        3. Si una estrategia tiene 3+ fallos consecutivos, pausarla temporalmente
+        """
+        min_interval = self.config.get("min_signal_interval", 60)
+        avoid_repeat = self.config.get("avoid_repeat_strategy", True)
+        now = self.clock()
+
+        # Regla 1: No repetir misma estrategia+direccion dentro del intervalo
+        for sig in reversed(self.recent_signals):
+            age = now - sig["timestamp"]
+            if age > min_interval:
+                break
+            if sig["strategy"] == strategy and sig["direction"] == direction:
+                self.log("INFO", f"Anti-spam: {strategy}/{direction} ya enviada hace {age:.0f}s")
+                return True
+
+        # Regla 2: No duplicar estrategia+direccion en trades activos
+        if avoid_repeat and self._active_pairs.get((strategy, direction)):
+            self.log("INFO", f"Anti-spam: {strategy}/{direction} ya tiene trade activo")
+            return True
+
+        # Regla 3: Estrategia con muchos fallos consecutivos
+        fail_key = f"{strategy}_{direction}"
+        if self.strategy_fail_count.get(fail_key, 0) >= FAIL_LIMIT:
+            last_fail_time = self.strategy_fail_count.get(f"{fail_key}_time", 0)
+            if now - last_fail_time < FAIL_PAUSE:
+                self.log("INFO", f"Anti-repeticion: {strategy}/{direction} pausada por fallos consecutivos")
+                return True
+            else:
+                self.strategy_fail_count[fail_key] = 0
+
+        return False
+
+    def update_fail_count(self, strategy, direction, result):
+        """Actualizar contador de fallos por estrategia"""
+        fail_key = f"{strategy}_{direction}"
+
+        if result == "LOSS":
+            self.strategy_fail_count[fail_key] = self.strategy_fail_count.get(fail_key, 0) + 1
+            self.strategy_fail_count[f"{fail_key}_time"] = self.clock()
+        elif result == "WIN":
+            self.strategy_fail_count[fail_key] = 0
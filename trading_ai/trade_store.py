@@ -0,0 +1,267 @@
+"""
+trade_store.py - Historial de trades append-only sobre SQLite (WAL)
+
+Reemplaza a learning_data/trade_history.json, que se reescribia completo
+en cada lote de feedback y se re-parseaba entero en cada lectura.
+
+  - append()/append_many(): O(1) por trade, sin reescribir nada
+  - Consultas indexadas por timestamp, setup y signal_id
+  - Modo WAL: el bot escribe mientras la API y las GUIs leen
+  - Migracion automatica (una sola vez) desde el JSON legacy
+
+Cada trade se guarda completo en la columna `data` (JSON), de modo que
+campos extra como market_context o confidence se conservan tal cual.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+HISTORY_DB = "learning_data/trade_history.db"
+LEGACY_HISTORY_JSON = "learning_data/trade_history.json"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    signal_id    TEXT,
+    setup        TEXT,
+    result       TEXT,
+    pips         REAL,
+    timestamp    TEXT,
+    processed_at TEXT,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_timestamp ON trades(timestamp);
+CREATE INDEX IF NOT EXISTS idx_trades_setup     ON trades(setup);
+CREATE INDEX IF NOT EXISTS idx_trades_signal_id ON trades(signal_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _row_values(trade):
+    return (
+        str(trade.get("signal_id", "")),
+        str(trade.get("setup", "")),
+        str(trade.get("result", "")),
+        _to_float(trade.get("pips", trade.get("profit_pips", 0))),
+        str(trade.get("timestamp", "")),
+        str(trade.get("processed_at", "")),
+        json.dumps(trade, ensure_ascii=False),
+    )
+
+
+class TradeStore:
+    """Historial de trades persistido en SQLite"""
+
+    def __init__(self, db_path=HISTORY_DB, legacy_json=LEGACY_HISTORY_JSON):
+        self.db_path = str(db_path)
+        self.legacy_json = str(legacy_json) if legacy_json else None
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._appends = 0
+        self._conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+        self._migrate_legacy_json()
+
+    # ==============================
+    # MIGRACION
+    # ==============================
+    def _migrate_legacy_json(self):
+        """
+        Importa trade_history.json una unica vez (marcado en la tabla meta).
+
+        El bot y la API pueden arrancar a la vez: la marca se vuelve a leer
+        dentro de una transaccion BEGIN IMMEDIATE (bloqueo de escritura de
+        SQLite, valido entre procesos), asi solo uno de ellos importa.
+        """
+        with self._lock:
+            if self._migrated():
+                return
+
+            trades = []
+            if self.legacy_json and os.path.exists(self.legacy_json):
+                try:
+                    with open(self.legacy_json, "r") as f:
+                        history = json.load(f)
+                    if isinstance(history, dict):
+                        history = history.get("trades", [])
+                    trades = [t for t in history if isinstance(t, dict)]
+                except Exception as e:
+                    print(f"Error migrando {self.legacy_json}: {e}")
+                    return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._migrated():
+                    self._conn.rollback()
+                    return
+                self._conn.executemany(
+                    "INSERT INTO trades (signal_id, setup, result, pips, timestamp, processed_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [_row_values(t) for t in trades]
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('legacy_json_migrated', ?)",
+                    (str(len(trades)),)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+            if trades:
+                print(f"Historial migrado a SQLite: {len(trades)} trades")
+
+    def _migrated(self):
+        return self._conn.execute(
+            "SELECT 1 FROM meta WHERE key = 'legacy_json_migrated'"
+        ).fetchone() is not None
+
+    # ==============================
+    # ESCRITURA
+    # ==============================
+    def append(self, trade):
+        """Anexa un trade al historial"""
+        self.append_many([trade])
+
+    def append_many(self, trades):
+        """Anexa varios trades en una sola transaccion (cierres masivos)"""
+        rows = [_row_values(t) for t in trades]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO trades (signal_id, setup, result, pips, timestamp, processed_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._appends += 1
+
+    def version(self):
+        """
+        Marca de version barata: cambia cuando se anexan trades en este
+        proceso (contador) o en otro (PRAGMA data_version).
+        """
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return (self._appends, data_version)
+
+    # ==============================
+    # LECTURA
+    # ==============================
+    def _select(self, where="", params=(), order="id ASC", limit=None, offset=0):
+        sql = "SELECT data FROM trades"
+        if where:
+            sql += f" WHERE {where}"
+        sql += f" ORDER BY {order}"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = tuple(params) + (int(limit), int(offset))
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM trades").fetchone()[0]
+
+    def all(self):
+        """Historial completo en orden cronologico de insercion"""
+        return self._select()
+
+    def recent(self, n):
+        """Ultimos n trades (mas antiguo primero)"""
+        if n <= 0:
+            return []
+        return list(reversed(self._select(order="id DESC", limit=n)))
+
+    def page(self, limit, offset=0):
+        """Pagina de trades, mas reciente primero"""
+        return self._select(order="id DESC", limit=limit, offset=offset)
+
+    def by_signal_id(self, signal_id):
+        return self._select("signal_id = ?", (signal_id,))
+
+    def by_setup(self, setup, limit=None):
+        """Trades de un setup (mas antiguo primero)"""
+        if limit is None:
+            return self._select("setup = ?", (setup,))
+        return list(reversed(self._select("setup = ?", (setup,), order="id DESC", limit=limit)))
+
+    def between(self, start=None, end=None):
+        """Trades con start <= timestamp < end (comparacion de texto ISO)"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        return self._select(" AND ".join(clauses), params, order="timestamp ASC, id ASC")
+
+    def summary(self, start=None, end=None):
+        """
+        Agregados calculados en SQLite sin cargar los trades.
+
+        Returns:
+            dict: total, wins, losses, pips
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        sql = (
+            "SELECT COUNT(*), "
+            "COALESCE(SUM(result = 'WIN'), 0), "
+            "COALESCE(SUM(result = 'LOSS'), 0), "
+            "COALESCE(SUM(pips), 0.0) FROM trades"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            total, wins, losses, pips = self._conn.execute(sql, params).fetchone()
+        return {"total": total, "wins": wins, "losses": losses, "pips": pips}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ==============================
+# INSTANCIA COMPARTIDA
+# ==============================
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_trade_store(db_path=HISTORY_DB, legacy_json=LEGACY_HISTORY_JSON):
+    """Devuelve un TradeStore compartido por proceso para cada ruta de base de datos"""
+    key = os.path.abspath(str(db_path))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = TradeStore(db_path, legacy_json)
+            _stores[key] = store
+        return store